@@ -3,7 +3,7 @@
 """
 
 import secrets
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from pydantic import model_validator
 from pydantic_settings import BaseSettings
@@ -42,6 +42,45 @@ class Settings(BaseSettings):
 
     # Астрологические вычисления
     SWISS_EPHEMERIS_PATH: str = "/app/swisseph"
+    EPHEMERIS_TABLE_PATH: str = "data/ephemeris/ephemeris_table.bin"
+    EPHEMERIS_TABLE_MAX_ERROR_DEG: float = 0.01  # Иначе живой расчет
+    LUNATION_INDEX_PATH: str = "data/ephemeris/lunations.npz"
+
+    # Пул процессов для расчетов Kerykeion (вместо пула потоков)
+    KERYKEION_PROCESS_POOL: bool = False
+    KERYKEION_PROCESS_WORKERS: int = 4
+    KERYKEION_PROCESS_MAX_PENDING: int = 32  # Очередь с обратным давлением
+    KERYKEION_PROCESS_SUBMIT_TIMEOUT: float = 5.0  # Секунды ожидания слота
+
+    # Кэш в памяти процесса (емкость в мегабайтах)
+    MEMORY_CACHE_MAX_MB: int = 64
+    MEMORY_CACHE_QUOTAS: Dict[str, float] = {}  # Доли емкости по пространствам
+    # Политика вытеснения по пространствам: lru или tinylfu
+    MEMORY_CACHE_POLICIES: Dict[str, str] = {
+        "natal_chart": "tinylfu",
+        "transits": "tinylfu",
+    }
+
+    # Формат значений кэша в Redis
+    CACHE_CODEC: str = "auto"  # auto, msgpack, json; pickle — только доверенный Redis
+    CACHE_COMPRESSION: str = "auto"  # auto, zstd, lz4, zlib, none
+    CACHE_COMPRESS_THRESHOLD: int = 4096  # Сжимать от этого размера, байт
+
+    # Stale-while-revalidate: сколько секунд после TTL отдавать
+    # устаревшее значение, пока оно пересчитывается (по категориям)
+    CACHE_STALE_BUDGETS: Dict[str, int] = {}
+    CACHE_XFETCH_BETA: float = 1.0  # >1 - более раннее обновление
+    CACHE_COORD_PRECISION: int = 4  # Знаков координат в ключах (~11 м)
+
+    # Общий кэш неба: ширина корзины в секундах по классам тел
+    # (moon, inner, outer, points), поверх значений по умолчанию
+    SKY_CACHE_BUCKETS: Dict[str, int] = {}
+    SKY_CACHE_MAX_ENTRIES: int = 4096
+
+    # Снимок L1 для быстрого старта; пустой путь отключает снимок
+    CACHE_SNAPSHOT_PATH: str = "data/cache/l1_snapshot.bin"
+    CACHE_SNAPSHOT_INTERVAL: int = 600  # Период записи, сек (0 - при выходе)
+    CACHE_SNAPSHOT_MAX_MB: int = 32
 
     # AI настройки
     ENABLE_AI_GENERATION: bool = True
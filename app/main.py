@@ -7,6 +7,7 @@ import os
 
 from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 from slowapi.util import get_remote_address
@@ -136,6 +137,26 @@ async def health_check() -> dict[str, str]:
     }
 
 
+@app.get("/ready")
+async def readiness_check() -> JSONResponse:
+    """Готовность принимать трафик: снимок кэша уже отображен в память."""
+    from app.services.startup_manager import startup_manager
+
+    ready = (
+        os.getenv("DISABLE_BACKGROUND_TASKS") == "true"
+        or startup_manager.ready
+    )
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "status": "ready" if ready else "starting",
+            "snapshot_entries": startup_manager.startup_stats[
+                "snapshot_entries"
+            ],
+        },
+    )
+
+
 @app.on_event("startup")
 async def startup_event() -> None:
     """Инициализация при запуске приложения."""
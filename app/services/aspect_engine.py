@@ -0,0 +1,149 @@
+"""
+Общий векторный движок аспектов.
+
+Долготы тел передаются массивами: угловые расстояния для всех пар
+считаются одной операцией, затем орбисы всех типов аспектов проверяются
+разом через broadcasting (пары × типы аспектов). Движок обслуживает
+аспекты внутри одной карты (верхний треугольник матрицы) и между картами
+(транзит × натал, партнер A × партнер B).
+
+Порядок таблицы орбисов задает приоритет: в режиме первого совпадения
+берется первый подходящий тип аспекта, как в прежних циклах с break.
+Результаты идут в порядке пар (строка за строкой), поэтому вызывающий
+код получает записи в той же последовательности, что и раньше.
+"""
+
+from typing import Iterable, List, Mapping, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+
+class AspectDefinition(NamedTuple):
+    """Тип аспекта в таблице орбисов"""
+
+    angle: float
+    orb: float
+    name: str
+    symbol: str = ""
+
+
+class AspectHit(NamedTuple):
+    """Найденный аспект: индексы тел и типа аспекта в таблице"""
+
+    first: int
+    second: int
+    aspect: int
+    separation: float
+    orb: float
+
+
+class OrbTable:
+    """Таблица орбисов: углы и орбисы хранятся массивами для broadcasting"""
+
+    def __init__(self, definitions: Iterable[AspectDefinition]):
+        self.definitions = tuple(definitions)
+        self.angles = np.array(
+            [definition.angle for definition in self.definitions], dtype=float
+        )
+        self.orbs = np.array(
+            [definition.orb for definition in self.definitions], dtype=float
+        )
+
+    @classmethod
+    def from_orbs(
+        cls,
+        orbs: Mapping[float, float],
+        names: Optional[Mapping[float, str]] = None,
+    ) -> "OrbTable":
+        """Таблица из словаря {угол: орбис} в порядке словаря"""
+        names = names or {}
+        return cls(
+            AspectDefinition(angle, orb, names.get(angle, str(angle)))
+            for angle, orb in orbs.items()
+        )
+
+    def scaled(self, factor: float) -> "OrbTable":
+        """Копия таблицы с орбисами, умноженными на коэффициент"""
+        return OrbTable(
+            definition._replace(orb=definition.orb * factor)
+            for definition in self.definitions
+        )
+
+    def __len__(self) -> int:
+        return len(self.definitions)
+
+    def __getitem__(self, index: int) -> AspectDefinition:
+        return self.definitions[index]
+
+
+def angular_separation(
+    first: Sequence[float], second: Optional[Sequence[float]] = None
+) -> np.ndarray:
+    """Матрица кратчайших угловых расстояний [0, 180] между телами"""
+    first = np.asarray(first, dtype=float)
+    second = first if second is None else np.asarray(second, dtype=float)
+    diff = np.abs(first[:, None] - second[None, :])
+    return np.where(diff > 180, 360 - diff, diff)
+
+
+def _match_pairs(
+    rows: np.ndarray,
+    cols: np.ndarray,
+    separation: np.ndarray,
+    table: OrbTable,
+    first_match: bool,
+) -> List[AspectHit]:
+    if not len(separation) or not len(table):
+        return []
+
+    exactness = np.abs(separation[:, None] - table.angles[None, :])
+    mask = exactness <= table.orbs[None, :]
+
+    if first_match:
+        pairs = np.flatnonzero(mask.any(axis=1))
+        aspects = mask[pairs].argmax(axis=1)
+    else:
+        pairs, aspects = np.nonzero(mask)
+
+    return [
+        AspectHit(*values)
+        for values in zip(
+            rows[pairs].tolist(),
+            cols[pairs].tolist(),
+            aspects.tolist(),
+            separation[pairs].tolist(),
+            exactness[pairs, aspects].tolist(),
+        )
+    ]
+
+
+def find_aspects(
+    longitudes: Sequence[float], table: OrbTable, first_match: bool = True
+) -> List[AspectHit]:
+    """Аспекты внутри одной карты (каждая пара i < j один раз)"""
+    longitudes = np.asarray(longitudes, dtype=float)
+    rows, cols = np.triu_indices(len(longitudes), k=1)
+    separation = angular_separation(longitudes)[rows, cols]
+    return _match_pairs(rows, cols, separation, table, first_match)
+
+
+def find_cross_aspects(
+    first: Sequence[float],
+    second: Sequence[float],
+    table: OrbTable,
+    first_match: bool = True,
+) -> List[AspectHit]:
+    """Аспекты между двумя картами (все пары first × second)"""
+    separation = angular_separation(first, second)
+    rows, cols = np.indices(separation.shape)
+    return _match_pairs(
+        rows.ravel(), cols.ravel(), separation.ravel(), table, first_match
+    )
+
+
+def aspect_between(
+    first: float, second: float, table: OrbTable
+) -> Optional[AspectDefinition]:
+    """Первый подходящий аспект между двумя точками или None"""
+    hits = find_cross_aspects([first], [second], table)
+    return table[hits[0].aspect] if hits else None
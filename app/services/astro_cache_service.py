@@ -3,20 +3,72 @@ Advanced caching service for astrological calculations with performance optimiza
 Extends the basic cache service with specific methods for Kerykeion data.
 """
 
-import hashlib
+import asyncio
 import importlib.util
-import json
+import inspect
+import math
+import random
+import struct
 import time
-from datetime import date as date_type, datetime, timedelta
-from typing import Any, Dict, List, Optional, Union
+from datetime import date as date_type
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
 
 from loguru import logger
 
+from app.core.config import settings
+from app.services.cache_keys import (
+    build_key,
+    chart_id,
+    quantize_coordinate,
+    utc_instant,
+)
 from app.services.cache_service import CacheService
+from app.services.cache_snapshot import CacheSnapshot, SnapshotError, write_snapshot
+from app.services.memory_cache import TagIndex
+from app.services.sky_cache import get_sky_cache
 
 # Check Redis availability without importing it
 REDIS_AVAILABLE = importlib.util.find_spec("redis.asyncio") is not None
 
+# Redis sets holding the keys registered under each invalidation tag
+TAG_KEY_PREFIX = "tag:"
+
+# Redis set of the chart ids computed for a user (see link_user_charts)
+USER_CHARTS_PREFIX = "user_charts:"
+
+# Cross-process guard so only one worker refreshes a stale key
+REFRESH_LOCK_PREFIX = "lock:refresh:"
+REFRESH_LOCK_SECONDS = 30
+
+
+def user_tag(user_id: Any) -> str:
+    return f"user:{user_id}"
+
+
+def chart_tag(chart_id: str) -> str:
+    return f"chart:{chart_id}"
+
+
+def date_tag(value: Union[date_type, datetime, str]) -> str:
+    if isinstance(value, datetime):
+        value = value.date()
+    if isinstance(value, date_type):
+        value = value.isoformat()
+    return f"date:{value[:10]}"
+
 
 class AstroCacheService(CacheService):
     """Enhanced caching service for astrological data with performance monitoring."""
@@ -41,7 +93,46 @@ class AstroCacheService(CacheService):
             "arabic_parts": 86400 * 30,  # 30 days (Arabic parts)
             "chart_analysis": 86400 * 7,  # 7 days (chart pattern analysis)
             "popular_calculations": 1800,  # 30 minutes (pre-computed popular data)
+            "returns": 86400 * 365,  # 1 year (solar/lunar return moments)
+            "transit_timeline": 86400 * 7,  # 7 days (per-chart aspect windows)
+            "mundane_calendar": 86400 * 30,  # 30 days (yearly sky events)
+            "progression_timeline": 86400 * 30,  # 30 days (per-chart progressions)
+        }
+
+        # Stale-while-revalidate: seconds an entry may be served past its
+        # TTL while a background task recomputes it
+        self.stale_budget = {
+            "daily_ephemeris": 1800,
+            "current_transits": 600,
+            "period_forecasts": 900,
+            **settings.CACHE_STALE_BUDGETS,
+        }
+        self.xfetch_beta = settings.CACHE_XFETCH_BETA
+        # Smoothed recomputation time per category (XFetch delta)
+        self._compute_seconds: Dict[str, float] = {}
+        self._refresh_tasks: Dict[str, asyncio.Task] = {}
+
+        # L1 (in-process) / L2 (Redis) hierarchy and request coalescing
+        self.tier_metrics = {
+            "l1_hits": 0,
+            "l2_hits": 0,
+            "misses": 0,
+            "computations": 0,
+            "coalesced_requests": 0,
+            "stale_hits": 0,
+            "early_refreshes": 0,
+            "refreshes": 0,
+            "refresh_errors": 0,
+            "snapshot_hits": 0,
         }
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+        # Reverse index tag -> keys for the memory tier (Redis uses sets)
+        self.tag_index = TagIndex()
+        self.memory.on_evict = self.tag_index.discard
+
+        # Warm-start snapshot of L1, decoded lazily on L1 misses
+        self.snapshot: Optional[CacheSnapshot] = None
 
         logger.info(
             "ASTRO_CACHE_SERVICE_INIT: Enhanced astrological caching initialized"
@@ -75,18 +166,30 @@ class AstroCacheService(CacheService):
 
     def _generate_cache_key(self, prefix: str, **kwargs) -> str:
         """Generate deterministic cache key for astrological data."""
-        # Sort kwargs for consistent keys
-        sorted_kwargs = sorted(kwargs.items())
-        key_data = f"{prefix}:" + ":".join(
-            [f"{k}={v}" for k, v in sorted_kwargs]
-        )
+        return build_key(prefix, **kwargs)
 
-        # Use hash for very long keys
-        if len(key_data) > 200:
-            key_hash = hashlib.md5(key_data.encode()).hexdigest()
-            return f"{prefix}:hash:{key_hash}"
+    def storage_ttl(self, category: str) -> int:
+        """Redis/L1 lifetime for a category: TTL plus staleness budget."""
+        return self.astro_ttl[category] + self.stale_budget.get(category, 0)
 
-        return key_data
+    def natal_chart_key(
+        self,
+        birth_datetime: Union[datetime, str],
+        latitude: float,
+        longitude: float,
+        timezone: str = "Europe/Moscow",
+        house_system: str = "Placidus",
+        zodiac_type: str = "Tropical",
+    ) -> str:
+        """Cache key for natal chart data."""
+        return "natal_chart:" + chart_id(
+            birth_datetime,
+            latitude,
+            longitude,
+            timezone,
+            house_system,
+            zodiac_type,
+        )
 
     async def get_natal_chart(
         self,
@@ -99,20 +202,8 @@ class AstroCacheService(CacheService):
         """Get cached natal chart data."""
         start_time = time.time()
 
-        # Convert datetime to string for consistent caching
-        birth_dt_str = (
-            birth_datetime.isoformat()
-            if isinstance(birth_datetime, datetime)
-            else birth_datetime
-        )
-
-        cache_key = self._generate_cache_key(
-            "natal_chart",
-            birth_dt=birth_dt_str,
-            lat=round(latitude, 6),
-            lng=round(longitude, 6),
-            tz=timezone,
-            house_system=house_system,
+        cache_key = self.natal_chart_key(
+            birth_datetime, latitude, longitude, timezone, house_system
         )
 
         result = await self.get(cache_key)
@@ -133,21 +224,11 @@ class AstroCacheService(CacheService):
         chart_data: Dict[str, Any],
         timezone: str = "Europe/Moscow",
         house_system: str = "Placidus",
+        tags: Iterable[str] = (),
     ) -> bool:
         """Cache natal chart data with extended TTL."""
-        birth_dt_str = (
-            birth_datetime.isoformat()
-            if isinstance(birth_datetime, datetime)
-            else birth_datetime
-        )
-
-        cache_key = self._generate_cache_key(
-            "natal_chart",
-            birth_dt=birth_dt_str,
-            lat=round(latitude, 6),
-            lng=round(longitude, 6),
-            tz=timezone,
-            house_system=house_system,
+        cache_key = self.natal_chart_key(
+            birth_datetime, latitude, longitude, timezone, house_system
         )
 
         # Add caching metadata
@@ -161,7 +242,9 @@ class AstroCacheService(CacheService):
             }
         }
 
-        success = await self.set(cache_key, enriched_data, self.astro_ttl["natal_chart"])
+        success = await self.set(
+            cache_key, enriched_data, self.astro_ttl["natal_chart"], tags
+        )
         
         if success:
             logger.debug(f"ASTRO_CACHE_SET: Natal chart cached {cache_key}")
@@ -170,6 +253,64 @@ class AstroCacheService(CacheService):
 
         return success
 
+    def _chart_snapshot_key(
+        self,
+        birth_datetime: datetime,
+        latitude: float,
+        longitude: float,
+        house_system: str,
+    ) -> str:
+        return self._generate_cache_key(
+            "chart_snapshot",
+            birth_dt=utc_instant(birth_datetime),
+            lat=quantize_coordinate(latitude),
+            lng=quantize_coordinate(longitude),
+            house_system=house_system,
+        )
+
+    async def get_chart_snapshot(
+        self,
+        birth_datetime: datetime,
+        latitude: float,
+        longitude: float,
+        house_system: str = "P",
+    ) -> Optional[Any]:
+        """Get a cached compact ChartSnapshot (binary payload)."""
+        from app.services.chart_snapshot import ChartSnapshot
+
+        start_time = time.time()
+        cache_key = self._chart_snapshot_key(
+            birth_datetime, latitude, longitude, house_system
+        )
+
+        payload = await self.get(cache_key)
+        self._update_performance_metrics(start_time, payload is not None)
+        if not payload:
+            logger.debug(f"ASTRO_CACHE_MISS: Chart snapshot {cache_key}")
+            return None
+
+        try:
+            return ChartSnapshot.from_bytes(payload)
+        except (ValueError, TypeError, struct.error) as e:
+            logger.warning(f"ASTRO_CACHE_SNAPSHOT_DECODE_ERROR: {e}")
+            return None
+
+    async def set_chart_snapshot(self, snapshot: Any) -> bool:
+        """Cache a ChartSnapshot as a compact binary payload.
+
+        The raw bytes go to Redis as they are: both cache codecs carry
+        bytes natively.
+        """
+        cache_key = self._chart_snapshot_key(
+            snapshot.moment,
+            snapshot.latitude,
+            snapshot.longitude,
+            snapshot.house_system,
+        )
+        return await self.set(
+            cache_key, snapshot.to_bytes(), self.astro_ttl["natal_chart"]
+        )
+
     # Removed duplicate simpler implementation of set_natal_chart to ensure enhanced caching with metadata is used.
 
     async def get_daily_ephemeris(
@@ -199,7 +340,21 @@ class AstroCacheService(CacheService):
         cache_key = f"ephemeris:daily:{date_str}"
 
         return await self.set(
-            cache_key, ephemeris_data, self.astro_ttl["daily_ephemeris"]
+            cache_key, ephemeris_data, self.storage_ttl("daily_ephemeris")
+        )
+
+    def current_transits_key(
+        self,
+        natal_chart_id: str,
+        transit_date: Union[datetime, str],
+        include_minor: bool = True,
+    ) -> str:
+        """Cache key for current transits to a natal chart."""
+        return self._generate_cache_key(
+            "transits_current",
+            chart_id=natal_chart_id,
+            date=utc_instant(transit_date),
+            minor=include_minor,
         )
 
     async def get_current_transits(
@@ -211,16 +366,8 @@ class AstroCacheService(CacheService):
         """Get cached current transits."""
         start_time = time.time()
 
-        transit_dt_str = (
-            transit_date.isoformat()
-            if isinstance(transit_date, datetime)
-            else transit_date
-        )
-        cache_key = self._generate_cache_key(
-            "transits_current",
-            chart_id=natal_chart_id,
-            date=transit_dt_str,
-            minor=include_minor,
+        cache_key = self.current_transits_key(
+            natal_chart_id, transit_date, include_minor
         )
 
         result = await self.get(cache_key)
@@ -241,40 +388,73 @@ class AstroCacheService(CacheService):
         include_minor: bool = True,
     ) -> bool:
         """Cache current transits."""
-        transit_dt_str = (
-            transit_date.isoformat()
-            if isinstance(transit_date, datetime)
-            else transit_date
-        )
-        cache_key = self._generate_cache_key(
-            "transits_current",
-            chart_id=natal_chart_id,
-            date=transit_dt_str,
-            minor=include_minor,
+        cache_key = self.current_transits_key(
+            natal_chart_id, transit_date, include_minor
         )
 
         return await self.set(
-            cache_key, transit_data, self.astro_ttl["current_transits"]
+            cache_key,
+            transit_data,
+            self.storage_ttl("current_transits"),
+            tags=[chart_tag(natal_chart_id), date_tag(transit_date)],
         )
 
-    async def get_period_forecast(
-        self, natal_chart_id: str, start_date: Union[date_type, str], days: int
-    ) -> Optional[Dict[str, Any]]:
-        """Get cached period forecast."""
-        start_time = time.time()
+    def transit_timeline_key(self, natal_chart_id: str) -> str:
+        """Cache key for the transit timeline of a natal chart."""
+        return self._generate_cache_key(
+            "transit_timeline", chart_id=natal_chart_id
+        )
 
+    def mundane_calendar_key(self, year: int) -> str:
+        """Cache key for one year of the shared mundane event calendar."""
+        return self._generate_cache_key("mundane_calendar", year=year)
+
+    def progression_timeline_key(self, natal_chart_id: str) -> str:
+        """Cache key for the progressed-position timeline of a chart."""
+        return self._generate_cache_key(
+            "progression_timeline", chart_id=natal_chart_id
+        )
+
+    def important_transits_key(
+        self,
+        natal_chart_id: str,
+        today: Union[date_type, datetime, str],
+        lookback_days: int,
+        lookahead_days: int,
+    ) -> str:
+        """Cache key for the important transits around a day."""
+        return self._generate_cache_key(
+            "transits_important",
+            chart_id=natal_chart_id,
+            date=date_tag(today),
+            lookback=lookback_days,
+            lookahead=lookahead_days,
+        )
+
+    def period_forecast_key(
+        self, natal_chart_id: str, start_date: Union[date_type, str], days: int
+    ) -> str:
+        """Cache key for a period forecast."""
         start_dt_str = (
             start_date.isoformat()
             if isinstance(start_date, date_type)
             else start_date
         )
-        cache_key = self._generate_cache_key(
+        return self._generate_cache_key(
             "forecast_period",
             chart_id=natal_chart_id,
-            start=start_dt_str,
+            start=start_dt_str[:10],
             days=days,
         )
 
+    async def get_period_forecast(
+        self, natal_chart_id: str, start_date: Union[date_type, str], days: int
+    ) -> Optional[Dict[str, Any]]:
+        """Get cached period forecast."""
+        start_time = time.time()
+
+        cache_key = self.period_forecast_key(natal_chart_id, start_date, days)
+
         result = await self.get(cache_key)
         self._update_performance_metrics(start_time, result is not None)
 
@@ -288,20 +468,13 @@ class AstroCacheService(CacheService):
         forecast_data: Dict[str, Any],
     ) -> bool:
         """Cache period forecast."""
-        start_dt_str = (
-            start_date.isoformat()
-            if isinstance(start_date, date_type)
-            else start_date
-        )
-        cache_key = self._generate_cache_key(
-            "forecast_period",
-            chart_id=natal_chart_id,
-            start=start_dt_str,
-            days=days,
-        )
+        cache_key = self.period_forecast_key(natal_chart_id, start_date, days)
 
         return await self.set(
-            cache_key, forecast_data, self.astro_ttl["period_forecasts"]
+            cache_key,
+            forecast_data,
+            self.storage_ttl("period_forecasts"),
+            tags=[chart_tag(natal_chart_id), date_tag(start_date)],
         )
 
     async def get_compatibility_analysis(
@@ -374,7 +547,10 @@ class AstroCacheService(CacheService):
         )
 
         return await self.set(
-            cache_key, parts_data, self.astro_ttl["arabic_parts"]
+            cache_key,
+            parts_data,
+            self.astro_ttl["arabic_parts"],
+            tags=[chart_tag(natal_chart_id)],
         )
 
     async def get_chart_analysis(
@@ -408,7 +584,10 @@ class AstroCacheService(CacheService):
         )
 
         return await self.set(
-            cache_key, analysis_data, self.astro_ttl["chart_analysis"]
+            cache_key,
+            analysis_data,
+            self.astro_ttl["chart_analysis"],
+            tags=[chart_tag(natal_chart_id)],
         )
 
     async def precompute_popular_data(self) -> Dict[str, Any]:
@@ -521,10 +700,26 @@ class AstroCacheService(CacheService):
             "cache_info": {
                 "redis_available": REDIS_AVAILABLE,
                 "redis_connected": self.redis_client is not None,
-                "memory_cache_size": len(self.memory_cache),
-                "memory_cache_limit": self.max_memory_items,
+                "memory_cache_size": len(self.memory),
+                "memory_cache_bytes": self.memory.total_bytes,
+                "memory_cache_limit_bytes": self.memory.max_bytes,
+            },
+            "memory_cache": self.memory.get_stats(),
+            "codec": self.codec.get_stats(),
+            "sky_cache": get_sky_cache().get_stats(),
+            "tiers": {
+                **self.tier_metrics,
+                "inflight": len(self._inflight),
+                "refreshing": len(self._refresh_tasks),
+            },
+            "snapshot": {
+                "mapped": self.snapshot is not None,
+                "remaining_entries": (
+                    len(self.snapshot) if self.snapshot is not None else 0
+                ),
             },
             "ttl_settings": self.astro_ttl,
+            "stale_budget": self.stale_budget,
         }
 
         # Add Redis-specific stats if available
@@ -572,100 +767,601 @@ class AstroCacheService(CacheService):
             self.performance_metrics["slow_operations"] += 1
             logger.warning(f"ASTRO_CACHE_SLOW_OPERATION: {elapsed_time:.3f}s")
 
-    async def invalidate_user_data(self, user_identifier: str) -> int:
-        """Invalidate all cached data for a specific user."""
-        logger.info(f"ASTRO_CACHE_INVALIDATE_USER: {user_identifier}")
+    async def link_user_charts(
+        self, user_identifier: Any, *chart_ids: str
+    ) -> None:
+        """
+        Remember which natal charts were computed for a user.
 
-        invalidated_count = 0
+        Chart-derived entries (transits, timelines, progressions) are
+        tagged by chart only. invalidate_user_data() expands these links
+        into chart tags, so deleting a user drops them as well. The
+        in-process copy lives in the memory tier, so its quota and TTL
+        bound it like any other entry.
+        """
+        if not user_identifier or not chart_ids:
+            return
 
-        # Pattern to match user-specific cache keys
-        patterns = [
-            f"natal_chart:*{user_identifier}*",
-            f"transits_current:*{user_identifier}*",
-            f"forecast_period:*{user_identifier}*",
-            f"compatibility:*{user_identifier}*",
-            f"arabic_parts:*{user_identifier}*",
-            f"chart_analysis:*{user_identifier}*",
-        ]
+        link_key = USER_CHARTS_PREFIX + str(user_identifier)
+        # Links outlive every entry they point to
+        ttl = max(self.astro_ttl.values())
+        linked = set(self.get_local(link_key) or ()) | set(chart_ids)
+        self.set_local(link_key, sorted(linked), ttl)
 
         if self.redis_client:
-            # Redis pattern matching
-            for pattern in patterns:
-                try:
-                    keys = await self.redis_client.keys(pattern)
-                    if keys:
-                        await self.redis_client.delete(*keys)
-                        invalidated_count += len(keys)
-                except Exception as e:
-                    logger.error(f"ASTRO_CACHE_INVALIDATE_REDIS_ERROR: {e}")
-        else:
-            # Memory cache pattern matching
-            keys_to_delete = []
-            for key in self.memory_cache.keys():
-                if any(
-                    pattern.replace("*", "") in key for pattern in patterns
-                ):
-                    keys_to_delete.append(key)
+            try:
+                async with self.redis_client.pipeline(
+                    transaction=False
+                ) as pipe:
+                    pipe.sadd(link_key, *chart_ids)
+                    pipe.expire(link_key, ttl)
+                    await pipe.execute()
+            except Exception as e:
+                logger.error(f"ASTRO_CACHE_LINK_USER_ERROR: {e}")
 
-            for key in keys_to_delete:
-                await self.delete(key)
-                invalidated_count += 1
+    async def _pop_user_charts(self, user_identifier: str) -> Set[str]:
+        """Chart ids linked to a user; the links are removed."""
+        link_key = USER_CHARTS_PREFIX + str(user_identifier)
+        chart_ids = set(self.get_local(link_key) or ())
+        self._forget_local(link_key)
+
+        if self.redis_client:
+            try:
+                members = await self.redis_client.smembers(link_key)
+                chart_ids.update(member.decode() for member in members)
+                await self.redis_client.delete(link_key)
+            except Exception as e:
+                logger.error(f"ASTRO_CACHE_LINK_USER_ERROR: {e}")
+        return chart_ids
+
+    async def invalidate_user_data(
+        self, user_identifier: str, chart_ids: Iterable[str] = ()
+    ) -> int:
+        """Invalidate all cached data for a specific user."""
+        logger.info(f"ASTRO_CACHE_INVALIDATE_USER: {user_identifier}")
+
+        chart_ids = set(chart_ids) | await self._pop_user_charts(
+            user_identifier
+        )
+
+        # The identifier may be a user id or a natal chart id
+        invalidated_count = await self.invalidate_tags(
+            user_tag(user_identifier),
+            chart_tag(user_identifier),
+            *(chart_tag(chart_id) for chart_id in chart_ids),
+        )
 
         logger.info(
             f"ASTRO_CACHE_INVALIDATE_COMPLETE: {invalidated_count} keys invalidated"
         )
         return invalidated_count
 
-    async def get(self, key: str) -> Optional[Any]:
-        """Get a value from cache."""
-        try:
-            # Check Redis cache
-            if self.redis_client:
-                redis_data = await self.redis_client.get(key)
-                if redis_data:
-                    return json.loads(redis_data)
+    async def invalidate_tags(self, *tags: str) -> int:
+        """
+        Delete every entry registered under any of the tags.
 
-            # Check memory cache fallback
-            if key in self.memory_cache:
-                data, timestamp, ttl = self.memory_cache[key]
+        Uses the tag sets instead of KEYS scans, so the cost is
+        proportional to the number of tagged entries.
+        """
+        if not tags:
+            return 0
 
-                # Check if expired
-                if ttl is not None and (time.time() - timestamp) > ttl:
-                    del self.memory_cache[key]
-                    return None
+        keys = set()
+        for tag in tags:
+            keys |= self.tag_index.pop(tag)
 
-                return data
+        if self.redis_client:
+            tag_keys = [TAG_KEY_PREFIX + tag for tag in tags]
+            try:
+                async with self.redis_client.pipeline(
+                    transaction=False
+                ) as pipe:
+                    for tag_key in tag_keys:
+                        pipe.smembers(tag_key)
+                    members = await pipe.execute()
 
-            return None
+                for tag_members in members:
+                    keys.update(member.decode() for member in tag_members)
+
+                await self.redis_client.delete(*keys, *tag_keys)
+            except Exception as e:
+                logger.error(f"ASTRO_CACHE_INVALIDATE_REDIS_ERROR: {e}")
+
+        for key in keys:
+            self._forget_local(key)
+
+        return len(keys)
+
+    async def get(self, key: str) -> Optional[Any]:
+        """Get a value from cache: L1 memory first, then L2 Redis."""
+        try:
+            # L1 hit: no network round trip, no deserialization
+            value = self.get_local(key)
+            if value is not None:
+                self.tier_metrics["l1_hits"] += 1
+                return value
+
+            value = await self._get_l2(key)
+            if value is not None:
+                self.tier_metrics["l2_hits"] += 1
+            else:
+                self.tier_metrics["misses"] += 1
+            return value
         except Exception as e:
             logger.error(f"ASTRO_CACHE_GET_ERROR: {e}")
             return None
 
+    async def _get_l2(self, key: str) -> Optional[Any]:
+        """Read from Redis and promote the value to L1."""
+        value, _ = await self._get_l2_entry(key)
+        return value
+
+    async def _get_l2_entry(
+        self, key: str
+    ) -> Tuple[Optional[Any], Optional[int]]:
+        """Value and remaining TTL from Redis; the value goes to L1."""
+        if not self.redis_client:
+            return None, None
+
+        try:
+            # One round trip for the value and its remaining TTL
+            async with self.redis_client.pipeline(
+                transaction=False
+            ) as pipe:
+                pipe.get(key)
+                pipe.ttl(key)
+                redis_data, remaining_ttl = await pipe.execute()
+        except Exception as e:
+            logger.warning(f"ASTRO_CACHE_L2_ERROR: {e}")
+            return None, None
+
+        if not redis_data:
+            return None, None
+
+        try:
+            value = self.codec.decode(redis_data)
+        except Exception as e:
+            logger.warning(f"ASTRO_CACHE_DECODE_ERROR: {key}: {e}")
+            return None, None
+        remaining_ttl = remaining_ttl if remaining_ttl > 0 else None
+        self.set_local(key, value, remaining_ttl)
+        return value, remaining_ttl
+
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """
+        Get several values: L1 in bulk, then one Redis round trip.
+
+        Returns only the keys that were found; Redis hits are promoted
+        to L1 with their remaining TTL.
+        """
+        keys = list(dict.fromkeys(keys))
+        found = self.memory.get_many(keys)
+        if self.snapshot is not None:
+            for key in keys:
+                if key not in found:
+                    value, _ = self._take_snapshot(key)
+                    if value is not None:
+                        found[key] = value
+        self.tier_metrics["l1_hits"] += len(found)
+
+        missing = [key for key in keys if key not in found]
+        if missing and self.redis_client:
+            try:
+                async with self.redis_client.pipeline(
+                    transaction=False
+                ) as pipe:
+                    pipe.mget(missing)
+                    for key in missing:
+                        pipe.ttl(key)
+                    payloads, *remaining_ttls = await pipe.execute()
+            except Exception as e:
+                logger.warning(f"ASTRO_CACHE_L2_ERROR: {e}")
+                payloads, remaining_ttls = [], []
+
+            for key, payload, remaining_ttl in zip(
+                missing, payloads, remaining_ttls
+            ):
+                if not payload:
+                    continue
+                try:
+                    value = self.codec.decode(payload)
+                except Exception as e:
+                    logger.warning(f"ASTRO_CACHE_DECODE_ERROR: {key}: {e}")
+                    continue
+                found[key] = value
+                self.tier_metrics["l2_hits"] += 1
+                self.set_local(
+                    key, value, remaining_ttl if remaining_ttl > 0 else None
+                )
+
+        self.tier_metrics["misses"] += len(keys) - len(found)
+        return found
+
+    async def exists_many(self, keys: Iterable[str]) -> Dict[str, bool]:
+        """Presence of several keys without fetching their values."""
+        keys = list(dict.fromkeys(keys))
+        present = {
+            key: key in self.memory
+            or (self.snapshot is not None and key in self.snapshot)
+            for key in keys
+        }
+
+        missing = [key for key, hit in present.items() if not hit]
+        if missing and self.redis_client:
+            try:
+                async with self.redis_client.pipeline(
+                    transaction=False
+                ) as pipe:
+                    for key in missing:
+                        pipe.exists(key)
+                    counts = await pipe.execute()
+                for key, count in zip(missing, counts):
+                    present[key] = bool(count)
+            except Exception as e:
+                logger.warning(f"ASTRO_CACHE_L2_ERROR: {e}")
+
+        return present
+
+    async def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Any],
+        ttl: Optional[int] = None,
+        cache_if: Optional[Callable[[Any], bool]] = None,
+        tags: Iterable[str] = (),
+        category: Optional[str] = None,
+    ) -> Any:
+        """
+        Read-through cache with single-flight coalescing.
+
+        Serves L1 hits without I/O, promotes L2 hits to L1, and otherwise
+        runs ``compute`` (sync or async) once, however many callers are
+        waiting for the same key. Results are cached, registered under
+        ``tags``, unless ``cache_if`` rejects them (e.g. error payloads).
+
+        With an ``astro_ttl`` ``category`` the TTL defaults to that
+        category's, and entries outlive it by the category's staleness
+        budget. Stale hits are served while one background task
+        recomputes the value; fresh hits are refreshed early with XFetch
+        probability, so entries of one category do not all expire at once.
+        """
+        stale_budget = 0
+        if category is not None:
+            ttl = ttl or self.astro_ttl[category]
+            stale_budget = self.stale_budget.get(category, 0)
+        storage_ttl = ttl + stale_budget if ttl else ttl
+        tags = list(tags)
+
+        async def recompute() -> Any:
+            value = await self._timed_compute(compute, category)
+            cacheable = cache_if is None or cache_if(value)
+            if value is not None and cacheable:
+                await self.set(key, value, storage_ttl, tags)
+            return value
+
+        value, remaining_ttl = self._get_l1_entry(key)
+        if value is not None:
+            self.tier_metrics["l1_hits"] += 1
+            if self._should_refresh(remaining_ttl, stale_budget, category):
+                self._schedule_refresh(key, recompute)
+            return value
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.tier_metrics["coalesced_requests"] += 1
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value, remaining_ttl = await self._get_l2_entry(key)
+            if value is not None:
+                self.tier_metrics["l2_hits"] += 1
+                if self._should_refresh(
+                    remaining_ttl, stale_budget, category
+                ):
+                    self._schedule_refresh(key, recompute)
+            else:
+                self.tier_metrics["misses"] += 1
+                self.tier_metrics["computations"] += 1
+                value = await recompute()
+
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved: there may be no coalesced waiters
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _timed_compute(
+        self, compute: Callable[[], Any], category: Optional[str]
+    ) -> Any:
+        """Run compute (sync or async) and track its duration."""
+        started = time.perf_counter()
+        value = compute()
+        if inspect.isawaitable(value):
+            value = await value
+        if category is not None:
+            elapsed = time.perf_counter() - started
+            previous = self._compute_seconds.get(category, elapsed)
+            self._compute_seconds[category] = 0.8 * previous + 0.2 * elapsed
+        return value
+
+    def _should_refresh(
+        self,
+        remaining_ttl: Optional[float],
+        stale_budget: int,
+        category: Optional[str],
+    ) -> bool:
+        """Whether a hit should trigger a background recomputation."""
+        if not stale_budget or remaining_ttl is None:
+            return False
+
+        fresh_for = remaining_ttl - stale_budget
+        if fresh_for <= 0:
+            self.tier_metrics["stale_hits"] += 1
+            return True
+
+        # XFetch: refresh early with a probability that grows as expiry
+        # nears and with the cost of recomputation
+        delta = self._compute_seconds.get(category, 0.0)
+        gap = -delta * self.xfetch_beta * math.log(1.0 - random.random())
+        if delta and gap >= fresh_for:
+            self.tier_metrics["early_refreshes"] += 1
+            return True
+        return False
+
+    def _schedule_refresh(
+        self, key: str, recompute: Callable[[], Awaitable[Any]]
+    ) -> None:
+        """Recompute a key in the background, at most once at a time."""
+        if key in self._refresh_tasks or key in self._inflight:
+            return
+        task = asyncio.get_running_loop().create_task(
+            self._refresh(key, recompute)
+        )
+        self._refresh_tasks[key] = task
+        task.add_done_callback(lambda _: self._refresh_tasks.pop(key, None))
+
+    async def _refresh(
+        self, key: str, recompute: Callable[[], Awaitable[Any]]
+    ) -> None:
+        try:
+            if not await self._acquire_refresh_lock(key):
+                return
+            self.tier_metrics["refreshes"] += 1
+            await recompute()
+            logger.debug(f"ASTRO_CACHE_REFRESHED: {key}")
+        except Exception as e:
+            self.tier_metrics["refresh_errors"] += 1
+            logger.warning(f"ASTRO_CACHE_REFRESH_ERROR: {key}: {e}")
+
+    async def _acquire_refresh_lock(self, key: str) -> bool:
+        """Let only one worker across processes refresh a key."""
+        if not self.redis_client:
+            return True
+        try:
+            return bool(
+                await self.redis_client.set(
+                    REFRESH_LOCK_PREFIX + key,
+                    b"1",
+                    nx=True,
+                    ex=REFRESH_LOCK_SECONDS,
+                )
+            )
+        except Exception as e:
+            logger.warning(f"ASTRO_CACHE_REFRESH_LOCK_ERROR: {e}")
+            return True
+
+    def get_local(self, key: str) -> Optional[Any]:
+        """Get a value from the in-process memory tier only (sync)."""
+        value, _ = self._get_l1_entry(key)
+        return value
+
+    def _get_l1_entry(
+        self, key: str
+    ) -> Tuple[Optional[Any], Optional[float]]:
+        """L1 value and remaining TTL, falling back to the snapshot."""
+        value, remaining_ttl = self.memory.get_with_ttl(key)
+        if value is None and self.snapshot is not None:
+            value, remaining_ttl = self._take_snapshot(key)
+        return value, remaining_ttl
+
+    def _take_snapshot(
+        self, key: str
+    ) -> Tuple[Optional[Any], Optional[float]]:
+        """Decode a snapshot entry and promote it to L1."""
+        value, remaining_ttl = self.snapshot.take(key)
+        if value is not None:
+            self.tier_metrics["snapshot_hits"] += 1
+            self.set_local(key, value, remaining_ttl)
+        return value, remaining_ttl
+
+    def _forget_local(self, key: str) -> None:
+        """Drop a key from L1, the tag index and the snapshot."""
+        self.memory.delete(key)
+        self.tag_index.discard(key)
+        if self.snapshot is not None:
+            self.snapshot.discard(key)
+
+    def clear_local(self) -> None:
+        """Drop the in-process tier and its tag index (Redis untouched)."""
+        self.memory.clear()
+        self.tag_index.clear()
+        self.close_snapshot()
+
+    def load_snapshot(self, path: Optional[str] = None) -> int:
+        """
+        Map a warm-start snapshot; returns how many entries it offers.
+
+        Only the index is read here. Values are decoded on first access
+        and promoted to L1, and their tags are registered right away so
+        invalidation also reaches entries not yet promoted.
+        """
+        path = path or settings.CACHE_SNAPSHOT_PATH
+        if not path or not Path(path).is_file():
+            return 0
+
+        self.close_snapshot()
+        try:
+            self.snapshot = CacheSnapshot(path, self.codec)
+        except SnapshotError as e:
+            logger.warning(f"ASTRO_CACHE_SNAPSHOT_IGNORED: {e}")
+            return 0
+
+        for key, tags in self.snapshot.tags().items():
+            if tags:
+                self.tag_index.add(key, tags)
+        logger.info(
+            f"ASTRO_CACHE_SNAPSHOT_LOADED: {len(self.snapshot)} entries "
+            f"from {path}"
+        )
+        return len(self.snapshot)
+
+    async def save_snapshot(self, path: Optional[str] = None) -> int:
+        """Write the hottest L1 entries to the snapshot file."""
+        path = path or settings.CACHE_SNAPSHOT_PATH
+        if not path:
+            return 0
+
+        items = [
+            (key, value, remaining_ttl, self.tag_index.tags_of(key))
+            for key, value, remaining_ttl in self.memory.export()
+        ]
+        try:
+            written = await asyncio.to_thread(
+                write_snapshot,
+                path,
+                items,
+                self.codec,
+                settings.CACHE_SNAPSHOT_MAX_MB * 1024 * 1024,
+            )
+        except OSError as e:
+            logger.error(f"ASTRO_CACHE_SNAPSHOT_WRITE_ERROR: {e}")
+            return 0
+
+        logger.info(f"ASTRO_CACHE_SNAPSHOT_SAVED: {written} entries to {path}")
+        return written
+
+    def close_snapshot(self) -> None:
+        """Unmap the snapshot and forget its remaining entries."""
+        if self.snapshot is not None:
+            self.snapshot.close()
+            self.snapshot = None
+
+    def set_local(
+        self,
+        key: str,
+        value: Any,
+        ttl: Optional[int] = None,
+        tags: Iterable[str] = (),
+    ) -> None:
+        """Set a value in the in-process memory tier only (sync)."""
+        # LRU eviction within the key's namespace quota, O(1) per entry
+        self.memory.set(key, value, ttl)
+        if tags:
+            self.tag_index.add(key, tags)
+
     async def set(
-        self, key: str, value: Any, ttl: Optional[int] = None
+        self,
+        key: str,
+        value: Any,
+        ttl: Optional[int] = None,
+        tags: Iterable[str] = (),
     ) -> bool:
-        """Set a value in cache."""
+        """Set a value in cache, optionally registered under tags."""
         try:
+            tags = list(tags)
+
             # Set in Redis cache
             if self.redis_client:
-                json_data = json.dumps(value, default=str)
-                if ttl:
-                    await self.redis_client.setex(key, ttl, json_data)
+                payload = self.codec.encode(value)
+                if tags:
+                    await self._set_tagged(key, payload, ttl, tags)
+                elif ttl:
+                    await self.redis_client.setex(key, ttl, payload)
                 else:
-                    await self.redis_client.set(key, json_data)
+                    await self.redis_client.set(key, payload)
 
             # Set in memory cache as fallback
-            timestamp = time.time()
-            self.memory_cache[key] = (value, timestamp, ttl)
-
-            # Enforce memory cache size limit
-            if len(self.memory_cache) > self.max_memory_items:
-                # Remove oldest item
-                oldest_key = min(
-                    self.memory_cache.keys(),
-                    key=lambda k: self.memory_cache[k][1],  # timestamp
-                )
-                del self.memory_cache[oldest_key]
+            self.set_local(key, value, ttl, tags)
+
+            return True
+        except Exception as e:
+            logger.error(f"ASTRO_CACHE_SET_ERROR: {e}")
+            return False
+
+    async def _set_tagged(
+        self, key: str, payload: bytes, ttl: Optional[int], tags: List[str]
+    ) -> None:
+        """Write the value and its tag memberships in one round trip."""
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            self._queue_set(pipe, key, payload, ttl, tags)
+            await pipe.execute()
+
+    def _queue_set(
+        self,
+        pipe: Any,
+        key: str,
+        payload: bytes,
+        ttl: Optional[int],
+        tags: Iterable[str],
+    ) -> None:
+        if ttl:
+            pipe.setex(key, ttl, payload)
+        else:
+            pipe.set(key, payload)
+        for tag in tags:
+            tag_key = TAG_KEY_PREFIX + tag
+            pipe.sadd(tag_key, key)
+            if ttl:
+                # A tag set lives as long as its longest-lived entry
+                pipe.expire(tag_key, ttl, nx=True)
+                pipe.expire(tag_key, ttl, gt=True)
+            else:
+                pipe.persist(tag_key)
+
+    async def set_many(
+        self,
+        items: Dict[str, Any],
+        ttl: Optional[int] = None,
+        tags_by_key: Optional[Dict[str, Iterable[str]]] = None,
+    ) -> bool:
+        """
+        Set several values with one TTL in a single Redis round trip.
+
+        ``tags_by_key`` optionally maps keys to their invalidation tags.
+        """
+        if not items:
+            return True
+        tags_by_key = {
+            key: list(tags) for key, tags in (tags_by_key or {}).items()
+        }
+        try:
+            if self.redis_client:
+                async with self.redis_client.pipeline(
+                    transaction=False
+                ) as pipe:
+                    for key, value in items.items():
+                        self._queue_set(
+                            pipe,
+                            key,
+                            self.codec.encode(value),
+                            ttl,
+                            tags_by_key.get(key, ()),
+                        )
+                    await pipe.execute()
+
+            self.memory.set_many(items, ttl)
+            for key, tags in tags_by_key.items():
+                if key in items and tags:
+                    self.tag_index.add(key, tags)
 
             return True
         except Exception as e:
@@ -676,8 +1372,7 @@ class AstroCacheService(CacheService):
         """Delete a value from cache."""
         try:
             # Remove from memory cache
-            if key in self.memory_cache:
-                del self.memory_cache[key]
+            self._forget_local(key)
 
             # Remove from Redis cache
             if self.redis_client:
@@ -692,20 +1387,8 @@ class AstroCacheService(CacheService):
         """Manually clear expired cache entries."""
         logger.info("ASTRO_CACHE_CLEANUP_START: Clearing expired entries")
 
-        cleared_count = 0
-
-        if not self.redis_client:
-            # Only needed for memory cache - Redis handles TTL automatically
-            now = datetime.utcnow()
-            expired_keys = [
-                key
-                for key, expiry in self.cache_expiry.items()
-                if now > expiry
-            ]
-
-            for key in expired_keys:
-                await self.delete(key)
-                cleared_count += 1
+        # Only needed for memory cache - Redis handles TTL automatically
+        cleared_count = self.memory.expire()
 
         logger.info(
             f"ASTRO_CACHE_CLEANUP_COMPLETE: {cleared_count} expired entries cleared"
@@ -5,13 +5,25 @@
 
 import logging
 import math
+from dataclasses import dataclass
 from datetime import date, datetime, timedelta
 from enum import Enum
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Sequence
 
+import numpy as np
 import pytz
 
+from app.core.config import settings
 from app.models.yandex_models import YandexZodiacSign
+from app.services.aspect_engine import (
+    AspectDefinition,
+    OrbTable,
+    find_aspects,
+    find_cross_aspects,
+)
+from app.services.ephemeris_table import get_ephemeris_table
+from app.services.lunar_phase_engine import lunar_phase_engine
+from app.services.sky_cache import get_sky_cache
 
 # Попытка импорта kerykeion и связанных библиотек
 try:
@@ -88,6 +100,18 @@ class AspectType(Enum):
         self.symbol = symbol
 
 
+# Таблица орбисов движка аспектов в порядке приоритета AspectType
+ASPECT_TYPE_TABLE = OrbTable(
+    AspectDefinition(
+        aspect_type.angle,
+        aspect_type.orb,
+        aspect_type.name_ru,
+        aspect_type.symbol,
+    )
+    for aspect_type in AspectType
+)
+
+
 class CelestialBody(Enum):
     """Небесные тела"""
 
@@ -186,9 +210,30 @@ class TransitPeriod(Enum):
     CUSTOM = "Произвольный период"
 
 
+# Длина периода транзитов в сутках (для событий календаря неба)
+TRANSIT_PERIOD_DAYS = {
+    TransitPeriod.TODAY: 1,
+    TransitPeriod.WEEK: 7,
+    TransitPeriod.MONTH: 30,
+    TransitPeriod.YEAR: 365,
+    TransitPeriod.CUSTOM: 1,
+}
+
+
 class ChartPoint:
     """Точка на астрологической карте"""
 
+    __slots__ = (
+        "name",
+        "longitude",
+        "latitude",
+        "speed",
+        "retrograde",
+        "sign",
+        "house",
+        "degree_in_sign",
+    )
+
     def __init__(
         self,
         name: str,
@@ -274,12 +319,104 @@ class NatalChart:
                 logging.warning(f"Failed to create Kerykeion subject: {e}")
 
 
+# Порядок тел в пакетных расчетах (столбцы массивов PlanetPositionsBatch)
+BATCH_BODIES = (
+    "Sun",
+    "Moon",
+    "Mercury",
+    "Venus",
+    "Mars",
+    "Jupiter",
+    "Saturn",
+    "Uranus",
+    "Neptune",
+    "Pluto",
+    "TrueNode",
+    "Chiron",
+)
+
+# Юлианский день эпохи Unix (1970-01-01T00:00:00 UTC)
+UNIX_EPOCH_JD = 2440587.5
+
+
+def to_julian_days(datetimes: Sequence[datetime]) -> np.ndarray:
+    """Переводит последовательность дат в массив юлианских дней (UT).
+
+    Наивные даты считаются заданными в UTC, как и в скалярных расчетах.
+    """
+    timestamps = np.fromiter(
+        (
+            (dt if dt.tzinfo else dt.replace(tzinfo=pytz.UTC)).timestamp()
+            for dt in datetimes
+        ),
+        dtype=np.float64,
+        count=len(datetimes),
+    )
+    return timestamps / 86400.0 + UNIX_EPOCH_JD
+
+
+def from_julian_day(julian_day: float) -> datetime:
+    """Переводит юлианский день (UT) в datetime с часовым поясом UTC"""
+    timestamp = (float(julian_day) - UNIX_EPOCH_JD) * 86400.0
+    return datetime.fromtimestamp(timestamp, tz=pytz.UTC)
+
+
+@dataclass
+class PlanetPositionsBatch:
+    """Позиции тел для набора моментов времени в виде массивов NumPy.
+
+    Массивы longitude/latitude/speed имеют форму (N моментов, P тел),
+    порядок столбцов совпадает с ``planets``.
+    """
+
+    planets: List[str]
+    julian_days: np.ndarray
+    longitude: np.ndarray
+    latitude: np.ndarray
+    speed: np.ndarray
+    backend: str
+    observer_latitudes: Optional[np.ndarray] = None
+    observer_longitudes: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.julian_days)
+
+    @property
+    def retrograde(self) -> np.ndarray:
+        """Маска ретроградности той же формы, что и speed"""
+        return self.speed < 0
+
+    def column(self, planet: str) -> int:
+        """Индекс столбца тела в массивах"""
+        return self.planets.index(planet)
+
+    def positions_at(self, index: int) -> Dict[str, Dict[str, Any]]:
+        """Позиции на один момент в формате calculate_planet_positions"""
+        signs = list(ZodiacSign)
+        positions = {}
+        for column, planet in enumerate(self.planets):
+            longitude_deg = float(self.longitude[index, column])
+            speed = float(self.speed[index, column])
+            positions[planet] = {
+                "longitude": longitude_deg,
+                "latitude": float(self.latitude[index, column]),
+                "speed": speed,
+                "retrograde": speed < 0,
+                "sign": signs[int(longitude_deg / 30) % 12].name_ru,
+                "degree_in_sign": longitude_deg % 30,
+            }
+        return positions
+
+
 class AstrologyCalculator:
     """Класс для астрологических вычислений с полным функционалом kerykeion"""
 
     def __init__(self):
         self.backend = self._detect_backend()
         self._init_astronomical_data()
+        self.ephemeris_table = get_ephemeris_table()
+        self.table_max_error_deg = settings.EPHEMERIS_TABLE_MAX_ERROR_DEG
+        self.sky_cache = get_sky_cache()
         logging.info(
             f"AstrologyCalculator initialized with backend: {self.backend}"
         )
@@ -364,51 +501,49 @@ class AstrologyCalculator:
             name, birth_datetime, latitude, longitude, timezone, house_system
         )
 
-        # Вычисляем позиции планет
-        chart.planets = self.calculate_planet_positions(
-            birth_datetime, latitude, longitude
-        )
-
-        # Вычисляем дома
-        chart.houses = self.calculate_houses(
+        # Позиции, дома, аспекты, арабские части и звезды — из одного
+        # контекста с общим субъектом
+        context = self.chart_context(
             birth_datetime, latitude, longitude, house_system
         )
+        return context.fill_chart(chart)
 
-        # Вычисляем аспекты
-        chart.aspects = self.calculate_aspects(chart.planets)
-
-        # Вычисляем арабские части
-        chart.arabic_parts = self.calculate_arabic_parts(chart)
-
-        # Добавляем фиксированные звезды
-        chart.fixed_stars = self.calculate_fixed_stars(
-            birth_datetime, latitude, longitude
+    def create_subject(
+        self, birth_datetime: datetime, latitude: float, longitude: float
+    ) -> Any:
+        """Создает субъект kerykeion для момента и места (время в UTC)"""
+        return AstrologicalSubject(
+            name="Temp",
+            year=birth_datetime.year,
+            month=birth_datetime.month,
+            day=birth_datetime.day,
+            hour=birth_datetime.hour,
+            minute=birth_datetime.minute,
+            lat=latitude,
+            lng=longitude,
+            tz_str="UTC",
         )
 
-        return chart
-
     def calculate_planet_positions(
         self,
         birth_datetime: datetime,
         latitude: float = 55.7558,
         longitude: float = 37.6176,
+        subject: Any = None,
     ) -> Dict[str, Dict[str, Any]]:
-        """Вычисляет позиции планет и других небесных тел"""
+        """Вычисляет позиции планет и других небесных тел.
+
+        Готовый субъект kerykeion (например, из ChartContext) используется
+        вместо построения нового.
+        """
         positions = {}
 
         if self.backend == "kerykeion" and KERYKEION_AVAILABLE:
             try:
-                subject = AstrologicalSubject(
-                    name="Temp",
-                    year=birth_datetime.year,
-                    month=birth_datetime.month,
-                    day=birth_datetime.day,
-                    hour=birth_datetime.hour,
-                    minute=birth_datetime.minute,
-                    lat=latitude,
-                    lng=longitude,
-                    tz_str="UTC",
-                )
+                if subject is None:
+                    subject = self.create_subject(
+                        birth_datetime, latitude, longitude
+                    )
 
                 # Основные планеты
                 planet_mapping = {
@@ -652,29 +787,366 @@ class AstrologyCalculator:
 
         return positions
 
+    def calculate_planet_positions_batch(
+        self,
+        datetimes: Sequence[datetime],
+        latitudes: Optional[Sequence[float]] = None,
+        longitudes: Optional[Sequence[float]] = None,
+        planets: Optional[Sequence[str]] = None,
+    ) -> PlanetPositionsBatch:
+        """Вычисляет позиции тел сразу для N моментов времени.
+
+        Геоцентрические долготы от места наблюдения не зависят, поэтому
+        координаты (скаляр или N значений) только сохраняются в результате
+        для последующих расчетов домов.
+        """
+        julian_days = to_julian_days(datetimes)
+        batch = self.calculate_positions_for_julian_days(julian_days, planets)
+
+        shape = (len(julian_days),)
+        if latitudes is not None:
+            batch.observer_latitudes = np.broadcast_to(
+                np.asarray(latitudes, dtype=np.float64), shape
+            ).copy()
+        if longitudes is not None:
+            batch.observer_longitudes = np.broadcast_to(
+                np.asarray(longitudes, dtype=np.float64), shape
+            ).copy()
+
+        return batch
+
+    def calculate_positions_for_julian_days(
+        self,
+        julian_days: Sequence[float],
+        planets: Optional[Sequence[str]] = None,
+        use_table: bool = True,
+    ) -> PlanetPositionsBatch:
+        """Вычисляет позиции тел для массива юлианских дней (UT).
+
+        Если подключена таблица эфемерид, покрывающая все моменты, и ее
+        ошибка не превышает допустимой, позиции интерполируются из нее.
+        """
+        julian_days = np.atleast_1d(np.asarray(julian_days, dtype=np.float64))
+        requested = list(planets) if planets else list(BATCH_BODIES)
+
+        if use_table:
+            batch = self._interpolate_from_table(julian_days, requested)
+            if batch is not None:
+                return batch
+
+        return self._calculate_live_batch(julian_days, requested)
+
+    def _live_backend(self) -> str:
+        """Бэкенд, которым пакетный путь считает позиции без таблицы"""
+        # Kerykeion считает через тот же Swiss Ephemeris, поэтому пакетный
+        # путь обращается к нему напрямую без построения субъектов
+        if self.backend in ("kerykeion", "swisseph") and SWISSEPH_AVAILABLE:
+            return "swisseph"
+        if self.backend == "skyfield" and SKYFIELD_AVAILABLE and ts and eph:
+            return "skyfield"
+        return "fallback"
+
+    def _calculate_live_batch(
+        self, julian_days: np.ndarray, requested: List[str]
+    ) -> PlanetPositionsBatch:
+        """Пакетный расчет позиций живым бэкендом"""
+        backend = self._live_backend()
+        if backend == "swisseph":
+            columns = self._calculate_batch_swisseph(julian_days, requested)
+        elif backend == "skyfield":
+            columns = self._calculate_batch_skyfield(julian_days, requested)
+        else:
+            columns = self._calculate_batch_fallback(julian_days, requested)
+
+        names = [planet for planet in requested if planet in columns]
+        shape = (len(julian_days), len(names))
+        longitude = np.empty(shape)
+        latitude = np.empty(shape)
+        speed = np.empty(shape)
+        for index, planet in enumerate(names):
+            longitude[:, index], latitude[:, index], speed[:, index] = columns[
+                planet
+            ]
+
+        return PlanetPositionsBatch(
+            planets=names,
+            julian_days=julian_days,
+            longitude=longitude,
+            latitude=latitude,
+            speed=speed,
+            backend=backend,
+        )
+
+    def _interpolate_from_table(
+        self, julian_days: np.ndarray, planets: List[str]
+    ) -> Optional[PlanetPositionsBatch]:
+        """Позиции из таблицы эфемерид или None, если нужен живой расчет.
+
+        Тела, которых нет в таблице, досчитываются живым бэкендом. Таблица,
+        построенная другим бэкендом, не используется: ее оценка ошибки
+        сделана относительно чужих эфемерид.
+        """
+        table = self.ephemeris_table
+        if table is None or table.source != self._live_backend():
+            return None
+
+        names = [planet for planet in planets if planet in table.bodies]
+        if (
+            not names
+            or not table.covers(julian_days)
+            or table.max_error_for(names) > self.table_max_error_deg
+        ):
+            return None
+
+        longitude, latitude, speed = table.interpolate(julian_days, names)
+        batch = PlanetPositionsBatch(
+            planets=names,
+            julian_days=julian_days,
+            longitude=longitude,
+            latitude=latitude,
+            speed=speed,
+            backend="table",
+        )
+
+        missing = [planet for planet in planets if planet not in names]
+        if not missing:
+            return batch
+
+        live = self._calculate_live_batch(julian_days, missing)
+        merged = [p for p in planets if p in names or p in live.planets]
+        shape = (len(julian_days), len(merged))
+        longitude = np.empty(shape)
+        latitude = np.empty(shape)
+        speed = np.empty(shape)
+        for index, planet in enumerate(merged):
+            source = batch if planet in names else live
+            column = source.column(planet)
+            longitude[:, index] = source.longitude[:, column]
+            latitude[:, index] = source.latitude[:, column]
+            speed[:, index] = source.speed[:, column]
+
+        return PlanetPositionsBatch(
+            planets=merged,
+            julian_days=julian_days,
+            longitude=longitude,
+            latitude=latitude,
+            speed=speed,
+            backend=f"table+{live.backend}",
+        )
+
+    def calculate_transit_positions(
+        self, transit_date: datetime
+    ) -> Dict[str, Dict[str, Any]]:
+        """Позиции планет для транзитов без построения домов и субъектов.
+
+        Позиции берутся из общего кэша неба: одна эфемеридная оценка на
+        временную корзину обслуживает транзиты всех пользователей.
+        """
+        julian_days = to_julian_days([transit_date])
+        states = self.sky_cache.positions(
+            self._sky_source(),
+            float(julian_days[0]),
+            BATCH_BODIES,
+            self.calculate_positions_for_julian_days,
+        )
+        if not states:
+            return self.calculate_planet_positions(transit_date)
+
+        names = list(states)
+        longitude, latitude, speed = (
+            np.array([[states[name][field] for name in names]])
+            for field in range(3)
+        )
+        batch = PlanetPositionsBatch(
+            planets=names,
+            julian_days=julian_days,
+            longitude=longitude,
+            latitude=latitude,
+            speed=speed,
+            backend=self.backend,
+        )
+        return batch.positions_at(0)
+
+    def _sky_source(self) -> tuple:
+        """Ключ источника позиций для общего кэша неба"""
+        table = self.ephemeris_table
+        return (
+            self.backend,
+            table.path if table is not None else None,
+            self.table_max_error_deg,
+        )
+
+    def _calculate_batch_swisseph(
+        self, julian_days: np.ndarray, planets: List[str]
+    ) -> Dict[str, tuple]:
+        """Пакетный расчет через Swiss Ephemeris без промежуточных словарей"""
+        planet_ids = {
+            "Sun": swe.SUN,
+            "Moon": swe.MOON,
+            "Mercury": swe.MERCURY,
+            "Venus": swe.VENUS,
+            "Mars": swe.MARS,
+            "Jupiter": swe.JUPITER,
+            "Saturn": swe.SATURN,
+            "Uranus": swe.URANUS,
+            "Neptune": swe.NEPTUNE,
+            "Pluto": swe.PLUTO,
+            "TrueNode": swe.TRUE_NODE,
+            "Chiron": swe.CHIRON,
+        }
+        calc_ut = swe.calc_ut
+        if len(julian_days) == 0:
+            return {}
+
+        # Отбрасываем тела, для которых нет файлов эфемерид
+        available = []
+        for planet_name in planets:
+            planet_id = planet_ids.get(planet_name)
+            if planet_id is None:
+                continue
+            try:
+                calc_ut(float(julian_days[0]), planet_id)
+            except Exception as e:
+                logging.warning(f"Failed to calculate {planet_name}: {e}")
+                continue
+            available.append((planet_name, planet_id))
+
+        # Внешний цикл по времени: Swiss Ephemeris кэширует промежуточные
+        # величины для одного момента, и все тела считаются подряд
+        planet_ids_order = [planet_id for _, planet_id in available]
+        rows = [
+            calc_ut(jd, planet_id)[0]
+            for jd in julian_days.tolist()
+            for planet_id in planet_ids_order
+        ]
+        values = np.asarray(rows, dtype=np.float64).reshape(
+            len(julian_days), len(available), 6
+        )
+
+        return {
+            planet_name: (
+                values[:, index, 0],
+                values[:, index, 1],
+                values[:, index, 3],
+            )
+            for index, (planet_name, _) in enumerate(available)
+        }
+
+    def _calculate_batch_skyfield(
+        self, julian_days: np.ndarray, planets: List[str]
+    ) -> Dict[str, tuple]:
+        """Пакетный расчет через Skyfield, который принимает массивы времени"""
+        planet_mapping = {
+            "Sun": "sun",
+            "Moon": "moon",
+            "Mercury": "mercury",
+            "Venus": "venus",
+            "Mars": "mars",
+            "Jupiter": "jupiter barycenter",
+            "Saturn": "saturn barycenter",
+            "Uranus": "uranus barycenter",
+            "Neptune": "neptune barycenter",
+            "Pluto": "pluto barycenter",
+        }
+
+        # Скорость получаем конечной разностью на интервале в один час
+        step_days = 1.0 / 24.0
+        t = ts.ut1_jd(julian_days)
+        t_next = ts.ut1_jd(julian_days + step_days)
+        earth = eph["earth"]
+        columns = {}
+
+        for planet_name in planets:
+            skyfield_name = planet_mapping.get(planet_name)
+            if skyfield_name is None:
+                continue
+
+            try:
+                planet = eph[skyfield_name]
+                lat, lon, _ = earth.at(t).observe(planet).ecliptic_latlon()
+                _, lon_next, _ = (
+                    earth.at(t_next).observe(planet).ecliptic_latlon()
+                )
+            except Exception as e:
+                logging.warning(f"Failed to calculate {planet_name}: {e}")
+                continue
+
+            longitude = np.asarray(lon.degrees, dtype=np.float64) % 360
+            delta = (lon_next.degrees - lon.degrees + 180) % 360 - 180
+            columns[planet_name] = (
+                longitude,
+                np.asarray(lat.degrees, dtype=np.float64),
+                delta / step_days,
+            )
+
+        return columns
+
+    def _calculate_batch_fallback(
+        self, julian_days: np.ndarray, planets: List[str]
+    ) -> Dict[str, tuple]:
+        """Векторизованная версия упрощенного расчета по средним движениям"""
+        # Те же средние движения и позиции на J2000, что и в скалярном fallback
+        speeds = {
+            "Sun": 360,
+            "Moon": 4680,
+            "Mercury": 1480,
+            "Venus": 585,
+            "Mars": 191,
+            "Jupiter": 30.3,
+            "Saturn": 12.2,
+            "Uranus": 4.3,
+            "Neptune": 2.2,
+            "Pluto": 1.5,
+        }
+        j2000_positions = {
+            "Sun": 280.5,
+            "Moon": 218.3,
+            "Mercury": 252.3,
+            "Venus": 181.9,
+            "Mars": 355.4,
+            "Jupiter": 34.4,
+            "Saturn": 50.1,
+            "Uranus": 314.1,
+            "Neptune": 304.9,
+            "Pluto": 250.1,
+        }
+
+        years_since_2000 = (julian_days - 2451545.0) / 365.25
+        zeros = np.zeros(len(julian_days))
+        columns = {}
+
+        for planet_name in planets:
+            if planet_name not in speeds:
+                continue
+            yearly_motion = speeds[planet_name]
+            longitude = (
+                j2000_positions[planet_name] + yearly_motion * years_since_2000
+            ) % 360
+            columns[planet_name] = (
+                longitude,
+                zeros.copy(),
+                np.full(len(julian_days), yearly_motion / 365.25),
+            )
+
+        return columns
+
     def calculate_houses(
         self,
         birth_datetime: datetime,
         latitude: float = 55.7558,
         longitude: float = 37.6176,
         house_system: HouseSystem = HouseSystem.PLACIDUS,
+        subject: Any = None,
     ) -> Dict[int, Dict[str, Any]]:
         """Вычисляет астрологические дома"""
         houses = {}
 
         if self.backend == "kerykeion" and KERYKEION_AVAILABLE:
             try:
-                subject = AstrologicalSubject(
-                    name="Temp",
-                    year=birth_datetime.year,
-                    month=birth_datetime.month,
-                    day=birth_datetime.day,
-                    hour=birth_datetime.hour,
-                    minute=birth_datetime.minute,
-                    lat=latitude,
-                    lng=longitude,
-                    tz_str="UTC",
-                )
+                if subject is None:
+                    subject = self.create_subject(
+                        birth_datetime, latitude, longitude
+                    )
 
                 # Kerykeion автоматически вычисляет дома
                 for i in range(1, 13):
@@ -812,41 +1284,37 @@ class AstrologyCalculator:
         orb_factor: float = 1.0,
     ) -> List[Dict[str, Any]]:
         """Вычисляет аспекты между планетами с учетом орбисов"""
-        aspects = []
         planets = list(planet_positions.keys())
+        longitudes = [
+            planet_positions[planet].get("longitude", 0) for planet in planets
+        ]
+        table = (
+            ASPECT_TYPE_TABLE
+            if orb_factor == 1.0
+            else ASPECT_TYPE_TABLE.scaled(orb_factor)
+        )
 
-        for i, planet1 in enumerate(planets):
-            for planet2 in planets[i + 1 :]:
-                pos1 = planet_positions[planet1].get("longitude", 0)
-                pos2 = planet_positions[planet2].get("longitude", 0)
-
-                # Вычисляем угол между планетами
-                angle = abs(pos1 - pos2)
-                if angle > 180:
-                    angle = 360 - angle
-
-                # Проверяем все типы аспектов
-                for aspect_type in AspectType:
-                    orb = aspect_type.orb * orb_factor
-                    if abs(angle - aspect_type.angle) <= orb:
-                        aspects.append(
-                            {
-                                "planet1": planet1,
-                                "planet2": planet2,
-                                "aspect": aspect_type.name_ru,
-                                "aspect_symbol": aspect_type.symbol,
-                                "angle": aspect_type.angle,
-                                "actual_angle": angle,
-                                "orb": abs(angle - aspect_type.angle),
-                                "applying": self._is_aspect_applying(
-                                    planet_positions[planet1],
-                                    planet_positions[planet2],
-                                    angle,
-                                    aspect_type.angle,
-                                ),
-                            }
-                        )
-                        break
+        aspects = []
+        for hit in find_aspects(longitudes, table):
+            definition = table[hit.aspect]
+            planet1, planet2 = planets[hit.first], planets[hit.second]
+            aspects.append(
+                {
+                    "planet1": planet1,
+                    "planet2": planet2,
+                    "aspect": definition.name,
+                    "aspect_symbol": definition.symbol,
+                    "angle": definition.angle,
+                    "actual_angle": hit.separation,
+                    "orb": hit.orb,
+                    "applying": self._is_aspect_applying(
+                        planet_positions[planet1],
+                        planet_positions[planet2],
+                        hit.separation,
+                        definition.angle,
+                    ),
+                }
+            )
 
         return aspects
 
@@ -869,20 +1337,28 @@ class AstrologyCalculator:
 
     def calculate_arabic_parts(self, chart: NatalChart) -> Dict[str, float]:
         """Вычисляет арабские части/жребии"""
+        return self.calculate_arabic_parts_for(chart.planets, chart.houses)
+
+    def calculate_arabic_parts_for(
+        self,
+        planets: Dict[str, Dict[str, Any]],
+        houses: Dict[Any, Dict[str, Any]],
+    ) -> Dict[str, float]:
+        """Вычисляет арабские части по готовым позициям и домам"""
         parts = {}
 
-        if not chart.planets or not chart.houses:
+        if not planets or not houses:
             return parts
 
         # Получаем необходимые точки
-        asc = chart.houses.get("ascendant", {}).get("longitude", 0)
-        mc = chart.houses.get("midheaven", {}).get("longitude", 0)
-        sun = chart.planets.get("Sun", {}).get("longitude", 0)
-        moon = chart.planets.get("Moon", {}).get("longitude", 0)
-        venus = chart.planets.get("Venus", {}).get("longitude", 0)
-        mars = chart.planets.get("Mars", {}).get("longitude", 0)
-        jupiter = chart.planets.get("Jupiter", {}).get("longitude", 0)
-        saturn = chart.planets.get("Saturn", {}).get("longitude", 0)
+        asc = houses.get("ascendant", {}).get("longitude", 0)
+        mc = houses.get("midheaven", {}).get("longitude", 0)
+        sun = planets.get("Sun", {}).get("longitude", 0)
+        moon = planets.get("Moon", {}).get("longitude", 0)
+        venus = planets.get("Venus", {}).get("longitude", 0)
+        mars = planets.get("Mars", {}).get("longitude", 0)
+        jupiter = planets.get("Jupiter", {}).get("longitude", 0)
+        saturn = planets.get("Saturn", {}).get("longitude", 0)
 
         # Колесо Фортуны (дневная/ночная формула)
         is_day_chart = sun > asc or sun < (asc + 180) % 360
@@ -901,7 +1377,7 @@ class AstrologyCalculator:
         parts["Love"] = (asc + venus - sun) % 360
 
         # Часть Брака
-        seventh_cusp = chart.houses.get(7, {}).get(
+        seventh_cusp = houses.get(7, {}).get(
             "cusp_longitude", (asc + 180) % 360
         )
         parts["Marriage"] = (asc + seventh_cusp - venus) % 360
@@ -916,9 +1392,7 @@ class AstrologyCalculator:
         parts["Disease"] = (asc + mars - saturn) % 360
 
         # Часть Богатства
-        second_cusp = chart.houses.get(2, {}).get(
-            "cusp_longitude", (asc + 30) % 360
-        )
+        second_cusp = houses.get(2, {}).get("cusp_longitude", (asc + 30) % 360)
         parts["Wealth"] = (asc + second_cusp - jupiter) % 360
 
         return parts
@@ -1060,31 +1534,28 @@ class AstrologyCalculator:
             "composite_midpoints": {},
         }
 
-        # Вычисляем межкартовые аспекты
-        for planet1_name, planet1_data in chart1.planets.items():
-            for planet2_name, planet2_data in chart2.planets.items():
-                pos1 = planet1_data.get("longitude", 0)
-                pos2 = planet2_data.get("longitude", 0)
-
-                angle = abs(pos1 - pos2)
-                if angle > 180:
-                    angle = 360 - angle
-
-                for aspect_type in AspectType:
-                    orb = aspect_type.orb * orb_factor
-                    if abs(angle - aspect_type.angle) <= orb:
-                        synastry_data["aspects"].append(
-                            {
-                                "planet1": f"{chart1.name}_{planet1_name}",
-                                "planet2": f"{chart2.name}_{planet2_name}",
-                                "aspect": aspect_type.name_ru,
-                                "aspect_symbol": aspect_type.symbol,
-                                "angle": aspect_type.angle,
-                                "actual_angle": angle,
-                                "orb": abs(angle - aspect_type.angle),
-                            }
-                        )
-                        break
+        # Вычисляем межкартовые аспекты одной матрицей A × B
+        planets1 = list(chart1.planets.keys())
+        planets2 = list(chart2.planets.keys())
+        table = ASPECT_TYPE_TABLE.scaled(orb_factor)
+
+        for hit in find_cross_aspects(
+            [chart1.planets[name].get("longitude", 0) for name in planets1],
+            [chart2.planets[name].get("longitude", 0) for name in planets2],
+            table,
+        ):
+            definition = table[hit.aspect]
+            synastry_data["aspects"].append(
+                {
+                    "planet1": f"{chart1.name}_{planets1[hit.first]}",
+                    "planet2": f"{chart2.name}_{planets2[hit.second]}",
+                    "aspect": definition.name,
+                    "aspect_symbol": definition.symbol,
+                    "angle": definition.angle,
+                    "actual_angle": hit.separation,
+                    "orb": hit.orb,
+                }
+            )
 
         # Вычисляем совместимость по элементам
         sun1_sign = self._get_sign_from_longitude(
@@ -1212,7 +1683,7 @@ class AstrologyCalculator:
             transit_date = datetime.now(pytz.UTC)
 
         # Получаем текущие позиции планет
-        transit_positions = self.calculate_planet_positions(transit_date)
+        transit_positions = self.calculate_transit_positions(transit_date)
 
         transits = {
             "date": transit_date.isoformat(),
@@ -1222,54 +1693,71 @@ class AstrologyCalculator:
             "retrogrades": [],
         }
 
-        # Вычисляем аспекты транзитных планет к натальным
-        for transit_planet, transit_data in transit_positions.items():
-            transit_pos = transit_data.get("longitude", 0)
-
-            for natal_planet, natal_data in natal_chart.planets.items():
-                natal_pos = natal_data.get("longitude", 0)
-
-                angle = abs(transit_pos - natal_pos)
-                if angle > 180:
-                    angle = 360 - angle
-
-                for aspect_type in AspectType:
-                    # Используем более узкие орбисы для транзитов
-                    orb = aspect_type.orb * 0.5
-                    if abs(angle - aspect_type.angle) <= orb:
-                        transits["aspects"].append(
-                            {
-                                "transit_planet": transit_planet,
-                                "natal_planet": natal_planet,
-                                "aspect": aspect_type.name_ru,
-                                "aspect_symbol": aspect_type.symbol,
-                                "exact_date": self._calculate_exact_aspect_date(
-                                    transit_planet,
-                                    natal_pos,
-                                    aspect_type.angle,
-                                    transit_date,
-                                ),
-                                "orb": abs(angle - aspect_type.angle),
-                            }
-                        )
-                        break
-
-            # Проверяем ингрессии (вход в новый знак)
-            transit_sign = self._get_sign_from_longitude(transit_pos)
-            if transit_data.get("degree_in_sign", 30) < 1:
-                transits["ingresses"].append(
-                    {
-                        "planet": transit_planet,
-                        "sign": transit_sign.name_ru,
-                        "date": transit_date.isoformat(),
-                    }
-                )
+        # Вычисляем аспекты транзитных планет к натальным одной матрицей
+        transit_planets = list(transit_positions.keys())
+        natal_planets = list(natal_chart.planets.keys())
+        natal_longitudes = [
+            natal_chart.planets[planet].get("longitude", 0)
+            for planet in natal_planets
+        ]
+        # Используем более узкие орбисы для транзитов
+        table = ASPECT_TYPE_TABLE.scaled(0.5)
+
+        for hit in find_cross_aspects(
+            [
+                transit_positions[planet].get("longitude", 0)
+                for planet in transit_planets
+            ],
+            natal_longitudes,
+            table,
+        ):
+            definition = table[hit.aspect]
+            transit_planet = transit_planets[hit.first]
+            transits["aspects"].append(
+                {
+                    "transit_planet": transit_planet,
+                    "natal_planet": natal_planets[hit.second],
+                    "aspect": definition.name,
+                    "aspect_symbol": definition.symbol,
+                    "exact_date": self._calculate_exact_aspect_date(
+                        transit_planet,
+                        natal_longitudes[hit.second],
+                        definition.angle,
+                        transit_date,
+                    ),
+                    "orb": hit.orb,
+                }
+            )
 
-            # Проверяем ретроградность
-            if transit_data.get("retrograde", False):
-                transits["retrogrades"].append(
-                    {"planet": transit_planet, "status": "ретроградный"}
-                )
+        # Ингрессии и ретроградные периоды общие для всех карт и берутся
+        # из предвычисленного календаря неба
+        from app.services.mundane_calendar import INGRESS
+
+        period_end = transit_date + timedelta(days=TRANSIT_PERIOD_DAYS[period])
+        for event in self.mundane_calendar.events_between(
+            transit_date, period_end, kinds=[INGRESS]
+        ):
+            ingress = event.to_dict()
+            transits["ingresses"].append(
+                {
+                    "planet": event.planet,
+                    "sign": ingress["sign"],
+                    "date": ingress["date"],
+                    "retrograde": ingress["retrograde"],
+                }
+            )
+
+        for planet, retrograde in self.mundane_calendar.retrograde_periods_at(
+            transit_date
+        ).items():
+            transits["retrogrades"].append(
+                {
+                    "planet": planet,
+                    "status": "ретроградный",
+                    "station_retrograde": retrograde.start.isoformat(),
+                    "station_direct": retrograde.end.isoformat(),
+                }
+            )
 
         return transits
 
@@ -1280,9 +1768,51 @@ class AstrologyCalculator:
         aspect_angle: float,
         current_date: datetime,
     ) -> Optional[str]:
-        """Вычисляет точную дату аспекта (упрощенно)"""
-        # Это упрощенная версия - в реальности нужен более сложный расчет
-        return current_date.isoformat()
+        """Вычисляет момент точного аспекта, ближайший к текущей дате"""
+        try:
+            exact_moment = self.timing_solver.nearest_exact_hit(
+                transit_planet, natal_pos, aspect_angle, current_date
+            )
+        except Exception as e:
+            logging.warning(f"Exact aspect date calculation failed: {e}")
+            return None
+
+        return exact_moment.isoformat() if exact_moment else None
+
+    @property
+    def return_solver(self):
+        """Общий решатель соляров и лунаров"""
+        from app.services.return_solver import get_return_solver
+
+        return get_return_solver()
+
+    def chart_context(
+        self,
+        moment: datetime,
+        latitude: float,
+        longitude: float,
+        house_system: HouseSystem = HouseSystem.PLACIDUS,
+    ):
+        """Контекст вычисления одной карты (ChartContext)"""
+        from app.services.chart_context import ChartContext
+
+        return ChartContext(self, moment, latitude, longitude, house_system)
+
+    @property
+    def timing_solver(self):
+        """Решатель моментов транзитов (создается при первом обращении)"""
+        if getattr(self, "_timing_solver", None) is None:
+            from app.services.transit_timing import TransitTimingSolver
+
+            self._timing_solver = TransitTimingSolver(self)
+        return self._timing_solver
+
+    @property
+    def mundane_calendar(self):
+        """Общий календарь мундинных событий"""
+        from app.services.mundane_calendar import get_mundane_calendar
+
+        return get_mundane_calendar()
 
     def calculate_progressions(
         self,
@@ -1352,22 +1882,9 @@ class AstrologyCalculator:
 
         # Находим момент, когда Солнце возвращается в натальное положение
         natal_sun = natal_chart.planets.get("Sun", {}).get("longitude", 0)
-
-        # Приблизительная дата солнечного возвращения
-        solar_return_date = natal_chart.birth_datetime.replace(year=year)
-
-        # Уточняем дату (упрощенно - в реальности нужен итеративный поиск)
-        for day_offset in range(-2, 3):
-            check_date = solar_return_date + timedelta(days=day_offset)
-            sun_pos = (
-                self.calculate_planet_positions(check_date)
-                .get("Sun", {})
-                .get("longitude", 0)
-            )
-
-            if abs(sun_pos - natal_sun) < 0.5:
-                solar_return_date = check_date
-                break
+        solar_return_date = self.return_solver.solar_return(
+            natal_sun, year, birth_datetime=natal_chart.birth_datetime
+        )
 
         # Создаем карту солнечного возвращения
         solar_return = self.create_natal_chart(
@@ -1390,23 +1907,9 @@ class AstrologyCalculator:
 
         # Находим момент, когда Луна возвращается в натальное положение
         natal_moon = natal_chart.planets.get("Moon", {}).get("longitude", 0)
-
-        # Луна проходит зодиак примерно за 27.3 дня
-
-        # Ищем ближайшее лунное возвращение
-        for day_offset in range(-14, 15):
-            check_date = target_date + timedelta(days=day_offset)
-            moon_pos = (
-                self.calculate_planet_positions(check_date)
-                .get("Moon", {})
-                .get("longitude", 0)
-            )
-
-            if abs(moon_pos - natal_moon) < 1:
-                lunar_return_date = check_date
-                break
-        else:
-            lunar_return_date = target_date
+        lunar_return_date = self.return_solver.nearest_lunar_return(
+            natal_moon, target_date
+        )
 
         # Создаем карту лунного возвращения
         lunar_return = self.create_natal_chart(
@@ -1596,18 +2099,13 @@ class AstrologyCalculator:
     def calculate_moon_phase(self, target_date: datetime) -> Dict[str, Any]:
         """Вычисляет фазу Луны на заданную дату"""
         logger = logging.getLogger(__name__)
-        logger.info(
+        logger.debug(
             f"MOON_PHASE_CALCULATION_START: date={target_date.strftime('%Y-%m-%d')}"
         )
 
         try:
-            # Получаем позиции Солнца и Луны
-            positions = self.calculate_planet_positions(target_date)
-            sun_pos = positions.get("Sun", {}).get("longitude", 0)
-            moon_pos = positions.get("Moon", {}).get("longitude", 0)
-
-            # Вычисляем угол между Солнцем и Луной
-            angle = (moon_pos - sun_pos) % 360
+            # Угол между Солнцем и Луной без построения полной карты
+            angle = lunar_phase_engine.elongation(target_date)
 
             # Определяем фазу
             phase_info = self._get_moon_phase_info(angle)
@@ -1642,7 +2140,7 @@ class AstrologyCalculator:
                 else round((540 - angle) / 12.19),
             }
 
-            logger.info(
+            logger.debug(
                 f"MOON_PHASE_CALCULATION_SUCCESS: phase='{result['phase_name']}'"
             )
             return result
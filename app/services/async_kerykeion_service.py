@@ -4,7 +4,6 @@ Provides non-blocking astrological calculations with intelligent caching.
 """
 
 import asyncio
-import hashlib
 import time
 from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
@@ -12,16 +11,35 @@ from typing import Any, Dict, List, Optional
 
 from loguru import logger
 
-from app.services.astro_cache_service import astro_cache
+from app.core.config import settings
+from app.services import cache_keys
+from app.services.astro_cache_service import astro_cache, chart_tag, user_tag
+from app.services.chart_process_pool import ChartProcessPool
 from app.services.kerykeion_service import HouseSystem, KerykeionService, ZodiacType
 
 
 class AsyncKerykeionService:
     """Asynchronous wrapper for KerykeionService with performance optimizations."""
 
-    def __init__(self, max_workers: int = 4):
+    def __init__(
+        self, max_workers: int = 4, use_process_pool: Optional[bool] = None
+    ):
         self.kerykeion_service = KerykeionService()
         self.executor = ThreadPoolExecutor(max_workers=max_workers)
+
+        # Optional process pool for CPU-bound natal chart calculations
+        if use_process_pool is None:
+            use_process_pool = settings.KERYKEION_PROCESS_POOL
+        self.process_pool: Optional[ChartProcessPool] = (
+            ChartProcessPool(
+                max_workers=settings.KERYKEION_PROCESS_WORKERS,
+                max_pending=settings.KERYKEION_PROCESS_MAX_PENDING,
+                submit_timeout=settings.KERYKEION_PROCESS_SUBMIT_TIMEOUT,
+                ephemeris_path=settings.SWISS_EPHEMERIS_PATH,
+            )
+            if use_process_pool
+            else None
+        )
         self.performance_stats = {
             "total_operations": 0,
             "cached_operations": 0,
@@ -44,12 +62,18 @@ class AsyncKerykeionService:
         latitude: float,
         longitude: float,
         timezone: str = "Europe/Moscow",
+        house_system: Any = "Placidus",
+        zodiac_type: Any = "Tropical",
     ) -> str:
         """Generate unique ID for natal chart."""
-        data = (
-            f"{birth_datetime.isoformat()}_{latitude}_{longitude}_{timezone}"
+        return cache_keys.chart_id(
+            birth_datetime,
+            latitude,
+            longitude,
+            timezone,
+            house_system,
+            zodiac_type,
         )
-        return hashlib.sha256(data.encode()).hexdigest()[:16]
 
     async def get_full_natal_chart_data(
         self,
@@ -61,44 +85,48 @@ class AsyncKerykeionService:
         house_system: HouseSystem = HouseSystem.PLACIDUS,
         zodiac_type: ZodiacType = ZodiacType.TROPICAL,
         use_cache: bool = True,
+        user_id: Optional[str] = None,
     ) -> Dict[str, Any]:
-        """Get comprehensive natal chart data asynchronously with caching."""
+        """Get comprehensive natal chart data asynchronously with caching.
+
+        ``user_id`` tags the cached chart and links its chart id to the
+        user, so ``astro_cache.invalidate_user_data`` drops the chart and
+        everything derived from it.
+        """
         start_time = time.time()
         self.performance_stats["total_operations"] += 1
 
         logger.info(f"ASYNC_KERYKEION_NATAL_START: {name}")
 
-        # Check cache first
-        if use_cache:
-            cached_result = await astro_cache.get_natal_chart(
-                birth_datetime=birth_datetime,
-                latitude=latitude,
-                longitude=longitude,
-                timezone=timezone,
-                house_system=house_system.value,
+        if not use_cache:
+            return await self._compute_natal_chart(
+                name,
+                birth_datetime,
+                latitude,
+                longitude,
+                timezone,
+                house_system,
+                zodiac_type,
+                start_time,
             )
 
-            if cached_result:
-                self.performance_stats["cached_operations"] += 1
-                elapsed = time.time() - start_time
-                self._update_average_time(elapsed)
-                logger.info(
-                    f"ASYNC_KERYKEION_NATAL_CACHED: {name} in {elapsed:.3f}s"
-                )
-                return cached_result
-
-        # If not available, return error immediately
-        if not self.is_available():
-            return {"error": "Kerykeion not available"}
+        chart_id = self._generate_chart_id(
+            birth_datetime,
+            latitude,
+            longitude,
+            timezone,
+            house_system,
+            zodiac_type,
+        )
+        await astro_cache.link_user_charts(user_id, chart_id)
 
-        # Calculate asynchronously
-        try:
-            self.performance_stats["async_operations"] += 1
+        # Read-through: L1 memory, then Redis, then one shared computation.
+        # The cache holds compact snapshot records, expanded on read.
+        computed = None
 
-            # Run in thread pool to avoid blocking
-            result = await asyncio.get_event_loop().run_in_executor(
-                self.executor,
-                self._calculate_natal_chart_sync,
+        async def compute() -> Dict[str, Any]:
+            nonlocal computed
+            computed = await self._compute_natal_chart(
                 name,
                 birth_datetime,
                 latitude,
@@ -106,7 +134,93 @@ class AsyncKerykeionService:
                 timezone,
                 house_system,
                 zodiac_type,
+                start_time,
             )
+            return self._compact_chart(computed)
+
+        cached = await astro_cache.get_or_compute(
+            astro_cache.natal_chart_key(
+                birth_datetime,
+                latitude,
+                longitude,
+                timezone,
+                house_system.value,
+                zodiac_type.value,
+            ),
+            compute,
+            ttl=astro_cache.astro_ttl["natal_chart"],
+            cache_if=lambda chart: not chart.get("error"),
+            tags=[
+                chart_tag(chart_id),
+                *([user_tag(user_id)] if user_id else []),
+            ],
+        )
+
+        if computed is not None:
+            return computed
+
+        self.performance_stats["cached_operations"] += 1
+        result = self._expand_chart(cached)
+        elapsed = time.time() - start_time
+        self._update_average_time(elapsed)
+        logger.info(f"ASYNC_KERYKEION_NATAL_CACHED: {name} in {elapsed:.3f}s")
+        return result
+
+    def _compact_chart(self, chart: Dict[str, Any]) -> Dict[str, Any]:
+        """Snapshot record to cache, or the chart itself if not compactable."""
+        record = self.kerykeion_service.chart_record(chart)
+        return chart if record is None else record
+
+    def _expand_chart(self, value: Dict[str, Any]) -> Dict[str, Any]:
+        """Full chart data from a cached value."""
+        if isinstance(value.get("snapshot"), bytes):
+            return self.kerykeion_service.expand_chart_record(value)
+        return value
+
+    async def _compute_natal_chart(
+        self,
+        name: str,
+        birth_datetime: datetime,
+        latitude: float,
+        longitude: float,
+        timezone: str,
+        house_system: HouseSystem,
+        zodiac_type: ZodiacType,
+        start_time: float,
+    ) -> Dict[str, Any]:
+        """Calculate a natal chart in the process or thread pool."""
+        # If not available, return error immediately
+        if not self.is_available():
+            return {"error": "Kerykeion not available"}
+
+        # Calculate asynchronously
+        try:
+            self.performance_stats["async_operations"] += 1
+
+            if self.process_pool is not None:
+                # Run in a warm worker process (no GIL contention)
+                result = await self.process_pool.calculate_natal_chart(
+                    name,
+                    birth_datetime,
+                    latitude,
+                    longitude,
+                    timezone,
+                    house_system,
+                    zodiac_type,
+                )
+            else:
+                # Run in thread pool to avoid blocking
+                result = await asyncio.get_event_loop().run_in_executor(
+                    self.executor,
+                    self._calculate_natal_chart_sync,
+                    name,
+                    birth_datetime,
+                    latitude,
+                    longitude,
+                    timezone,
+                    house_system,
+                    zodiac_type,
+                )
 
             elapsed = time.time() - start_time
             self._update_average_time(elapsed)
@@ -117,17 +231,6 @@ class AsyncKerykeionService:
                     f"ASYNC_KERYKEION_SLOW_CALCULATION: {elapsed:.3f}s for {name}"
                 )
 
-            # Cache successful results
-            if use_cache and not result.get("error"):
-                await astro_cache.set_natal_chart(
-                    birth_datetime=birth_datetime,
-                    latitude=latitude,
-                    longitude=longitude,
-                    chart_data=result,
-                    timezone=timezone,
-                    house_system=house_system.value,
-                )
-
             logger.info(
                 f"ASYNC_KERYKEION_NATAL_SUCCESS: {name} in {elapsed:.3f}s"
             )
@@ -249,19 +352,7 @@ class AsyncKerykeionService:
         logger.info("ASYNC_KERYKEION_ARABIC_PARTS_START")
 
         # Generate chart ID for caching
-        chart_id = self._generate_chart_id(
-            birth_datetime=datetime.fromisoformat(
-                natal_chart_data.get("subject_info", {}).get(
-                    "birth_datetime", "2000-01-01T00:00:00"
-                )
-            ),
-            latitude=natal_chart_data.get("subject_info", {})
-            .get("coordinates", {})
-            .get("latitude", 0),
-            longitude=natal_chart_data.get("subject_info", {})
-            .get("coordinates", {})
-            .get("longitude", 0),
-        )
+        chart_id = cache_keys.chart_id_from_data(natal_chart_data)
 
         # Check cache first
         if use_cache:
@@ -408,10 +499,29 @@ class AsyncKerykeionService:
 
         start_time = time.time()
 
-        # Create tasks for parallel execution
-        tasks = []
-        for request in chart_requests:
-            task = self.get_full_natal_chart_data(
+        keys = [
+            astro_cache.natal_chart_key(
+                request["birth_datetime"],
+                request["latitude"],
+                request["longitude"],
+                request.get("timezone", "Europe/Moscow"),
+                request.get("house_system", "Placidus"),
+                request.get("zodiac_type", "Tropical"),
+            )
+            for request in chart_requests
+        ]
+
+        # One bulk lookup (L1, then a single Redis round trip)
+        cached = await astro_cache.get_many(keys) if use_cache else {}
+
+        # Compute each distinct missing chart once
+        pending: Dict[str, Dict[str, Any]] = {}
+        for key, request in zip(keys, chart_requests):
+            if key not in cached and key not in pending:
+                pending[key] = request
+
+        tasks = [
+            self.get_full_natal_chart_data(
                 name=request.get("name", "Unknown"),
                 birth_datetime=request["birth_datetime"],
                 latitude=request["latitude"],
@@ -421,16 +531,47 @@ class AsyncKerykeionService:
                     request.get("house_system", "Placidus")
                 ),
                 zodiac_type=ZodiacType(request.get("zodiac_type", "Tropical")),
-                use_cache=use_cache,
+                use_cache=False,
             )
-            tasks.append(task)
+            for request in pending.values()
+        ]
 
         # Execute all tasks concurrently
         results = await asyncio.gather(*tasks, return_exceptions=True)
+        computed = dict(zip(pending, results))
+
+        if use_cache:
+            for request in chart_requests:
+                if request.get("user_id"):
+                    await astro_cache.link_user_charts(
+                        request["user_id"], self._request_chart_id(request)
+                    )
+
+            # Write back successful charts in a single round trip
+            fresh = {
+                key: result
+                for key, result in computed.items()
+                if not isinstance(result, Exception)
+                and not result.get("error")
+            }
+            await astro_cache.set_many(
+                {key: self._compact_chart(chart) for key, chart in fresh.items()},
+                astro_cache.astro_ttl["natal_chart"],
+                tags_by_key={
+                    key: self._chart_tags(pending[key]) for key in fresh
+                },
+            )
 
         # Handle exceptions in results
         processed_results = []
-        for i, result in enumerate(results):
+        for i, key in enumerate(keys):
+            if key in cached:
+                self.performance_stats["total_operations"] += 1
+                self.performance_stats["cached_operations"] += 1
+                processed_results.append(self._expand_chart(cached[key]))
+                continue
+
+            result = computed[key]
             if isinstance(result, Exception):
                 logger.error(
                     f"ASYNC_KERYKEION_BATCH_ERROR: Chart {i} failed: {result}"
@@ -446,6 +587,24 @@ class AsyncKerykeionService:
 
         return processed_results
 
+    def _request_chart_id(self, request: Dict[str, Any]) -> str:
+        """Chart id of a batch chart request."""
+        return self._generate_chart_id(
+            request["birth_datetime"],
+            request["latitude"],
+            request["longitude"],
+            request.get("timezone", "Europe/Moscow"),
+            request.get("house_system", "Placidus"),
+            request.get("zodiac_type", "Tropical"),
+        )
+
+    def _chart_tags(self, request: Dict[str, Any]) -> List[str]:
+        """Invalidation tags for a batch chart request."""
+        tags = [chart_tag(self._request_chart_id(request))]
+        if request.get("user_id"):
+            tags.append(user_tag(request["user_id"]))
+        return tags
+
     async def _create_subject_from_chart_data(
         self, chart_data: Dict[str, Any]
     ) -> Optional[Any]:
@@ -502,24 +661,7 @@ class AsyncKerykeionService:
         Returns:
             Natal chart data dictionary
         """
-        self._generate_chart_id(
-            birth_datetime, latitude, longitude, timezone
-        )
-
-        # Check cache if enabled
-        if use_cache:
-            cached_result = await astro_cache.get_natal_chart(
-                birth_datetime=birth_datetime,
-                latitude=latitude,
-                longitude=longitude,
-                timezone=timezone,
-            )
-            if cached_result:
-                self.performance_stats["cached_operations"] += 1
-                self.performance_stats["total_operations"] += 1
-                return cached_result
-
-        # Calculate asynchronously
+        # Calculate asynchronously (cached read-through when enabled)
         start_time = time.time()
         result = await self.get_full_natal_chart_data(
             name="AsyncChart",
@@ -527,6 +669,7 @@ class AsyncKerykeionService:
             latitude=latitude,
             longitude=longitude,
             timezone=timezone,
+            use_cache=use_cache,
         )
 
         elapsed_time = time.time() - start_time
@@ -538,16 +681,6 @@ class AsyncKerykeionService:
         self.performance_stats["async_operations"] += 1
         self.performance_stats["total_operations"] += 1
 
-        # Cache result if enabled
-        if use_cache and not result.get("error"):
-            await astro_cache.set_natal_chart(
-                birth_datetime=birth_datetime,
-                latitude=latitude,
-                longitude=longitude,
-                chart_data=result,
-                timezone=timezone,
-            )
-
         return result
 
     def reset_performance_stats(self):
@@ -594,6 +727,9 @@ class AsyncKerykeionService:
                 if hasattr(self.executor, "_threads")
                 else 0,
             },
+            "process_pool_info": self.process_pool.get_stats()
+            if self.process_pool is not None
+            else {"enabled": False},
         }
 
     async def precompute_popular_charts(self) -> Dict[str, Any]:
@@ -670,6 +806,8 @@ class AsyncKerykeionService:
 
         # Shutdown thread pool
         self.executor.shutdown(wait=True)
+        if self.process_pool is not None:
+            self.process_pool.shutdown(wait=True)
 
         # Shutdown cache service
         await astro_cache.shutdown()
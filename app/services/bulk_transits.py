@@ -0,0 +1,470 @@
+"""
+Массовая оценка транзитов для многих натальных карт за один проход.
+
+Натальные долготы пользователей собираются в матрицу (пользователи ×
+тела), транзитная сторона — один снимок неба из общего кэша. Аспекты
+всех пар «транзитная планета × натальная планета» для всех пользователей
+считаются операциями над массивами: угловые расстояния одним
+broadcasting, затем орбисы по типам аспектов в порядке таблицы (первое
+совпадение, как в aspect_engine).
+
+Матрица обрабатывается кусками по BULK_CHUNK_USERS строк, поэтому
+промежуточные массивы ограничены по памяти, а результаты отдаются по мере
+готовности: в callback или через асинхронный итератор. Куски хранят
+попадания массивами; словари и кортежи строятся только для тех
+пользователей, которые действительно нужны вызывающему коду.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Hashable,
+    Iterator,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+import numpy as np
+import pytz
+
+from app.services.aspect_engine import OrbTable
+from app.services.astrology_calculator import AstrologyCalculator
+
+# Транзитные тела по умолчанию. Луна исключена: за сутки она проходит
+# около 13°, и «сильный транзит дня» по ней зависит от часа снимка
+BULK_TRANSIT_BODIES = (
+    "Sun",
+    "Mercury",
+    "Venus",
+    "Mars",
+    "Jupiter",
+    "Saturn",
+    "Uranus",
+    "Neptune",
+    "Pluto",
+)
+
+# Орбисы и названия аспектов как у TransitCalculator
+BULK_TRANSIT_ORBS = {0: 8, 60: 6, 90: 8, 120: 8, 180: 8}
+BULK_ASPECT_NAMES = {
+    0: "Соединение",
+    60: "Секстиль",
+    90: "Квадрат",
+    120: "Трин",
+    180: "Оппозиция",
+}
+
+# Вес транзитной планеты (шкала значимости 0–10): медленные планеты
+# дают долгие и заметные периоды
+TRANSIT_WEIGHTS = {
+    "Sun": 6.0,
+    "Moon": 3.0,
+    "Mercury": 5.0,
+    "Venus": 6.0,
+    "Mars": 7.0,
+    "Jupiter": 8.0,
+    "Saturn": 9.0,
+    "Uranus": 9.0,
+    "Neptune": 9.0,
+    "Pluto": 10.0,
+}
+DEFAULT_TRANSIT_WEIGHT = 5.0
+
+# Множитель натальной точки: светила и личные планеты важнее высших
+NATAL_WEIGHTS = {
+    "Sun": 1.0,
+    "Moon": 1.0,
+    "Mercury": 0.9,
+    "Venus": 0.9,
+    "Mars": 0.9,
+    "Jupiter": 0.8,
+    "Saturn": 0.8,
+    "Uranus": 0.7,
+    "Neptune": 0.7,
+    "Pluto": 0.7,
+}
+DEFAULT_NATAL_WEIGHT = 0.7
+
+# Медленные транзитные планеты и натальные светила с личными планетами
+SLOW_TRANSIT_PLANETS = ("Jupiter", "Saturn", "Uranus", "Neptune", "Pluto")
+PERSONAL_NATAL_POINTS = ("Sun", "Moon", "Mercury", "Venus", "Mars")
+STRONG_TRANSIT_ORB = 1.0
+
+
+def strong_transit_significance() -> float:
+    """Наименьшая значимость медленной планеты в пределах
+    STRONG_TRANSIT_ORB от точного аспекта к светилу или личной планете"""
+    return min(
+        TRANSIT_WEIGHTS[transit]
+        * NATAL_WEIGHTS[natal]
+        * (1 - STRONG_TRANSIT_ORB / limit)
+        for transit in SLOW_TRANSIT_PLANETS
+        for natal in PERSONAL_NATAL_POINTS
+        for limit in BULK_TRANSIT_ORBS.values()
+    )
+
+
+# Значимость, начиная с которой транзит считается сильным: любая
+# медленная планета в пределах градуса от точного аспекта к светилу или
+# личной планете проходит порог. Порог выводится из весов и орбисов
+# (Юпитер в секстиле к Меркурию, Венере или Марсу дает 6.0), поэтому
+# точные аспекты быстрых планет тоже могут его пройти
+STRONG_TRANSIT_SIGNIFICANCE = strong_transit_significance()
+
+# Строк матрицы на кусок: (кусок × тела × тела) float64 держится в
+# нескольких мегабайтах
+BULK_CHUNK_USERS = 8192
+
+
+def default_orb_table() -> OrbTable:
+    """Таблица орбисов массовой оценки"""
+    return OrbTable.from_orbs(BULK_TRANSIT_ORBS, BULK_ASPECT_NAMES)
+
+
+class NatalMatrix:
+    """Натальные долготы многих пользователей: строки — пользователи,
+    столбцы — тела. Отсутствующие тела хранятся как NaN и не дают
+    аспектов."""
+
+    def __init__(
+        self,
+        user_ids: Sequence[Hashable],
+        bodies: Sequence[str],
+        longitudes: Any,
+    ):
+        self.user_ids = list(user_ids)
+        self.bodies = tuple(bodies)
+        self.longitudes = np.asarray(longitudes, dtype=np.float64).reshape(
+            len(self.user_ids), len(self.bodies)
+        )
+
+    @classmethod
+    def from_planets(
+        cls,
+        charts: Mapping[Hashable, Mapping[str, Mapping[str, Any]]],
+        bodies: Optional[Sequence[str]] = None,
+    ) -> "NatalMatrix":
+        """Матрица из словарей {пользователь: calculate_planet_positions}"""
+        return cls._build(
+            charts,
+            bodies,
+            lambda chart: {
+                name: data["longitude"]
+                for name, data in chart.items()
+                if isinstance(data, Mapping) and "longitude" in data
+            },
+        )
+
+    @classmethod
+    def from_snapshots(
+        cls,
+        snapshots: Mapping[Hashable, Any],
+        bodies: Optional[Sequence[str]] = None,
+    ) -> "NatalMatrix":
+        """Матрица из словаря {пользователь: ChartSnapshot}"""
+        return cls._build(
+            snapshots,
+            bodies,
+            lambda snapshot: dict(
+                zip(snapshot.bodies, snapshot.longitudes.tolist())
+            ),
+        )
+
+    @classmethod
+    def _build(
+        cls,
+        charts: Mapping[Hashable, Any],
+        bodies: Optional[Sequence[str]],
+        extract: Callable[[Any], Dict[str, float]],
+    ) -> "NatalMatrix":
+        rows = {user_id: extract(chart) for user_id, chart in charts.items()}
+        if bodies is None:
+            bodies = list(
+                dict.fromkeys(name for row in rows.values() for name in row)
+            )
+        longitudes = np.full((len(rows), len(bodies)), np.nan)
+        for index, row in enumerate(rows.values()):
+            for column, name in enumerate(bodies):
+                if name in row:
+                    longitudes[index, column] = row[name]
+        return cls(list(rows), bodies, longitudes)
+
+    def __len__(self) -> int:
+        return len(self.user_ids)
+
+
+class BulkTransitHit(NamedTuple):
+    """Транзитный аспект одного пользователя"""
+
+    user_id: Hashable
+    transit_planet: str
+    natal_planet: str
+    aspect: str
+    angle: float
+    orb: float
+    significance: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "transit_planet": self.transit_planet,
+            "natal_planet": self.natal_planet,
+            "aspect": self.aspect,
+            "angle": self.angle,
+            "orb": round(self.orb, 2),
+            "significance": round(self.significance, 1),
+        }
+
+
+@dataclass
+class BulkTransitChunk:
+    """Попадания куска матрицы, упорядоченные по пользователю и убыванию
+    значимости. Поля rows/transit/natal/aspect — индексы в user_ids,
+    transit_bodies, natal_bodies и таблице орбисов."""
+
+    moment: datetime
+    user_ids: List[Hashable]
+    transit_bodies: Tuple[str, ...]
+    natal_bodies: Tuple[str, ...]
+    table: OrbTable
+    rows: np.ndarray
+    transit: np.ndarray
+    natal: np.ndarray
+    aspect: np.ndarray
+    orb: np.ndarray
+    significance: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def hits(self) -> Iterator[BulkTransitHit]:
+        """Попадания куска по одному"""
+        for row, transit, natal, aspect, orb, significance in zip(
+            self.rows.tolist(),
+            self.transit.tolist(),
+            self.natal.tolist(),
+            self.aspect.tolist(),
+            self.orb.tolist(),
+            self.significance.tolist(),
+        ):
+            definition = self.table[aspect]
+            yield BulkTransitHit(
+                self.user_ids[row],
+                self.transit_bodies[transit],
+                self.natal_bodies[natal],
+                definition.name,
+                definition.angle,
+                orb,
+                significance,
+            )
+
+    def by_user(self) -> Dict[Hashable, List[BulkTransitHit]]:
+        """Попадания, сгруппированные по пользователю"""
+        grouped: Dict[Hashable, List[BulkTransitHit]] = {}
+        for hit in self.hits():
+            grouped.setdefault(hit.user_id, []).append(hit)
+        return grouped
+
+    def strongest(self) -> Dict[Hashable, float]:
+        """Наибольшая значимость транзита для каждого пользователя с
+        попаданиями"""
+        if not len(self.rows):
+            return {}
+        # Строки отсортированы, первая запись строки — самая значимая
+        first = np.flatnonzero(np.r_[True, np.diff(self.rows) != 0])
+        return {
+            self.user_ids[row]: significance
+            for row, significance in zip(
+                self.rows[first].tolist(),
+                self.significance[first].tolist(),
+            )
+        }
+
+
+class BulkTransitEvaluator:
+    """Транзитные аспекты одного момента для матрицы натальных карт"""
+
+    def __init__(
+        self,
+        calculator: Optional[AstrologyCalculator] = None,
+        table: Optional[OrbTable] = None,
+        bodies: Sequence[str] = BULK_TRANSIT_BODIES,
+        chunk_size: int = BULK_CHUNK_USERS,
+    ):
+        self._calculator = calculator
+        self.table = table or default_orb_table()
+        self.bodies = tuple(bodies)
+        self.chunk_size = chunk_size
+
+    @property
+    def calculator(self) -> AstrologyCalculator:
+        if self._calculator is None:
+            self._calculator = AstrologyCalculator()
+        return self._calculator
+
+    def sky_snapshot(self, moment: datetime) -> Dict[str, float]:
+        """Долготы транзитных тел на момент (через общий кэш неба)"""
+        positions = self.calculator.calculate_transit_positions(moment)
+        return {
+            name: positions[name]["longitude"]
+            for name in self.bodies
+            if name in positions
+        }
+
+    def iter_chunks(
+        self,
+        matrix: NatalMatrix,
+        moment: Optional[datetime] = None,
+        min_significance: float = 0.0,
+        sky: Optional[Mapping[str, float]] = None,
+    ) -> Iterator[BulkTransitChunk]:
+        """Попадания по кускам матрицы; sky заменяет расчет снимка неба"""
+        moment, sky = self._prepare(moment, sky)
+        for start in range(0, len(matrix), self.chunk_size):
+            yield self._evaluate_chunk(
+                matrix, start, moment, sky, min_significance
+            )
+
+    def evaluate(
+        self,
+        matrix: NatalMatrix,
+        callback: Callable[[BulkTransitChunk], Any],
+        moment: Optional[datetime] = None,
+        min_significance: float = 0.0,
+        sky: Optional[Mapping[str, float]] = None,
+    ) -> Dict[str, Any]:
+        """Передает каждый кусок в callback и возвращает сводку прохода"""
+        started = time.perf_counter()
+        chunks = hits = 0
+        for chunk in self.iter_chunks(matrix, moment, min_significance, sky):
+            callback(chunk)
+            chunks += 1
+            hits += len(chunk)
+        return {
+            "users": len(matrix),
+            "chunks": chunks,
+            "hits": hits,
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+
+    async def stream(
+        self,
+        matrix: NatalMatrix,
+        moment: Optional[datetime] = None,
+        min_significance: float = 0.0,
+        sky: Optional[Mapping[str, float]] = None,
+    ) -> AsyncIterator[BulkTransitChunk]:
+        """Асинхронный итератор кусков: расчет каждого куска идет в потоке,
+        цикл событий между кусками свободен"""
+        if sky is None:
+            moment = moment or datetime.now(pytz.UTC)
+            sky = await asyncio.to_thread(self.sky_snapshot, moment)
+        moment, sky = self._prepare(moment, sky)
+        for start in range(0, len(matrix), self.chunk_size):
+            yield await asyncio.to_thread(
+                self._evaluate_chunk,
+                matrix,
+                start,
+                moment,
+                sky,
+                min_significance,
+            )
+
+    def _prepare(
+        self,
+        moment: Optional[datetime],
+        sky: Optional[Mapping[str, float]],
+    ) -> Tuple[datetime, Dict[str, float]]:
+        moment = moment or datetime.now(pytz.UTC)
+        if sky is None:
+            sky = self.sky_snapshot(moment)
+        return moment, {
+            name: float(sky[name]) for name in self.bodies if name in sky
+        }
+
+    def _evaluate_chunk(
+        self,
+        matrix: NatalMatrix,
+        start: int,
+        moment: datetime,
+        sky: Mapping[str, float],
+        min_significance: float,
+    ) -> BulkTransitChunk:
+        transit_bodies = tuple(sky)
+        natal = matrix.longitudes[start : start + self.chunk_size]
+        transit = np.fromiter(sky.values(), dtype=float, count=len(sky))
+
+        # (пользователи × транзитные × натальные)
+        separation = np.abs(natal[:, None, :] - transit[None, :, None])
+        np.subtract(360, separation, out=separation, where=separation > 180)
+
+        # Первый подходящий тип аспекта в порядке таблицы
+        aspect = np.full(separation.shape, -1, dtype=np.int8)
+        orb = np.zeros(separation.shape)
+        for index, (angle, limit) in enumerate(
+            zip(self.table.angles, self.table.orbs)
+        ):
+            deviation = np.abs(separation - angle)
+            match = (deviation <= limit) & (aspect < 0)
+            aspect[match] = index
+            orb[match] = deviation[match]
+
+        rows, transits, natals = np.nonzero(aspect >= 0)
+        aspects = aspect[rows, transits, natals].astype(np.intp)
+        orbs = orb[rows, transits, natals]
+
+        transit_weights = np.array(
+            [
+                TRANSIT_WEIGHTS.get(name, DEFAULT_TRANSIT_WEIGHT)
+                for name in transit_bodies
+            ]
+        )
+        natal_weights = np.array(
+            [
+                NATAL_WEIGHTS.get(name, DEFAULT_NATAL_WEIGHT)
+                for name in matrix.bodies
+            ]
+        )
+        # Точный аспект дает полный вес, к границе орбиса вес падает до 0
+        limits = self.table.orbs[aspects]
+        significance = (
+            transit_weights[transits]
+            * natal_weights[natals]
+            * (1 - orbs / np.where(limits > 0, limits, 1))
+        )
+
+        keep = significance >= min_significance
+        order = np.lexsort((-significance[keep], rows[keep]))
+        return BulkTransitChunk(
+            moment=moment,
+            user_ids=matrix.user_ids[start : start + self.chunk_size],
+            transit_bodies=transit_bodies,
+            natal_bodies=matrix.bodies,
+            table=self.table,
+            rows=rows[keep][order],
+            transit=transits[keep][order],
+            natal=natals[keep][order],
+            aspect=aspects[keep][order],
+            orb=orbs[keep][order],
+            significance=significance[keep][order],
+        )
+
+
+_bulk_transit_evaluator = None
+
+
+def get_bulk_transit_evaluator() -> BulkTransitEvaluator:
+    """Общий для процесса оценщик массовых транзитов"""
+    global _bulk_transit_evaluator
+    if _bulk_transit_evaluator is None:
+        _bulk_transit_evaluator = BulkTransitEvaluator()
+    return _bulk_transit_evaluator
@@ -0,0 +1,260 @@
+"""
+Pluggable binary codec for cache payloads.
+
+Every payload starts with a 5-byte header: magic, format version, codec
+id and compression id. Readers can therefore roll forward safely. An
+unknown version or codec raises ``ValueError``, which the caches treat
+as a miss, and headerless payloads are decoded as legacy JSON.
+
+Codecs:
+
+- ``msgpack``: compact and fast, the default. Datetimes, dates and tuples
+  survive the round trip as extension types. Values msgpack cannot
+  represent raise ``TypeError``, so the caller skips caching them.
+- ``json``: the old format, used when msgpack is not installed and kept
+  for debugging and rollback. Bytes survive as tagged base64 objects.
+- ``pickle``: protocol 5, lossless for any picklable value, for trusted
+  channels such as worker processes. Unpickling runs code, so pickle
+  payloads are rejected on decode unless pickle is explicitly enabled.
+
+Bodies at or above ``compress_threshold`` bytes are compressed with
+zstd, lz4 or zlib, depending on what is installed and configured.
+"""
+
+import base64
+import json
+import pickle
+import struct
+import zlib
+from datetime import date, datetime
+from typing import Any, Dict, Optional, Tuple, Union
+
+from loguru import logger
+
+try:
+    import msgpack
+
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+try:
+    import zstandard
+
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+try:
+    import lz4.frame
+
+    LZ4_AVAILABLE = True
+except ImportError:
+    LZ4_AVAILABLE = False
+
+CODEC_MAGIC = b"\xacC"
+FORMAT_VERSION = 1
+
+# magic, format version, codec id, compression id
+_HEADER = struct.Struct("<2sBBB")
+
+CODEC_IDS = {"json": 0, "pickle": 1, "msgpack": 2}
+COMPRESSION_IDS = {"none": 0, "zlib": 1, "zstd": 2, "lz4": 3}
+
+# msgpack extension type codes
+_EXT_DATETIME = 1
+_EXT_DATE = 2
+_EXT_TUPLE = 3
+
+# JSON object that carries bytes
+_JSON_BYTES = "__bytes__"
+
+
+def _msgpack_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return msgpack.ExtType(
+            _EXT_DATETIME, value.isoformat().encode("utf-8")
+        )
+    if isinstance(value, date):
+        return msgpack.ExtType(_EXT_DATE, value.isoformat().encode("utf-8"))
+    if isinstance(value, tuple):
+        return msgpack.ExtType(_EXT_TUPLE, _msgpack_pack(list(value)))
+    raise TypeError(f"Cannot msgpack {type(value).__name__}")
+
+
+def _msgpack_ext_hook(code: int, data: bytes) -> Any:
+    if code == _EXT_DATETIME:
+        return datetime.fromisoformat(data.decode("utf-8"))
+    if code == _EXT_DATE:
+        return date.fromisoformat(data.decode("utf-8"))
+    if code == _EXT_TUPLE:
+        return tuple(_msgpack_unpack(data))
+    return msgpack.ExtType(code, data)
+
+
+def _msgpack_pack(value: Any) -> bytes:
+    # strict_types sends tuples and dict subclasses to the default hook
+    return msgpack.packb(
+        value, default=_msgpack_default, strict_types=True, use_bin_type=True
+    )
+
+
+def _msgpack_unpack(data: bytes) -> Any:
+    return msgpack.unpackb(
+        data, ext_hook=_msgpack_ext_hook, raw=False, strict_map_key=False
+    )
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return {_JSON_BYTES: base64.b64encode(value).decode("ascii")}
+    return str(value)
+
+
+def _json_object_hook(value: Dict[str, Any]) -> Any:
+    if len(value) == 1 and _JSON_BYTES in value:
+        return base64.b64decode(value[_JSON_BYTES])
+    return value
+
+
+def _resolve_codec(name: str) -> str:
+    if name == "auto":
+        return "msgpack" if MSGPACK_AVAILABLE else "json"
+    if name not in CODEC_IDS:
+        raise ValueError(f"Unknown cache codec: {name}")
+    if name == "msgpack" and not MSGPACK_AVAILABLE:
+        logger.warning("CACHE_CODEC_FALLBACK: msgpack missing, using json")
+        return "json"
+    return name
+
+
+def _resolve_compression(name: str) -> str:
+    if name == "auto":
+        if ZSTD_AVAILABLE:
+            return "zstd"
+        return "lz4" if LZ4_AVAILABLE else "zlib"
+    if name not in COMPRESSION_IDS:
+        raise ValueError(f"Unknown cache compression: {name}")
+    if (name == "zstd" and not ZSTD_AVAILABLE) or (
+        name == "lz4" and not LZ4_AVAILABLE
+    ):
+        logger.warning(f"CACHE_CODEC_FALLBACK: {name} missing, using zlib")
+        return "zlib"
+    return name
+
+
+class CacheCodec:
+    """Encodes cache values to versioned, optionally compressed bytes.
+
+    ``allow_pickle`` defaults to whether pickle was chosen explicitly;
+    otherwise pickle payloads are refused, whoever wrote them.
+    """
+
+    def __init__(
+        self,
+        codec: str = "auto",
+        compression: str = "auto",
+        compress_threshold: int = 4096,
+        allow_pickle: Optional[bool] = None,
+    ):
+        self.codec = _resolve_codec(codec)
+        self.allow_pickle = (
+            self.codec == "pickle" if allow_pickle is None else allow_pickle
+        )
+        self.compression = _resolve_compression(compression)
+        self.compress_threshold = compress_threshold
+
+        self._zstd_compressor = self._zstd_decompressor = None
+        if ZSTD_AVAILABLE:
+            self._zstd_compressor = zstandard.ZstdCompressor(level=3)
+            self._zstd_decompressor = zstandard.ZstdDecompressor()
+
+        self.stats = {
+            "encoded": 0,
+            "decoded": 0,
+            "compressed": 0,
+            "legacy_decoded": 0,
+            "pickle_rejected": 0,
+        }
+
+    def _serialize(self, value: Any) -> Tuple[str, bytes]:
+        if self.codec == "msgpack":
+            return "msgpack", _msgpack_pack(value)
+        if self.codec == "json":
+            return "json", json.dumps(value, default=_json_default).encode(
+                "utf-8"
+            )
+        return "pickle", pickle.dumps(value, protocol=5)
+
+    def _compress(self, body: bytes) -> Tuple[str, bytes]:
+        if self.compression == "none" or len(body) < self.compress_threshold:
+            return "none", body
+        if self.compression == "zstd":
+            return "zstd", self._zstd_compressor.compress(body)
+        if self.compression == "lz4":
+            return "lz4", lz4.frame.compress(body)
+        return "zlib", zlib.compress(body, 6)
+
+    def encode(self, value: Any) -> bytes:
+        codec, body = self._serialize(value)
+        compression, body = self._compress(body)
+        if compression != "none":
+            self.stats["compressed"] += 1
+        self.stats["encoded"] += 1
+        return (
+            _HEADER.pack(
+                CODEC_MAGIC,
+                FORMAT_VERSION,
+                CODEC_IDS[codec],
+                COMPRESSION_IDS[compression],
+            )
+            + body
+        )
+
+    def decode(self, payload: Union[bytes, str]) -> Any:
+        if isinstance(payload, str) or not payload.startswith(CODEC_MAGIC):
+            # Written before the codec layer: plain JSON text
+            self.stats["legacy_decoded"] += 1
+            return json.loads(payload, object_hook=_json_object_hook)
+
+        _, version, codec_id, compression_id = _HEADER.unpack_from(payload)
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported cache format version {version}")
+        if codec_id == CODEC_IDS["pickle"] and not self.allow_pickle:
+            self.stats["pickle_rejected"] += 1
+            raise ValueError("pickle cache payloads are disabled")
+
+        body = self._decompress(
+            compression_id, memoryview(payload)[_HEADER.size :]
+        )
+        self.stats["decoded"] += 1
+
+        if codec_id == CODEC_IDS["pickle"]:
+            return pickle.loads(body)
+        if codec_id == CODEC_IDS["msgpack"]:
+            if not MSGPACK_AVAILABLE:
+                raise ValueError("msgpack payload but msgpack is missing")
+            return _msgpack_unpack(body)
+        if codec_id == CODEC_IDS["json"]:
+            return json.loads(bytes(body), object_hook=_json_object_hook)
+        raise ValueError(f"Unknown cache codec id {codec_id}")
+
+    def _decompress(self, compression_id: int, body: memoryview) -> Any:
+        if compression_id == COMPRESSION_IDS["none"]:
+            return body
+        if compression_id == COMPRESSION_IDS["zlib"]:
+            return zlib.decompress(body)
+        if compression_id == COMPRESSION_IDS["zstd"] and ZSTD_AVAILABLE:
+            return self._zstd_decompressor.decompress(body)
+        if compression_id == COMPRESSION_IDS["lz4"] and LZ4_AVAILABLE:
+            return lz4.frame.decompress(body)
+        raise ValueError(f"Unsupported cache compression id {compression_id}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "codec": self.codec,
+            "compression": self.compression,
+            "compress_threshold": self.compress_threshold,
+            "allow_pickle": self.allow_pickle,
+            **self.stats,
+        }
@@ -0,0 +1,151 @@
+"""
+Canonical cache keys shared by the astro services.
+
+Every key is a readable prefix plus a 128-bit digest of canonical fields.
+The prefix selects the memory-cache namespace. Field values are
+normalized before hashing, so equivalent requests map to the same key:
+
+- Datetimes become UTC instants at second precision. A naive datetime is
+  read in the supplied timezone (UTC when there is none).
+- Coordinates are quantized to ``CACHE_COORD_PRECISION`` decimals. The
+  default of 4 is about 11 m, far below any effect on a chart.
+- Enums contribute their value, and floats their shortest repr.
+- Chart ids also cover house system, zodiac type, the key schema version
+  and the ephemeris engine version. An engine upgrade therefore starts
+  with fresh entries instead of stale ones.
+
+Fields are joined with length prefixes, which rules out the ambiguity of
+``"a=b:c"``-style concatenation. The digest is xxh3-128 when ``xxhash``
+is installed and blake2b-128 otherwise.
+"""
+
+import hashlib
+import importlib.metadata
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Dict, Optional, Union
+
+import pytz
+
+from app.core.config import settings
+
+try:
+    import xxhash
+
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+
+# Bump when the canonical form changes; old keys then simply miss
+KEY_SCHEMA_VERSION = 1
+
+
+def _engine_version() -> str:
+    for package in ("kerykeion", "pyswisseph"):
+        try:
+            return f"{package}-{importlib.metadata.version(package)}"
+        except importlib.metadata.PackageNotFoundError:
+            continue
+    return "none"
+
+
+ENGINE_VERSION = _engine_version()
+
+
+def fast_hash(data: bytes) -> str:
+    """128-bit non-cryptographic digest as 32 hex characters."""
+    if XXHASH_AVAILABLE:
+        return xxhash.xxh3_128_hexdigest(data)
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def utc_instant(
+    value: Union[datetime, date, str], timezone: Optional[str] = None
+) -> str:
+    """ISO UTC instant (``YYYY-MM-DDTHH:MM:SSZ``) for a moment in time."""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    elif not isinstance(value, datetime):
+        return value.isoformat()
+
+    if value.tzinfo is None:
+        try:
+            zone = pytz.timezone(timezone) if timezone else pytz.UTC
+        except pytz.UnknownTimeZoneError:
+            zone = pytz.UTC
+        value = zone.localize(value)
+    value = value.astimezone(pytz.UTC)
+    return value.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def quantize_coordinate(value: float, precision: Optional[int] = None) -> str:
+    """Coordinate rounded to the configured precision, as text."""
+    if precision is None:
+        precision = settings.CACHE_COORD_PRECISION
+    text = f"{float(value):.{precision}f}"
+    # -0.0000 and 0.0000 are the same place
+    return text.lstrip("-") if float(text) == 0 else text
+
+
+def canonical(value: Any) -> str:
+    """Canonical text form of a key field value."""
+    if isinstance(value, Enum):
+        value = value.value
+    if value is None:
+        return "~"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, (datetime, date)):
+        return utc_instant(value)
+    if isinstance(value, float):
+        return repr(value)
+    if isinstance(value, (list, tuple)):
+        return "[" + ",".join(canonical(item) for item in value) + "]"
+    return str(value)
+
+
+def build_key(prefix: str, **fields: Any) -> str:
+    """``prefix:<digest>`` over the canonical, sorted fields."""
+    parts = [f"v{KEY_SCHEMA_VERSION}", prefix]
+    for name, value in sorted(fields.items()):
+        parts.append(name)
+        parts.append(canonical(value))
+    payload = "".join(f"{len(part)}:{part}" for part in parts)
+    return f"{prefix}:{fast_hash(payload.encode('utf-8'))}"
+
+
+def chart_id(
+    birth_datetime: Union[datetime, str],
+    latitude: float,
+    longitude: float,
+    timezone: Optional[str] = "Europe/Moscow",
+    house_system: Any = "Placidus",
+    zodiac_type: Any = "Tropical",
+) -> str:
+    """Stable id of a natal chart, independent of how it was requested."""
+    return build_key(
+        "chart",
+        instant=utc_instant(birth_datetime, timezone),
+        lat=quantize_coordinate(latitude),
+        lng=quantize_coordinate(longitude),
+        house_system=canonical(house_system),
+        zodiac=canonical(zodiac_type),
+        engine=ENGINE_VERSION,
+    ).split(":", 1)[1]
+
+
+def chart_id_from_data(natal_chart: Dict[str, Any]) -> str:
+    """Chart id for natal chart data in either of its dict shapes."""
+    # Full chart data keeps the birth data under "subject_info"
+    info = natal_chart.get("subject_info") or natal_chart
+    coordinates = info.get("coordinates") or {}
+    birth_datetime = info.get("birth_datetime") or "2000-01-01T12:00:00"
+
+    return chart_id(
+        birth_datetime,
+        coordinates.get("latitude", info.get("latitude", 0.0)),
+        coordinates.get("longitude", info.get("longitude", 0.0)),
+        info.get("timezone", "Europe/Moscow"),
+        info.get("house_system", "Placidus"),
+        info.get("zodiac_type", "Tropical"),
+    )
@@ -1,12 +1,14 @@
 """Caching service for IoT device data and analytics."""
 
 import asyncio
-import json
-from datetime import datetime, timedelta
 from typing import Any, Dict, Optional
 
 from loguru import logger
 
+from app.core.config import settings
+from app.services.cache_codec import CacheCodec
+from app.services.memory_cache import MemoryCache
+
 try:
     import redis.asyncio as redis
 
@@ -21,16 +23,24 @@ class CacheService:
 
     def __init__(self, redis_url: Optional[str] = None):
         self.redis_client: Optional[redis.Redis] = None
-        self.memory_cache: Dict[str, Dict[str, Any]] = {}
-        self.cache_expiry: Dict[str, datetime] = {}
-        self.max_memory_items = 1000
+        self.memory = MemoryCache(
+            max_bytes=settings.MEMORY_CACHE_MAX_MB * 1024 * 1024,
+            quotas=settings.MEMORY_CACHE_QUOTAS,
+            policies=settings.MEMORY_CACHE_POLICIES,
+        )
+        self.codec = CacheCodec(
+            settings.CACHE_CODEC,
+            settings.CACHE_COMPRESSION,
+            settings.CACHE_COMPRESS_THRESHOLD,
+        )
         self._cleanup_task: Optional[asyncio.Task] = None
 
         # Try to initialize Redis if available and configured
         if REDIS_AVAILABLE and redis_url:
             try:
+                # Binary client: values are encoded by the cache codec
                 self.redis_client = redis.from_url(
-                    redis_url, decode_responses=True
+                    redis_url, decode_responses=False
                 )
                 logger.info("Redis cache initialized")
             except Exception as e:
@@ -61,17 +71,11 @@ class CacheService:
             if self.redis_client:
                 value = await self.redis_client.get(key)
                 if value:
-                    return json.loads(value)
+                    return self.codec.decode(value)
                 return None
             else:
                 # Use memory cache
-                if key in self.cache_expiry:
-                    if datetime.utcnow() > self.cache_expiry[key]:
-                        # Expired
-                        await self.delete(key)
-                        return None
-
-                return self.memory_cache.get(key, {}).get("value")
+                return self.memory.get(key)
 
         except Exception as e:
             logger.error(f"Cache get error for key {key}: {e}")
@@ -84,25 +88,13 @@ class CacheService:
         self._ensure_cleanup_task()
         try:
             if self.redis_client:
-                serialized_value = json.dumps(value, default=str)
                 await self.redis_client.setex(
-                    key, expiry_seconds, serialized_value
+                    key, expiry_seconds, self.codec.encode(value)
                 )
                 return True
             else:
-                # Use memory cache
-                if len(self.memory_cache) >= self.max_memory_items:
-                    # Remove oldest entries
-                    await self._cleanup_oldest_entries()
-
-                self.memory_cache[key] = {
-                    "value": value,
-                    "created_at": datetime.utcnow(),
-                }
-                self.cache_expiry[key] = datetime.utcnow() + timedelta(
-                    seconds=expiry_seconds
-                )
-                return True
+                # Use memory cache (evicts LRU entries when over quota)
+                return self.memory.set(key, value, expiry_seconds)
 
         except Exception as e:
             logger.error(f"Cache set error for key {key}: {e}")
@@ -116,8 +108,7 @@ class CacheService:
                 return True
             else:
                 # Use memory cache
-                self.memory_cache.pop(key, None)
-                self.cache_expiry.pop(key, None)
+                self.memory.delete(key)
                 return True
 
         except Exception as e:
@@ -196,44 +187,17 @@ class CacheService:
         while True:
             try:
                 await asyncio.sleep(300)  # Cleanup every 5 minutes
-                now = datetime.utcnow()
-                expired_keys = [
-                    key
-                    for key, expiry in self.cache_expiry.items()
-                    if now > expiry
-                ]
-
-                for key in expired_keys:
-                    await self.delete(key)
+                # Pops only due entries from the expiry heap
+                expired = self.memory.expire()
 
-                if expired_keys:
-                    logger.debug(
-                        f"Cleaned up {len(expired_keys)} expired cache entries"
-                    )
+                if expired:
+                    logger.debug(f"Cleaned up {expired} expired cache entries")
 
             except asyncio.CancelledError:
                 break
             except Exception as e:
                 logger.error(f"Cache cleanup error: {e}")
 
-    async def _cleanup_oldest_entries(self):
-        """Remove oldest entries when memory cache is full."""
-        if not self.memory_cache:
-            return
-
-        # Sort by creation time and remove oldest 10%
-        entries_by_age = sorted(
-            [
-                (key, data["created_at"])
-                for key, data in self.memory_cache.items()
-            ],
-            key=lambda x: x[1],
-        )
-
-        remove_count = max(1, len(entries_by_age) // 10)
-        for key, _ in entries_by_age[:remove_count]:
-            await self.delete(key)
-
     async def shutdown(self):
         """Shutdown cache service."""
         if self._cleanup_task:
@@ -0,0 +1,211 @@
+"""
+Warm-start snapshot of the in-process cache tier.
+
+On shutdown (and periodically) the hottest L1 entries are written to a
+local file. On startup the file is memory-mapped, and only its index is
+read. A value is decoded from the mapping the first time it is asked
+for and then promoted to L1. A fresh pod therefore serves warm
+latencies as soon as the file is mapped, instead of after minutes of
+recomputation.
+
+File layout (little-endian):
+
+- 64-byte header: magic, snapshot format version, cache key schema
+  version, ephemeris engine version, write time, entry count and index
+  length.
+- Index: JSON list of ``[key, offset, length, expires_at, tags]``.
+  ``expires_at`` is wall-clock time (0 means no expiry), so TTLs carry
+  over across restarts.
+- Payloads: cache codec output, which carries its own format header.
+
+A snapshot written by another format, key schema or engine version is
+ignored, since its keys or values would not match this process.
+"""
+
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from loguru import logger
+
+from app.services.cache_codec import CacheCodec
+from app.services.cache_keys import ENGINE_VERSION, KEY_SCHEMA_VERSION
+
+SNAPSHOT_MAGIC = b"ASTSNAP\x00"
+SNAPSHOT_FORMAT_VERSION = 1
+
+# magic, format version, key schema version, engine version, written at,
+# entry count, index length
+_HEADER = struct.Struct("<8sHH32sdII")
+HEADER_SIZE = 64
+
+# (key, value, remaining ttl in seconds or None, tags)
+SnapshotItem = Tuple[str, Any, Optional[float], Iterable[str]]
+
+
+class SnapshotError(Exception):
+    """Snapshot file is missing, corrupt or from another version."""
+
+
+def write_snapshot(
+    path: str,
+    items: Iterable[SnapshotItem],
+    codec: CacheCodec,
+    max_bytes: Optional[int] = None,
+) -> int:
+    """
+    Write items, hottest first, until ``max_bytes`` of payload.
+
+    The file is written next to ``path`` and renamed over it, so readers
+    never see a partial snapshot. Returns the number of entries written.
+    """
+    now = time.time()
+    index: List[list] = []
+    payloads: List[bytes] = []
+    offset = 0
+    for key, value, remaining_ttl, tags in items:
+        try:
+            payload = codec.encode(value)
+        except Exception as e:
+            logger.debug(f"CACHE_SNAPSHOT_SKIP: {key}: {e}")
+            continue
+        if max_bytes is not None and offset + len(payload) > max_bytes:
+            break
+        expires_at = now + remaining_ttl if remaining_ttl else 0
+        index.append([key, offset, len(payload), expires_at, sorted(tags)])
+        payloads.append(payload)
+        offset += len(payload)
+
+    index_bytes = json.dumps(index, separators=(",", ":")).encode("utf-8")
+    header = _HEADER.pack(
+        SNAPSHOT_MAGIC,
+        SNAPSHOT_FORMAT_VERSION,
+        KEY_SCHEMA_VERSION,
+        ENGINE_VERSION.encode("ascii")[:32],
+        now,
+        len(index),
+        len(index_bytes),
+    ).ljust(HEADER_SIZE, b"\x00")
+
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    temporary = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+    with open(temporary, "wb") as handle:
+        handle.write(header)
+        handle.write(index_bytes)
+        for payload in payloads:
+            handle.write(payload)
+    os.replace(temporary, target)
+    return len(index)
+
+
+class CacheSnapshot:
+    """Memory-mapped snapshot whose values are decoded on first use."""
+
+    def __init__(self, path: str, codec: CacheCodec):
+        self.path = str(path)
+        self.codec = codec
+        self._lock = threading.Lock()
+        try:
+            with open(self.path, "rb") as handle:
+                self._mmap = mmap.mmap(
+                    handle.fileno(), 0, access=mmap.ACCESS_READ
+                )
+        except (OSError, ValueError) as e:
+            raise SnapshotError(f"Cannot map {self.path}: {e}") from e
+
+        try:
+            self._index = self._read_index()
+        except Exception:
+            self._mmap.close()
+            raise
+
+    def _read_index(self) -> Dict[str, Tuple[int, int, float, List[str]]]:
+        if len(self._mmap) < HEADER_SIZE:
+            raise SnapshotError(f"{self.path} is too small")
+        (
+            magic,
+            version,
+            key_schema,
+            engine,
+            self.written_at,
+            count,
+            index_length,
+        ) = _HEADER.unpack_from(self._mmap)
+
+        if magic != SNAPSHOT_MAGIC:
+            raise SnapshotError(f"{self.path} is not a cache snapshot")
+        engine = engine.rstrip(b"\x00").decode("ascii")
+        expected = ENGINE_VERSION.encode("ascii")[:32].decode("ascii")
+        if (
+            version != SNAPSHOT_FORMAT_VERSION
+            or key_schema != KEY_SCHEMA_VERSION
+            or engine != expected
+        ):
+            raise SnapshotError(
+                f"{self.path} was written by format {version}, "
+                f"key schema {key_schema}, engine {engine}"
+            )
+
+        data_start = HEADER_SIZE + index_length
+        raw_index = json.loads(self._mmap[HEADER_SIZE:data_start])
+        if len(raw_index) != count:
+            raise SnapshotError(f"{self.path} index is truncated")
+
+        now = time.time()
+        index = {}
+        for key, offset, length, expires_at, tags in raw_index:
+            if expires_at and expires_at <= now:
+                continue
+            index[key] = (data_start + offset, length, expires_at, tags)
+        return index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, key: str) -> bool:
+        entry = self._index.get(key)
+        return entry is not None and not (entry[2] and entry[2] <= time.time())
+
+    def tags(self) -> Dict[str, List[str]]:
+        """Tags of the entries still in the snapshot."""
+        with self._lock:
+            return {key: entry[3] for key, entry in self._index.items()}
+
+    def take(self, key: str) -> Tuple[Optional[Any], Optional[float]]:
+        """
+        Decode an entry and forget it; returns (value, remaining ttl).
+
+        The caller promotes the value to L1, so each entry is decoded at
+        most once. Expired or undecodable entries read as a miss.
+        """
+        with self._lock:
+            entry = self._index.pop(key, None)
+            if entry is None:
+                return None, None
+            start, length, expires_at, _ = entry
+            payload = self._mmap[start : start + length]
+
+        remaining_ttl = expires_at - time.time() if expires_at else None
+        if remaining_ttl is not None and remaining_ttl <= 0:
+            return None, None
+        try:
+            return self.codec.decode(payload), remaining_ttl
+        except Exception as e:
+            logger.warning(f"CACHE_SNAPSHOT_DECODE_ERROR: {key}: {e}")
+            return None, None
+
+    def discard(self, key: str) -> None:
+        """Forget an entry, e.g. after its key was invalidated."""
+        with self._lock:
+            self._index.pop(key, None)
+
+    def close(self) -> None:
+        with self._lock:
+            self._index.clear()
+            self._mmap.close()
@@ -0,0 +1,169 @@
+"""
+Контекст вычисления одной карты.
+
+Все части карты (позиции, дома, аспекты, достоинства, арабские части,
+фиксированные звезды) берутся из одного контекста: каждая часть
+вычисляется при первом обращении и запоминается на время запроса.
+Субъект kerykeion строится один раз и хранится в небольшом LRU по ключу
+(момент UTC, широта, долгота, система домов), поэтому позиции и дома
+одной карты больше не создают два одинаковых субъекта.
+
+Моменты с часовым поясом приводятся к UTC, наивные считаются заданными
+в UTC — так же, как в пакетном API калькулятора.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from functools import cached_property
+from typing import Any, Dict, List, Tuple
+
+import pytz
+
+from app.services.astrology_calculator import (
+    AstrologyCalculator,
+    HouseSystem,
+    NatalChart,
+)
+from app.services.chart_snapshot import ChartSnapshot
+
+logger = logging.getLogger(__name__)
+
+SUBJECT_CACHE_SIZE = 128
+
+ChartKey = Tuple[str, float, float, str]
+
+_subjects: "OrderedDict[ChartKey, Any]" = OrderedDict()
+_subjects_lock = threading.Lock()
+_subject_stats = {"hits": 0, "misses": 0}
+
+
+def to_utc(moment: datetime) -> datetime:
+    """Момент в UTC; наивная дата считается заданной в UTC"""
+    if moment.tzinfo is None:
+        return pytz.UTC.localize(moment)
+    return moment.astimezone(pytz.UTC)
+
+
+def chart_key(
+    moment: datetime,
+    latitude: float,
+    longitude: float,
+    house_system: HouseSystem = HouseSystem.PLACIDUS,
+) -> ChartKey:
+    """Ключ карты: (момент UTC, широта, долгота, система домов)"""
+    return (
+        to_utc(moment).isoformat(),
+        round(float(latitude), 6),
+        round(float(longitude), 6),
+        house_system.value,
+    )
+
+
+def get_subject_stats() -> Dict[str, int]:
+    with _subjects_lock:
+        return {**_subject_stats, "size": len(_subjects)}
+
+
+def clear_subject_cache() -> None:
+    with _subjects_lock:
+        _subjects.clear()
+        _subject_stats.update(hits=0, misses=0)
+
+
+class ChartContext:
+    """Мемоизированные части одной карты для одного запроса"""
+
+    def __init__(
+        self,
+        calculator: AstrologyCalculator,
+        moment: datetime,
+        latitude: float,
+        longitude: float,
+        house_system: HouseSystem = HouseSystem.PLACIDUS,
+    ):
+        self.calculator = calculator
+        self.moment = to_utc(moment)
+        self.latitude = latitude
+        self.longitude = longitude
+        self.house_system = house_system
+        self.key = chart_key(moment, latitude, longitude, house_system)
+
+    @cached_property
+    def subject(self) -> Any:
+        """Субъект kerykeion из общего LRU (None для других бэкендов)"""
+        if self.calculator.backend != "kerykeion":
+            return None
+
+        with _subjects_lock:
+            subject = _subjects.get(self.key)
+            if subject is not None:
+                _subjects.move_to_end(self.key)
+                _subject_stats["hits"] += 1
+                return subject
+            _subject_stats["misses"] += 1
+
+        try:
+            subject = self.calculator.create_subject(
+                self.moment, self.latitude, self.longitude
+            )
+        except Exception as e:
+            logger.warning(f"CHART_CONTEXT_SUBJECT_ERROR: {e}")
+            return None
+
+        with _subjects_lock:
+            _subjects[self.key] = subject
+            while len(_subjects) > SUBJECT_CACHE_SIZE:
+                _subjects.popitem(last=False)
+        return subject
+
+    @cached_property
+    def planets(self) -> Dict[str, Dict[str, Any]]:
+        return self.calculator.calculate_planet_positions(
+            self.moment, self.latitude, self.longitude, subject=self.subject
+        )
+
+    @cached_property
+    def houses(self) -> Dict[Any, Dict[str, Any]]:
+        return self.calculator.calculate_houses(
+            self.moment,
+            self.latitude,
+            self.longitude,
+            self.house_system,
+            subject=self.subject,
+        )
+
+    @cached_property
+    def aspects(self) -> List[Dict[str, Any]]:
+        return self.calculator.calculate_aspects(self.planets)
+
+    @cached_property
+    def dignities(self) -> Dict[str, Dict[str, str]]:
+        return self.calculator.calculate_dignities(self.planets)
+
+    @cached_property
+    def arabic_parts(self) -> Dict[str, float]:
+        return self.calculator.calculate_arabic_parts_for(
+            self.planets, self.houses
+        )
+
+    @cached_property
+    def fixed_stars(self) -> List[Dict[str, Any]]:
+        return self.calculator.calculate_fixed_stars(
+            self.moment, self.latitude, self.longitude
+        )
+
+    @cached_property
+    def snapshot(self) -> ChartSnapshot:
+        """Компактный снимок позиций и домов для кэшей"""
+        return ChartSnapshot.from_context(self)
+
+    def fill_chart(self, chart: NatalChart) -> NatalChart:
+        """Заполняет натальную карту частями из контекста"""
+        chart.planets = self.planets
+        chart.houses = self.houses
+        chart.aspects = self.aspects
+        chart.arabic_parts = self.arabic_parts
+        chart.fixed_stars = self.fixed_stars
+        return chart
@@ -0,0 +1,295 @@
+"""
+Process-pool backend for CPU-bound chart calculations.
+
+Kerykeion subject construction is pure Python and holds the GIL, so a
+thread pool cannot run several charts at once. This module keeps a pool
+of warm worker processes. Each worker imports swisseph/kerykeion once,
+opens the ephemeris files and builds a single KerykeionService instance.
+Results come back as compact CacheCodec payloads: pickle protocol 5
+between trusted processes, compressed above the codec threshold. Unlike
+JSON this keeps integer house numbers and datetimes, so results equal
+those of the thread-pool path.
+
+Submissions are bounded: at most ``max_pending`` tasks can be in flight.
+Callers beyond that wait for a slot (backpressure). If no slot frees up
+within ``submit_timeout`` they get ``PoolSaturatedError``. Every task
+reports the worker PID and its run time, and these feed the per-worker
+metrics returned by ``get_stats()``.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from loguru import logger
+
+from app.services.cache_codec import CacheCodec
+
+# Worker-process state (populated by the pool initializer)
+_worker_service: Any = None
+_worker_started_at: float = 0.0
+
+
+class PoolSaturatedError(RuntimeError):
+    """Raised when no submission slot frees up within the timeout."""
+
+
+# Worker results never leave this host, so pickle is safe here
+_payload_codec = CacheCodec("pickle", "auto", allow_pickle=True)
+
+
+def encode_payload(data: Any) -> bytes:
+    """Compact wire format for results: lossless CacheCodec payload."""
+    return _payload_codec.encode(data)
+
+
+def decode_payload(payload: bytes) -> Any:
+    return _payload_codec.decode(payload)
+
+
+def _init_worker(ephemeris_path: Optional[str]) -> None:
+    """Warm a worker: import heavy modules and open ephemeris files once."""
+    global _worker_service, _worker_started_at
+
+    try:
+        import swisseph as swe
+
+        if ephemeris_path and os.path.isdir(ephemeris_path):
+            swe.set_ephe_path(ephemeris_path)
+    except ImportError:
+        pass
+
+    from app.services.kerykeion_service import KerykeionService
+
+    _worker_service = KerykeionService()
+    _worker_started_at = time.time()
+
+
+def _run_task(func: Callable, args: Tuple) -> Tuple[int, float, Any]:
+    started = time.perf_counter()
+    result = func(*args)
+    return os.getpid(), time.perf_counter() - started, result
+
+
+def worker_info() -> Dict[str, Any]:
+    """Cheap task used to spawn and probe workers."""
+    return {
+        "pid": os.getpid(),
+        "warm": _worker_service is not None,
+        "started_at": _worker_started_at,
+    }
+
+
+def natal_chart_task(
+    name: str,
+    birth_datetime: str,
+    latitude: float,
+    longitude: float,
+    timezone: str,
+    house_system: str,
+    zodiac_type: str,
+) -> bytes:
+    """Full natal chart in a worker, returned as an encoded payload."""
+    from app.services.kerykeion_service import HouseSystem, ZodiacType
+
+    result = _worker_service.get_full_natal_chart_data(
+        name=name,
+        birth_datetime=datetime.fromisoformat(birth_datetime),
+        latitude=latitude,
+        longitude=longitude,
+        timezone=timezone,
+        house_system=HouseSystem(house_system),
+        zodiac_type=ZodiacType(zodiac_type),
+    )
+    return encode_payload(result)
+
+
+class ChartProcessPool:
+    """Bounded pool of warm worker processes with per-worker metrics."""
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        max_pending: int = 32,
+        submit_timeout: Optional[float] = 5.0,
+        ephemeris_path: Optional[str] = None,
+        start_method: str = "spawn",
+    ):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.submit_timeout = submit_timeout
+        self.ephemeris_path = ephemeris_path
+        self.start_method = start_method
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._slots_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending = 0
+
+        self.stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "rejected": 0,
+            "waited_for_slot": 0,
+            "peak_pending": 0,
+            "total_task_time": 0.0,
+            "total_queue_time": 0.0,
+        }
+        self.worker_stats: Dict[int, Dict[str, Any]] = {}
+
+        logger.info(
+            f"CHART_PROCESS_POOL_INIT: {max_workers} workers, "
+            f"{max_pending} pending slots"
+        )
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context(self.start_method),
+                initializer=_init_worker,
+                initargs=(self.ephemeris_path,),
+            )
+        return self._executor
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        # Semaphores are bound to the loop they were first awaited on
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._slots_loop is not loop:
+            self._slots = asyncio.Semaphore(
+                max(self.max_pending - self._pending, 0)
+            )
+            self._slots_loop = loop
+        return self._slots
+
+    async def submit(self, func: Callable, *args: Any) -> Any:
+        """Run a picklable module-level function in a worker process."""
+        slots = self._get_slots()
+        queued_at = time.perf_counter()
+
+        if not slots.locked():
+            await slots.acquire()
+        else:
+            # Backpressure: wait for a running task to finish
+            self.stats["waited_for_slot"] += 1
+            try:
+                await asyncio.wait_for(slots.acquire(), self.submit_timeout)
+            except asyncio.TimeoutError:
+                self.stats["rejected"] += 1
+                logger.warning(
+                    f"CHART_PROCESS_POOL_SATURATED: {self._pending} pending"
+                )
+                raise PoolSaturatedError(
+                    f"No free slot within {self.submit_timeout}s"
+                )
+
+        self._pending += 1
+        self.stats["submitted"] += 1
+        self.stats["peak_pending"] = max(
+            self.stats["peak_pending"], self._pending
+        )
+        self.stats["total_queue_time"] += time.perf_counter() - queued_at
+
+        try:
+            pid, task_time, result = await asyncio.wrap_future(
+                self.executor.submit(_run_task, func, args)
+            )
+        except Exception:
+            self.stats["failed"] += 1
+            raise
+        finally:
+            self._pending -= 1
+            slots.release()
+
+        self.stats["completed"] += 1
+        self.stats["total_task_time"] += task_time
+        worker = self.worker_stats.setdefault(
+            pid, {"tasks": 0, "total_time": 0.0, "max_time": 0.0}
+        )
+        worker["tasks"] += 1
+        worker["total_time"] += task_time
+        worker["max_time"] = max(worker["max_time"], task_time)
+        worker["last_seen"] = time.time()
+        return result
+
+    async def warm_up(self) -> int:
+        """Start every worker process ahead of the first real request."""
+        infos = await asyncio.gather(
+            *(self.submit(worker_info) for _ in range(self.max_workers))
+        )
+        pids = {info["pid"] for info in infos}
+        logger.info(f"CHART_PROCESS_POOL_WARM: {len(pids)} workers ready")
+        return len(pids)
+
+    async def calculate_natal_chart(
+        self,
+        name: str,
+        birth_datetime: datetime,
+        latitude: float,
+        longitude: float,
+        timezone: str,
+        house_system: Any,
+        zodiac_type: Any,
+    ) -> Dict[str, Any]:
+        """Full natal chart data computed in a worker process."""
+        payload = await self.submit(
+            natal_chart_task,
+            name,
+            birth_datetime.isoformat(),
+            latitude,
+            longitude,
+            timezone,
+            house_system.value,
+            zodiac_type.value,
+        )
+        return decode_payload(payload)
+
+    def get_stats(self) -> Dict[str, Any]:
+        completed = self.stats["completed"]
+        submitted = self.stats["submitted"]
+        workers = {
+            pid: {
+                "tasks": data["tasks"],
+                "average_task_time_ms": round(
+                    data["total_time"] / data["tasks"] * 1000, 2
+                ),
+                "max_task_time_ms": round(data["max_time"] * 1000, 2),
+                "last_seen": data.get("last_seen"),
+            }
+            for pid, data in self.worker_stats.items()
+        }
+        return {
+            "enabled": True,
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "pending": self._pending,
+            "peak_pending": self.stats["peak_pending"],
+            "submitted": submitted,
+            "completed": completed,
+            "failed": self.stats["failed"],
+            "rejected": self.stats["rejected"],
+            "waited_for_slot": self.stats["waited_for_slot"],
+            "average_task_time_ms": round(
+                self.stats["total_task_time"] / completed * 1000, 2
+            )
+            if completed
+            else 0.0,
+            "average_queue_time_ms": round(
+                self.stats["total_queue_time"] / submitted * 1000, 2
+            )
+            if submitted
+            else 0.0,
+            "workers": workers,
+        }
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+        logger.info("CHART_PROCESS_POOL_SHUTDOWN")
@@ -0,0 +1,344 @@
+"""
+Компактное представление натальной карты.
+
+ChartSnapshot хранит позиции тел массивами float64 в фиксированном
+порядке, знаки и дома — малыми целыми индексами, а не строками в каждой
+записи. Привычный словарь (как у calculate_planet_positions и
+calculate_houses) строится лениво, только когда нужен ответ API.
+Для кэшей есть двоичная сериализация: заголовок struct и сырые массивы,
+без JSON и повторяющихся названий знаков.
+"""
+
+import struct
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pytz
+
+from app.services.astrology_calculator import ZodiacSign
+
+SNAPSHOT_MAGIC = b"CHS1"
+
+# magic, число тел, флаг домов, момент (Unix, NaN если нет), широта, долгота
+_HEADER = struct.Struct("<4sHBddd")
+_LENGTH = struct.Struct("<H")
+
+SIGNS = tuple(ZodiacSign)
+
+# Индекс дома 0 — дом неизвестен (нет куспидов)
+NO_HOUSE = 0
+
+
+class SnapshotPoint:
+    """Тело карты: значения из массивов снимка"""
+
+    __slots__ = (
+        "name",
+        "longitude",
+        "latitude",
+        "speed",
+        "sign_index",
+        "house",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        longitude: float,
+        latitude: float,
+        speed: float,
+        sign_index: int,
+        house: int,
+    ):
+        self.name = name
+        self.longitude = longitude
+        self.latitude = latitude
+        self.speed = speed
+        self.sign_index = sign_index
+        self.house = house
+
+    @property
+    def sign(self) -> ZodiacSign:
+        return SIGNS[self.sign_index]
+
+    @property
+    def retrograde(self) -> bool:
+        return self.speed < 0
+
+    @property
+    def degree_in_sign(self) -> float:
+        return self.longitude % 30
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Словарь в формате calculate_planet_positions"""
+        data = {
+            "longitude": self.longitude,
+            "latitude": self.latitude,
+            "speed": self.speed,
+            "retrograde": self.retrograde,
+            "sign": self.sign.name_ru,
+            "degree_in_sign": self.degree_in_sign,
+        }
+        if self.house != NO_HOUSE:
+            data["house"] = self.house
+        return data
+
+
+def sign_indexes(longitudes: np.ndarray) -> np.ndarray:
+    """Индексы знаков 0..11 для массива долгот"""
+    return (np.floor_divide(longitudes % 360, 30) % 12).astype(np.int8)
+
+
+def house_indexes(longitudes: np.ndarray, cusps: np.ndarray) -> np.ndarray:
+    """Номера домов 1..12 для массива долгот по куспидам"""
+    spans = (np.roll(cusps, -1) - cusps) % 360
+    offsets = (longitudes[:, None] - cusps[None, :]) % 360
+    inside = offsets < spans[None, :]
+    houses = inside.argmax(axis=1) + 1
+    houses[~inside.any(axis=1)] = NO_HOUSE
+    return houses.astype(np.int8)
+
+
+class ChartSnapshot:
+    """Компактный снимок карты: массивы позиций, куспиды и углы"""
+
+    __slots__ = (
+        "moment",
+        "latitude",
+        "longitude",
+        "house_system",
+        "bodies",
+        "longitudes",
+        "latitudes",
+        "speeds",
+        "sign_indexes",
+        "house_indexes",
+        "cusps",
+        "angles",
+        "_planets",
+        "_houses",
+    )
+
+    def __init__(
+        self,
+        bodies: Sequence[str],
+        longitudes: Sequence[float],
+        latitudes: Optional[Sequence[float]] = None,
+        speeds: Optional[Sequence[float]] = None,
+        cusps: Optional[Sequence[float]] = None,
+        angles: Optional[Sequence[float]] = None,
+        moment: Optional[datetime] = None,
+        latitude: float = 0.0,
+        longitude: float = 0.0,
+        house_system: str = "P",
+    ):
+        count = len(bodies)
+        self.bodies = tuple(bodies)
+        self.longitudes = np.asarray(longitudes, dtype=np.float64)
+        self.latitudes = (
+            np.zeros(count)
+            if latitudes is None
+            else np.asarray(latitudes, dtype=np.float64)
+        )
+        self.speeds = (
+            np.zeros(count)
+            if speeds is None
+            else np.asarray(speeds, dtype=np.float64)
+        )
+        self.cusps = (
+            None if cusps is None else np.asarray(cusps, dtype=np.float64)
+        )
+        if self.cusps is not None and angles is None:
+            angles = (self.cusps[0], self.cusps[9])
+        self.angles = (
+            None if angles is None else np.asarray(angles, dtype=np.float64)
+        )
+        self.moment = moment
+        self.latitude = latitude
+        self.longitude = longitude
+        self.house_system = house_system
+
+        self.sign_indexes = sign_indexes(self.longitudes)
+        self.house_indexes = (
+            np.zeros(count, dtype=np.int8)
+            if self.cusps is None
+            else house_indexes(self.longitudes, self.cusps)
+        )
+        self._planets: Optional[Dict[str, Dict[str, Any]]] = None
+        self._houses: Optional[Dict[Any, Dict[str, Any]]] = None
+
+    @classmethod
+    def from_legacy(
+        cls,
+        planets: Dict[str, Dict[str, Any]],
+        houses: Optional[Dict[Any, Dict[str, Any]]] = None,
+        **metadata: Any,
+    ) -> "ChartSnapshot":
+        """Снимок из словарей calculate_planet_positions/calculate_houses"""
+        bodies = list(planets.keys())
+        cusps = angles = None
+        if houses and all(number in houses for number in range(1, 13)):
+            cusps = [houses[n]["cusp_longitude"] for n in range(1, 13)]
+            angles = (
+                houses.get("ascendant", {}).get("longitude", cusps[0]),
+                houses.get("midheaven", {}).get("longitude", cusps[9]),
+            )
+
+        return cls(
+            bodies,
+            [planets[name].get("longitude", 0) for name in bodies],
+            [planets[name].get("latitude", 0) for name in bodies],
+            [planets[name].get("speed", 0) for name in bodies],
+            cusps,
+            angles,
+            **metadata,
+        )
+
+    @classmethod
+    def from_context(cls, context: Any) -> "ChartSnapshot":
+        """Снимок из ChartContext (позиции и дома контекста)"""
+        return cls.from_legacy(
+            context.planets,
+            context.houses,
+            moment=context.moment,
+            latitude=context.latitude,
+            longitude=context.longitude,
+            house_system=context.house_system.value,
+        )
+
+    def __len__(self) -> int:
+        return len(self.bodies)
+
+    def __iter__(self) -> Iterator[SnapshotPoint]:
+        for index in range(len(self.bodies)):
+            yield self._point(index)
+
+    def _point(self, index: int) -> SnapshotPoint:
+        return SnapshotPoint(
+            self.bodies[index],
+            float(self.longitudes[index]),
+            float(self.latitudes[index]),
+            float(self.speeds[index]),
+            int(self.sign_indexes[index]),
+            int(self.house_indexes[index]),
+        )
+
+    def point(self, name: str) -> SnapshotPoint:
+        """Тело карты по имени"""
+        return self._point(self.bodies.index(name))
+
+    @property
+    def planets(self) -> Dict[str, Dict[str, Any]]:
+        """Позиции в привычном формате словаря (строятся один раз)"""
+        if self._planets is None:
+            self._planets = {point.name: point.to_dict() for point in self}
+        return self._planets
+
+    @property
+    def houses(self) -> Dict[Any, Dict[str, Any]]:
+        """Дома в формате calculate_houses (строятся один раз)"""
+        if self._houses is None:
+            self._houses = self._build_houses()
+        return self._houses
+
+    def _build_houses(self) -> Dict[Any, Dict[str, Any]]:
+        if self.cusps is None:
+            return {}
+
+        houses: Dict[Any, Dict[str, Any]] = {}
+        cusp_signs = sign_indexes(self.cusps)
+        for index, cusp in enumerate(self.cusps.tolist()):
+            houses[index + 1] = {
+                "cusp_longitude": cusp,
+                "sign": SIGNS[cusp_signs[index]].name_ru,
+                "degree_in_sign": cusp % 30,
+            }
+
+        angle_signs = sign_indexes(self.angles)
+        for index, name in enumerate(("ascendant", "midheaven")):
+            value = float(self.angles[index])
+            houses[name] = {
+                "longitude": value,
+                "sign": SIGNS[angle_signs[index]].name_ru,
+                "degree_in_sign": value % 30,
+            }
+        return houses
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Карта в формате словаря для ответов API"""
+        return {"planets": self.planets, "houses": self.houses}
+
+    def to_bytes(self) -> bytes:
+        """Двоичная сериализация для кэша"""
+        has_houses = self.cusps is not None
+        timestamp = (
+            self.moment.timestamp() if self.moment is not None else np.nan
+        )
+        parts: List[bytes] = [
+            _HEADER.pack(
+                SNAPSHOT_MAGIC,
+                len(self.bodies),
+                int(has_houses),
+                timestamp,
+                float(self.latitude),
+                float(self.longitude),
+            )
+        ]
+        for text in (self.house_system, "\0".join(self.bodies)):
+            encoded = text.encode("utf-8")
+            parts.append(_LENGTH.pack(len(encoded)))
+            parts.append(encoded)
+
+        arrays = [self.longitudes, self.latitudes, self.speeds]
+        if has_houses:
+            arrays.extend([self.cusps, self.angles])
+        parts.append(np.concatenate(arrays).astype("<f8").tobytes())
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, payload: bytes) -> "ChartSnapshot":
+        """Восстанавливает снимок из двоичной сериализации"""
+        (
+            magic,
+            count,
+            has_houses,
+            timestamp,
+            latitude,
+            longitude,
+        ) = _HEADER.unpack_from(payload)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError("Not a chart snapshot payload")
+
+        offset = _HEADER.size
+        texts = []
+        for _ in range(2):
+            (length,) = _LENGTH.unpack_from(payload, offset)
+            offset += _LENGTH.size
+            texts.append(payload[offset : offset + length].decode("utf-8"))
+            offset += length
+        house_system, names = texts
+
+        values = np.frombuffer(payload, dtype="<f8", offset=offset)
+        bodies = names.split("\0") if count else []
+        cusps = angles = None
+        if has_houses:
+            cusps = values[3 * count : 3 * count + 12]
+            angles = values[3 * count + 12 : 3 * count + 14]
+
+        return cls(
+            bodies,
+            values[:count],
+            values[count : 2 * count],
+            values[2 * count : 3 * count],
+            cusps,
+            angles,
+            moment=(
+                None
+                if np.isnan(timestamp)
+                else datetime.fromtimestamp(timestamp, tz=pytz.UTC)
+            ),
+            latitude=latitude,
+            longitude=longitude,
+            house_system=house_system,
+        )
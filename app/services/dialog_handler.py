@@ -17,7 +17,9 @@ from app.models.yandex_models import (
     YandexResponseModel,
 )
 from app.services.ai_horoscope_service import ai_horoscope_service
+from app.services.astro_cache_service import astro_cache
 from app.services.astrology_calculator import AstrologyCalculator
+from app.services.cache_keys import chart_id_from_data
 from app.services.compatibility_analyzer import CompatibilityAnalyzer, CompatibilityType
 from app.services.conversation_manager import ConversationManager
 from app.services.dialog_flow_manager import DialogFlowManager, DialogState
@@ -1998,6 +2000,12 @@ class DialogHandler:
             "aspects": enhanced_natal_chart.get("aspects", []),
         }
 
+        # Транзиты и прогрессии кэшируются по id карты: запоминаем связь
+        # с пользователем, чтобы удаление данных (GDPR) сбросило и их
+        await astro_cache.link_user_charts(
+            user_context.user_id, chart_id_from_data(chart_data)
+        )
+
         return chart_data
 
     def _extract_timing_advice_from_forecast(
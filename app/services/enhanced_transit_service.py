@@ -3,17 +3,29 @@
 Использует TransitsTimeRangeFactory для профессионального анализа транзитов.
 """
 
+import asyncio
 import logging
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional
 
 import pytz
 
-from app.services.astro_cache_service import astro_cache
-from app.services.astrology_calculator import AstrologyCalculator
+from app.services.aspect_engine import AspectHit, OrbTable, find_cross_aspects
+from app.services.astro_cache_service import astro_cache, chart_tag, date_tag
+from app.services.astrology_calculator import (
+    BATCH_BODIES,
+    AstrologyCalculator,
+    from_julian_day,
+    to_julian_days,
+)
 from app.services.async_kerykeion_service import async_kerykeion
+from app.services.cache_keys import chart_id_from_data
 from app.services.kerykeion_service import KerykeionService
+from app.services.mundane_calendar import RETROGRADE
 from app.services.performance_monitor import performance_monitor
+from app.services.sky_cache import get_sky_cache
+from app.services.transit_timeline import TransitTimeline
+from app.services.transit_timing import AspectWindow
 
 logger = logging.getLogger(__name__)
 
@@ -48,6 +60,7 @@ class TransitService:
         self.kerykeion_service = KerykeionService()
         self.async_kerykeion = async_kerykeion
         self.astro_calculator = AstrologyCalculator()
+        self.sky_cache = get_sky_cache()
         self.logger = logging.getLogger(__name__)
 
         # Орбы для транзитных аспектов (более точные для профессиональной астрологии)
@@ -65,6 +78,14 @@ class TransitService:
             180: 8,  # Оппозиция
         }
 
+        # Орбис, в пределах которого транзит медленной планеты активен
+        self.important_transit_orb = 2
+        self.important_aspect_angles = [0, 60, 90, 120, 180]
+
+        # Окна линии транзитов старше этого срока до ее горизонта
+        # не хранятся
+        self.timeline_retention_days = 180
+
         # Performance optimization settings
         self.enable_caching = True
         self.cache_ttl_hours = {
@@ -264,48 +285,47 @@ class TransitService:
                 f"ENHANCED_TRANSIT_SERVICE_CURRENT_START: {transit_date.strftime('%Y-%m-%d')}"
             )
 
-            # Generate cache key
-            natal_chart_id = self._generate_chart_cache_key(natal_chart)
-
-            # Check cache first if enabled
-            if use_cache and self.enable_caching:
-                cached_result = await astro_cache.get_current_transits(
-                    natal_chart_id=natal_chart_id,
-                    transit_date=transit_date,
-                    include_minor=include_minor_aspects,
-                )
-
-                if cached_result:
-                    performance_monitor.end_operation(
-                        op_id, success=True, cache_hit=True
+            computed = False
+
+            async def compute() -> Dict[str, Any]:
+                nonlocal computed
+                computed = True
+                if self.is_available():
+                    return await self._get_kerykeion_transits_async(
+                        natal_chart,
+                        transit_date,
+                        include_minor_aspects,
+                        use_cache,
                     )
-                    logger.info("ENHANCED_TRANSIT_SERVICE_CURRENT_CACHED")
-                    return cached_result
-
-            # Calculate transits
-            if self.is_available():
-                result = await self._get_kerykeion_transits_async(
-                    natal_chart, transit_date, include_minor_aspects
-                )
-            else:
-                logger.warning(
-                    "ENHANCED_TRANSIT_SERVICE_FALLBACK: Using basic calculator"
-                )
-                result = await self._get_basic_transits_async(
-                    natal_chart, transit_date
+                # Без Kerykeion транзиты берутся из линии транзитов карты
+                (result,) = await self._query_timeline(
+                    natal_chart,
+                    lambda timeline: self._timeline_daily_transits(
+                        timeline, [transit_date]
+                    ),
+                    use_cache,
                 )
+                return result
 
-            # Cache successful results
-            if use_cache and self.enable_caching and not result.get("error"):
-                await astro_cache.set_current_transits(
-                    natal_chart_id=natal_chart_id,
-                    transit_date=transit_date,
-                    transit_data=result,
-                    include_minor=include_minor_aspects,
+            if use_cache and self.enable_caching:
+                # Read-through with coalescing of concurrent identical requests
+                natal_chart_id = self._generate_chart_cache_key(natal_chart)
+                result = await astro_cache.get_or_compute(
+                    astro_cache.current_transits_key(
+                        natal_chart_id, transit_date, include_minor_aspects
+                    ),
+                    compute,
+                    category="current_transits",
+                    cache_if=lambda transits: not transits.get("error"),
+                    tags=[chart_tag(natal_chart_id), date_tag(transit_date)],
                 )
+            else:
+                result = await compute()
 
+            if not computed:
+                logger.info("ENHANCED_TRANSIT_SERVICE_CURRENT_CACHED")
             performance_monitor.end_operation(
-                op_id, success=True, cache_hit=False
+                op_id, success=True, cache_hit=not computed
             )
             return result
 
@@ -377,18 +397,15 @@ class TransitService:
                 )
                 return self._get_basic_transits(natal_chart, transit_date)
 
-            # Создаем эфемериды для периода транзитов
-            start_date = transit_date - timedelta(days=1)
-            end_date = transit_date + timedelta(days=1)
-
             if EphemerisDataFactory:
-                ephemeris_factory = EphemerisDataFactory(
-                    start_datetime=start_date,
-                    end_datetime=end_date,
-                    step_type="hours",
-                    step=6,  # Каждые 6 часов для точности
+                # Эфемериды периода не зависят от пользователя и берутся
+                # из общего кэша неба на часовую корзину момента
+                ephemeris_data = self.sky_cache.shared(
+                    "kerykeion_ephemeris",
+                    float(to_julian_days([transit_date])[0]),
+                    "outer",
+                    self._build_ephemeris_window,
                 )
-                ephemeris_data = ephemeris_factory.get_ephemeris_data()
 
                 # Создаем транзитную фабрику
                 if TransitsTimeRangeFactory:
@@ -416,6 +433,18 @@ class TransitService:
         # Fallback к базовому методу
         return self._get_basic_transits(natal_chart, transit_date)
 
+    @staticmethod
+    def _build_ephemeris_window(center_jd: float) -> List[Any]:
+        """Эфемериды Kerykeion на сутки по обе стороны от момента."""
+        center = from_julian_day(center_jd)
+        ephemeris_factory = EphemerisDataFactory(
+            start_datetime=center - timedelta(days=1),
+            end_datetime=center + timedelta(days=1),
+            step_type="hours",
+            step=6,  # Каждые 6 часов для точности
+        )
+        return ephemeris_factory.get_ephemeris_data()
+
     def _process_kerykeion_transit_results(
         self,
         transit_results: List[Any],
@@ -527,25 +556,21 @@ class TransitService:
         natal_planets = natal_chart.get("planets", {})
 
         # Получаем текущие позиции планет
-        current_positions = self.astro_calculator.calculate_planet_positions(
+        current_positions = self.astro_calculator.calculate_transit_positions(
             transit_date
         )
 
         active_transits = []
         approaching_transits = []
 
-        for transit_planet, transit_data in current_positions.items():
-            for natal_planet, natal_data in natal_planets.items():
-                aspects = self._calculate_basic_transit_aspects(
-                    transit_data, natal_data, transit_planet, natal_planet
-                )
-
-                for aspect in aspects:
-                    orb = aspect.get("orb", 10)
-                    if orb <= 2:
-                        active_transits.append(aspect)
-                    elif orb <= 8:
-                        approaching_transits.append(aspect)
+        for aspect in self._calculate_basic_transit_matrix(
+            current_positions, natal_planets
+        ):
+            orb = aspect.get("orb", 10)
+            if orb <= 2:
+                active_transits.append(aspect)
+            elif orb <= 8:
+                approaching_transits.append(aspect)
 
         # Combine all transits for aspects field
         all_aspects = active_transits[:10] + approaching_transits[:5]
@@ -576,43 +601,65 @@ class TransitService:
         natal_planet: str,
     ) -> List[Dict[str, Any]]:
         """Вычисляет аспекты базовым методом."""
-        aspects = []
-        transit_longitude = transit_data["longitude"]
-        natal_longitude = natal_data["longitude"]
+        return self._calculate_basic_transit_matrix(
+            {transit_planet: transit_data}, {natal_planet: natal_data}
+        )
 
-        # Вычисляем угол между планетами
-        angle = abs(transit_longitude - natal_longitude)
-        if angle > 180:
-            angle = 360 - angle
+    def _calculate_basic_transit_matrix(
+        self,
+        transit_positions: Dict[str, Dict[str, Any]],
+        natal_planets: Dict[str, Dict[str, Any]],
+    ) -> List[Dict[str, Any]]:
+        """Вычисляет все аспекты транзитных планет к натальным за один проход.
 
-        # Проверяем аспекты
-        for aspect_angle, orb in self.transit_orbs.items():
-            if abs(angle - aspect_angle) <= orb:
-                exactness = abs(angle - aspect_angle)
-
-                aspects.append(
-                    {
-                        "transit_planet": transit_planet,
-                        "natal_planet": natal_planet,
-                        "aspect": self._get_aspect_name(aspect_angle),
-                        "angle": aspect_angle,
-                        "orb": exactness,
-                        "exact_angle": angle,
-                        "influence": self._get_enhanced_transit_influence(
-                            transit_planet,
-                            natal_planet,
-                            self._get_aspect_name(aspect_angle),
-                        ),
-                        "strength": self._calculate_enhanced_aspect_strength(
-                            exactness, aspect_angle
-                        ),
-                        "nature": self._get_enhanced_aspect_nature(
-                            self._get_aspect_name(aspect_angle)
-                        ),
-                    }
-                )
+        Матрица расстояний транзит × натал строится движком аспектов один
+        раз; учитываются все аспекты в пределах орбисов transit_orbs.
+        """
+        transit_names = list(transit_positions.keys())
+        natal_names = list(natal_planets.keys())
+        table = OrbTable.from_orbs(self.transit_orbs)
+
+        return [
+            self._transit_aspect_record(
+                transit_names[hit.first], natal_names[hit.second], hit, table
+            )
+            for hit in find_cross_aspects(
+                [
+                    transit_positions[name]["longitude"]
+                    for name in transit_names
+                ],
+                [natal_planets[name]["longitude"] for name in natal_names],
+                table,
+                first_match=False,
+            )
+        ]
 
-        return aspects
+    def _transit_aspect_record(
+        self,
+        transit_planet: str,
+        natal_planet: str,
+        hit: AspectHit,
+        table: OrbTable,
+    ) -> Dict[str, Any]:
+        """Формирует запись транзитного аспекта по попаданию движка."""
+        aspect_angle = table[hit.aspect].angle
+        aspect_name = self._get_aspect_name(aspect_angle)
+
+        return {
+            "transit_planet": transit_planet,
+            "natal_planet": natal_planet,
+            "aspect": aspect_name,
+            "angle": aspect_angle,
+            "orb": hit.orb,
+            "exact_angle": hit.separation,
+            "influence": self._get_enhanced_transit_influence(
+                transit_planet, natal_planet, aspect_name
+            ),
+            "strength": self._calculate_enhanced_aspect_strength(
+                hit.orb, aspect_angle
+            ),
+            "nature": self._get_enhanced_aspect_nature(aspect_name),
+        }
 
     def _calculate_transit_aspect(
         self, transit_longitude: float, natal_longitude: float, include_minor: bool
@@ -755,6 +802,167 @@ class TransitService:
         meaning = house_meanings.get(house_num, "неизвестное влияние")
         return f"{planet.capitalize()} {meaning}"
 
+    async def _get_daily_transits_many(
+        self,
+        natal_chart: Dict[str, Any],
+        natal_chart_id: str,
+        dates: List[datetime],
+        use_cache: bool = True,
+    ) -> List[Dict[str, Any]]:
+        """
+        Транзиты на несколько дат с пакетным чтением и записью кэша.
+
+        Все дни читаются одним запросом к кэшу; отсутствующие берутся
+        из линии транзитов карты, и результаты записываются одним
+        пакетом.
+        """
+        use_cache = use_cache and self.enable_caching
+        keys = [
+            astro_cache.current_transits_key(natal_chart_id, transit_date)
+            for transit_date in dates
+        ]
+        cached = await astro_cache.get_many(keys) if use_cache else {}
+
+        missing = [
+            (key, transit_date)
+            for key, transit_date in zip(keys, dates)
+            if key not in cached
+        ]
+
+        computed = {}
+        if missing:
+            results = await self._query_timeline(
+                natal_chart,
+                lambda timeline: self._timeline_daily_transits(
+                    timeline, [transit_date for _, transit_date in missing]
+                ),
+                use_cache,
+            )
+            for (key, _), result in zip(missing, results):
+                computed[key] = result
+
+        if use_cache and computed:
+            fresh = {
+                key: result
+                for key, result in computed.items()
+                if not result.get("error")
+            }
+            await astro_cache.set_many(
+                fresh,
+                astro_cache.storage_ttl("current_transits"),
+                tags_by_key={
+                    key: [chart_tag(natal_chart_id), date_tag(transit_date)]
+                    for key, transit_date in missing
+                    if key in fresh
+                },
+            )
+
+        return [cached.get(key) or computed[key] for key in keys]
+
+    def _natal_longitudes(
+        self, natal_chart: Dict[str, Any]
+    ) -> Dict[str, float]:
+        """Долготы натальных точек карты."""
+        return {
+            name: data["longitude"]
+            for name, data in natal_chart.get("planets", {}).items()
+            if isinstance(data, dict) and "longitude" in data
+        }
+
+    async def _query_timeline(
+        self,
+        natal_chart: Dict[str, Any],
+        query: Callable[[TransitTimeline], Any],
+        use_cache: bool = True,
+    ) -> Any:
+        """
+        Выполняет запрос к линии транзитов натальной карты.
+
+        Линия читается из кэша и достраивается только на участках,
+        которые запрос еще не покрывал; изменившаяся линия записывается
+        обратно. Поэтому "сегодня", "неделя" и "важные транзиты" в одной
+        сессии считают эфемериды только для новых дат. Без use_cache
+        линия строится заново и в кэш не попадает.
+        """
+        use_cache = use_cache and self.enable_caching
+        natal_chart_id = self._generate_chart_cache_key(natal_chart)
+        natal_longitudes = self._natal_longitudes(natal_chart)
+        cache_key = astro_cache.transit_timeline_key(natal_chart_id)
+
+        cached = await astro_cache.get(cache_key) if use_cache else None
+        timeline = (
+            TransitTimeline.from_dict(cached, self.astro_calculator)
+            if isinstance(cached, dict)
+            else None
+        )
+        if timeline is None or not timeline.matches(
+            natal_longitudes, BATCH_BODIES, self.transit_orbs
+        ):
+            timeline = TransitTimeline(
+                natal_longitudes,
+                BATCH_BODIES,
+                self.transit_orbs,
+                self.astro_calculator,
+            )
+
+        revision = timeline.revision
+        result = await asyncio.to_thread(query, timeline)
+
+        if use_cache and timeline.revision != revision:
+            timeline.trim(self.timeline_retention_days)
+            await astro_cache.set(
+                cache_key,
+                timeline.to_dict(),
+                astro_cache.storage_ttl("transit_timeline"),
+                tags=[chart_tag(natal_chart_id)],
+            )
+            logger.info(
+                f"ENHANCED_TRANSIT_SERVICE_TIMELINE_EXTENDED: {len(timeline)} windows"
+            )
+
+        return result
+
+    def _timeline_daily_transits(
+        self, timeline: TransitTimeline, dates: List[datetime]
+    ) -> List[Dict[str, Any]]:
+        """
+        Транзиты на даты как запрос к линии транзитов.
+
+        Аспекты в орбисе и их орбисы на каждую дату берутся из окон
+        линии; сводка совпадает с результатом расчета на одну дату.
+        """
+        timeline.ensure(min(dates), max(dates))
+        table = OrbTable.from_orbs(self.transit_orbs)
+        aspect_index = {
+            definition.angle: index
+            for index, definition in enumerate(table.definitions)
+        }
+
+        return [
+            self._summarize_transits(
+                transit_date,
+                [
+                    self._transit_aspect_record(
+                        window.transit_planet,
+                        window.natal_point,
+                        AspectHit(
+                            0,
+                            0,
+                            aspect_index[window.aspect_angle],
+                            separation,
+                            orb,
+                        ),
+                        table,
+                    )
+                    for window, orb, separation in timeline.aspects_at(
+                        transit_date
+                    )
+                ],
+                source="timeline",
+            )
+            for transit_date in dates
+        ]
+
     async def get_period_forecast(
         self,
         natal_chart: Dict[str, Any],
@@ -785,118 +993,33 @@ class TransitService:
 
             # Generate cache key
             natal_chart_id = self._generate_chart_cache_key(natal_chart)
+            computed = False
 
-            # Check cache first if enabled
-            if use_cache and self.enable_caching:
-                cached_result = await astro_cache.get_period_forecast(
-                    natal_chart_id=natal_chart_id,
-                    start_date=start_date.date(),
-                    days=days,
+            async def compute() -> Dict[str, Any]:
+                nonlocal computed
+                computed = True
+                return await self._build_period_forecast(
+                    natal_chart, natal_chart_id, days, start_date, use_cache
                 )
 
-                if cached_result:
-                    performance_monitor.end_operation(
-                        op_id, success=True, cache_hit=True
-                    )
-                    logger.info("ENHANCED_TRANSIT_SERVICE_PERIOD_CACHED")
-                    return cached_result
-
-            daily_forecasts = []
-            important_dates = []
-            overall_themes = set()
-
-            # Process multiple days in parallel for better performance
-            forecast_tasks = []
-            for i in range(days):
-                forecast_date = start_date + timedelta(days=i)
-                task = self.get_current_transits(
-                    natal_chart, forecast_date, use_cache=use_cache
-                )
-                forecast_tasks.append((forecast_date, task))
-
-            # Execute daily transit calculations in parallel (limited batch size)
-            batch_size = 3  # Limit concurrent operations to avoid overload
-            for i in range(0, len(forecast_tasks), batch_size):
-                batch = forecast_tasks[i : i + batch_size]
-
-                # Wait for batch completion
-                batch_results = []
-                for forecast_date, task in batch:
-                    daily_transits = await task
-                    batch_results.append((forecast_date, daily_transits))
-
-                # Process batch results
-                for forecast_date, daily_transits in batch_results:
-                    daily_forecast = {
-                        "date": forecast_date.strftime("%Y-%m-%d"),
-                        "energy_level": self._calculate_daily_energy(
-                            daily_transits
-                        ),
-                        "main_influences": daily_transits.get(
-                            "daily_influences", []
-                        )[:3],
-                        "recommendations": self._get_daily_recommendations(
-                            daily_transits
-                        ),
-                    }
-
-                    daily_forecasts.append(daily_forecast)
-
-                    # Находим важные даты
-                    for transit in daily_transits.get("active_transits", []):
-                        if transit.get("strength") in [
-                            "очень сильный",
-                            "сильный",
-                        ]:
-                            important_dates.append(
-                                {
-                                    "date": forecast_date.strftime("%Y-%m-%d"),
-                                    "event": f"{transit['transit_planet']} {transit['aspect']} {transit['natal_planet']}",
-                                    "significance": transit.get(
-                                        "influence",
-                                        "Важное транзитное влияние",
-                                    ),
-                                }
-                            )
-
-                    # Собираем общие темы
-                    for influence in daily_transits.get(
-                        "daily_influences", []
-                    ):
-                        theme = self._extract_theme_from_influence(influence)
-                        if theme:
-                            overall_themes.add(theme)
-
-            # Create final result
-            sorted_forecasts = sorted(daily_forecasts, key=lambda x: x["date"])
-            result = {
-                "period": f"{days} дней",
-                "start_date": start_date.strftime("%Y-%m-%d"),
-                "daily_forecasts": sorted_forecasts,
-                "forecast_days": sorted_forecasts,  # Alias for test compatibility
-                "important_dates": important_dates[:5],  # Топ-5 важных дат
-                "overall_themes": list(overall_themes)[:5],
-                "major_themes": list(overall_themes)[
-                    :5
-                ],  # Alias for test compatibility
-                "overall_energy": self._create_period_summary(
-                    daily_forecasts
-                ),  # Alias for test compatibility
-                "period_summary": self._create_period_summary(daily_forecasts),
-                "general_advice": self._get_period_advice(overall_themes),
-            }
-
-            # Cache successful results
             if use_cache and self.enable_caching:
-                await astro_cache.set_period_forecast(
-                    natal_chart_id=natal_chart_id,
-                    start_date=start_date.date(),
-                    days=days,
-                    forecast_data=result,
+                # Устаревший прогноз отдается, пока он пересчитывается в фоне
+                result = await astro_cache.get_or_compute(
+                    astro_cache.period_forecast_key(
+                        natal_chart_id, start_date.date(), days
+                    ),
+                    compute,
+                    category="period_forecasts",
+                    cache_if=lambda forecast: not forecast.get("error"),
+                    tags=[chart_tag(natal_chart_id), date_tag(start_date)],
                 )
+            else:
+                result = await compute()
 
+            if not computed:
+                logger.info("ENHANCED_TRANSIT_SERVICE_PERIOD_CACHED")
             performance_monitor.end_operation(
-                op_id, success=True, cache_hit=False
+                op_id, success=True, cache_hit=not computed
             )
             return result
 
@@ -907,6 +1030,99 @@ class TransitService:
             )
             return {"error": f"Period forecast failed: {str(e)}"}
 
+    async def _build_period_forecast(
+        self,
+        natal_chart: Dict[str, Any],
+        natal_chart_id: str,
+        days: int,
+        start_date: datetime,
+        use_cache: bool,
+    ) -> Dict[str, Any]:
+        """Рассчитывает прогноз на период по дневным транзитам.
+
+        Дневные транзиты всего периода — один запрос к линии транзитов
+        карты, а не отдельный расчет на каждый день.
+        """
+        daily_forecasts = []
+        important_dates = []
+        overall_themes = set()
+
+        forecast_dates = [start_date + timedelta(days=i) for i in range(days)]
+        daily_results = await self._get_daily_transits_many(
+            natal_chart, natal_chart_id, forecast_dates, use_cache
+        )
+
+        for forecast_date, daily_transits in zip(
+            forecast_dates, daily_results
+        ):
+            daily_forecast = {
+                "date": forecast_date.strftime("%Y-%m-%d"),
+                "energy_level": self._calculate_daily_energy(
+                    daily_transits
+                ),
+                "main_influences": daily_transits.get(
+                    "daily_influences", []
+                )[:3],
+                "recommendations": self._get_daily_recommendations(
+                    daily_transits
+                ),
+            }
+
+            daily_forecasts.append(daily_forecast)
+
+            # Находим важные даты
+            for transit in daily_transits.get("active_transits", []):
+                if transit.get("strength") in [
+                    "очень сильный",
+                    "сильный",
+                ]:
+                    important_dates.append(
+                        {
+                            "date": forecast_date.strftime("%Y-%m-%d"),
+                            "event": f"{transit['transit_planet']} {transit['aspect']} {transit['natal_planet']}",
+                            "significance": transit.get(
+                                "influence",
+                                "Важное транзитное влияние",
+                            ),
+                        }
+                    )
+
+            # Собираем общие темы
+            for influence in daily_transits.get("daily_influences", []):
+                theme = self._extract_theme_from_influence(influence)
+                if theme:
+                    overall_themes.add(theme)
+
+        # Лунации, затмения, станции и ингрессии периода общие для всех
+        # карт и берутся из календаря неба
+        sky_events = await asyncio.to_thread(
+            self.astro_calculator.mundane_calendar.notable_events,
+            start_date,
+            start_date + timedelta(days=days),
+        )
+
+        # Create final result
+        sorted_forecasts = sorted(daily_forecasts, key=lambda x: x["date"])
+        result = {
+            "period": f"{days} дней",
+            "start_date": start_date.strftime("%Y-%m-%d"),
+            "daily_forecasts": sorted_forecasts,
+            "forecast_days": sorted_forecasts,  # Alias for test compatibility
+            "important_dates": important_dates[:5],  # Топ-5 важных дат
+            "overall_themes": list(overall_themes)[:5],
+            "major_themes": list(overall_themes)[
+                :5
+            ],  # Alias for test compatibility
+            "overall_energy": self._create_period_summary(
+                daily_forecasts
+            ),  # Alias for test compatibility
+            "period_summary": self._create_period_summary(daily_forecasts),
+            "general_advice": self._get_period_advice(overall_themes),
+            "sky_events": [event.to_dict() for event in sky_events],
+        }
+
+        return result
+
     async def get_important_transits(
         self,
         natal_chart: Dict[str, Any],
@@ -938,8 +1154,8 @@ class TransitService:
 
             # Generate cache key
             natal_chart_id = self._generate_chart_cache_key(natal_chart)
-            cache_key = (
-                f"{natal_chart_id}_important_{lookback_days}_{lookahead_days}"
+            cache_key = astro_cache.important_transits_key(
+                natal_chart_id, today, lookback_days, lookahead_days
             )
 
             # Check cache first if enabled
@@ -952,55 +1168,33 @@ class TransitService:
                     logger.info("ENHANCED_TRANSIT_SERVICE_IMPORTANT_CACHED")
                     return cached_result
 
-            major_transits = []
-
             # Анализируем медленные планеты (Юпитер, Сатурн, Уран, Нептун, Плутон)
             slow_planets = ["Jupiter", "Saturn", "Uranus", "Neptune", "Pluto"]
 
-            # Process in weekly intervals to optimize performance
-            current_date = start_date
-            transit_tasks = []
+            # Окна аспектов за весь период — запрос к линии транзитов
+            aspect_orbs = {
+                angle: self.important_transit_orb
+                for angle in self.important_aspect_angles
+            }
+            windows = await self._query_timeline(
+                natal_chart,
+                lambda timeline: timeline.find_windows(
+                    start_date, end_date, slow_planets, aspect_orbs
+                ),
+                use_cache,
+            )
+            major_transits = [
+                self._build_important_transit(window) for window in windows
+            ]
 
-            while current_date <= end_date:
-                task = self.get_current_transits(
-                    natal_chart, current_date, use_cache=use_cache
-                )
-                transit_tasks.append((current_date, task))
-                current_date += timedelta(days=7)  # Weekly intervals
-
-            # Process transit tasks in batches
-            batch_size = 4
-            for i in range(0, len(transit_tasks), batch_size):
-                batch = transit_tasks[i : i + batch_size]
-
-                for date, task in batch:
-                    daily_transits = await task
-
-                    for transit in daily_transits.get("active_transits", []):
-                        transit_planet = transit.get("transit_planet", "")
-
-                        # Фокусируемся на транзитах медленных планет
-                        if transit_planet in slow_planets:
-                            major_transits.append(
-                                {
-                                    **transit,
-                                    "date": date.strftime("%Y-%m-%d"),
-                                    "planet_speed": self._get_planet_speed(
-                                        transit_planet
-                                    ),
-                                    "duration_estimate": self._estimate_transit_duration(
-                                        transit_planet,
-                                        transit.get("aspect", ""),
-                                    ),
-                                    "life_area_affected": self._get_affected_life_area(
-                                        transit.get("natal_planet", "")
-                                    ),
-                                    "transformation_level": self._assess_transformation_level(
-                                        transit_planet,
-                                        transit.get("aspect", ""),
-                                    ),
-                                }
-                            )
+            # Ретроградные периоды медленных планет из календаря неба
+            retrograde_periods = await asyncio.to_thread(
+                self.astro_calculator.mundane_calendar.events_between,
+                start_date,
+                end_date,
+                [RETROGRADE],
+                slow_planets,
+            )
 
             # Remove duplicates and sort by importance
             unique_transits = self._deduplicate_transits(major_transits)
@@ -1025,6 +1219,9 @@ class TransitService:
                 "spiritual_guidance": self._get_spiritual_guidance(
                     important_transits
                 ),
+                "retrograde_periods": [
+                    period.to_dict() for period in retrograde_periods
+                ],
             }
 
             # Cache successful results
@@ -1033,6 +1230,7 @@ class TransitService:
                     cache_key,
                     result,
                     self.cache_ttl_hours["important_transits"] * 3600,
+                    tags=[chart_tag(natal_chart_id), date_tag(today)],
                 )
 
             performance_monitor.end_operation(
@@ -1534,8 +1732,72 @@ class TransitService:
         }
         return speeds.get(planet, "неизвестная")
 
-    def _estimate_transit_duration(self, planet: str, aspect: str) -> str:
-        """Оценивает длительность транзита."""
+    def _build_important_transit(self, window: AspectWindow) -> Dict[str, Any]:
+        """Формирует описание важного транзита по окну аспекта."""
+        transit_planet = window.transit_planet
+        aspect_name = self._get_aspect_name(window.aspect_angle)
+        peak = window.peak
+
+        return {
+            "transit_planet": transit_planet,
+            "natal_planet": window.natal_point,
+            "aspect": aspect_name,
+            "angle": window.aspect_angle,
+            "orb": round(window.min_orb, 2),
+            "date": peak.strftime("%Y-%m-%d") if peak else "",
+            "start_date": (
+                window.start.strftime("%Y-%m-%d") if window.start else None
+            ),
+            "end_date": (
+                window.end.strftime("%Y-%m-%d") if window.end else None
+            ),
+            "exact_dates": [
+                hit.moment.isoformat() for hit in window.exact_hits
+            ],
+            "retrograde_passes": sum(
+                1 for hit in window.exact_hits if hit.retrograde
+            ),
+            "influence": self._get_enhanced_transit_influence(
+                transit_planet, window.natal_point, aspect_name
+            ),
+            "strength": self._calculate_enhanced_aspect_strength(
+                window.min_orb, window.aspect_angle
+            ),
+            "nature": self._get_enhanced_aspect_nature(aspect_name),
+            "planet_speed": self._get_planet_speed(transit_planet),
+            "duration_estimate": self._estimate_transit_duration(
+                transit_planet, aspect_name, window.duration_days
+            ),
+            "life_area_affected": self._get_affected_life_area(
+                window.natal_point
+            ),
+            "transformation_level": self._assess_transformation_level(
+                transit_planet, aspect_name
+            ),
+        }
+
+    def _estimate_transit_duration(
+        self,
+        planet: str,
+        aspect: str,
+        duration_days: Optional[float] = None,
+    ) -> str:
+        """Описывает длительность транзита.
+
+        Если известна длительность окна в орбисе, она форматируется
+        напрямую, иначе используется типичная длительность для планеты.
+        """
+        if duration_days is not None:
+            if duration_days < 2:
+                return "около суток"
+            if duration_days < 14:
+                return f"{round(duration_days)} дн."
+            if duration_days < 60:
+                return f"{round(duration_days / 7)} нед."
+            if duration_days < 730:
+                return f"{round(duration_days / 30.44)} мес."
+            return f"{duration_days / 365.25:.1f} г."
+
         base_durations = {
             "Jupiter": "2-3 недели",
             "Saturn": "1-2 месяца",
@@ -1773,48 +2035,35 @@ class TransitService:
 
     def _generate_chart_cache_key(self, natal_chart: Dict[str, Any]) -> str:
         """Генерирует ключ кэша для натальной карты."""
-        import hashlib
-
-        # Try different structures for birth datetime
-        birth_datetime = "unknown"
-        coordinates = {"latitude": 0, "longitude": 0}
-
-        # Check for subject_info structure first
-        subject_info = natal_chart.get("subject_info", {})
-        if subject_info:
-            birth_datetime = subject_info.get("birth_datetime", "unknown")
-            coordinates = subject_info.get(
-                "coordinates", {"latitude": 0, "longitude": 0}
-            )
-        else:
-            # Fallback to direct structure (test format)
-            birth_datetime = natal_chart.get("birth_datetime", "unknown")
-            if hasattr(birth_datetime, "isoformat"):
-                birth_datetime = birth_datetime.isoformat()
-            coordinates = natal_chart.get(
-                "coordinates", {"latitude": 0, "longitude": 0}
-            )
-
-        data = f"{birth_datetime}_{coordinates.get('latitude', 0)}_{coordinates.get('longitude', 0)}"
-        return hashlib.sha256(data.encode()).hexdigest()[:16]
+        # Тот же id, что и у AsyncKerykeionService для этой карты
+        return chart_id_from_data(natal_chart)
 
     async def _get_kerykeion_transits_async(
         self,
         natal_chart: Dict[str, Any],
         transit_date: datetime,
         include_minor_aspects: bool,
+        use_cache: bool = True,
     ) -> Dict[str, Any]:
-        """Получает транзиты через async Kerykeion."""
+        """
+        Получает транзиты к натальной карте, построенной async Kerykeion.
+
+        Транзитные аспекты — запрос к линии транзитов этой карты, как и
+        без Kerykeion: линия общая для "сегодня", прогнозов и важных
+        транзитов.
+        """
         try:
             # Используем async версию Kerykeion сервиса
             if self.async_kerykeion.is_available():
-                # Создаем натальную карту как AstrologicalSubject
-                birth_datetime = datetime.fromisoformat(
-                    natal_chart.get("subject_info", {}).get(
-                        "birth_datetime", "2000-01-01T12:00:00"
-                    )
+                # Создаем натальную карту как AstrologicalSubject; данные
+                # рождения лежат в subject_info или в корне словаря карты
+                info = natal_chart.get("subject_info") or natal_chart
+                birth_datetime = info.get(
+                    "birth_datetime", "2000-01-01T12:00:00"
                 )
-                coordinates = natal_chart.get("subject_info", {}).get(
+                if isinstance(birth_datetime, str):
+                    birth_datetime = datetime.fromisoformat(birth_datetime)
+                coordinates = info.get(
                     "coordinates", {"latitude": 55.7558, "longitude": 37.6176}
                 )
 
@@ -1824,6 +2073,7 @@ class TransitService:
                         birth_datetime=birth_datetime,
                         latitude=coordinates["latitude"],
                         longitude=coordinates["longitude"],
+                        timezone=info.get("timezone", "Europe/Moscow"),
                     )
                 )
 
@@ -1835,9 +2085,13 @@ class TransitService:
                         natal_chart, transit_date
                     )
 
-                # Формируем результат с использованием асинхронных методов
-                processed_transits = await self._process_async_transit_results(
-                    natal_subject_data, transit_date, include_minor_aspects
+                # Аспекты к карте Kerykeion из линии транзитов
+                (processed_transits,) = await self._query_timeline(
+                    natal_subject_data,
+                    lambda timeline: self._timeline_daily_transits(
+                        timeline, [transit_date]
+                    ),
+                    use_cache,
                 )
 
                 logger.info("ENHANCED_TRANSIT_SERVICE_ASYNC_KERYKEION_SUCCESS")
@@ -1884,36 +2138,43 @@ class TransitService:
         # В реальном проекте здесь бы была логика обработки
         # результатов от TransitsTimeRangeFactory
 
-        active_transits = []
-        approaching_transits = []
-
         # Получаем текущие позиции планет для даты транзита
-        current_positions = self.astro_calculator.calculate_planet_positions(
+        current_positions = self.astro_calculator.calculate_transit_positions(
             target_date
         )
         natal_planets = natal_chart_data.get("planets", {})
 
-        for transit_planet, transit_data in current_positions.items():
-            for natal_planet, natal_planet_data in natal_planets.items():
-                aspects = self._calculate_basic_transit_aspects(
-                    transit_data,
-                    natal_planet_data,
-                    transit_planet,
-                    natal_planet,
-                )
+        return self._summarize_transits(
+            target_date,
+            self._calculate_basic_transit_matrix(
+                current_positions, natal_planets
+            ),
+            source="async_enhanced",
+        )
+
+    def _summarize_transits(
+        self,
+        transit_date: datetime,
+        aspects: List[Dict[str, Any]],
+        source: str,
+    ) -> Dict[str, Any]:
+        """Сводка транзитов на дату по найденным аспектам."""
+        active_transits = []
+        approaching_transits = []
 
-                for aspect in aspects:
-                    orb = aspect.get("orb", 10)
-                    if orb <= 2:
-                        active_transits.append(aspect)
-                    elif orb <= 8:
-                        approaching_transits.append(aspect)
+        for aspect in aspects:
+            orb = aspect.get("orb", 10)
+            if orb <= 2:
+                active_transits.append(aspect)
+            elif orb <= 8:
+                approaching_transits.append(aspect)
 
         # Combine all transits for aspects field
         all_aspects = active_transits[:10] + approaching_transits[:5]
+        energy_assessment = self._assess_energy_patterns(active_transits)
 
         return {
-            "date": target_date.isoformat(),
+            "date": transit_date.isoformat(),
             "active_transits": active_transits[:10],
             "approaching_transits": approaching_transits[:5],
             "aspects": all_aspects,  # Combined aspects for test compatibility
@@ -1921,17 +2182,13 @@ class TransitService:
             "daily_influences": self._get_enhanced_daily_influences(
                 active_transits
             ),
-            "energy_assessment": self._assess_energy_patterns(active_transits),
-            "energy_level": self._assess_energy_patterns(active_transits).get(
-                "energy_level", "moderate"
-            ),
-            "dominant_themes": self._assess_energy_patterns(
-                active_transits
-            ).get("dominant_themes", []),
+            "energy_assessment": energy_assessment,
+            "energy_level": energy_assessment.get("energy_level", "moderate"),
+            "dominant_themes": energy_assessment.get("dominant_themes", []),
             "timing_recommendations": self._get_timing_recommendations(
                 active_transits
             ),
-            "source": "async_enhanced",
+            "source": source,
         }
 
     async def get_performance_stats(self) -> Dict[str, Any]:
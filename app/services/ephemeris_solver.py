@@ -0,0 +1,145 @@
+"""
+Поиск моментов астрономических событий методом Брента.
+
+Функции работают с угловыми величинами, заданными как функция
+юлианского дня: разность углов приводится к диапазону (-180°, 180°],
+после чего момент события — это корень функции. Корни сначала
+отделяются на сетке моментов, затем уточняются итерациями Брента.
+"""
+
+import logging
+from typing import Callable, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Точность по времени по умолчанию: 1e-6 суток (около 0.09 секунды)
+DEFAULT_TIME_TOLERANCE = 1e-6
+
+
+class RootNotBracketedError(ValueError):
+    """Значения функции на концах интервала имеют один знак"""
+
+
+def wrap_angle(angle):
+    """Приводит угол (или массив углов) к диапазону (-180°, 180°]"""
+    wrapped = -((-np.asarray(angle, dtype=np.float64) + 180.0) % 360.0 - 180.0)
+    if np.ndim(wrapped) == 0:
+        return float(wrapped)
+    return wrapped
+
+
+def brent_root(
+    func: Callable[[float], float],
+    a: float,
+    b: float,
+    fa: Optional[float] = None,
+    fb: Optional[float] = None,
+    xtol: float = DEFAULT_TIME_TOLERANCE,
+    max_iter: int = 100,
+) -> float:
+    """Находит корень функции на интервале [a, b] методом Брента.
+
+    Сочетает бисекцию, секущие и обратную квадратичную интерполяцию,
+    поэтому для гладких эфемеридных функций сходится за несколько
+    вычислений. Значения на концах можно передать, если они известны.
+    """
+    fa = func(a) if fa is None else fa
+    fb = func(b) if fb is None else fb
+
+    if fa == 0:
+        return a
+    if fb == 0:
+        return b
+    if fa * fb > 0:
+        raise RootNotBracketedError(
+            f"Корень не отделен на интервале [{a}, {b}]"
+        )
+
+    c, fc = a, fa
+    d = e = b - a
+
+    for _ in range(max_iter):
+        if fb * fc > 0:
+            c, fc = a, fa
+            d = e = b - a
+        if abs(fc) < abs(fb):
+            a, b, c = b, c, b
+            fa, fb, fc = fb, fc, fb
+
+        tol = 2 * np.finfo(float).eps * abs(b) + xtol / 2
+        middle = (c - b) / 2
+        if abs(middle) <= tol or fb == 0:
+            return b
+
+        if abs(e) >= tol and abs(fa) > abs(fb):
+            s = fb / fa
+            if a == c:
+                # Метод секущих
+                p = 2 * middle * s
+                q = 1 - s
+            else:
+                # Обратная квадратичная интерполяция
+                q = fa / fc
+                r = fb / fc
+                p = s * (2 * middle * q * (q - r) - (b - a) * (r - 1))
+                q = (q - 1) * (r - 1) * (s - 1)
+            if p > 0:
+                q = -q
+            p = abs(p)
+            if 2 * p < min(3 * middle * q - abs(tol * q), abs(e * q)):
+                e, d = d, p / q
+            else:
+                d = e = middle
+        else:
+            d = e = middle
+
+        a, fa = b, fb
+        b += d if abs(d) > tol else (tol if middle > 0 else -tol)
+        fb = func(b)
+
+    logger.warning(f"EPHEMERIS_SOLVER_MAX_ITER: [{a}, {b}]")
+    return b
+
+
+def find_angle_crossings(
+    func: Callable[[float], float],
+    grid: Sequence[float],
+    values: Optional[Sequence[float]] = None,
+    xtol: float = DEFAULT_TIME_TOLERANCE,
+) -> List[float]:
+    """Находит все моменты, когда угловая функция проходит через ноль.
+
+    ``func`` возвращает разность углов в (-180°, 180°]. Смена знака
+    между соседними узлами сетки считается корнем, только если значения
+    близки к нулю: переход через ±180° — это разрыв, а не событие.
+    Шаг сетки должен быть меньше половины самого короткого цикла.
+    """
+    grid = np.asarray(grid, dtype=np.float64)
+    if values is None:
+        values = np.array([func(float(jd)) for jd in grid])
+    else:
+        values = np.asarray(values, dtype=np.float64)
+
+    left = values[:-1]
+    right = values[1:]
+    candidates = np.nonzero(
+        (np.sign(left) != np.sign(right))
+        & (np.abs(left - right) < 180.0)
+        & (right != 0)
+    )[0]
+
+    roots = []
+    for index in candidates:
+        roots.append(
+            brent_root(
+                func,
+                float(grid[index]),
+                float(grid[index + 1]),
+                float(left[index]),
+                float(right[index]),
+                xtol=xtol,
+            )
+        )
+    return roots
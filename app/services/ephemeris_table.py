@@ -0,0 +1,327 @@
+"""
+Предвычисленная таблица эфемерид с отображением в память и интерполяцией.
+
+Таблица хранит долготы, широты и скорости тел на равномерной сетке
+времени. Значения между узлами восстанавливаются кубическим полиномом
+Эрмита по долготе и скорости, что для транзитных расчетов (без домов)
+заменяет вызовы Swiss Ephemeris и построение субъектов Kerykeion.
+
+Формат файла (little-endian, версия 1):
+    заголовок 64 байта: magic, версия, число тел, число узлов,
+        юлианский день первого узла, шаг в днях, источник данных;
+    имена тел по 16 байт ASCII;
+    максимальная ошибка интерполяции по каждому телу (float64, градусы);
+    долготы float64 [узлы x тела]; скорости float32; широты float32.
+"""
+
+import logging
+import struct
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+TABLE_MAGIC = b"ASTEPHT\x00"
+TABLE_FORMAT_VERSION = 1
+HEADER_STRUCT = struct.Struct("<8sHHIdd16s")
+HEADER_SIZE = 64
+BODY_NAME_SIZE = 16
+
+# Шаг сетки ограничен, чтобы Луна проходила меньше 180° между узлами
+MAX_STEP_HOURS = 48
+
+
+class EphemerisTableError(Exception):
+    """Ошибка чтения или построения таблицы эфемерид"""
+
+
+class EphemerisTable:
+    """Таблица эфемерид, отображенная в память"""
+
+    def __init__(self, path: str):
+        self.path = str(path)
+        self._buffer = np.memmap(self.path, dtype=np.uint8, mode="r")
+
+        if len(self._buffer) < HEADER_SIZE:
+            raise EphemerisTableError(f"Файл {self.path} слишком мал")
+
+        (
+            magic,
+            version,
+            body_count,
+            step_count,
+            start_jd,
+            step_days,
+            source,
+        ) = HEADER_STRUCT.unpack(bytes(self._buffer[: HEADER_STRUCT.size]))
+
+        if magic != TABLE_MAGIC:
+            raise EphemerisTableError(f"{self.path} не является таблицей")
+        if version != TABLE_FORMAT_VERSION:
+            raise EphemerisTableError(
+                f"Неподдерживаемая версия таблицы {version}"
+            )
+
+        self.version = version
+        self.step_count = step_count
+        self.start_jd = start_jd
+        self.step_days = step_days
+        self.end_jd = start_jd + (step_count - 1) * step_days
+        self.source = source.rstrip(b"\x00").decode("ascii")
+
+        offset = HEADER_SIZE
+        names_size = body_count * BODY_NAME_SIZE
+        raw_names = bytes(self._buffer[offset : offset + names_size])
+        self.bodies: List[str] = [
+            raw_names[i : i + BODY_NAME_SIZE].rstrip(b"\x00").decode("ascii")
+            for i in range(0, names_size, BODY_NAME_SIZE)
+        ]
+        offset += names_size
+
+        self.max_errors = self._view(offset, "<f8", (body_count,))
+        offset += body_count * 8
+
+        shape = (step_count, body_count)
+        self.longitude = self._view(offset, "<f8", shape)
+        offset += step_count * body_count * 8
+        self.speed = self._view(offset, "<f4", shape)
+        offset += step_count * body_count * 4
+        self.latitude = self._view(offset, "<f4", shape)
+        offset += step_count * body_count * 4
+
+        if offset != len(self._buffer):
+            raise EphemerisTableError(f"Файл {self.path} поврежден")
+
+        self._columns = {name: index for index, name in enumerate(self.bodies)}
+
+    def _view(self, offset: int, dtype: str, shape: Tuple[int, ...]):
+        size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        return self._buffer[offset : offset + size].view(dtype).reshape(shape)
+
+    def covers(self, julian_days: np.ndarray) -> bool:
+        """Проверяет, что все моменты лежат внутри таблицы"""
+        if len(julian_days) == 0:
+            return True
+        return (
+            float(julian_days.min()) >= self.start_jd
+            and float(julian_days.max()) <= self.end_jd
+        )
+
+    def max_error_for(self, planets: Sequence[str]) -> float:
+        """Максимальная ошибка интерполяции для набора тел"""
+        return max(
+            (float(self.max_errors[self._columns[p]]) for p in planets),
+            default=0.0,
+        )
+
+    def interpolate(
+        self, julian_days: np.ndarray, planets: Sequence[str]
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Интерполирует долготы, широты и скорости для массива моментов.
+
+        Возвращает массивы формы (N моментов, P тел).
+        """
+        julian_days = np.asarray(julian_days, dtype=np.float64)
+        columns = [self._columns[planet] for planet in planets]
+
+        position = (julian_days - self.start_jd) / self.step_days
+        index = np.clip(
+            np.floor(position).astype(np.int64), 0, self.step_count - 2
+        )
+        u = (position - index)[:, None]
+
+        lon0 = self.longitude[index][:, columns]
+        lon1 = self.longitude[index + 1][:, columns]
+        speed0 = self.speed[index][:, columns].astype(np.float64)
+        speed1 = self.speed[index + 1][:, columns].astype(np.float64)
+        lat0 = self.latitude[index][:, columns].astype(np.float64)
+        lat1 = self.latitude[index + 1][:, columns].astype(np.float64)
+
+        # Разность долгот через 0° приводится к кратчайшей дуге
+        delta = (lon1 - lon0 + 180.0) % 360.0 - 180.0
+        h = self.step_days
+        m0 = speed0 * h
+        m1 = speed1 * h
+
+        u2 = u * u
+        u3 = u2 * u
+        offset = (
+            (u3 - 2 * u2 + u) * m0
+            + (-2 * u3 + 3 * u2) * delta
+            + (u3 - u2) * m1
+        )
+        rate = (
+            (3 * u2 - 4 * u + 1) * m0
+            + (-6 * u2 + 6 * u) * delta
+            + (3 * u2 - 2 * u) * m1
+        ) / h
+
+        longitude = (lon0 + offset) % 360.0
+        latitude = lat0 + (lat1 - lat0) * u
+        return longitude, latitude, rate
+
+    def get_info(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "version": self.version,
+            "bodies": self.bodies,
+            "start_jd": self.start_jd,
+            "end_jd": self.end_jd,
+            "step_hours": self.step_days * 24,
+            "source": self.source,
+            "max_error_deg": {
+                name: float(self.max_errors[index])
+                for index, name in enumerate(self.bodies)
+            },
+            "size_bytes": len(self._buffer),
+        }
+
+
+def generate_ephemeris_table(
+    calculator: Any,
+    path: str,
+    start_jd: float,
+    end_jd: float,
+    step_hours: float = 6.0,
+    planets: Optional[Sequence[str]] = None,
+    chunk_size: int = 20000,
+    validation_samples: int = 2000,
+) -> EphemerisTable:
+    """Строит файл таблицы по живому бэкенду калькулятора.
+
+    ``calculator`` — экземпляр AstrologyCalculator. После записи ошибка
+    интерполяции оценивается в серединах случайных интервалов сетки и
+    сохраняется в файл для проверки допустимой точности при загрузке.
+    """
+    if not 0 < step_hours <= MAX_STEP_HOURS:
+        raise EphemerisTableError(
+            f"Шаг таблицы должен быть в пределах (0, {MAX_STEP_HOURS}] часов"
+        )
+
+    step_days = step_hours / 24.0
+    step_count = int(np.floor((end_jd - start_jd) / step_days)) + 1
+    if step_count < 2:
+        raise EphemerisTableError("Диапазон таблицы меньше одного шага")
+
+    probe = calculator.calculate_positions_for_julian_days(
+        [start_jd], planets, use_table=False
+    )
+    bodies = probe.planets
+    body_count = len(bodies)
+    source = probe.backend.encode("ascii")[:16]
+
+    data_offset = HEADER_SIZE + body_count * (BODY_NAME_SIZE + 8)
+    cells = step_count * body_count
+    total_size = data_offset + cells * (8 + 4 + 4)
+
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = target.with_suffix(target.suffix + ".tmp")
+
+    buffer = np.memmap(
+        tmp_path, dtype=np.uint8, mode="w+", shape=(total_size,)
+    )
+    header = HEADER_STRUCT.pack(
+        TABLE_MAGIC,
+        TABLE_FORMAT_VERSION,
+        body_count,
+        step_count,
+        start_jd,
+        step_days,
+        source,
+    )
+    buffer[: len(header)] = np.frombuffer(header, dtype=np.uint8)
+    names = b"".join(
+        name.encode("ascii")[:BODY_NAME_SIZE].ljust(BODY_NAME_SIZE, b"\x00")
+        for name in bodies
+    )
+    buffer[HEADER_SIZE : HEADER_SIZE + len(names)] = np.frombuffer(
+        names, dtype=np.uint8
+    )
+
+    shape = (step_count, body_count)
+    lon_offset = data_offset
+    speed_offset = lon_offset + cells * 8
+    lat_offset = speed_offset + cells * 4
+    longitude = buffer[lon_offset:speed_offset].view("<f8").reshape(shape)
+    speed = buffer[speed_offset:lat_offset].view("<f4").reshape(shape)
+    latitude = buffer[lat_offset:].view("<f4").reshape(shape)
+
+    grid = start_jd + np.arange(step_count) * step_days
+    for chunk_start in range(0, step_count, chunk_size):
+        chunk = slice(chunk_start, min(chunk_start + chunk_size, step_count))
+        batch = calculator.calculate_positions_for_julian_days(
+            grid[chunk], bodies, use_table=False
+        )
+        longitude[chunk] = batch.longitude
+        speed[chunk] = batch.speed
+        latitude[chunk] = batch.latitude
+
+    buffer.flush()
+    del longitude, speed, latitude, buffer
+
+    # Ошибки записываются до переименования: читатель не должен увидеть
+    # таблицу с нулевой оценкой ошибки
+    table = EphemerisTable(str(tmp_path))
+    errors = estimate_table_errors(calculator, table, validation_samples)
+    del table
+
+    errors_offset = HEADER_SIZE + body_count * BODY_NAME_SIZE
+    with open(tmp_path, "r+b") as handle:
+        handle.seek(errors_offset)
+        handle.write(np.asarray(errors, dtype="<f8").tobytes())
+    Path(tmp_path).replace(target)
+
+    logger.info(
+        f"EPHEMERIS_TABLE_GENERATED: {target} {step_count} steps, "
+        f"max error {max(errors):.6f} deg"
+    )
+    return EphemerisTable(str(target))
+
+
+def estimate_table_errors(
+    calculator: Any, table: EphemerisTable, samples: int = 2000
+) -> List[float]:
+    """Оценивает максимальную ошибку долготы по каждому телу"""
+    rng = np.random.default_rng(0)
+    index = rng.integers(0, table.step_count - 1, size=samples)
+    # Середина интервала — наихудшая точка для интерполяции Эрмита
+    julian_days = table.start_jd + (index + 0.5) * table.step_days
+
+    live = calculator.calculate_positions_for_julian_days(
+        julian_days, table.bodies, use_table=False
+    )
+    interpolated, _, _ = table.interpolate(julian_days, live.planets)
+    delta = np.abs((interpolated - live.longitude + 180.0) % 360.0 - 180.0)
+    worst = dict(zip(live.planets, delta.max(axis=0).tolist()))
+
+    # Тела, которые не удалось проверить, считаются неточными
+    return [worst.get(name, float("inf")) for name in table.bodies]
+
+
+_table_cache: Dict[str, Optional[EphemerisTable]] = {}
+
+
+def get_ephemeris_table(
+    path: Optional[str] = None,
+) -> Optional[EphemerisTable]:
+    """Возвращает таблицу по пути из настроек, загружая ее один раз"""
+    path = path or settings.EPHEMERIS_TABLE_PATH
+    if not path:
+        return None
+
+    if path not in _table_cache:
+        table = None
+        if Path(path).is_file():
+            try:
+                table = EphemerisTable(path)
+                logger.info(f"EPHEMERIS_TABLE_LOADED: {table.get_info()}")
+            except (EphemerisTableError, OSError, ValueError) as e:
+                logger.warning(f"EPHEMERIS_TABLE_LOAD_FAILED: {path}: {e}")
+        _table_cache[path] = table
+
+    return _table_cache[path]
@@ -10,6 +10,7 @@ from sqlalchemy import func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.database import DataDeletionRequest, HoroscopeRequest, SecurityLog, User
+from app.services.astro_cache_service import astro_cache
 from app.services.encryption import SecurityUtils, data_protection
 from app.services.user_manager import UserManager
 
@@ -201,11 +202,17 @@ class GDPRComplianceService:
         Returns:
             True если удаление выполнено
         """
+        # Яндекс-id читаем до удаления: по нему кэш связан с картами
+        yandex_user_id = await self._get_yandex_user_id(user_id)
+
         success = await self.user_manager.confirm_data_deletion(
             user_id, verification_code
         )
 
         if success:
+            # Удаляем кэшированные карты и прогнозы пользователя
+            await self._invalidate_cached_data(user_id, yandex_user_id)
+
             await self._log_compliance_event(
                 event_type="data_deletion_confirmed",
                 user_id=user_id,
@@ -286,6 +293,11 @@ class GDPRComplianceService:
                 if not success:
                     return False
 
+                # Кэш, построенный по старым данным рождения, устарел
+                await self._invalidate_cached_data(
+                    user_id, await self._get_yandex_user_id(user_id)
+                )
+
             # Обработка других данных
             if "gender" in correction_data:
                 updates["gender"] = SecurityUtils.sanitize_input(
@@ -458,6 +470,30 @@ class GDPRComplianceService:
 
         return history
 
+    async def _get_yandex_user_id(self, user_id: uuid.UUID) -> Optional[str]:
+        """Яндекс-идентификатор пользователя (им помечены карты в кэше)."""
+        result = await self.db.execute(
+            select(User.yandex_user_id).where(User.id == user_id)
+        )
+        return result.scalar_one_or_none()
+
+    async def _invalidate_cached_data(
+        self, user_id: uuid.UUID, yandex_user_id: Optional[str]
+    ) -> int:
+        """
+        Сброс кэша пользователя: по внутреннему и Яндекс-идентификатору.
+
+        Диалог связывает карты с Яндекс-идентификатором, поэтому по нему
+        сбрасываются и транзиты, и прогрессии, посчитанные для этих карт.
+        """
+        invalidated = 0
+        for identifier in (str(user_id), yandex_user_id):
+            if identifier:
+                invalidated += await astro_cache.invalidate_user_data(
+                    identifier
+                )
+        return invalidated
+
     async def _log_compliance_event(
         self,
         event_type: str,
@@ -1,6 +1,6 @@
 """Home automation service with astrological triggers."""
 
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Any, Dict, List, Optional
 
 from loguru import logger
@@ -17,9 +17,30 @@ from app.models.iot_models import (
 from app.services.horoscope_generator import HoroscopeGenerator
 from app.services.iot_manager import IoTDeviceManager
 from app.services.lunar_calendar import LunarCalendar
+from app.services.mundane_calendar import (
+    ASPECT,
+    ECLIPSE,
+    INGRESS,
+    LUNATION,
+    MundaneEvent,
+    get_mundane_calendar,
+)
 from app.services.smart_lighting_service import SmartLightingService
 from app.services.transit_calculator import TransitCalculator
 
+# Aspect names used in trigger conditions
+TRIGGER_ASPECT_ANGLES = {
+    "conjunction": 0,
+    "sextile": 60,
+    "square": 90,
+    "trine": 120,
+    "opposition": 180,
+}
+FAVORABLE_ASPECT_ANGLES = (60, 120)
+
+# Sky events within this many hours of the check fire event triggers
+EVENT_TRIGGER_WINDOW_HOURS = 12
+
 
 class HomeAutomationService:
     """Manages automated home scenarios based on astrological events."""
@@ -39,6 +60,8 @@ class HomeAutomationService:
         self.lunar_service = lunar_service
         self.transit_calculator = transit_calculator
         self.horoscope_generator = horoscope_generator
+        # Sky events are shared by all users and precomputed by year
+        self.mundane_calendar = get_mundane_calendar()
 
     async def create_automation(
         self, user_id: int, automation_data: AutomationCreate
@@ -740,16 +763,102 @@ class HomeAutomationService:
 
         return current_phase in phases
 
+    def _sky_events_now(
+        self, conditions: Dict[str, Any], kinds: List[str]
+    ) -> List[MundaneEvent]:
+        """Calendar events within the trigger window around now."""
+        window = timedelta(
+            hours=conditions.get("window_hours", EVENT_TRIGGER_WINDOW_HOURS)
+        )
+        now = datetime.utcnow()
+        return self.mundane_calendar.events_between(
+            now - window, now + window, kinds=kinds
+        )
+
     async def _check_transit_trigger(self, conditions: Dict[str, Any]) -> bool:
-        """Check if planetary transit trigger should fire."""
-        # This would check for specific transits
-        # Simplified for this implementation
-        return False
+        """Check if planetary transit trigger should fire.
+
+        ``transit_type`` is ``<planet>_retrograde`` (fires for the whole
+        retrograde period), ``<planet>_ingress``, a lunation phase such as
+        ``full_moon`` or ``eclipse``. Events come from the shared mundane
+        calendar instead of per-user calculations.
+        """
+        transit_type = conditions.get("transit_type") or conditions.get(
+            "transit"
+        )
+        if not transit_type:
+            return False
+
+        subject, _, event = transit_type.rpartition("_")
+        planet = subject.capitalize()
+        if event == "retrograde":
+            return self.mundane_calendar.is_retrograde(
+                planet, datetime.utcnow()
+            )
+        if event == "ingress":
+            return any(
+                sky_event.planet == planet
+                for sky_event in self._sky_events_now(conditions, [INGRESS])
+            )
+        if transit_type == "eclipse":
+            return bool(self._sky_events_now(conditions, [ECLIPSE]))
+        return any(
+            sky_event.detail == transit_type
+            for sky_event in self._sky_events_now(conditions, [LUNATION])
+        )
 
     async def _check_astrological_event_trigger(
         self, conditions: Dict[str, Any]
     ) -> bool:
-        """Check if astrological event trigger should fire."""
-        # This would check for various astrological events
-        # Simplified for this implementation
-        return False
+        """Check if astrological event trigger should fire.
+
+        Every criterion present in the conditions must hold: one of the
+        ``preferred_times``, a sky event of one of the ``events`` kinds,
+        a Venus aspect from ``venus_aspects`` or, with
+        ``favorable_aspects``, a sextile or trine between planets.
+        """
+        checks = []
+
+        preferred_times = conditions.get("preferred_times")
+        if preferred_times:
+            matches = [
+                await self._check_time_trigger({"time": preferred_time})
+                for preferred_time in preferred_times
+            ]
+            checks.append(any(matches))
+
+        if conditions.get("events"):
+            checks.append(
+                bool(self._sky_events_now(conditions, conditions["events"]))
+            )
+
+        venus_aspects = conditions.get("venus_aspects")
+        favorable_aspects = conditions.get("favorable_aspects")
+        aspects = (
+            self._sky_events_now(conditions, [ASPECT])
+            if venus_aspects or favorable_aspects
+            else []
+        )
+        if venus_aspects:
+            angles = {
+                TRIGGER_ASPECT_ANGLES[name]
+                for name in venus_aspects
+                if name in TRIGGER_ASPECT_ANGLES
+            }
+            checks.append(
+                any(
+                    "Venus" in (aspect.planet, aspect.other)
+                    and aspect.value in angles
+                    for aspect in aspects
+                )
+            )
+
+        if favorable_aspects:
+            checks.append(
+                any(
+                    aspect.value in FAVORABLE_ASPECT_ANGLES
+                    for aspect in aspects
+                )
+            )
+
+        return bool(checks) and all(checks)
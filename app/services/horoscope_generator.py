@@ -4,7 +4,7 @@
 
 import logging
 import random
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
 from enum import Enum
 from typing import Any, Dict, List, Optional
 
@@ -28,6 +28,26 @@ class HoroscopeGenerator:
         self.astro_calc = AstrologyCalculator()
         self.transit_calc = TransitCalculator()
 
+        # Личные планеты: (название, прямое движение, ретроград), где
+        # движение описано парой (характер, описание)
+        self.personal_planet_transits = {
+            "Mercury": (
+                "Меркурий",
+                ("благоприятный", "Отличное время для общения и обучения"),
+                ("ретроградный", "Перепроверяйте договоры и сообщения"),
+            ),
+            "Venus": (
+                "Венера",
+                ("гармоничный", "Благоприятно для любви и творчества"),
+                ("ретроградный", "Время пересмотреть отношения и траты"),
+            ),
+            "Mars": (
+                "Марс",
+                ("энергичный", "Время активных действий и инициатив"),
+                ("ретроградный", "Лучше завершать начатое, чем начинать"),
+            ),
+        }
+
         # Базовые характеристики знаков зодиака
         self.sign_characteristics = {
             YandexZodiacSign.ARIES: {
@@ -339,6 +359,9 @@ class HoroscopeGenerator:
             f"INFLUENCES_TRANSITS_RESULT: transits_count={len(important_transits)}"
         )
 
+        # События неба за день
+        sky_events = self._get_sky_events(target_date)
+
         # Сезонные влияния
         logger.debug(
             "INFLUENCES_SEASONAL_START: calculating_seasonal_influence"
@@ -352,6 +375,7 @@ class HoroscopeGenerator:
             "moon_phase": moon_phase,
             "planetary_hours": planetary_hours,
             "transits": important_transits,
+            "sky_events": sky_events,
             "season_influence": season_influence,
         }
 
@@ -363,60 +387,51 @@ class HoroscopeGenerator:
     def _get_simplified_transits(
         self, target_date: datetime, zodiac_sign: YandexZodiacSign
     ) -> List[Dict[str, str]]:
-        """Упрощенное определение транзитов."""
+        """Транзиты личных планет по календарю неба.
+
+        Ретроградные периоды общие для всех пользователей и берутся из
+        предвычисленного календаря мундинных событий.
+        """
         logger.debug(
             f"TRANSITS_CALCULATION_START: date={target_date.strftime('%Y-%m-%d')}"
         )
-        transits = []
-
-        # Примерные циклы планет для упрощения
-        day_of_year = target_date.timetuple().tm_yday
-        logger.debug(f"TRANSITS_DAY_OF_YEAR: day={day_of_year}")
+        retrogrades = self.astro_calc.mundane_calendar.retrograde_periods_at(
+            target_date
+        )
+        logger.debug(f"TRANSITS_RETROGRADES: planets={sorted(retrogrades)}")
 
-        # Меркурий (цикл ~88 дней)
-        mercury_phase = (day_of_year % 88) / 88
-        logger.debug(f"TRANSITS_MERCURY_PHASE: phase={mercury_phase:.2f}")
-        if mercury_phase < 0.33:
-            transits.append(
-                {
-                    "planet": "Меркурий",
-                    "aspect": "благоприятный",
-                    "description": "Отличное время для общения и обучения",
-                }
+        transits = []
+        for planet, variants in self.personal_planet_transits.items():
+            name_ru, direct, retrograde = variants
+            aspect, description = (
+                retrograde if planet in retrogrades else direct
             )
-            logger.debug("TRANSITS_MERCURY_FAVORABLE: added_to_transits")
-
-        # Венера (цикл ~225 дней)
-        venus_phase = (day_of_year % 225) / 225
-        logger.debug(f"TRANSITS_VENUS_PHASE: phase={venus_phase:.2f}")
-        if venus_phase < 0.4:
             transits.append(
                 {
-                    "planet": "Венера",
-                    "aspect": "гармоничный",
-                    "description": "Благоприятно для любви и творчества",
+                    "planet": name_ru,
+                    "aspect": aspect,
+                    "description": description,
                 }
             )
-            logger.debug("TRANSITS_VENUS_HARMONIOUS: added_to_transits")
-
-        # Марс (цикл ~687 дней, упрощаем до 365)
-        mars_phase = (day_of_year % 365) / 365
-        logger.debug(f"TRANSITS_MARS_PHASE: phase={mars_phase:.2f}")
-        if 0.2 < mars_phase < 0.6:
-            transits.append(
-                {
-                    "planet": "Марс",
-                    "aspect": "энергичный",
-                    "description": "Время активных действий и инициатив",
-                }
+            logger.debug(
+                f"TRANSITS_{planet.upper()}: aspect={aspect}, added_to_transits"
             )
-            logger.debug("TRANSITS_MARS_ENERGETIC: added_to_transits")
 
         logger.debug(
             f"TRANSITS_CALCULATION_RESULT: found_transits={len(transits)}"
         )
         return transits
 
+    def _get_sky_events(self, target_date: datetime) -> List[Dict[str, Any]]:
+        """События календаря неба за сутки (общие для всех знаков)"""
+        day_start = datetime.combine(target_date.date(), datetime.min.time())
+        return [
+            event.to_dict()
+            for event in self.astro_calc.mundane_calendar.notable_events(
+                day_start, day_start + timedelta(days=1)
+            )
+        ]
+
     def _get_seasonal_influence(self, target_date: datetime) -> Dict[str, str]:
         """Определяет сезонное влияние."""
         month = target_date.month
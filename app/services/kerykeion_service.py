@@ -10,8 +10,106 @@ from typing import Any, Dict, List, Optional
 
 import pytz
 
+from app.services.aspect_engine import (
+    AspectDefinition,
+    OrbTable,
+    aspect_between,
+    find_aspects,
+)
+from app.services.cache_keys import chart_id
+from app.services.chart_snapshot import NO_HOUSE, ChartSnapshot
+from app.services.progression_timeline import get_progression_engine
+
 logger = logging.getLogger(__name__)
 
+# Sign abbreviations used by Kerykeion subjects, in zodiac order
+KERYKEION_SIGNS = (
+    "Ari",
+    "Tau",
+    "Gem",
+    "Can",
+    "Leo",
+    "Vir",
+    "Lib",
+    "Sco",
+    "Sag",
+    "Cap",
+    "Aqu",
+    "Pis",
+)
+
+# Elements, qualities and emoji of the signs in Kerykeion's spelling
+KERYKEION_SIGN_EMOJI = (
+    "♈️",
+    "♉️",
+    "♊️",
+    "♋️",
+    "♌️",
+    "♍️",
+    "♎️",
+    "♏️",
+    "♐️",
+    "♑️",
+    "♒️",
+    "♓️",
+)
+KERYKEION_ELEMENTS = ("Fire", "Earth", "Air", "Water")
+KERYKEION_QUALITIES = ("Cardinal", "Fixed", "Mutable")
+KERYKEION_HOUSES = (
+    "First_House",
+    "Second_House",
+    "Third_House",
+    "Fourth_House",
+    "Fifth_House",
+    "Sixth_House",
+    "Seventh_House",
+    "Eighth_House",
+    "Ninth_House",
+    "Tenth_House",
+    "Eleventh_House",
+    "Twelfth_House",
+)
+
+# Chart points extracted from a Kerykeion subject
+KERYKEION_CHART_BODIES = (
+    "sun",
+    "moon",
+    "mercury",
+    "venus",
+    "mars",
+    "jupiter",
+    "saturn",
+    "uranus",
+    "neptune",
+    "pluto",
+    "mean_node",
+    "true_node",
+    "mean_apog",
+    "osculating_apog",
+    "chiron",
+    "lilith",
+    "ceres",
+    "pallas",
+    "juno",
+    "vesta",
+)
+
+# Chart points that take part in aspect calculation
+KERYKEION_ASPECT_BODIES = (
+    "sun",
+    "moon",
+    "mercury",
+    "venus",
+    "mars",
+    "jupiter",
+    "saturn",
+    "uranus",
+    "neptune",
+    "pluto",
+    "mean_node",
+    "chiron",
+)
+
 # Try to import Kerykeion with detailed error handling
 try:
     # Updated imports for Kerykeion 4.x
@@ -77,6 +175,18 @@ class AspectColor(Enum):
     BIQUINTILE = "#FFD700"  # Gold
 
 
+# Major aspects with compatibility orbs, in matching priority order
+MAJOR_ASPECT_TABLE = OrbTable(
+    [
+        AspectDefinition(0, 8, "Conjunction", "☌"),
+        AspectDefinition(60, 6, "Sextile", "⚹"),
+        AspectDefinition(90, 8, "Square", "□"),
+        AspectDefinition(120, 8, "Trine", "△"),
+        AspectDefinition(180, 8, "Opposition", "☍"),
+    ]
+)
+
+
 class KerykeionService:
     """Advanced astrological service using Kerykeion library"""
 
@@ -201,89 +311,25 @@ class KerykeionService:
             return {"error": "Failed to create astrological subject"}
 
         try:
-            # Extract all planetary data including modern bodies and asteroids
-            planets_data = {}
-            for planet in [
-                "sun",
-                "moon",
-                "mercury",
-                "venus",
-                "mars",
-                "jupiter",
-                "saturn",
-                "uranus",
-                "neptune",
-                "pluto",
-                "mean_node",
-                "true_node",
-                "mean_apog",
-                "osculating_apog",
-                "chiron",
-                "lilith",
-                "ceres",
-                "pallas",
-                "juno",
-                "vesta",
-            ]:
-                if hasattr(subject, planet):
-                    planet_info = getattr(subject, planet)
-                    if planet_info:
-                        planets_data[planet] = {
-                            "name": planet_info.get(
-                                "name", planet.capitalize()
-                            ),
-                            "longitude": planet_info.get("pos", [0, 0, 0])[0],
-                            "latitude": planet_info.get("pos", [0, 0, 0])[1],
-                            "distance": planet_info.get("pos", [0, 0, 0])[2],
-                            "speed": planet_info.get("speed", 0),
-                            "retrograde": planet_info.get("retrograde", False),
-                            "sign": planet_info.get("sign", "Unknown"),
-                            "sign_num": planet_info.get("sign_num", 0),
-                            "degree_in_sign": planet_info.get(
-                                "deg_in_sign", 0
-                            ),
-                            "house": planet_info.get("house", None),
-                            "emoji": planet_info.get("emoji", ""),
-                            "element": planet_info.get("element", ""),
-                            "quality": planet_info.get("quality", ""),
-                        }
-
-            # Extract houses data
-            houses_data = {}
-            for i in range(1, 13):
-                house_attr = f"house{i}"
-                if hasattr(subject, house_attr):
-                    house_info = getattr(subject, house_attr)
-                    if house_info:
-                        houses_data[i] = {
-                            "cusp_longitude": house_info.get("pos", [0])[0],
-                            "sign": house_info.get("sign", "Unknown"),
-                            "sign_num": house_info.get("sign_num", 0),
-                            "degree_in_sign": house_info.get("deg_in_sign", 0),
-                        }
-
-            # Add angles (ASC, MC, DSC, IC)
-            angles = {}
-            if hasattr(subject, "first_house") and subject.first_house:
-                angles["ascendant"] = {
-                    "longitude": subject.first_house.get("pos", [0])[0],
-                    "sign": subject.first_house.get("sign", "Unknown"),
-                    "degree_in_sign": subject.first_house.get(
-                        "deg_in_sign", 0
-                    ),
-                }
-
-            if hasattr(subject, "tenth_house") and subject.tenth_house:
-                angles["midheaven"] = {
-                    "longitude": subject.tenth_house.get("pos", [0])[0],
-                    "sign": subject.tenth_house.get("sign", "Unknown"),
-                    "degree_in_sign": subject.tenth_house.get(
-                        "deg_in_sign", 0
-                    ),
-                }
-
-            # Calculate all aspects with Kerykeion
-            aspects_data = self.calculate_kerykeion_aspects(subject)
+            # Extract raw positions of all bodies, houses and angles
+            points = {}
+            for planet in KERYKEION_CHART_BODIES:
+                planet_info = getattr(subject, planet, None)
+                if planet_info:
+                    points[planet] = planet_info
+
+            cusps = angles = None
+            houses = [getattr(subject, f"house{i}", None) for i in range(1, 13)]
+            if all(houses):
+                cusps = [house.get("pos", [0])[0] for house in houses]
+                angles = [
+                    getattr(subject, attr, None) or house
+                    for attr, house in (
+                        ("first_house", houses[0]),
+                        ("tenth_house", houses[9]),
+                    )
+                ]
+                angles = [angle.get("pos", [0])[0] for angle in angles]
 
             # Get additional chart information
             chart_info = {
@@ -295,24 +341,31 @@ class KerykeionService:
                 "birth_datetime": birth_datetime.isoformat(),
             }
 
-            result = {
+            positions = [info.get("pos", [0, 0, 0]) for info in points.values()]
+            snapshot = ChartSnapshot(
+                list(points),
+                [pos[0] for pos in positions],
+                [pos[1] for pos in positions],
+                [info.get("speed", 0) for info in points.values()],
+                cusps,
+                angles,
+            )
+            record = {
+                "snapshot": snapshot.to_bytes(),
+                "names": [
+                    info.get("name", planet.capitalize())
+                    for planet, info in points.items()
+                ],
+                "distances": [pos[2] for pos in positions],
+                "retrograde": [
+                    info.get("retrograde", False) for info in points.values()
+                ],
                 "subject_info": chart_info,
-                "planets": planets_data,
-                "houses": houses_data,
-                "angles": angles,
-                "aspects": aspects_data,
-                "chart_shape": self._analyze_chart_shape(planets_data),
-                "element_distribution": self._calculate_element_distribution(
-                    planets_data
-                ),
-                "quality_distribution": self._calculate_quality_distribution(
-                    planets_data
-                ),
-                "dominant_planets": self._find_dominant_planets(
-                    planets_data, aspects_data
-                ),
             }
 
+            # Cache hits expand the same record, so both paths agree
+            result = self.expand_chart_record(record)
+
             logger.info(f"KERYKEION_SERVICE_FULL_CHART_SUCCESS: {name}")
             return result
 
@@ -320,6 +373,112 @@ class KerykeionService:
             logger.error(f"KERYKEION_SERVICE_FULL_CHART_ERROR: {e}")
             return {"error": f"Chart calculation failed: {str(e)}"}
 
+    def expand_chart_record(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """Full natal chart data from a compact cache record"""
+        snapshot = ChartSnapshot.from_bytes(record["snapshot"])
+
+        planets_data = {}
+        for point, name, distance, retrograde in zip(
+            snapshot, record["names"], record["distances"], record["retrograde"]
+        ):
+            sign = point.sign_index
+            planets_data[point.name] = {
+                "name": name,
+                "longitude": point.longitude,
+                "latitude": point.latitude,
+                "distance": distance,
+                "speed": point.speed,
+                "retrograde": retrograde,
+                "sign": KERYKEION_SIGNS[sign],
+                "sign_num": sign,
+                "degree_in_sign": point.degree_in_sign,
+                "house": None
+                if point.house == NO_HOUSE
+                else KERYKEION_HOUSES[point.house - 1],
+                "emoji": KERYKEION_SIGN_EMOJI[sign],
+                "element": KERYKEION_ELEMENTS[sign % 4],
+                "quality": KERYKEION_QUALITIES[sign % 3],
+            }
+
+        houses_data = {}
+        angles = {}
+        if snapshot.cusps is not None:
+            for number, cusp in enumerate(snapshot.cusps.tolist(), start=1):
+                sign = int(cusp // 30) % 12
+                houses_data[number] = {
+                    "cusp_longitude": cusp,
+                    "sign": KERYKEION_SIGNS[sign],
+                    "sign_num": sign,
+                    "degree_in_sign": cusp % 30,
+                }
+            for key, value in zip(
+                ("ascendant", "midheaven"), snapshot.angles.tolist()
+            ):
+                angles[key] = {
+                    "longitude": value,
+                    "sign": KERYKEION_SIGNS[int(value // 30) % 12],
+                    "degree_in_sign": value % 30,
+                }
+
+        aspects_data = self.calculate_point_aspects(planets_data)
+        return {
+            "subject_info": record["subject_info"],
+            "planets": planets_data,
+            "houses": houses_data,
+            "angles": angles,
+            "aspects": aspects_data,
+            "chart_shape": self._analyze_chart_shape(planets_data),
+            "element_distribution": self._calculate_element_distribution(
+                planets_data
+            ),
+            "quality_distribution": self._calculate_quality_distribution(
+                planets_data
+            ),
+            "dominant_planets": self._find_dominant_planets(
+                planets_data, aspects_data
+            ),
+        }
+
+    def chart_record(self, chart: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Compact cache record of a full natal chart.
+
+        Returns None when the chart cannot be restored exactly from a
+        record (errors, partial data), so callers cache the dict as is.
+        """
+        try:
+            planets = chart["planets"]
+            houses = chart["houses"]
+            cusps = angles = None
+            if houses:
+                cusps = [houses[n]["cusp_longitude"] for n in range(1, 13)]
+                angles = [
+                    chart["angles"][key]["longitude"]
+                    for key in ("ascendant", "midheaven")
+                ]
+            snapshot = ChartSnapshot(
+                list(planets),
+                [data["longitude"] for data in planets.values()],
+                [data["latitude"] for data in planets.values()],
+                [data["speed"] for data in planets.values()],
+                cusps,
+                angles,
+            )
+            record = {
+                "snapshot": snapshot.to_bytes(),
+                "names": [data["name"] for data in planets.values()],
+                "distances": [data["distance"] for data in planets.values()],
+                "retrograde": [
+                    data["retrograde"] for data in planets.values()
+                ],
+                "subject_info": chart["subject_info"],
+            }
+            if self.expand_chart_record(record) == chart:
+                return record
+        except (AttributeError, KeyError, TypeError, ValueError):
+            pass
+        return None
+
     def calculate_kerykeion_aspects(
         self, subject: Any
     ) -> List[Dict[str, Any]]:
@@ -327,25 +486,29 @@ class KerykeionService:
         if not subject:
             return []
 
+        points = {}
+        try:
+            for body in KERYKEION_ASPECT_BODIES:
+                body_data = getattr(subject, body, None)
+                if body_data:
+                    points[body] = {
+                        "name": body_data.get("name", body.capitalize()),
+                        "longitude": body_data.get("pos", [0])[0],
+                        "speed": body_data.get("speed", 0),
+                    }
+        except Exception as e:
+            logger.error(f"KERYKEION_SERVICE_ASPECTS_ERROR: {e}")
+            return []
+
+        return self.calculate_point_aspects(points)
+
+    def calculate_point_aspects(
+        self, points: Dict[str, Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """Calculate aspects between chart points given as planet dicts"""
         aspects = []
 
         try:
-            # Get all celestial bodies for aspect calculation
-            celestial_bodies = [
-                "sun",
-                "moon",
-                "mercury",
-                "venus",
-                "mars",
-                "jupiter",
-                "saturn",
-                "uranus",
-                "neptune",
-                "pluto",
-                "mean_node",
-                "chiron",
-            ]
-
             # Standard aspect definitions with orbs
             aspect_definitions = {
                 0: {
@@ -416,64 +579,63 @@ class KerykeionService:
                 },
             }
 
-            # Calculate aspects between all planet pairs
-            for i, planet1 in enumerate(celestial_bodies):
-                for planet2 in celestial_bodies[i + 1 :]:
-                    planet1_data = getattr(subject, planet1, None)
-                    planet2_data = getattr(subject, planet2, None)
-
-                    if not planet1_data or not planet2_data:
-                        continue
-
-                    pos1 = planet1_data.get("pos", [0])[0]  # longitude
-                    pos2 = planet2_data.get("pos", [0])[0]  # longitude
-
-                    # Calculate angle between planets
-                    angle = abs(pos1 - pos2)
-                    if angle > 180:
-                        angle = 360 - angle
-
-                    # Check for aspects
-                    for (
-                        aspect_angle,
-                        aspect_info,
-                    ) in aspect_definitions.items():
-                        orb = aspect_info["orb"]
-                        if abs(angle - aspect_angle) <= orb:
-                            # Calculate exactness (how close to exact aspect)
-                            exactness = abs(angle - aspect_angle)
-
-                            # Determine if aspect is applying or separating
-                            speed1 = planet1_data.get("speed", 0)
-                            speed2 = planet2_data.get("speed", 0)
-                            applying = self._is_aspect_applying(
-                                angle, aspect_angle, speed1, speed2
-                            )
-
-                            aspects.append(
-                                {
-                                    "planet1": planet1_data.get(
-                                        "name", planet1.capitalize()
-                                    ),
-                                    "planet2": planet2_data.get(
-                                        "name", planet2.capitalize()
-                                    ),
-                                    "aspect": aspect_info["name"],
-                                    "symbol": aspect_info["symbol"],
-                                    "angle": aspect_angle,
-                                    "actual_angle": round(angle, 2),
-                                    "orb": round(exactness, 2),
-                                    "color": aspect_info["color"],
-                                    "applying": applying,
-                                    "strength": self._calculate_aspect_strength(
-                                        exactness, orb
-                                    ),
-                                    "interpretation": self._get_aspect_interpretation(
-                                        planet1, planet2, aspect_info["name"]
-                                    ),
-                                }
-                            )
-                            break
+            # Collect available bodies, then match all pairs in one pass
+            bodies = [
+                (body, points[body])
+                for body in KERYKEION_ASPECT_BODIES
+                if body in points
+            ]
+
+            orb_table = OrbTable(
+                AspectDefinition(
+                    aspect_angle,
+                    aspect_info["orb"],
+                    aspect_info["name"],
+                    aspect_info["symbol"],
+                )
+                for aspect_angle, aspect_info in aspect_definitions.items()
+            )
+
+            for hit in find_aspects(
+                [body_data["longitude"] for _, body_data in bodies],
+                orb_table,
+            ):
+                planet1, planet1_data = bodies[hit.first]
+                planet2, planet2_data = bodies[hit.second]
+                aspect_angle = orb_table[hit.aspect].angle
+                aspect_info = aspect_definitions[aspect_angle]
+
+                # Determine if aspect is applying or separating
+                applying = self._is_aspect_applying(
+                    hit.separation,
+                    aspect_angle,
+                    planet1_data.get("speed", 0),
+                    planet2_data.get("speed", 0),
+                )
+
+                aspects.append(
+                    {
+                        "planet1": planet1_data.get(
+                            "name", planet1.capitalize()
+                        ),
+                        "planet2": planet2_data.get(
+                            "name", planet2.capitalize()
+                        ),
+                        "aspect": aspect_info["name"],
+                        "symbol": aspect_info["symbol"],
+                        "angle": aspect_angle,
+                        "actual_angle": round(hit.separation, 2),
+                        "orb": round(hit.orb, 2),
+                        "color": aspect_info["color"],
+                        "applying": applying,
+                        "strength": self._calculate_aspect_strength(
+                            hit.orb, aspect_info["orb"]
+                        ),
+                        "interpretation": self._get_aspect_interpretation(
+                            planet1, planet2, aspect_info["name"]
+                        ),
+                    }
+                )
 
             # Sort aspects by exactness (strongest first)
             aspects.sort(key=lambda x: x["orb"])
@@ -955,25 +1117,8 @@ class KerykeionService:
         self, long1: float, long2: float
     ) -> Optional[str]:
         """Calculate aspect between two longitude points"""
-        angle = abs(long1 - long2)
-        if angle > 180:
-            angle = 360 - angle
-
-        # Check major aspects
-        aspects = {
-            0: "Conjunction",
-            60: "Sextile",
-            90: "Square",
-            120: "Trine",
-            180: "Opposition",
-        }
-
-        for aspect_angle, aspect_name in aspects.items():
-            orb = 8 if aspect_angle in [0, 90, 120, 180] else 6
-            if abs(angle - aspect_angle) <= orb:
-                return aspect_name
-
-        return None
+        aspect = aspect_between(long1, long2, MAJOR_ASPECT_TABLE)
+        return aspect.name if aspect else None
 
     def _get_aspect_harmony_score(self, aspect: str) -> int:
         """Get harmony score for an aspect"""
@@ -1012,51 +1157,42 @@ class KerykeionService:
             return {"error": "Kerykeion not available"}
 
         try:
-            # Calculate progressed date (1 day = 1 year)
-            birth_date = birth_datetime.date()
-            years_elapsed = (current_date.date() - birth_date).days / 365.25
-            progressed_date = birth_date + timedelta(days=years_elapsed)
-            
-            # Create progressed datetime maintaining birth time
-            progressed_datetime = datetime.combine(
-                progressed_date, birth_datetime.time()
-            ).replace(tzinfo=birth_datetime.tzinfo)
-
-            # Calculate natal chart
-            natal_subject = self.create_astrological_subject(
-                name, birth_datetime, latitude, longitude, timezone, house_system
-            )
-            
-            # Calculate progressed chart
-            progressed_subject = self.create_astrological_subject(
-                f"{name} Progressed",
-                progressed_datetime,
-                latitude,
-                longitude,
-                timezone,
-                house_system,
+            # Local birth and current times to UTC moments
+            zone = pytz.timezone(timezone)
+            birth_moment, current_moment = (
+                moment if moment.tzinfo else zone.localize(moment)
+                for moment in (birth_datetime, current_date)
             )
 
-            if not natal_subject or not progressed_subject:
-                return {"error": "Failed to create chart subjects"}
+            # Natal and progressed positions (1 day = 1 year) come from the
+            # chart's cached progression timeline instead of two subjects
+            timeline = get_progression_engine().timeline(
+                chart_id(
+                    birth_datetime, latitude, longitude, timezone, house_system
+                ),
+                birth_moment,
+                current_moment,
+            )
+            natal_positions = timeline.positions_at(birth_moment)
+            progressed_positions = timeline.positions_at(current_moment)
+            years_elapsed = timeline.age_of(current_moment)
+            progressed_datetime = timeline.progressed_moment(current_moment)
 
             # Extract progressed planetary positions
             progressed_planets = {}
             for planet in ["sun", "moon", "mercury", "venus", "mars"]:
-                natal_planet = getattr(natal_subject, planet, {})
-                prog_planet = getattr(progressed_subject, planet, {})
-                
-                if natal_planet and prog_planet:
-                    natal_pos = natal_planet.get("pos", [0])[0]
-                    prog_pos = prog_planet.get("pos", [0])[0]
-                    
-                    progressed_planets[planet] = {
-                        "natal_longitude": natal_pos,
-                        "progressed_longitude": prog_pos,
-                        "movement": (prog_pos - natal_pos) % 360,
-                        "progressed_sign": prog_planet.get("sign", "Unknown"),
-                        "natal_sign": natal_planet.get("sign", "Unknown"),
-                    }
+                natal_pos = natal_positions[planet.capitalize()]["longitude"]
+                prog_pos = progressed_positions[planet.capitalize()][
+                    "longitude"
+                ]
+
+                progressed_planets[planet] = {
+                    "natal_longitude": natal_pos,
+                    "progressed_longitude": prog_pos,
+                    "movement": (prog_pos - natal_pos) % 360,
+                    "progressed_sign": KERYKEION_SIGNS[int(prog_pos // 30)],
+                    "natal_sign": KERYKEION_SIGNS[int(natal_pos // 30)],
+                }
 
             logger.info(f"KERYKEION_SERVICE_PROGRESSIONS_SUCCESS: {name}")
             return {
@@ -7,6 +7,7 @@ from datetime import datetime
 from typing import Any, Dict, List, Optional
 
 from app.services.astrology_calculator import AstrologyCalculator
+from app.services.lunation_index import get_lunation_index
 
 
 class LunarCalendar:
@@ -354,12 +355,10 @@ class LunarCalendar:
     def get_lunar_day_info(self, target_date: datetime) -> Dict[str, Any]:
         """Получает информацию о лунном дне."""
 
-        # Упрощенный расчет лунного дня
-        # В реальности требуется точный расчет лунного календаря
         moon_phase = self.astro_calc.calculate_moon_phase(target_date)
 
-        # Приблизительный расчет лунного дня на основе фазы
-        lunar_day = self._calculate_approximate_lunar_day(moon_phase["angle"])
+        # Лунный день отсчитывается от точного момента новолуния
+        lunar_day = get_lunation_index().lunar_day(target_date)
 
         lunar_info = self.lunar_day_descriptions.get(
             lunar_day, self.lunar_day_descriptions[1]
@@ -378,12 +377,6 @@ class LunarCalendar:
             ),
         }
 
-    def _calculate_approximate_lunar_day(self, moon_angle: float) -> int:
-        """Приблизительно вычисляет лунный день по углу Луны."""
-        # Упрощенный расчет: 360 градусов / 29.5 дней ≈ 12.2 градуса на день
-        lunar_day = int(moon_angle / 12.2) + 1
-        return max(1, min(30, lunar_day))
-
     def get_monthly_lunar_calendar(
         self, year: int, month: int
     ) -> Dict[str, Any]:
@@ -423,9 +416,8 @@ class LunarCalendar:
     def _find_key_lunar_dates(
         self, year: int, month: int
     ) -> Dict[str, List[int]]:
-        """Находит ключевые лунные даты в месяце."""
+        """Находит дни точных новолуний, четвертей и полнолуний."""
 
-        days_in_month = calendar.monthrange(year, month)[1]
         key_dates = {
             "new_moon": [],
             "full_moon": [],
@@ -433,19 +425,16 @@ class LunarCalendar:
             "last_quarter": [],
         }
 
-        for day in range(1, days_in_month + 1):
-            target_date = datetime(year, month, day)
-            moon_phase = self.astro_calc.calculate_moon_phase(target_date)
-            phase_name = moon_phase["phase_name"]
-
-            if "Новолуние" in phase_name:
-                key_dates["new_moon"].append(day)
-            elif "Полнолуние" in phase_name:
-                key_dates["full_moon"].append(day)
-            elif "Первая четверть" in phase_name:
-                key_dates["first_quarter"].append(day)
-            elif "Последняя четверть" in phase_name:
-                key_dates["last_quarter"].append(day)
+        month_start = datetime(year, month, 1)
+        month_end = (
+            datetime(year + 1, 1, 1)
+            if month == 12
+            else datetime(year, month + 1, 1)
+        )
+        events = get_lunation_index().events_between(month_start, month_end)
+
+        for event in events:
+            key_dates[event["phase"]].append(event["datetime"].day)
 
         return key_dates
 
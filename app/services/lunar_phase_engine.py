@@ -0,0 +1,141 @@
+"""
+Облегченный расчет элонгации Луны от Солнца для фаз Луны.
+
+Фаза Луны нужна почти в каждом гороскопе, лунном календаре и сценарии
+умного дома, а для нее достаточно двух долгот. Движок не строит карту и
+не вычисляет дома, а результаты кэширует в LRU по временным корзинам.
+"""
+
+import logging
+import math
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict
+
+import numpy as np
+import pytz
+
+from app.services.ephemeris_table import get_ephemeris_table
+
+try:
+    import swisseph as swe
+
+    SWISSEPH_AVAILABLE = True
+except ImportError:
+    SWISSEPH_AVAILABLE = False
+    swe = None
+
+logger = logging.getLogger(__name__)
+
+# Юлианский день эпохи Unix и эпохи J2000
+UNIX_EPOCH_JD = 2440587.5
+J2000_JD = 2451545.0
+
+
+def _analytic_elongation(julian_day: float) -> float:
+    """Элонгация по усеченным рядам Миуса (точность около 0.3°)"""
+    t = (julian_day - J2000_JD) / 36525.0
+
+    sun_mean = 280.46646 + 36000.76983 * t
+    sun_anomaly = math.radians(357.52911 + 35999.05029 * t)
+    sun = (
+        sun_mean
+        + 1.914602 * math.sin(sun_anomaly)
+        + 0.019993 * math.sin(2 * sun_anomaly)
+    )
+
+    moon_mean = 218.3164477 + 481267.88123421 * t
+    elong = math.radians(297.8501921 + 445267.1114034 * t)
+    moon_anomaly = math.radians(134.9633964 + 477198.8675055 * t)
+    latitude_arg = math.radians(93.2720950 + 483202.0175233 * t)
+    moon = (
+        moon_mean
+        + 6.289 * math.sin(moon_anomaly)
+        + 1.274 * math.sin(2 * elong - moon_anomaly)
+        + 0.658 * math.sin(2 * elong)
+        + 0.214 * math.sin(2 * moon_anomaly)
+        - 0.186 * math.sin(sun_anomaly)
+        - 0.114 * math.sin(2 * latitude_arg)
+    )
+
+    return (moon - sun) % 360
+
+
+class LunarPhaseEngine:
+    """Движок элонгации Солнце–Луна с LRU-кэшем по временным корзинам"""
+
+    def __init__(self, bucket_seconds: int = 60, cache_size: int = 4096):
+        self.bucket_seconds = bucket_seconds
+        self.backend = self._detect_backend()
+        self._elongation_for_bucket = lru_cache(maxsize=cache_size)(
+            self._compute_bucket
+        )
+
+    def _detect_backend(self) -> str:
+        """Определяет источник долгот Солнца и Луны"""
+        if SWISSEPH_AVAILABLE:
+            return "swisseph"
+        if get_ephemeris_table() is not None:
+            return "table"
+        return "analytic"
+
+    def _bucket(self, target_date: datetime) -> int:
+        if target_date.tzinfo is None:
+            target_date = target_date.replace(tzinfo=pytz.UTC)
+        return int(target_date.timestamp() // self.bucket_seconds)
+
+    def _compute_bucket(self, bucket: int) -> float:
+        julian_day = bucket * self.bucket_seconds / 86400.0 + UNIX_EPOCH_JD
+        return self.elongation_at_julian_day(julian_day)
+
+    def elongation_at_julian_day(self, julian_day: float) -> float:
+        """Элонгация Луны от Солнца (0–360°) без кэширования"""
+        if self.backend == "swisseph":
+            try:
+                moon = swe.calc_ut(julian_day, swe.MOON, swe.FLG_SWIEPH)[0][0]
+                sun = swe.calc_ut(julian_day, swe.SUN, swe.FLG_SWIEPH)[0][0]
+                return (moon - sun) % 360
+            except Exception as e:
+                logger.warning(f"LUNAR_PHASE_ENGINE_SWISSEPH_ERROR: {e}")
+
+        if self.backend == "table":
+            table = get_ephemeris_table()
+            julian_days = np.array([julian_day])
+            if (
+                table is not None
+                and {"Sun", "Moon"} <= set(table.bodies)
+                and table.covers(julian_days)
+            ):
+                longitude, _, _ = table.interpolate(
+                    julian_days, ["Sun", "Moon"]
+                )
+                return float((longitude[0, 1] - longitude[0, 0]) % 360)
+
+        return _analytic_elongation(julian_day)
+
+    def elongation(self, target_date: datetime) -> float:
+        """Элонгация Луны от Солнца на момент (кэшируется по корзине)"""
+        return self._elongation_for_bucket(self._bucket(target_date))
+
+    def illumination(self, target_date: datetime) -> float:
+        """Освещенность диска Луны в процентах"""
+        angle = self.elongation(target_date)
+        return (1 - math.cos(math.radians(angle))) / 2 * 100
+
+    def cache_info(self) -> Dict[str, Any]:
+        info = self._elongation_for_bucket.cache_info()
+        return {
+            "backend": self.backend,
+            "bucket_seconds": self.bucket_seconds,
+            "hits": info.hits,
+            "misses": info.misses,
+            "size": info.currsize,
+            "max_size": info.maxsize,
+        }
+
+    def clear_cache(self) -> None:
+        self._elongation_for_bucket.cache_clear()
+
+
+# Общий экземпляр движка фаз Луны
+lunar_phase_engine = LunarPhaseEngine()
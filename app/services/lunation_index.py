@@ -0,0 +1,278 @@
+"""
+Точные моменты лунаций и предвычисленный индекс лунных фаз.
+
+Моменты новолуний, четвертей и полнолуний находятся как корни элонгации
+Луны от Солнца: начальное приближение дает средний синодический месяц,
+затем момент уточняется методом Брента. Индекс хранит отсортированные
+моменты событий, поэтому месячный календарь и лунный день вычисляются
+бинарным поиском. Индекс загружается из файла (если он сгенерирован
+скриптом) и достраивается по требованию.
+"""
+
+import logging
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pytz
+
+from app.core.config import settings
+from app.services.ephemeris_solver import brent_root, wrap_angle
+from app.services.lunar_phase_engine import (
+    UNIX_EPOCH_JD,
+    LunarPhaseEngine,
+    lunar_phase_engine,
+)
+
+logger = logging.getLogger(__name__)
+
+LUNATION_INDEX_VERSION = 1
+
+# Средний синодический месяц и новолуние 6 января 2000 (Миус, гл. 49)
+SYNODIC_MONTH = 29.530588861
+REFERENCE_NEW_MOON_JD = 2451550.09766
+
+NEW_MOON, FIRST_QUARTER, FULL_MOON, LAST_QUARTER = range(4)
+PHASE_KEYS = ("new_moon", "first_quarter", "full_moon", "last_quarter")
+PHASE_NAMES_RU = (
+    "Новолуние",
+    "Первая четверть",
+    "Полнолуние",
+    "Последняя четверть",
+)
+
+# Истинная фаза отклоняется от средней не более чем на ~0.6 суток
+SEARCH_HALF_WIDTH_DAYS = 1.5
+
+
+def _to_julian_day(target_date: datetime) -> float:
+    if target_date.tzinfo is None:
+        target_date = target_date.replace(tzinfo=pytz.UTC)
+    return target_date.timestamp() / 86400.0 + UNIX_EPOCH_JD
+
+
+def _from_julian_day(julian_day: float) -> datetime:
+    timestamp = (julian_day - UNIX_EPOCH_JD) * 86400.0
+    return datetime.fromtimestamp(round(timestamp), tz=pytz.UTC)
+
+
+class LunationIndex:
+    """Отсортированный индекс моментов лунных фаз"""
+
+    def __init__(self, engine: Optional[LunarPhaseEngine] = None):
+        self.engine = engine or lunar_phase_engine
+        # Номер лунации -> моменты четырех фаз (юлианские дни)
+        self._lunations: Dict[int, np.ndarray] = {}
+        # Моменты и фазы заменяются одной парой, чтобы читатели без
+        # блокировки не видели списки разной длины
+        self._events: Tuple[List[float], List[int]] = ([], [])
+        self._lock = threading.Lock()
+        self.solved_events = 0
+
+    def _lunation_number(self, julian_day: float) -> int:
+        return int(
+            np.floor((julian_day - REFERENCE_NEW_MOON_JD) / SYNODIC_MONTH)
+        )
+
+    def _solve_event(self, lunation: int, phase: int) -> float:
+        """Уточняет момент фазы методом Брента"""
+        target_angle = phase * 90.0
+        guess = REFERENCE_NEW_MOON_JD + (lunation + phase / 4) * SYNODIC_MONTH
+
+        def residual(julian_day: float) -> float:
+            angle = self.engine.elongation_at_julian_day(julian_day)
+            return wrap_angle(angle - target_angle)
+
+        self.solved_events += 1
+        return brent_root(
+            residual,
+            guess - SEARCH_HALF_WIDTH_DAYS,
+            guess + SEARCH_HALF_WIDTH_DAYS,
+        )
+
+    def ensure_range(self, start_jd: float, end_jd: float) -> None:
+        """Достраивает индекс, чтобы он покрывал интервал с запасом"""
+        first = self._lunation_number(start_jd) - 1
+        last = self._lunation_number(end_jd) + 1
+        missing = [
+            k for k in range(first, last + 1) if k not in self._lunations
+        ]
+        if not missing:
+            return
+
+        with self._lock:
+            solved = {
+                k: np.array(
+                    [self._solve_event(k, phase) for phase in range(4)]
+                )
+                for k in missing
+                if k not in self._lunations
+            }
+            if solved:
+                self._lunations.update(solved)
+                self._rebuild()
+
+    def _rebuild(self) -> None:
+        events = sorted(
+            (float(julian_day), phase)
+            for moments in self._lunations.values()
+            for phase, julian_day in enumerate(moments)
+        )
+        self._events = (
+            [julian_day for julian_day, _ in events],
+            [phase for _, phase in events],
+        )
+
+    def build(self, start_year: int, end_year: int) -> None:
+        """Предвычисляет лунации за диапазон лет включительно"""
+        self.ensure_range(
+            _to_julian_day(datetime(start_year, 1, 1)),
+            _to_julian_day(datetime(end_year + 1, 1, 1)),
+        )
+
+    @staticmethod
+    def _event(julian_day: float, phase: int) -> Dict[str, Any]:
+        return {
+            "phase": PHASE_KEYS[phase],
+            "name": PHASE_NAMES_RU[phase],
+            "julian_day": julian_day,
+            "datetime": _from_julian_day(julian_day),
+        }
+
+    def events_between(
+        self, start: datetime, end: datetime
+    ) -> List[Dict[str, Any]]:
+        """События лунных фаз в полуинтервале [start, end)"""
+        start_jd = _to_julian_day(start)
+        end_jd = _to_julian_day(end)
+        self.ensure_range(start_jd, end_jd)
+
+        julian_days, phases = self._events
+        first = bisect_left(julian_days, start_jd)
+        last = bisect_left(julian_days, end_jd)
+        return [
+            self._event(julian_days[index], phases[index])
+            for index in range(first, last)
+        ]
+
+    def previous_event(
+        self, target_date: datetime, phase: int = NEW_MOON
+    ) -> Dict[str, Any]:
+        """Последнее событие фазы не позже указанного момента"""
+        julian_day = _to_julian_day(target_date)
+        self.ensure_range(julian_day - SYNODIC_MONTH, julian_day)
+
+        julian_days, phases = self._events
+        index = bisect_right(julian_days, julian_day) - 1
+        while phases[index] != phase:
+            index -= 1
+        return self._event(julian_days[index], phases[index])
+
+    def next_event(
+        self, target_date: datetime, phase: int = NEW_MOON
+    ) -> Dict[str, Any]:
+        """Ближайшее событие фазы строго после указанного момента"""
+        julian_day = _to_julian_day(target_date)
+        self.ensure_range(julian_day, julian_day + SYNODIC_MONTH)
+
+        julian_days, phases = self._events
+        index = bisect_right(julian_days, julian_day)
+        while phases[index] != phase:
+            index += 1
+        return self._event(julian_days[index], phases[index])
+
+    def new_moon_in_month(self, year: int, month: int) -> Dict[str, Any]:
+        """Первое новолуние месяца (или ближайшее после его начала)"""
+        return self.next_event(datetime(year, month, 1), NEW_MOON)
+
+    def lunar_age(self, target_date: datetime) -> float:
+        """Возраст Луны в сутках от последнего точного новолуния"""
+        new_moon = self.previous_event(target_date, NEW_MOON)
+        return _to_julian_day(target_date) - new_moon["julian_day"]
+
+    def lunar_day(self, target_date: datetime) -> int:
+        """Номер лунного дня (1–30) по точному моменту новолуния"""
+        return min(30, int(self.lunar_age(target_date)) + 1)
+
+    def save(self, path: str) -> None:
+        """Сохраняет индекс в файл .npz"""
+        lunations = np.array(sorted(self._lunations), dtype=np.int64)
+        moments = np.array(
+            [self._lunations[k] for k in lunations], dtype=np.float64
+        ).reshape(-1, 4)
+
+        target = Path(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        with open(target, "wb") as handle:
+            np.savez(
+                handle,
+                version=np.array(LUNATION_INDEX_VERSION),
+                backend=np.array(self.engine.backend),
+                lunations=lunations,
+                moments=moments,
+            )
+        logger.info(
+            f"LUNATION_INDEX_SAVED: {target} {len(lunations)} lunations"
+        )
+
+    def load(self, path: str) -> bool:
+        """Загружает индекс из файла, возвращает False при ошибке"""
+        try:
+            with np.load(path) as data:
+                if int(data["version"]) != LUNATION_INDEX_VERSION:
+                    logger.warning(
+                        f"LUNATION_INDEX_VERSION_MISMATCH: {path} "
+                        f"{int(data['version'])}"
+                    )
+                    return False
+                lunations = data["lunations"]
+                moments = data["moments"]
+        except (OSError, KeyError, ValueError) as e:
+            logger.warning(f"LUNATION_INDEX_LOAD_FAILED: {path}: {e}")
+            return False
+
+        with self._lock:
+            for k, row in zip(lunations.tolist(), moments):
+                self._lunations[k] = np.array(row)
+            self._rebuild()
+        logger.info(
+            f"LUNATION_INDEX_LOADED: {path} {len(lunations)} lunations"
+        )
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        julian_days, _ = self._events
+        return {
+            "lunations": len(self._lunations),
+            "events": len(julian_days),
+            "solved_events": self.solved_events,
+            "backend": self.engine.backend,
+            "first": (
+                _from_julian_day(julian_days[0]).isoformat()
+                if julian_days
+                else None
+            ),
+            "last": (
+                _from_julian_day(julian_days[-1]).isoformat()
+                if julian_days
+                else None
+            ),
+        }
+
+
+_lunation_index: Optional[LunationIndex] = None
+
+
+def get_lunation_index() -> LunationIndex:
+    """Возвращает общий индекс, загружая файл из настроек один раз"""
+    global _lunation_index
+    if _lunation_index is None:
+        index = LunationIndex()
+        path = settings.LUNATION_INDEX_PATH
+        if path and Path(path).is_file():
+            index.load(path)
+        _lunation_index = index
+    return _lunation_index
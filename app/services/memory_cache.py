@@ -0,0 +1,552 @@
+"""
+In-process memory tier with O(1) LRU eviction and heap-based TTL expiry.
+
+Entries live in an ordered map, so get, set and eviction are O(1). Each
+namespace also keeps its own ordered map. Expiry times go into a min-heap,
+so expired entries are popped in deadline order. Nothing walks the whole
+cache.
+
+Capacity is measured in estimated bytes, not items. A natal chart costs
+far more than a device-capability flag. Every namespace (natal charts,
+transits, IoT analytics, ...) gets a byte quota carved from the total.
+That way a burst of one kind of data cannot flush the others. Hits,
+misses, evictions and expirations are counted per namespace.
+
+A namespace evicts by plain LRU or by W-TinyLFU. W-TinyLFU puts new
+entries in a small LRU window (1% of the quota). When the window
+overflows, its oldest entry competes with the main segment's LRU
+victim, and the one with the higher estimated access frequency stays.
+A count-min sketch tracks the frequencies, and it is halved
+periodically so old popularity fades. One-off keys, such as the charts
+of first-time users, then pass through the window without flushing the
+hot set.
+"""
+
+import heapq
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from loguru import logger
+
+# Key prefix (text before the first ":") -> namespace
+NAMESPACE_PREFIXES = {
+    "natal_chart": "natal_chart",
+    "chart_snapshot": "natal_chart",
+    "arabic_parts": "natal_chart",
+    "chart_analysis": "natal_chart",
+    "return": "natal_chart",
+    "transits_current": "transits",
+    "forecast_period": "transits",
+    "daily_ephemeris": "transits",
+    "analytics": "iot_analytics",
+    "automation_insights": "iot_analytics",
+    "device_capabilities": "iot_devices",
+    "user_devices": "iot_devices",
+}
+
+DEFAULT_NAMESPACE = "default"
+
+# Share of the total byte capacity each namespace may use
+DEFAULT_NAMESPACE_QUOTAS = {
+    "natal_chart": 0.4,
+    "transits": 0.3,
+    "iot_analytics": 0.15,
+    "iot_devices": 0.05,
+    DEFAULT_NAMESPACE: 0.2,
+}
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+POLICY_LRU = "lru"
+POLICY_TINYLFU = "tinylfu"
+
+# Share of a W-TinyLFU namespace's quota given to the admission window
+WINDOW_SHARE = 0.01
+
+# Average entry size assumed when sizing the frequency sketch
+SKETCH_BYTES_PER_ENTRY = 1024
+
+
+def namespace_of(key: str) -> str:
+    """Namespace for a cache key, derived from its prefix."""
+    prefix = key.split(":", 1)[0]
+    return NAMESPACE_PREFIXES.get(prefix, DEFAULT_NAMESPACE)
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate in-memory size of a JSON-like value in bytes."""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        for item_key, item in value.items():
+            size += estimate_size(item_key) + estimate_size(item)
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        for item in value:
+            size += estimate_size(item)
+    return size
+
+
+# Byte translation table that halves every counter at once
+_HALVED = bytes(count >> 1 for count in range(256))
+
+
+class FrequencySketch:
+    """
+    Count-min sketch of access frequencies with 4-bit counters.
+
+    Each key maps to one counter in each of four rows, and its estimate
+    is the smallest of them. After ``10 * width`` increments every
+    counter is halved, so the sketch follows recent popularity.
+    """
+
+    _SEEDS = (
+        0x9E3779B97F4A7C15,
+        0xC2B2AE3D27D4EB4F,
+        0x165667B19E3779F9,
+        0xD6E8FEB86659FD93,
+    )
+    _MAX_COUNT = 15
+
+    def __init__(self, width: int):
+        # Power of two, so a mask selects the column
+        self.width = 1 << max(6, (max(1, width) - 1).bit_length())
+        self._mask = self.width - 1
+        self._table = bytearray(self.width * len(self._SEEDS))
+        self._sample_size = 10 * self.width
+        self._additions = 0
+
+    def _indexes(self, key: str) -> List[int]:
+        item = hash(key) & 0xFFFFFFFFFFFFFFFF
+        indexes = []
+        for row, seed in enumerate(self._SEEDS):
+            mixed = (item * seed) & 0xFFFFFFFFFFFFFFFF
+            indexes.append(row * self.width + ((mixed >> 32) & self._mask))
+        return indexes
+
+    def increment(self, key: str) -> None:
+        table = self._table
+        for index in self._indexes(key):
+            if table[index] < self._MAX_COUNT:
+                table[index] += 1
+        self._additions += 1
+        if self._additions >= self._sample_size:
+            self._age()
+
+    def frequency(self, key: str) -> int:
+        table = self._table
+        return min(table[index] for index in self._indexes(key))
+
+    def _age(self) -> None:
+        self._table = bytearray(self._table.translate(_HALVED))
+        self._additions //= 2
+
+
+class _Entry:
+    __slots__ = ("value", "size", "expires_at", "namespace")
+
+    def __init__(
+        self,
+        value: Any,
+        size: int,
+        expires_at: Optional[float],
+        namespace: str,
+    ):
+        self.value = value
+        self.size = size
+        self.expires_at = expires_at
+        self.namespace = namespace
+
+
+class _Namespace:
+    __slots__ = (
+        "order",
+        "window",
+        "bytes",
+        "window_bytes",
+        "quota",
+        "window_quota",
+        "policy",
+        "hits",
+        "misses",
+        "evictions",
+        "expirations",
+        "rejected",
+        "admission_rejections",
+    )
+
+    def __init__(self, quota: int, policy: str = POLICY_LRU):
+        # LRU order of the main segment (of everything under plain LRU)
+        self.order: "OrderedDict[str, None]" = OrderedDict()
+        # W-TinyLFU admission window, LRU order
+        self.window: "OrderedDict[str, None]" = OrderedDict()
+        self.bytes = 0
+        self.window_bytes = 0
+        self.quota = quota
+        self.window_quota = int(quota * WINDOW_SHARE)
+        self.policy = policy
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.rejected = 0
+        self.admission_rejections = 0
+
+    def segment(self, key: str) -> "OrderedDict[str, None]":
+        return self.window if key in self.window else self.order
+
+
+class MemoryCache:
+    """Byte-bounded LRU cache with TTL and per-namespace quotas."""
+
+    def __init__(
+        self,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        quotas: Optional[Dict[str, float]] = None,
+        clock: Callable[[], float] = time.monotonic,
+        on_evict: Optional[Callable[[str], None]] = None,
+        policies: Optional[Dict[str, str]] = None,
+    ):
+        self.max_bytes = max_bytes
+        self.clock = clock
+        # Called with the key when an entry is evicted or expires
+        self.on_evict = on_evict
+        self._quotas = dict(DEFAULT_NAMESPACE_QUOTAS)
+        if quotas:
+            self._quotas.update(quotas)
+        # Eviction policy per namespace; unlisted namespaces use LRU
+        self._policies = dict(policies or {})
+        self._sketch = FrequencySketch(max_bytes // SKETCH_BYTES_PER_ENTRY)
+
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._namespaces: Dict[str, _Namespace] = {}
+        # (expires_at, key); stale items are skipped when popped
+        self._expiry_heap: List[Tuple[float, str]] = []
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _namespace(self, name: str) -> _Namespace:
+        namespace = self._namespaces.get(name)
+        if namespace is None:
+            share = self._quotas.get(
+                name, self._quotas.get(DEFAULT_NAMESPACE, 1.0)
+            )
+            policy = self._policies.get(
+                name, self._policies.get(DEFAULT_NAMESPACE, POLICY_LRU)
+            )
+            namespace = _Namespace(int(self.max_bytes * share), policy)
+            self._namespaces[name] = namespace
+        return namespace
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        entry = self._entries.get(key)
+        return entry is not None and not self._is_expired(entry)
+
+    def _is_expired(self, entry: _Entry) -> bool:
+        return entry.expires_at is not None and entry.expires_at <= (
+            self.clock()
+        )
+
+    @property
+    def total_bytes(self) -> int:
+        return self._bytes
+
+    def keys(self) -> List[str]:
+        """Snapshot of the keys, safe to iterate while deleting."""
+        with self._lock:
+            return list(self._entries)
+
+    def export(self) -> List[Tuple[str, Any, Optional[float]]]:
+        """Live entries, most recently used first, with remaining TTL."""
+        with self._lock:
+            now = self.clock()
+            items = []
+            for key in reversed(self._entries):
+                entry = self._entries[key]
+                if entry.expires_at is None:
+                    items.append((key, entry.value, None))
+                elif entry.expires_at > now:
+                    items.append((key, entry.value, entry.expires_at - now))
+            return items
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Value for key, or ``default`` if missing or expired."""
+        with self._lock:
+            return self._get(key, default)
+
+    def get_with_ttl(
+        self, key: str, default: Any = None
+    ) -> Tuple[Any, Optional[float]]:
+        """Value and remaining TTL in seconds (None if it never expires)."""
+        missing = object()
+        with self._lock:
+            value = self._get(key, missing)
+            if value is missing:
+                return default, None
+            expires_at = self._entries[key].expires_at
+            if expires_at is None:
+                return value, None
+            return value, expires_at - self.clock()
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Values for the keys that are present, under one lock."""
+        missing = object()
+        found = {}
+        with self._lock:
+            for key in keys:
+                value = self._get(key, missing)
+                if value is not missing:
+                    found[key] = value
+        return found
+
+    def set(
+        self,
+        key: str,
+        value: Any,
+        ttl: Optional[float] = None,
+        size: Optional[int] = None,
+    ) -> bool:
+        """Store value; ``ttl`` in seconds, None or 0 means no expiry."""
+        size = estimate_size(value) if size is None else size
+        with self._lock:
+            return self._set(key, value, ttl, size)
+
+    def set_many(
+        self, items: Dict[str, Any], ttl: Optional[float] = None
+    ) -> int:
+        """Store several values with one TTL; returns how many fit."""
+        sized = [
+            (key, value, estimate_size(value)) for key, value in items.items()
+        ]
+        with self._lock:
+            return sum(
+                self._set(key, value, ttl, size) for key, value, size in sized
+            )
+
+    def _get(self, key: str, default: Any) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            namespace = self._namespace(namespace_of(key))
+            namespace.misses += 1
+            # Misses count too: a key asked for again and again earns
+            # admission even after it was evicted
+            if namespace.policy == POLICY_TINYLFU:
+                self._sketch.increment(key)
+            return default
+
+        namespace = self._namespaces[entry.namespace]
+        if namespace.policy == POLICY_TINYLFU:
+            self._sketch.increment(key)
+        if self._is_expired(entry):
+            self._drop(key)
+            namespace.expirations += 1
+            namespace.misses += 1
+            return default
+
+        self._entries.move_to_end(key)
+        namespace.segment(key).move_to_end(key)
+        namespace.hits += 1
+        return entry.value
+
+    def _set(
+        self, key: str, value: Any, ttl: Optional[float], size: int
+    ) -> bool:
+        name = namespace_of(key)
+        namespace = self._namespace(name)
+        if key in self._entries:
+            self._remove(key)
+
+        if size > namespace.quota or size > self.max_bytes:
+            namespace.rejected += 1
+            logger.debug(
+                f"MEMORY_CACHE_REJECT: {key} ({size} bytes) "
+                f"exceeds {name} quota"
+            )
+            return False
+
+        self._expire_due()
+        tinylfu = namespace.policy == POLICY_TINYLFU
+        if not tinylfu:
+            while namespace.bytes + size > namespace.quota:
+                self._evict(next(iter(namespace.order)))
+        while self._bytes + size > self.max_bytes:
+            self._evict(next(iter(self._entries)))
+
+        expires_at = self.clock() + ttl if ttl else None
+        self._entries[key] = _Entry(value, size, expires_at, name)
+        namespace.bytes += size
+        self._bytes += size
+        if tinylfu:
+            # New entries always enter through the window
+            self._sketch.increment(key)
+            namespace.window[key] = None
+            namespace.window_bytes += size
+        else:
+            namespace.order[key] = None
+        if expires_at is not None:
+            heapq.heappush(self._expiry_heap, (expires_at, key))
+        if tinylfu:
+            self._admit(namespace)
+        self._compact_heap()
+        return key in self._entries
+
+    def _admit(self, namespace: _Namespace) -> None:
+        """Move window overflow to the main segment, by frequency."""
+        main_quota = namespace.quota - namespace.window_quota
+        while namespace.window_bytes > namespace.window_quota:
+            candidate = next(iter(namespace.window))
+            del namespace.window[candidate]
+            namespace.window_bytes -= self._entries[candidate].size
+            namespace.order[candidate] = None
+
+            while namespace.bytes - namespace.window_bytes > main_quota:
+                victim = next(iter(namespace.order))
+                if victim != candidate and self._sketch.frequency(
+                    candidate
+                ) > self._sketch.frequency(victim):
+                    self._evict(victim)
+                else:
+                    namespace.admission_rejections += 1
+                    self._evict(candidate)
+                    break
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            if key not in self._entries:
+                return False
+            self._remove(key)
+            return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            for namespace in self._namespaces.values():
+                namespace.order.clear()
+                namespace.window.clear()
+                namespace.bytes = 0
+                namespace.window_bytes = 0
+            self._expiry_heap.clear()
+            self._bytes = 0
+
+    def expire(self) -> int:
+        """Drop every entry whose TTL has passed; returns the count."""
+        with self._lock:
+            return self._expire_due()
+
+    def _remove(self, key: str) -> _Entry:
+        entry = self._entries.pop(key)
+        namespace = self._namespaces[entry.namespace]
+        if key in namespace.window:
+            del namespace.window[key]
+            namespace.window_bytes -= entry.size
+        else:
+            del namespace.order[key]
+        namespace.bytes -= entry.size
+        self._bytes -= entry.size
+        return entry
+
+    def _drop(self, key: str) -> _Entry:
+        entry = self._remove(key)
+        if self.on_evict is not None:
+            self.on_evict(key)
+        return entry
+
+    def _evict(self, key: str) -> None:
+        entry = self._drop(key)
+        self._namespaces[entry.namespace].evictions += 1
+
+    def _expire_due(self) -> int:
+        now = self.clock()
+        heap = self._expiry_heap
+        expired = 0
+        while heap and heap[0][0] <= now:
+            expires_at, key = heapq.heappop(heap)
+            entry = self._entries.get(key)
+            # The key may have been deleted or re-set with a new TTL
+            if entry is None or entry.expires_at != expires_at:
+                continue
+            self._drop(key)
+            self._namespaces[entry.namespace].expirations += 1
+            expired += 1
+        return expired
+
+    def _compact_heap(self) -> None:
+        # Overwrites leave stale heap items; rebuild once they dominate
+        if len(self._expiry_heap) <= 2 * len(self._entries) + 64:
+            return
+        self._expiry_heap = [
+            (entry.expires_at, key)
+            for key, entry in self._entries.items()
+            if entry.expires_at is not None
+        ]
+        heapq.heapify(self._expiry_heap)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            namespaces = {
+                name: {
+                    "policy": namespace.policy,
+                    "items": len(namespace.order) + len(namespace.window),
+                    "bytes": namespace.bytes,
+                    "quota_bytes": namespace.quota,
+                    "hits": namespace.hits,
+                    "misses": namespace.misses,
+                    "evictions": namespace.evictions,
+                    "expirations": namespace.expirations,
+                    "rejected": namespace.rejected,
+                    "admission_rejections": namespace.admission_rejections,
+                }
+                for name, namespace in self._namespaces.items()
+            }
+            return {
+                "items": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "namespaces": namespaces,
+            }
+
+
+class TagIndex:
+    """In-process reverse index from tags to cache keys."""
+
+    def __init__(self):
+        self._keys_by_tag: Dict[str, Set[str]] = {}
+        self._tags_by_key: Dict[str, Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys_by_tag)
+
+    def add(self, key: str, tags: Iterable[str]) -> None:
+        for tag in tags:
+            self._keys_by_tag.setdefault(tag, set()).add(key)
+            self._tags_by_key.setdefault(key, set()).add(tag)
+
+    def keys(self, tag: str) -> Set[str]:
+        return set(self._keys_by_tag.get(tag, ()))
+
+    def tags_of(self, key: str) -> Set[str]:
+        return set(self._tags_by_key.get(key, ()))
+
+    def discard(self, key: str) -> None:
+        """Forget a key, e.g. after it was deleted or evicted."""
+        for tag in self._tags_by_key.pop(key, ()):
+            keys = self._keys_by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_tag[tag]
+
+    def clear(self) -> None:
+        self._keys_by_tag.clear()
+        self._tags_by_key.clear()
+
+    def pop(self, tag: str) -> Set[str]:
+        """Keys registered under a tag; the tag is removed."""
+        keys = self._keys_by_tag.pop(tag, set())
+        for key in keys:
+            self.discard(key)
+        return keys
@@ -0,0 +1,574 @@
+"""
+Календарь мундинных событий, общий для всех пользователей.
+
+Ингрессии планет в знаки, ретроградные станции, лунации, затмения и
+точные аспекты планет друг к другу не зависят от натальной карты. Они
+считаются один раз на календарный год: позиции тел на сетке моментов
+получаются одним пакетным вызовом, переходы (граница знака, смена знака
+скорости, точный аспект) отделяются на сетке и уточняются методом
+Брента. Моменты лунаций берутся из индекса лунаций.
+
+События хранятся в интервальном индексе: мгновенные события — это
+интервалы нулевой длины, ретроградные периоды — интервалы от станции
+R до станции D. Запрос за период выполняется бинарным поиском. Годы
+сериализуются в словари для общего кэша (их готовит PrecomputeService),
+недостающие годы достраиваются по требованию.
+"""
+
+import logging
+import threading
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from datetime import datetime
+from itertools import combinations
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from app.services.astrology_calculator import (
+    ASPECT_TYPE_TABLE,
+    AstrologyCalculator,
+    ZodiacSign,
+    from_julian_day,
+    to_julian_days,
+)
+from app.services.ephemeris_solver import (
+    RootNotBracketedError,
+    brent_root,
+    find_angle_crossings,
+    wrap_angle,
+)
+from app.services.lunation_index import (
+    PHASE_KEYS,
+    PHASE_NAMES_RU,
+    LunationIndex,
+    get_lunation_index,
+)
+from app.services.transit_timing import aspect_targets, to_moment
+
+logger = logging.getLogger(__name__)
+
+MUNDANE_CALENDAR_FORMAT = 1
+
+# Виды событий
+INGRESS = "ingress"
+STATION = "station"
+LUNATION = "lunation"
+ECLIPSE = "eclipse"
+ASPECT = "aspect"
+RETROGRADE = "retrograde"
+
+# Тела календаря: ингрессии считаются для всех, станции — для тел,
+# которые бывают ретроградными, аспекты — без Луны (она дает их
+# несколько в сутки)
+CALENDAR_PLANETS = (
+    "Sun",
+    "Moon",
+    "Mercury",
+    "Venus",
+    "Mars",
+    "Jupiter",
+    "Saturn",
+    "Uranus",
+    "Neptune",
+    "Pluto",
+    "Chiron",
+)
+STATION_PLANETS = CALENDAR_PLANETS[2:]
+ASPECT_PLANETS = CALENDAR_PLANETS[:1] + CALENDAR_PLANETS[2:10]
+MUNDANE_ASPECT_ANGLES = (0, 60, 90, 120, 180)
+
+# Шаг сетки (сутки): Луна проходит за шаг около 3°, меньше знака
+GRID_STEP_DAYS = 0.25
+
+# Эклиптические пределы: при меньшем расстоянии Солнца от узла в
+# новолуние (полнолуние) возможно солнечное (лунное) затмение
+SOLAR_ECLIPSE_LIMIT_DEG = 18.5
+LUNAR_ECLIPSE_LIMIT_DEG = 12.2
+
+# Запас вокруг запроса, чтобы ретроградные периоды, пересекающие его,
+# имели обе станции; ни один период не длиннее MAX_RETROGRADE_DAYS
+RETROGRADE_MARGIN_DAYS = 200.0
+MAX_RETROGRADE_DAYS = 200.0
+
+_ASPECT_NAMES = {
+    definition.angle: definition.name
+    for definition in ASPECT_TYPE_TABLE.definitions
+}
+
+
+@dataclass
+class MundaneEvent:
+    """Событие календаря; мгновенное, если start_jd == end_jd"""
+
+    kind: str
+    planet: str
+    start_jd: float
+    end_jd: float
+    # Второе тело аспекта
+    other: Optional[str] = None
+    # Номер знака ингрессии или угол аспекта
+    value: Optional[float] = None
+    # Фаза лунации, вид затмения, направление станции или ингрессии
+    detail: Optional[str] = None
+
+    @property
+    def start(self) -> datetime:
+        return to_moment(self.start_jd)
+
+    @property
+    def end(self) -> datetime:
+        return to_moment(self.end_jd)
+
+    def to_dict(self) -> Dict[str, Any]:
+        result = {
+            "kind": self.kind,
+            "planet": self.planet,
+            "date": self.start.isoformat(),
+        }
+        if self.kind == INGRESS:
+            result["sign"] = list(ZodiacSign)[int(self.value)].name_ru
+            result["retrograde"] = self.detail == "retrograde"
+        elif self.kind == STATION:
+            result["direction"] = self.detail
+        elif self.kind in (LUNATION, ECLIPSE):
+            result["phase"] = self.detail
+            result["name"] = PHASE_NAMES_RU[PHASE_KEYS.index(self.detail)]
+        elif self.kind == ASPECT:
+            result["other_planet"] = self.other
+            result["aspect_angle"] = self.value
+            result["aspect"] = _ASPECT_NAMES.get(self.value, str(self.value))
+        elif self.kind == RETROGRADE:
+            result["end_date"] = self.end.isoformat()
+        return result
+
+    def _row(self) -> List[Any]:
+        return [
+            self.kind,
+            self.planet,
+            self.start_jd,
+            self.other,
+            self.value,
+            self.detail,
+        ]
+
+
+class _IntervalIndex:
+    """Интервалы, отсортированные по началу, с префиксным максимумом
+    концов: пересекающие запрос интервалы лежат в одном срезе"""
+
+    def __init__(self, events: Iterable[MundaneEvent]):
+        self.events = sorted(events, key=lambda event: event.start_jd)
+        self.starts = [event.start_jd for event in self.events]
+        self.max_ends = np.maximum.accumulate(
+            [event.end_jd for event in self.events] or [0.0]
+        ).tolist()
+
+    def overlapping(
+        self, start_jd: float, end_jd: float
+    ) -> List[MundaneEvent]:
+        """Интервалы, пересекающие [start_jd, end_jd)"""
+        first = bisect_left(self.max_ends, start_jd)
+        last = bisect_left(self.starts, end_jd)
+        return [
+            event
+            for event in self.events[first:last]
+            if event.end_jd >= start_jd
+        ]
+
+    def containing(self, julian_day: float) -> List[MundaneEvent]:
+        """Интервалы, содержащие момент"""
+        first = bisect_left(self.max_ends, julian_day)
+        last = bisect_right(self.starts, julian_day)
+        return [
+            event
+            for event in self.events[first:last]
+            if event.end_jd >= julian_day
+        ]
+
+
+def _year_bounds(year: int) -> Tuple[float, float]:
+    start, end = to_julian_days(
+        [datetime(year, 1, 1), datetime(year + 1, 1, 1)]
+    )
+    return float(start), float(end)
+
+
+class MundaneCalendar:
+    """Предвычисленный по годам календарь мундинных событий"""
+
+    def __init__(
+        self,
+        calculator: Optional[AstrologyCalculator] = None,
+        lunation_index: Optional[LunationIndex] = None,
+    ):
+        self.calculator = calculator or AstrologyCalculator()
+        self.lunation_index = lunation_index or get_lunation_index()
+        # Год -> мгновенные события года
+        self._years: Dict[int, List[MundaneEvent]] = {}
+        # Индекс заменяется целиком, читатели работают без блокировки
+        self._index = _IntervalIndex([])
+        self._lock = threading.Lock()
+        self.built_years = 0
+
+    # Построение
+
+    def _positions(
+        self, julian_days: np.ndarray, planets: Iterable[str]
+    ) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        batch = self.calculator.calculate_positions_for_julian_days(
+            julian_days, list(planets)
+        )
+        return batch.planets, batch.longitude, batch.speed
+
+    def _position(self, julian_day: float, planet: str) -> Tuple[float, float]:
+        _, longitude, speed = self._positions(np.array([julian_day]), [planet])
+        return float(longitude[0, 0]), float(speed[0, 0])
+
+    def build_year(self, year: int) -> List[MundaneEvent]:
+        """Все мгновенные события года [1 января, 1 января следующего)"""
+        start_jd, end_jd = _year_bounds(year)
+        grid = np.arange(start_jd, end_jd + GRID_STEP_DAYS, GRID_STEP_DAYS)
+        names, longitude, speed = self._positions(grid, CALENDAR_PLANETS)
+        columns = {name: index for index, name in enumerate(names)}
+
+        events = (
+            self._ingresses(grid, names, longitude)
+            + self._stations(grid, columns, speed)
+            + self._aspects(grid, columns, longitude)
+            + self._lunations(year)
+        )
+        return sorted(
+            (event for event in events if start_jd <= event.start_jd < end_jd),
+            key=lambda event: event.start_jd,
+        )
+
+    def _ingresses(
+        self, grid: np.ndarray, names: List[str], longitude: np.ndarray
+    ) -> List[MundaneEvent]:
+        events = []
+        for column, planet in enumerate(names):
+            for sign in range(12):
+                boundary = sign * 30.0
+                values = wrap_angle(longitude[:, column] - boundary)
+
+                def residual(julian_day, planet=planet, boundary=boundary):
+                    return wrap_angle(
+                        self._position(julian_day, planet)[0] - boundary
+                    )
+
+                for root in find_angle_crossings(residual, grid, values):
+                    node = min(int(np.searchsorted(grid, root)), len(grid) - 1)
+                    # Назад через границу — возврат в предыдущий знак
+                    direct = values[node] > values[max(node - 1, 0)]
+                    events.append(
+                        MundaneEvent(
+                            INGRESS,
+                            planet,
+                            root,
+                            root,
+                            value=sign if direct else (sign - 1) % 12,
+                            detail="direct" if direct else "retrograde",
+                        )
+                    )
+        return events
+
+    def _stations(
+        self, grid: np.ndarray, columns: Mapping[str, int], speed: np.ndarray
+    ) -> List[MundaneEvent]:
+        events = []
+        for planet in STATION_PLANETS:
+            if planet not in columns:
+                continue
+            values = speed[:, columns[planet]]
+
+            def residual(julian_day, planet=planet):
+                return self._position(julian_day, planet)[1]
+
+            for index in np.nonzero(np.diff(np.sign(values)) != 0)[0]:
+                try:
+                    root = brent_root(
+                        residual,
+                        float(grid[index]),
+                        float(grid[index + 1]),
+                        float(values[index]),
+                        float(values[index + 1]),
+                    )
+                except RootNotBracketedError:
+                    continue
+                events.append(
+                    MundaneEvent(
+                        STATION,
+                        planet,
+                        root,
+                        root,
+                        detail=(
+                            "retrograde" if values[index] > 0 else "direct"
+                        ),
+                    )
+                )
+        return events
+
+    def _aspects(
+        self,
+        grid: np.ndarray,
+        columns: Mapping[str, int],
+        longitude: np.ndarray,
+    ) -> List[MundaneEvent]:
+        events = []
+        planets = [planet for planet in ASPECT_PLANETS if planet in columns]
+        for first, second in combinations(planets, 2):
+            difference = (
+                longitude[:, columns[first]] - longitude[:, columns[second]]
+            )
+
+            def separation(julian_day, first=first, second=second):
+                _, pair, _ = self._positions(
+                    np.array([julian_day]), [first, second]
+                )
+                return float(pair[0, 0] - pair[0, 1])
+
+            for angle in MUNDANE_ASPECT_ANGLES:
+                for target in aspect_targets(angle):
+                    roots = find_angle_crossings(
+                        lambda julian_day, target=target: wrap_angle(
+                            separation(julian_day) - target
+                        ),
+                        grid,
+                        wrap_angle(difference - target),
+                    )
+                    events.extend(
+                        MundaneEvent(
+                            ASPECT,
+                            first,
+                            root,
+                            root,
+                            other=second,
+                            value=float(angle),
+                        )
+                        for root in roots
+                    )
+        return events
+
+    def _lunations(self, year: int) -> List[MundaneEvent]:
+        events = []
+        for lunation in self.lunation_index.events_between(
+            datetime(year, 1, 1), datetime(year + 1, 1, 1)
+        ):
+            julian_day = lunation["julian_day"]
+            phase = lunation["phase"]
+            events.append(
+                MundaneEvent(
+                    LUNATION, "Moon", julian_day, julian_day, detail=phase
+                )
+            )
+            eclipse = self._eclipse_planet(julian_day, phase)
+            if eclipse:
+                events.append(
+                    MundaneEvent(
+                        ECLIPSE, eclipse, julian_day, julian_day, detail=phase
+                    )
+                )
+        return events
+
+    def _eclipse_planet(self, julian_day: float, phase: str) -> Optional[str]:
+        """Затмеваемое светило, если лунация близка к лунному узлу"""
+        if phase == "new_moon":
+            planet, limit = "Sun", SOLAR_ECLIPSE_LIMIT_DEG
+        elif phase == "full_moon":
+            planet, limit = "Moon", LUNAR_ECLIPSE_LIMIT_DEG
+        else:
+            return None
+
+        names, longitude, _ = self._positions(
+            np.array([julian_day]), ["Sun", "TrueNode"]
+        )
+        if "TrueNode" not in names:
+            return None
+        sun, node = (
+            longitude[0, names.index("Sun")],
+            longitude[0, names.index("TrueNode")],
+        )
+        # Расстояние до ближайшего из двух узлов
+        distance = abs(wrap_angle(sun - node))
+        return planet if min(distance, 180.0 - distance) < limit else None
+
+    # Индекс
+
+    def _rebuild(self) -> None:
+        instants = [
+            event
+            for year in sorted(self._years)
+            for event in self._years[year]
+        ]
+        self._index = _IntervalIndex(
+            instants + self._retrograde_periods(instants)
+        )
+
+    @staticmethod
+    def _retrograde_periods(
+        instants: List[MundaneEvent],
+    ) -> List[MundaneEvent]:
+        """Ретроградные периоды между станциями R и D одной планеты"""
+        periods = []
+        opened: Dict[str, float] = {}
+        for event in instants:
+            if event.kind != STATION:
+                continue
+            if event.detail == "retrograde":
+                opened[event.planet] = event.start_jd
+                continue
+            start_jd = opened.pop(event.planet, None)
+            # Станции из несмежных лет не образуют период
+            if (
+                start_jd is not None
+                and event.start_jd - start_jd <= MAX_RETROGRADE_DAYS
+            ):
+                periods.append(
+                    MundaneEvent(
+                        RETROGRADE, event.planet, start_jd, event.start_jd
+                    )
+                )
+        return periods
+
+    def ensure_years(self, first: int, last: int) -> None:
+        """Достраивает годы диапазона (включительно)"""
+        missing = [
+            year for year in range(first, last + 1) if year not in self._years
+        ]
+        if not missing:
+            return
+
+        with self._lock:
+            built = {
+                year: self.build_year(year)
+                for year in missing
+                if year not in self._years
+            }
+            if built:
+                self._years.update(built)
+                self.built_years += len(built)
+                self._rebuild()
+                logger.info(f"MUNDANE_CALENDAR_BUILT: {sorted(built)}")
+
+    def ensure_range(self, start_jd: float, end_jd: float) -> None:
+        """Достраивает годы, покрывающие интервал с запасом на ретрограды"""
+        self.ensure_years(
+            from_julian_day(start_jd - RETROGRADE_MARGIN_DAYS).year,
+            from_julian_day(end_jd + RETROGRADE_MARGIN_DAYS).year,
+        )
+
+    # Запросы
+
+    def events_between(
+        self,
+        start: datetime,
+        end: datetime,
+        kinds: Optional[Iterable[str]] = None,
+        planets: Optional[Iterable[str]] = None,
+    ) -> List[MundaneEvent]:
+        """События, пересекающие полуинтервал [start, end), по началу"""
+        start_jd, end_jd = (float(jd) for jd in to_julian_days([start, end]))
+        self.ensure_range(start_jd, end_jd)
+
+        kinds = set(kinds) if kinds is not None else None
+        planets = set(planets) if planets is not None else None
+        return [
+            event
+            for event in self._index.overlapping(start_jd, end_jd)
+            if (kinds is None or event.kind in kinds)
+            and (
+                planets is None
+                or event.planet in planets
+                or event.other in planets
+            )
+        ]
+
+    def notable_events(
+        self, start: datetime, end: datetime
+    ) -> List[MundaneEvent]:
+        """Лунации, затмения, станции и ингрессии планет (без частых
+        ингрессий Луны) за полуинтервал [start, end)"""
+        return [
+            event
+            for event in self.events_between(
+                start, end, kinds=[LUNATION, ECLIPSE, STATION, INGRESS]
+            )
+            if event.kind != INGRESS or event.planet != "Moon"
+        ]
+
+    def retrograde_periods_at(
+        self, moment: datetime
+    ) -> Dict[str, MundaneEvent]:
+        """Ретроградные периоды планет, идущие в указанный момент"""
+        julian_day = float(to_julian_days([moment])[0])
+        self.ensure_range(julian_day, julian_day)
+        return {
+            event.planet: event
+            for event in self._index.containing(julian_day)
+            if event.kind == RETROGRADE
+        }
+
+    def is_retrograde(self, planet: str, moment: datetime) -> bool:
+        return planet in self.retrograde_periods_at(moment)
+
+    # Сериализация
+
+    @property
+    def years(self) -> List[int]:
+        return sorted(self._years)
+
+    def year_to_dict(self, year: int) -> Dict[str, Any]:
+        """Словарь года для кэша (только мгновенные события)"""
+        self.ensure_years(year, year)
+        return {
+            "format": MUNDANE_CALENDAR_FORMAT,
+            "year": year,
+            "backend": self.calculator.backend,
+            "events": [event._row() for event in self._years[year]],
+        }
+
+    def load_years(self, payloads: Iterable[Mapping[str, Any]]) -> List[int]:
+        """Загружает годы из словарей кэша, возвращает загруженные годы.
+
+        Годы, посчитанные другим бэкендом эфемерид, пропускаются: их
+        моменты расходятся с текущим бэкендом, и такие годы строятся
+        заново.
+        """
+        loaded = {}
+        for data in payloads:
+            if data.get("format") != MUNDANE_CALENDAR_FORMAT:
+                continue
+            if data.get("backend") != self.calculator.backend:
+                continue
+            loaded[int(data["year"])] = [
+                MundaneEvent(kind, planet, jd, jd, other, value, detail)
+                for kind, planet, jd, other, value, detail in data["events"]
+            ]
+        if loaded:
+            with self._lock:
+                self._years.update(loaded)
+                self._rebuild()
+        return sorted(loaded)
+
+    def get_stats(self) -> Dict[str, Any]:
+        counts: Dict[str, int] = {}
+        for event in self._index.events:
+            counts[event.kind] = counts.get(event.kind, 0) + 1
+        return {
+            "years": self.years,
+            "built_years": self.built_years,
+            "events": counts,
+            "backend": self.calculator.backend,
+        }
+
+
+_mundane_calendar: Optional[MundaneCalendar] = None
+
+
+def get_mundane_calendar() -> MundaneCalendar:
+    """Общий календарь процесса"""
+    global _mundane_calendar
+    if _mundane_calendar is None:
+        _mundane_calendar = MundaneCalendar()
+    return _mundane_calendar
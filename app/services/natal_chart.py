@@ -10,6 +10,7 @@ from typing import Any, Dict, List, Optional
 import pytz
 
 from app.services.astrology_calculator import AstrologyCalculator
+from app.services.chart_context import ChartContext
 from app.services.kerykeion_service import HouseSystem, KerykeionService, ZodiacType
 
 logger = logging.getLogger(__name__)
@@ -232,19 +233,14 @@ class NatalChartCalculator:
             },
         }
 
-    def calculate_natal_chart(
+    def _create_chart_context(
         self,
         birth_date: date,
-        birth_time: Optional[time] = None,
-        birth_place: Optional[Dict[str, float]] = None,
-        timezone_str: str = "Europe/Moscow",
-    ) -> Dict[str, Any]:
-        """Вычисляет натальную карту."""
-
-        # Создаем datetime объект
-        if birth_time is None:
-            birth_time = time(12, 0)  # Полдень по умолчанию
-
+        birth_time: time,
+        birth_place: Dict[str, float],
+        timezone_str: str,
+    ) -> ChartContext:
+        """Создает контекст вычисления карты для момента и места рождения"""
         birth_datetime = datetime.combine(birth_date, birth_time)
 
         # Устанавливаем временную зону
@@ -255,22 +251,36 @@ class NatalChartCalculator:
             # Если временная зона некорректна, используем UTC
             birth_datetime = pytz.UTC.localize(birth_datetime)
 
+        return self.astro_calc.chart_context(
+            birth_datetime, birth_place["latitude"], birth_place["longitude"]
+        )
+
+    def calculate_natal_chart(
+        self,
+        birth_date: date,
+        birth_time: Optional[time] = None,
+        birth_place: Optional[Dict[str, float]] = None,
+        timezone_str: str = "Europe/Moscow",
+        context: Optional[ChartContext] = None,
+    ) -> Dict[str, Any]:
+        """Вычисляет натальную карту."""
+
+        if birth_time is None:
+            birth_time = time(12, 0)  # Полдень по умолчанию
+
         # Координаты места рождения (по умолчанию Москва)
         if birth_place is None:
             birth_place = {"latitude": 55.7558, "longitude": 37.6176}
 
-        # Вычисляем позиции планет
-        planet_positions = self.astro_calc.calculate_planet_positions(
-            birth_datetime, birth_place["latitude"], birth_place["longitude"]
-        )
-
-        # Вычисляем дома
-        houses = self.astro_calc.calculate_houses(
-            birth_datetime, birth_place["latitude"], birth_place["longitude"]
-        )
+        if context is None:
+            context = self._create_chart_context(
+                birth_date, birth_time, birth_place, timezone_str
+            )
 
-        # Вычисляем аспекты
-        aspects = self.astro_calc.calculate_aspects(planet_positions)
+        # Позиции, дома и аспекты берутся из одного контекста карты
+        planet_positions = context.planets
+        houses = context.houses
+        aspects = context.aspects
 
         # Создаем интерпретацию карты
         interpretation = self._create_chart_interpretation(
@@ -669,19 +679,14 @@ class NatalChartCalculator:
         except Exception:
             progressed_datetime = pytz.UTC.localize(progressed_datetime)
 
-        # Вычисляем прогрессированные позиции планет
-        progressed_positions = self.astro_calc.calculate_planet_positions(
-            progressed_datetime,
-            birth_place["latitude"],
-            birth_place["longitude"],
-        )
-
-        # Вычисляем прогрессированные дома (только для быстро движущихся точек)
-        progressed_houses = self.astro_calc.calculate_houses(
+        # Прогрессированные позиции и дома из одного контекста карты
+        context = self.astro_calc.chart_context(
             progressed_datetime,
             birth_place["latitude"],
             birth_place["longitude"],
         )
+        progressed_positions = context.planets
+        progressed_houses = context.houses
 
         # Создаем интерпретацию прогрессий
         progression_interpretation = self._interpret_progressions(
@@ -890,6 +895,11 @@ class NatalChartCalculator:
         if birth_place is None:
             birth_place = {"latitude": 55.7558, "longitude": 37.6176}
 
+        # Общий контекст для базового расчета и фиксированных звезд
+        context = self._create_chart_context(
+            birth_date, birth_time, birth_place, timezone_str
+        )
+
         # Конвертируем строковые параметры в enums
         try:
             house_sys_enum = HouseSystem(house_system)
@@ -1008,7 +1018,11 @@ class NatalChartCalculator:
                 # Fallback to basic calculation
                 result.update(
                     self._calculate_fallback_chart(
-                        birth_date, birth_time, birth_place, timezone_str
+                        birth_date,
+                        birth_time,
+                        birth_place,
+                        timezone_str,
+                        context,
                     )
                 )
         else:
@@ -1018,17 +1032,13 @@ class NatalChartCalculator:
             # Используем базовый калькулятор
             result.update(
                 self._calculate_fallback_chart(
-                    birth_date, birth_time, birth_place, timezone_str
+                    birth_date, birth_time, birth_place, timezone_str, context
                 )
             )
 
         # Добавляем фиксированные звезды если запрошены (используем базовый калькулятор)
         if include_fixed_stars:
-            result["fixed_stars"] = self.astro_calc.calculate_fixed_stars(
-                birth_datetime,
-                birth_place["latitude"],
-                birth_place["longitude"],
-            )
+            result["fixed_stars"] = context.fixed_stars
 
         logger.info(
             f"NATAL_CHART_ENHANCED_COMPLETE: {name} - backend: {result['calculation_backend']}"
@@ -1041,10 +1051,11 @@ class NatalChartCalculator:
         birth_time: Optional[time],
         birth_place: Dict[str, float],
         timezone_str: str,
+        context: Optional[ChartContext] = None,
     ) -> Dict[str, Any]:
         """Fallback calculation using the basic astrology calculator"""
         basic_chart = self.calculate_natal_chart(
-            birth_date, birth_time, birth_place, timezone_str
+            birth_date, birth_time, birth_place, timezone_str, context
         )
 
         return {
@@ -11,6 +11,7 @@ from loguru import logger
 
 from app.services.astro_cache_service import astro_cache
 from app.services.async_kerykeion_service import async_kerykeion
+from app.services.mundane_calendar import get_mundane_calendar
 from app.services.performance_monitor import performance_monitor
 
 
@@ -26,8 +27,13 @@ class PrecomputeService:
             "lunar_phases": {"interval_hours": 12, "last_run": None},
             "zodiac_compatibility": {"interval_hours": 48, "last_run": None},
             "transit_forecasts": {"interval_hours": 8, "last_run": None},
+            "mundane_calendar": {"interval_hours": 24, "last_run": None},
         }
 
+        # Years of the shared mundane calendar kept in cache, relative
+        # to the current year (inclusive)
+        self.mundane_calendar_years = (-1, 2)
+
         # Popular zodiac signs based on common requests
         self.popular_signs = [
             "Leo",
@@ -168,6 +174,8 @@ class PrecomputeService:
             await self._precompute_zodiac_compatibility()
         elif task_name == "transit_forecasts":
             await self._precompute_transit_forecasts()
+        elif task_name == "mundane_calendar":
+            await self._precompute_mundane_calendar()
         else:
             logger.warning(f"PRECOMPUTE_SERVICE_UNKNOWN_TASK: {task_name}")
 
@@ -256,33 +264,32 @@ class PrecomputeService:
                     }
                 )
 
-        # Pre-compute charts in batches to avoid overwhelming the system
-        batch_size = 5
-        for i in range(0, len(chart_requests), batch_size):
-            batch = chart_requests[i : i + batch_size]
-
-            # Check if charts are already cached
-            uncached_requests = []
-            for request in batch:
-                cached_chart = await astro_cache.get_natal_chart(
-                    birth_datetime=request["birth_datetime"],
-                    latitude=request["latitude"],
-                    longitude=request["longitude"],
-                    timezone=request["timezone"],
-                )
-                if not cached_chart:
-                    uncached_requests.append(request)
-
-            if uncached_requests:
-                results = await async_kerykeion.batch_calculate_charts(
-                    uncached_requests, use_cache=True
-                )
-                precomputed_count += len(
-                    [r for r in results if not r.get("error")]
-                )
+        # Check which charts are already cached in one bulk lookup
+        keys = [
+            astro_cache.natal_chart_key(
+                request["birth_datetime"],
+                request["latitude"],
+                request["longitude"],
+                request["timezone"],
+            )
+            for request in chart_requests
+        ]
+        present = await astro_cache.exists_many(keys)
+        uncached_requests = [
+            request
+            for key, request in zip(keys, chart_requests)
+            if not present[key]
+        ]
 
-                # Small delay between batches to avoid overloading
-                await asyncio.sleep(2)
+        if uncached_requests:
+            # The chart executor bounds concurrency; cache writes are
+            # pipelined into a single round trip
+            results = await async_kerykeion.batch_calculate_charts(
+                uncached_requests, use_cache=True
+            )
+            precomputed_count += len(
+                [r for r in results if not r.get("error")]
+            )
 
         logger.info(
             f"PRECOMPUTE_CHARTS_SUCCESS: {precomputed_count} charts precomputed"
@@ -462,6 +469,41 @@ class PrecomputeService:
             "PRECOMPUTE_TRANSITS_SUCCESS: Transit forecasts precomputed"
         )
 
+    async def _precompute_mundane_calendar(self):
+        """Load or build the shared mundane event calendar by year."""
+        logger.info("PRECOMPUTE_MUNDANE_CALENDAR_START")
+
+        calendar = get_mundane_calendar()
+        first, last = self.mundane_calendar_years
+        current_year = date.today().year
+        years = range(current_year + first, current_year + last + 1)
+
+        # Years already built by another process are loaded in one lookup
+        keys = {year: astro_cache.mundane_calendar_key(year) for year in years}
+        cached = await astro_cache.get_many(keys.values())
+        loaded = calendar.load_years(
+            payload for payload in cached.values() if isinstance(payload, dict)
+        )
+
+        missing = [year for year in years if year not in calendar.years]
+        if missing:
+            await asyncio.to_thread(
+                calendar.ensure_years, min(missing), max(missing)
+            )
+        await astro_cache.set_many(
+            {
+                keys[year]: calendar.year_to_dict(year)
+                for year in years
+                if year not in loaded
+            },
+            astro_cache.storage_ttl("mundane_calendar"),
+        )
+
+        logger.info(
+            f"PRECOMPUTE_MUNDANE_CALENDAR_SUCCESS: {len(loaded)} years loaded, "
+            f"{len(missing)} built"
+        )
+
     async def manual_precompute_all(self) -> Dict[str, Any]:
         """Manually trigger pre-computation of all popular data."""
         logger.info("PRECOMPUTE_MANUAL_ALL_START")
@@ -475,6 +517,7 @@ class PrecomputeService:
             ("lunar_phases", self._precompute_lunar_phases),
             ("zodiac_compatibility", self._precompute_zodiac_compatibility),
             ("transit_forecasts", self._precompute_transit_forecasts),
+            ("mundane_calendar", self._precompute_mundane_calendar),
         ]
 
         for task_name, task_func in tasks:
@@ -8,11 +8,18 @@ from datetime import date, datetime, timedelta
 from typing import Any, Dict, List, Optional
 
 from app.models.transit_models import ProgressedPlanet, ProgressionInterpretation
+from app.services import cache_keys
 from app.services.astrology_calculator import AstrologyCalculator
 from app.services.kerykeion_service import KerykeionService
+from app.services.lunation_index import get_lunation_index
+from app.services.progression_timeline import PROGRESSION_YEAR_DAYS, ProgressionEngine
+from app.services.return_solver import get_return_solver
 
 logger = logging.getLogger(__name__)
 
+# Горизонт смен знака прогрессированной Луны в ответе прогрессий (лет)
+PROGRESSED_MOON_HORIZON_YEARS = 5
+
 # Try to import additional Kerykeion features for progressions
 try:
     # Try different progression imports
@@ -43,6 +50,7 @@ class ProgressionService:
     def __init__(self):
         self.kerykeion_service = KerykeionService()
         self.astro_calculator = AstrologyCalculator()
+        self.progression_engine = ProgressionEngine(self.astro_calculator)
         self.logger = logging.getLogger(__name__)
 
     def is_available(self) -> bool:
@@ -73,6 +81,14 @@ class ProgressionService:
         ).date()
         days_progressed = (target_date - birth_date).days
 
+        # Позиции из линии прогрессий карты: без построения карты на дату
+        try:
+            return self._get_timeline_progressions(
+                natal_chart, target_date, days_progressed
+            )
+        except Exception as e:
+            logger.error(f"PROGRESSION_SERVICE_TIMELINE_ERROR: {e}")
+
         # Попробуем использовать Kerykeion, если доступен
         if (
             KERYKEION_PROGRESSIONS_AVAILABLE
@@ -90,6 +106,123 @@ class ProgressionService:
                 natal_chart, target_date, days_progressed
             )
 
+    def _birth_datetime(self, natal_chart: Dict[str, Any]) -> datetime:
+        """Момент рождения из данных натальной карты."""
+        return datetime.fromisoformat(
+            natal_chart.get("birth_datetime", "2000-01-01T12:00:00")
+        )
+
+    def _progression_moment(
+        self, birth_datetime: datetime, target_date: Optional[date]
+    ) -> datetime:
+        """Момент даты прогрессии во время рождения."""
+        return datetime.combine(
+            target_date or date.today(), birth_datetime.time()
+        ).replace(tzinfo=birth_datetime.tzinfo)
+
+    def _get_timeline_progressions(
+        self,
+        natal_chart: Dict[str, Any],
+        target_date: date,
+        days_progressed: int,
+    ) -> Dict[str, Any]:
+        """Прогрессии из линии прогрессированных позиций карты."""
+        birth_datetime = self._birth_datetime(natal_chart)
+        target_moment = self._progression_moment(birth_datetime, target_date)
+        horizon = target_moment + timedelta(
+            days=PROGRESSED_MOON_HORIZON_YEARS * PROGRESSION_YEAR_DAYS
+        )
+        timeline = self.progression_engine.timeline(
+            cache_keys.chart_id_from_data(natal_chart), birth_datetime, horizon
+        )
+
+        progressed_planets = {
+            name.lower(): {**data, "house": None}
+            for name, data in timeline.positions_at(target_moment).items()
+        }
+        natal_planets = {
+            name.lower(): data
+            for name, data in timeline.positions_at(birth_datetime).items()
+        }
+
+        interpretation = self._create_progression_interpretation(
+            progressed_planets, days_progressed, target_date
+        )
+
+        logger.info("PROGRESSION_SERVICE_TIMELINE_SUCCESS")
+        return {
+            "birth_date": birth_datetime.date().isoformat(),
+            "progression_date": target_date.isoformat(),
+            "days_progressed": days_progressed,
+            "progressed_date": timeline.progressed_moment(
+                target_moment
+            ).isoformat(),
+            "progressed_planets": progressed_planets,
+            "interpretation": interpretation,
+            "key_changes": self._identify_key_changes(
+                progressed_planets, natal_planets
+            ),
+            "progressed_aspects": timeline.aspects_at(target_moment),
+            "progressed_moon_sign_changes": timeline.sign_changes(
+                "Moon", target_moment, horizon
+            ),
+            "life_phase_analysis": self._analyze_life_phase(days_progressed),
+            "spiritual_evolution": self._assess_spiritual_evolution(
+                progressed_planets
+            ),
+            "source": "timeline",
+        }
+
+    def get_progressed_moon_sign_changes(
+        self,
+        natal_chart: Dict[str, Any],
+        years: int = PROGRESSED_MOON_HORIZON_YEARS,
+        start_date: Optional[date] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Смены знака прогрессированной Луны за ближайшие годы.
+
+        Args:
+            natal_chart: Данные натальной карты
+            years: Горизонт в годах
+            start_date: Начало периода (по умолчанию сегодня)
+        """
+        birth_datetime = self._birth_datetime(natal_chart)
+        start = self._progression_moment(birth_datetime, start_date)
+        end = start + timedelta(days=years * PROGRESSION_YEAR_DAYS)
+        timeline = self.progression_engine.timeline(
+            cache_keys.chart_id_from_data(natal_chart), birth_datetime, end
+        )
+        return timeline.sign_changes("Moon", start, end)
+
+    def get_progressed_aspects(
+        self,
+        natal_chart: Dict[str, Any],
+        target_date: Optional[date] = None,
+        years_ahead: int = 0,
+    ) -> Dict[str, Any]:
+        """
+        Аспекты прогрессированных планет к натальным.
+
+        Args:
+            natal_chart: Данные натальной карты
+            target_date: Дата прогрессии (по умолчанию сегодня)
+            years_ahead: Горизонт поиска дат точных аспектов (лет)
+        """
+        birth_datetime = self._birth_datetime(natal_chart)
+        moment = self._progression_moment(birth_datetime, target_date)
+        end = moment + timedelta(days=years_ahead * PROGRESSION_YEAR_DAYS)
+        timeline = self.progression_engine.timeline(
+            cache_keys.chart_id_from_data(natal_chart), birth_datetime, end
+        )
+        return {
+            "progression_date": moment.date().isoformat(),
+            "active_aspects": timeline.aspects_at(moment),
+            "exact_aspects": (
+                timeline.exact_aspects(moment, end) if years_ahead else []
+            ),
+        }
+
     def _get_kerykeion_progressions(
         self,
         natal_chart: Dict[str, Any],
@@ -117,7 +250,9 @@ class ProgressionService:
                 raise ValueError("Failed to create natal subject")
 
             # Создаем прогрессированную карту (день = год)
-            progression_date = birth_datetime + timedelta(days=days_progressed)
+            progression_date = birth_datetime + timedelta(
+                days=days_progressed / PROGRESSION_YEAR_DAYS
+            )
 
             progressed_subject = (
                 self.kerykeion_service.create_astrological_subject(
@@ -179,7 +314,9 @@ class ProgressionService:
         birth_datetime = datetime.fromisoformat(
             natal_chart.get("birth_datetime", "2000-01-01T12:00:00")
         )
-        progression_datetime = birth_datetime + timedelta(days=days_progressed)
+        progression_datetime = birth_datetime + timedelta(
+            days=days_progressed / PROGRESSION_YEAR_DAYS
+        )
 
         # Получаем позиции планет на прогрессированную дату
         progressed_positions = (
@@ -247,9 +384,12 @@ class ProgressionService:
         # Определяем дату соляра (приблизительно день рождения в указанном году)
         solar_date = date(year, birth_datetime.month, birth_datetime.day)
 
-        # Попробуем найти точное время соляра (когда Солнце возвращается в натальную позицию)
+        # Точное время соляра: Солнце возвращается в натальную позицию
         solar_datetime = self._find_exact_solar_return_time(
-            birth_datetime, year, coordinates
+            birth_datetime,
+            year,
+            coordinates,
+            self._get_natal_longitude(natal_chart, "Sun", birth_datetime),
         )
 
         # Рассчитываем позиции планет на соляр
@@ -311,17 +451,30 @@ class ProgressionService:
         else:
             coordinates = location
 
-        # Находим новолуние в указанном месяце (приблизительно)
+        birth_datetime = datetime.fromisoformat(
+            natal_chart.get("birth_datetime", "2000-01-01T12:00:00")
+        )
+
+        # Находим новолуние в указанном месяце
         new_moon_date = self._find_new_moon_date(year, month)
 
+        # Точное время лунара: Луна возвращается в натальную позицию
+        lunar_datetime = self._find_exact_lunar_return_time(
+            birth_datetime,
+            year,
+            month,
+            coordinates,
+            self._get_natal_longitude(natal_chart, "Moon", birth_datetime),
+        )
+
         # Рассчитываем позиции планет на лунар
         lunar_positions = self.astro_calculator.calculate_planet_positions(
-            new_moon_date, coordinates["latitude"], coordinates["longitude"]
+            lunar_datetime, coordinates["latitude"], coordinates["longitude"]
         )
 
         # Рассчитываем дома для лунара
         lunar_houses = self.astro_calculator.calculate_houses(
-            new_moon_date, coordinates["latitude"], coordinates["longitude"]
+            lunar_datetime, coordinates["latitude"], coordinates["longitude"]
         )
 
         # Создаем интерпретацию лунара
@@ -333,6 +486,7 @@ class ProgressionService:
             "month": month,
             "year": year,
             "new_moon_date": new_moon_date.isoformat(),
+            "exact_time": lunar_datetime.isoformat(),
             "location": coordinates,
             "planets": lunar_positions,
             "houses": lunar_houses,
@@ -594,26 +748,68 @@ class ProgressionService:
 
     # Solar Return methods
 
+    def _get_natal_longitude(
+        self,
+        natal_chart: Dict[str, Any],
+        planet: str,
+        birth_datetime: datetime,
+    ) -> float:
+        """Натальная долгота планеты из карты или по моменту рождения."""
+        planets = natal_chart.get("planets", {})
+        planet_data = planets.get(planet) or planets.get(planet.lower())
+        if isinstance(planet_data, dict) and "longitude" in planet_data:
+            return float(planet_data["longitude"])
+
+        return get_return_solver().longitude_at(planet, birth_datetime)
+
     def _find_exact_solar_return_time(
         self,
         birth_datetime: datetime,
         year: int,
         coordinates: Dict[str, float],
+        natal_sun_longitude: Optional[float] = None,
     ) -> datetime:
-        """Находит точное время соляра."""
-        # Простое приближение - используем день рождения в указанном году
-        # В реальной астрологии нужен точный расчет момента возвращения Солнца
+        """Находит точное время соляра (UTC)."""
+        solver = get_return_solver()
+        if natal_sun_longitude is None:
+            natal_sun_longitude = solver.longitude_at("Sun", birth_datetime)
 
-        approximate_date = datetime(
+        solar_return = solver.solar_return(
+            natal_sun_longitude,
             year,
-            birth_datetime.month,
-            birth_datetime.day,
-            birth_datetime.hour,
-            birth_datetime.minute,
+            chart_id=cache_keys.chart_id(
+                birth_datetime,
+                coordinates.get("latitude", 0),
+                coordinates.get("longitude", 0),
+            ),
+            birth_datetime=birth_datetime,
         )
+        return solar_return.replace(tzinfo=None)
+
+    def _find_exact_lunar_return_time(
+        self,
+        birth_datetime: datetime,
+        year: int,
+        month: int,
+        coordinates: Dict[str, float],
+        natal_moon_longitude: float,
+    ) -> datetime:
+        """Находит точное время первого лунара в месяце (UTC)."""
+        if not 1 <= month <= 12:
+            # Если месяц некорректный, используем январь
+            month = 1
 
-        # Можно добавить более точный расчет через итерацию
-        return approximate_date
+        lunar_return = get_return_solver().lunar_return(
+            natal_moon_longitude,
+            year,
+            month,
+            chart_id=cache_keys.chart_id(
+                birth_datetime,
+                coordinates.get("latitude", 0),
+                coordinates.get("longitude", 0),
+            ),
+        )
+        return lunar_return.replace(tzinfo=None)
 
     def _interpret_solar_return(
         self,
@@ -725,19 +921,13 @@ class ProgressionService:
     # Lunar Return methods
 
     def _find_new_moon_date(self, year: int, month: int) -> datetime:
-        """Находит дату новолуния в месяце."""
-        # Простое приближение - средина месяца
-        # В реальной астрологии нужен точный расчет лунных фаз
-
-        try:
-            new_moon_date = datetime(
-                year, month, 15, 12, 0
-            )  # 15 число в полдень
-        except ValueError:
+        """Находит точный момент новолуния в месяце (UTC)."""
+        if not 1 <= month <= 12:
             # Если месяц некорректный, используем январь
-            new_moon_date = datetime(year, 1, 15, 12, 0)
+            month = 1
 
-        return new_moon_date
+        event = get_lunation_index().new_moon_in_month(year, month)
+        return event["datetime"].replace(tzinfo=None)
 
     def _interpret_lunar_return(
         self,
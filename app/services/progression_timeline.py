@@ -0,0 +1,472 @@
+"""
+Вторичные прогрессии: линия прогрессированных позиций на всю жизнь.
+
+Прогрессии «день за год»: момент жизни t соответствует эфемеридному
+моменту natal + (t − natal) / 365.25. Вместо отдельной карты на каждую
+дату линия считает позиции тел на равномерной сетке возрастов (по
+умолчанию раз в месяц жизни на 100 лет) одним пакетным вызовом
+эфемерид. Долготы хранятся развернутыми (без скачка 360 → 0), поэтому
+позиция на любую дату — линейная интерполяция, а смены знаков и точные
+аспекты к натальным точкам находятся операциями над массивами.
+
+Прогрессированная Луна за месяц жизни проходит около градуса; ошибка
+линейной интерполяции между узлами — порядка угловой секунды. Линии
+хранятся в памяти процесса (AstroCacheService) по идентификатору
+натальной карты.
+"""
+
+import base64
+import logging
+import math
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.services.aspect_engine import OrbTable, find_cross_aspects
+from app.services.astro_cache_service import astro_cache, chart_tag
+from app.services.astrology_calculator import (
+    AstrologyCalculator,
+    ZodiacSign,
+    from_julian_day,
+    to_julian_days,
+)
+from app.services.ephemeris_solver import wrap_angle
+from app.services.transit_timing import aspect_targets
+
+logger = logging.getLogger(__name__)
+
+PROGRESSION_TIMELINE_FORMAT = 1
+
+# Сколько суток жизни соответствует одним эфемеридным суткам
+PROGRESSION_YEAR_DAYS = 365.25
+
+PROGRESSION_BODIES = (
+    "Sun",
+    "Moon",
+    "Mercury",
+    "Venus",
+    "Mars",
+    "Jupiter",
+    "Saturn",
+    "Uranus",
+    "Neptune",
+    "Pluto",
+)
+
+# Покрытие линии по умолчанию; более поздние даты расширяют ее кусками
+PROGRESSION_LIFESPAN_YEARS = 100
+PROGRESSION_EXTENSION_YEARS = 10
+
+# Допуск совпадения момента рождения кэшированной линии (~1 с)
+NATAL_JD_TOLERANCE = 1e-5
+
+# Узлов сетки на год жизни (шаг 1/12 эфемеридных суток)
+SAMPLES_PER_YEAR = 12
+
+# Прогрессии движутся медленно, поэтому орбисы узкие
+PROGRESSION_ORBS = {0: 1.0, 60: 1.0, 90: 1.0, 120: 1.0, 180: 1.0}
+PROGRESSION_ASPECT_NAMES = {
+    0: "Соединение",
+    60: "Секстиль",
+    90: "Квадрат",
+    120: "Трин",
+    180: "Оппозиция",
+}
+
+SIGNS = tuple(ZodiacSign)
+
+
+def default_orb_table() -> OrbTable:
+    """Таблица орбисов прогрессированных аспектов"""
+    return OrbTable.from_orbs(PROGRESSION_ORBS, PROGRESSION_ASPECT_NAMES)
+
+
+class ProgressionTimeline:
+    """Прогрессированные долготы тел на сетке возрастов.
+
+    longitudes имеет форму (узлы × тела), долготы развернуты по времени;
+    узел i соответствует возрасту i / samples_per_year лет.
+    """
+
+    def __init__(
+        self,
+        natal_jd: float,
+        bodies: Sequence[str],
+        longitudes: Any,
+        samples_per_year: int = SAMPLES_PER_YEAR,
+    ):
+        self.natal_jd = float(natal_jd)
+        self.bodies = tuple(bodies)
+        self.longitudes = np.asarray(longitudes, dtype=np.float64)
+        self.samples_per_year = samples_per_year
+        self._columns = {name: index for index, name in enumerate(bodies)}
+
+    @property
+    def years(self) -> float:
+        """Покрытие линии в годах жизни"""
+        return (len(self.longitudes) - 1) / self.samples_per_year
+
+    @property
+    def natal_longitudes(self) -> np.ndarray:
+        return self.longitudes[0] % 360
+
+    def age_of(self, moment: datetime) -> float:
+        """Возраст в годах на момент"""
+        julian_day = float(to_julian_days([moment])[0])
+        return (julian_day - self.natal_jd) / PROGRESSION_YEAR_DAYS
+
+    def moment_at(self, age: float) -> datetime:
+        """Момент жизни, на который приходится возраст"""
+        return from_julian_day(self.natal_jd + age * PROGRESSION_YEAR_DAYS)
+
+    def progressed_moment(self, moment: datetime) -> datetime:
+        """Эфемеридный момент прогрессированной карты для даты жизни"""
+        return from_julian_day(self.natal_jd + self.age_of(moment))
+
+    def covers(self, moment: datetime) -> bool:
+        return 0 <= self.age_of(moment) <= self.years
+
+    def _column(self, planet: str) -> int:
+        if planet not in self._columns:
+            raise KeyError(f"No progressed positions for {planet}")
+        return self._columns[planet]
+
+    def _check(self, age: float) -> None:
+        if not 0 <= age <= self.years:
+            raise ValueError(
+                f"Age {age:.2f} is outside progression timeline "
+                f"[0, {self.years:.0f}]"
+            )
+
+    def _sample_range(self, start_age: float, end_age: float) -> range:
+        """Узлы сетки, между которыми лежит интервал возрастов"""
+        first = max(int(math.floor(start_age * self.samples_per_year)), 0)
+        last = min(
+            int(math.ceil(end_age * self.samples_per_year)),
+            len(self.longitudes) - 1,
+        )
+        return range(first, max(last, first))
+
+    def longitudes_at(self, ages: Sequence[float]) -> np.ndarray:
+        """Развернутые долготы всех тел для массива возрастов"""
+        position = np.asarray(ages, dtype=np.float64) * self.samples_per_year
+        index = np.clip(
+            np.floor(position).astype(np.intp), 0, len(self.longitudes) - 2
+        )
+        fraction = (position - index)[:, None]
+        left = self.longitudes[index]
+        return left + (self.longitudes[index + 1] - left) * fraction
+
+    def positions_at(self, moment: datetime) -> Dict[str, Dict[str, Any]]:
+        """Прогрессированные позиции тел на дату жизни"""
+        age = self.age_of(moment)
+        self._check(age)
+        longitudes = self.longitudes_at([age])[0] % 360
+        index = min(int(age * self.samples_per_year), len(self.longitudes) - 2)
+        # Градусов за эфемеридные сутки (шаг сетки — 1/samples_per_year)
+        speeds = (
+            self.longitudes[index + 1] - self.longitudes[index]
+        ) * self.samples_per_year
+
+        positions = {}
+        for name, longitude, speed in zip(
+            self.bodies, longitudes.tolist(), speeds.tolist()
+        ):
+            positions[name] = {
+                "longitude": longitude,
+                "sign": SIGNS[int(longitude // 30) % 12].name_ru,
+                "degree_in_sign": longitude % 30,
+                "speed": speed,
+                "retrograde": speed < 0,
+            }
+        return positions
+
+    def sign_changes(
+        self, planet: str, start: datetime, end: datetime
+    ) -> List[Dict[str, Any]]:
+        """Смены знака прогрессированного тела в интервале дат"""
+        start_age = max(self.age_of(start), 0.0)
+        end_age = self.age_of(end)
+        self._check(end_age)
+        samples = self._sample_range(start_age, end_age)
+        if not len(samples):
+            return []
+
+        column = self._column(planet)
+        longitudes = self.longitudes[samples.start : samples.stop + 1, column]
+        signs = np.floor(longitudes / 30)
+        steps = np.flatnonzero(np.diff(signs) != 0)
+        if not len(steps):
+            return []
+
+        forward = signs[steps + 1] > signs[steps]
+        boundary = np.where(forward, signs[steps + 1], signs[steps]) * 30
+        fraction = (boundary - longitudes[steps]) / (
+            longitudes[steps + 1] - longitudes[steps]
+        )
+        ages = (samples.start + steps + fraction) / self.samples_per_year
+
+        changes = []
+        for age, sign, previous, direct in zip(
+            ages.tolist(),
+            signs[steps + 1].astype(int).tolist(),
+            signs[steps].astype(int).tolist(),
+            forward.tolist(),
+        ):
+            if not start_age <= age < end_age:
+                continue
+            changes.append(
+                {
+                    "planet": planet,
+                    "sign": SIGNS[sign % 12].name_ru,
+                    "previous_sign": SIGNS[previous % 12].name_ru,
+                    "date": self.moment_at(age).isoformat(),
+                    "age": round(age, 2),
+                    "retrograde": not direct,
+                }
+            )
+        return changes
+
+    def aspects_at(
+        self, moment: datetime, table: Optional[OrbTable] = None
+    ) -> List[Dict[str, Any]]:
+        """Аспекты прогрессированных тел к натальным в пределах орбиса"""
+        table = table or default_orb_table()
+        age = self.age_of(moment)
+        self._check(age)
+        progressed = self.longitudes_at([age])[0] % 360
+
+        aspects = []
+        for hit in find_cross_aspects(
+            progressed, self.natal_longitudes, table
+        ):
+            definition = table[hit.aspect]
+            # Тело в соединении с собственной натальной точкой — не событие
+            if hit.first == hit.second and definition.angle == 0:
+                continue
+            aspects.append(
+                {
+                    "progressed_planet": self.bodies[hit.first],
+                    "natal_planet": self.bodies[hit.second],
+                    "aspect": definition.name,
+                    "angle": definition.angle,
+                    "orb": round(hit.orb, 2),
+                }
+            )
+        return sorted(aspects, key=lambda aspect: aspect["orb"])
+
+    def exact_aspects(
+        self,
+        start: datetime,
+        end: datetime,
+        table: Optional[OrbTable] = None,
+        planets: Optional[Sequence[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Даты точных аспектов прогрессированных тел к натальным"""
+        table = table or default_orb_table()
+        start_age = max(self.age_of(start), 0.0)
+        end_age = self.age_of(end)
+        self._check(end_age)
+        samples = self._sample_range(start_age, end_age)
+        if not len(samples):
+            return []
+
+        columns = np.array(
+            [self._column(name) for name in planets or self.bodies]
+        )
+        offsets, aspect_indexes = [], []
+        for index, definition in enumerate(table):
+            for offset in aspect_targets(definition.angle):
+                offsets.append(offset)
+                aspect_indexes.append(index)
+        offsets = np.array(offsets)
+
+        # (узлы × прогрессированные × натальные × цели аспектов)
+        progressed = self.longitudes[samples.start : samples.stop + 1]
+        deviation = wrap_angle(
+            progressed[:, columns, None, None]
+            - self.natal_longitudes[None, None, :, None]
+            - offsets[None, None, None, :]
+        )
+        left, right = deviation[:-1], deviation[1:]
+        # Смена знака без перескока через ±180°
+        crossing = (np.signbit(left) != np.signbit(right)) & (
+            np.abs(left - right) < 180
+        )
+        steps, rows, natals, targets = np.nonzero(crossing)
+        fraction = left[crossing] / (left[crossing] - right[crossing])
+        ages = (samples.start + steps + fraction) / self.samples_per_year
+
+        aspects = []
+        for age, row, natal, target in zip(
+            ages.tolist(), rows.tolist(), natals.tolist(), targets.tolist()
+        ):
+            definition = table[aspect_indexes[target]]
+            progressed_column = int(columns[row])
+            if not start_age <= age < end_age or (
+                progressed_column == natal and definition.angle == 0
+            ):
+                continue
+            aspects.append(
+                {
+                    "progressed_planet": self.bodies[progressed_column],
+                    "natal_planet": self.bodies[natal],
+                    "aspect": definition.name,
+                    "angle": definition.angle,
+                    "date": self.moment_at(age).isoformat(),
+                    "age": round(age, 2),
+                }
+            )
+        return sorted(aspects, key=lambda aspect: aspect["age"])
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "format": PROGRESSION_TIMELINE_FORMAT,
+            "natal_jd": self.natal_jd,
+            "bodies": list(self.bodies),
+            "samples_per_year": self.samples_per_year,
+            "samples": len(self.longitudes),
+            "longitudes": base64.b64encode(
+                self.longitudes.astype("<f8").tobytes()
+            ).decode("ascii"),
+        }
+
+    @classmethod
+    def from_dict(cls, payload: Dict[str, Any]) -> "ProgressionTimeline":
+        if payload.get("format") != PROGRESSION_TIMELINE_FORMAT:
+            raise ValueError("Unsupported progression timeline format")
+        longitudes = np.frombuffer(
+            base64.b64decode(payload["longitudes"]), dtype="<f8"
+        ).reshape(payload["samples"], len(payload["bodies"]))
+        return cls(
+            payload["natal_jd"],
+            payload["bodies"],
+            longitudes,
+            payload["samples_per_year"],
+        )
+
+
+class ProgressionEngine:
+    """Строит и кэширует линии прогрессий натальных карт"""
+
+    def __init__(
+        self,
+        calculator: Optional[AstrologyCalculator] = None,
+        cache: Any = None,
+        bodies: Sequence[str] = PROGRESSION_BODIES,
+        lifespan_years: int = PROGRESSION_LIFESPAN_YEARS,
+        samples_per_year: int = SAMPLES_PER_YEAR,
+    ):
+        self._calculator = calculator
+        self.cache = cache or astro_cache
+        self.bodies = tuple(bodies)
+        self.lifespan_years = lifespan_years
+        self.samples_per_year = samples_per_year
+        self._lock = threading.Lock()
+        self.builds = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    @property
+    def calculator(self) -> AstrologyCalculator:
+        if self._calculator is None:
+            self._calculator = AstrologyCalculator()
+        return self._calculator
+
+    def build(
+        self, birth_datetime: datetime, years: Optional[int] = None
+    ) -> ProgressionTimeline:
+        """Линия на years лет жизни одним пакетным расчетом эфемерид"""
+        years = years or self.lifespan_years
+        natal_jd = float(to_julian_days([birth_datetime])[0])
+        ages = np.arange(years * self.samples_per_year + 1) / (
+            self.samples_per_year
+        )
+        # Год жизни — эфемеридные сутки
+        batch = self.calculator.calculate_positions_for_julian_days(
+            natal_jd + ages, list(self.bodies)
+        )
+        self.builds += 1
+        return ProgressionTimeline(
+            natal_jd,
+            batch.planets,
+            np.unwrap(batch.longitude, period=360, axis=0),
+            self.samples_per_year,
+        )
+
+    def timeline(
+        self,
+        natal_chart_id: str,
+        birth_datetime: datetime,
+        until: Optional[datetime] = None,
+    ) -> ProgressionTimeline:
+        """Линия натальной карты из кэша; строится или расширяется, если
+        не покрывает дату until.
+
+        Линия хранится под идентификатором карты с тегом карты, поэтому
+        invalidate_user_data() удаляет ее вместе с пользователем.
+        """
+        key = self.cache.progression_timeline_key(natal_chart_id)
+        natal_jd, until_jd = to_julian_days(
+            [birth_datetime, until or birth_datetime]
+        )
+        needed = max(
+            self.lifespan_years, (until_jd - natal_jd) / PROGRESSION_YEAR_DAYS
+        )
+
+        with self._lock:
+            timeline = None
+            cached = self.cache.get_local(key)
+            if cached is not None:
+                try:
+                    timeline = ProgressionTimeline.from_dict(cached)
+                except (KeyError, TypeError, ValueError) as e:
+                    logger.warning(f"PROGRESSION_TIMELINE_CACHE_INVALID: {e}")
+
+            # Линия другого момента рождения (например, наивная дата
+            # прочитана в другом поясе) строится заново
+            if (
+                timeline is not None
+                and abs(timeline.natal_jd - natal_jd) < NATAL_JD_TOLERANCE
+                and timeline.years >= needed
+            ):
+                self.cache_hits += 1
+                return timeline
+
+            self.cache_misses += 1
+            years = int(
+                math.ceil(needed / PROGRESSION_EXTENSION_YEARS)
+                * PROGRESSION_EXTENSION_YEARS
+            )
+            timeline = self.build(birth_datetime, years)
+            self.cache.set_local(
+                key,
+                timeline.to_dict(),
+                self.cache.astro_ttl["progression_timeline"],
+                tags=[chart_tag(natal_chart_id)],
+            )
+            return timeline
+
+    def get_stats(self) -> Dict[str, Any]:
+        total = self.cache_hits + self.cache_misses
+        return {
+            "builds": self.builds,
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "hit_rate": (
+                round(self.cache_hits / total * 100, 2) if total else 0
+            ),
+        }
+
+
+_progression_engine = None
+
+
+def get_progression_engine() -> ProgressionEngine:
+    """Общий для процесса движок прогрессий"""
+    global _progression_engine
+    if _progression_engine is None:
+        _progression_engine = ProgressionEngine()
+    return _progression_engine
@@ -0,0 +1,220 @@
+"""
+Точные моменты солнечных и лунных возвращений (соляр и лунар).
+
+Момент возвращения — корень разности долготы Солнца (Луны) и натальной
+долготы. Начальное приближение дает среднее движение, затем момент
+уточняется методом Ньютона по скорости из эфемерид: обычно хватает
+трех-четырех вычислений позиции. Найденные моменты кэшируются в
+AstroCacheService по идентификатору натальной карты и году (месяцу).
+"""
+
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+from app.services.astro_cache_service import astro_cache, chart_tag
+from app.services.astrology_calculator import (
+    AstrologyCalculator,
+    from_julian_day,
+    to_julian_days,
+)
+from app.services.ephemeris_solver import brent_root, wrap_angle
+
+logger = logging.getLogger(__name__)
+
+# Средние суточные движения и периоды возвращения
+MEAN_MOTION = {"Sun": 0.985647, "Moon": 13.176358}
+RETURN_PERIOD_DAYS = {"Sun": 365.242189, "Moon": 27.321661}
+
+# Наибольшее отклонение истинного момента от среднего (сутки)
+GUESS_ERROR_DAYS = {"Sun": 3.0, "Moon": 5.0}
+
+NEWTON_TOLERANCE_DAYS = 1e-6
+NEWTON_MAX_ITER = 12
+
+
+class ReturnSolver:
+    """Решатель моментов возвращения Солнца и Луны"""
+
+    def __init__(
+        self,
+        calculator: Optional[AstrologyCalculator] = None,
+        cache: Any = None,
+    ):
+        self.calculator = calculator or AstrologyCalculator()
+        self.cache = cache or astro_cache
+        self.evaluations = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def _position(self, planet: str, julian_day: float) -> Tuple[float, float]:
+        self.evaluations += 1
+        batch = self.calculator.calculate_positions_for_julian_days(
+            [julian_day], [planet]
+        )
+        return float(batch.longitude[0, 0]), float(batch.speed[0, 0])
+
+    def longitude_at(self, planet: str, moment: datetime) -> float:
+        """Долгота тела на момент"""
+        julian_day = float(to_julian_days([moment])[0])
+        return self._position(planet, julian_day)[0]
+
+    def solve_crossing(
+        self, planet: str, target_longitude: float, guess_jd: float
+    ) -> float:
+        """Момент, ближайший к приближению, когда тело на заданной долготе"""
+        julian_day = guess_jd
+        for _ in range(NEWTON_MAX_ITER):
+            longitude, speed = self._position(planet, julian_day)
+            if speed <= 0:
+                break
+            step = wrap_angle(target_longitude - longitude) / speed
+            julian_day += step
+            if abs(step) < NEWTON_TOLERANCE_DAYS:
+                return julian_day
+
+        # Метод Ньютона не сошелся — уточняем на интервале вокруг приближения
+        logger.debug(f"RETURN_SOLVER_NEWTON_FALLBACK: {planet} {guess_jd}")
+        half_width = GUESS_ERROR_DAYS.get(planet, 3.0)
+        return brent_root(
+            lambda jd: wrap_angle(
+                self._position(planet, jd)[0] - target_longitude
+            ),
+            guess_jd - half_width,
+            guess_jd + half_width,
+        )
+
+    def next_return(
+        self, planet: str, natal_longitude: float, after: datetime
+    ) -> datetime:
+        """Первое возвращение тела на натальную долготу после момента"""
+        start_jd = float(to_julian_days([after])[0])
+        longitude, _ = self._position(planet, start_jd)
+        guess = (
+            start_jd
+            + ((natal_longitude - longitude) % 360) / MEAN_MOTION[planet]
+        )
+
+        julian_day = self.solve_crossing(planet, natal_longitude, guess)
+        if julian_day < start_jd:
+            julian_day = self.solve_crossing(
+                planet,
+                natal_longitude,
+                julian_day + RETURN_PERIOD_DAYS[planet],
+            )
+        return from_julian_day(julian_day).replace(microsecond=0)
+
+    def _cached(
+        self, key: str, compute, chart_id: Optional[str] = None
+    ) -> datetime:
+        cached = self.cache.get_local(key)
+        if cached is not None:
+            self.cache_hits += 1
+            return datetime.fromisoformat(cached)
+
+        self.cache_misses += 1
+        moment = compute()
+        # Тег карты: моменты удаляются вместе с данными пользователя
+        self.cache.set_local(
+            key,
+            moment.isoformat(),
+            self.cache.astro_ttl["returns"],
+            tags=[chart_tag(chart_id)] if chart_id else (),
+        )
+        return moment
+
+    def _cache_key(
+        self,
+        return_type: str,
+        natal_longitude: float,
+        period: str,
+        chart_id: Optional[str],
+    ) -> str:
+        return self.cache._generate_cache_key(
+            "return",
+            chart=chart_id or f"lon{natal_longitude:.6f}",
+            type=return_type,
+            period=period,
+        )
+
+    def solar_return(
+        self,
+        natal_sun_longitude: float,
+        year: int,
+        chart_id: Optional[str] = None,
+        birth_datetime: Optional[datetime] = None,
+    ) -> datetime:
+        """Момент соляра в указанном году (UTC).
+
+        Если известна дата рождения, берется возвращение, ближайшее к дню
+        рождения в этом году (для рожденных 31 декабря или 1 января оно
+        может попасть на соседний календарный год).
+        """
+        key = self._cache_key(
+            "solar", natal_sun_longitude, str(year), chart_id
+        )
+
+        if birth_datetime is not None:
+            day = min(
+                birth_datetime.day, 28 if birth_datetime.month == 2 else 31
+            )
+            anchor = datetime(year, birth_datetime.month, day)
+            after = anchor - timedelta(days=RETURN_PERIOD_DAYS["Sun"] / 2)
+        else:
+            after = datetime(year, 1, 1)
+
+        return self._cached(
+            key,
+            lambda: self.next_return("Sun", natal_sun_longitude, after),
+            chart_id,
+        )
+
+    def lunar_return(
+        self,
+        natal_moon_longitude: float,
+        year: int,
+        month: int,
+        chart_id: Optional[str] = None,
+    ) -> datetime:
+        """Первый момент лунара в указанном месяце (UTC)"""
+        key = self._cache_key(
+            "lunar", natal_moon_longitude, f"{year}-{month:02d}", chart_id
+        )
+        return self._cached(
+            key,
+            lambda: self.next_return(
+                "Moon", natal_moon_longitude, datetime(year, month, 1)
+            ),
+            chart_id,
+        )
+
+    def nearest_lunar_return(
+        self, natal_moon_longitude: float, moment: datetime
+    ) -> datetime:
+        """Лунар, ближайший к моменту"""
+        half_month = timedelta(days=RETURN_PERIOD_DAYS["Moon"] / 2)
+        return self.next_return(
+            "Moon", natal_moon_longitude, moment - half_month
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "evaluations": self.evaluations,
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+        }
+
+
+_return_solver: Optional[ReturnSolver] = None
+_return_solver_lock = threading.Lock()
+
+
+def get_return_solver() -> ReturnSolver:
+    """Общий решатель возвращений для всех сервисов"""
+    global _return_solver
+    if _return_solver is None:
+        with _return_solver_lock:
+            if _return_solver is None:
+                _return_solver = ReturnSolver()
+    return _return_solver
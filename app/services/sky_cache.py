@@ -0,0 +1,253 @@
+"""
+Общий кэш положений неба, квантованный по времени.
+
+Транзитные расчеты разных пользователей на один и тот же момент требуют
+одних и тех же позиций планет, отличается только натальная сторона.
+Кэш хранит позиции тел на начало временного интервала (корзины) и
+обслуживает из одной эфемеридной оценки все запросы внутри корзины.
+
+Ширина корзины задается по классу тела, исходя из скорости движения:
+Луна проходит около 0.5° за час, поэтому ее корзина — минута, а дальние
+планеты за час смещаются на тысячные доли градуса. Внутри корзины
+долгота продолжается линейно по скорости, так что ошибка определяется
+изменением скорости за корзину, а не самим смещением.
+
+Ключ кэша включает источник позиций (бэкенд и таблицу эфемерид), чтобы
+калькуляторы с разными источниками не подменяли данные друг друга.
+"""
+
+import math
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Sequence, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+
+SECONDS_PER_DAY = 86400.0
+
+# Класс тела определяет ширину корзины
+BODY_CLASSES = {
+    "Moon": "moon",
+    "Sun": "inner",
+    "Mercury": "inner",
+    "Venus": "inner",
+    "Mars": "inner",
+    "Jupiter": "outer",
+    "Saturn": "outer",
+    "Uranus": "outer",
+    "Neptune": "outer",
+    "Pluto": "outer",
+    "TrueNode": "points",
+    "Chiron": "points",
+    "Lilith": "points",
+}
+
+# Ширина корзины в секундах; переопределяется SKY_CACHE_BUCKETS
+DEFAULT_BUCKETS = {
+    "moon": 60,
+    "inner": 600,
+    "outer": 3600,
+    "points": 3600,
+}
+
+# Неизвестные тела квантуются как быстрые
+DEFAULT_BODY_CLASS = "inner"
+
+# (долгота, широта, скорость) тела на начало корзины
+BodyState = Tuple[float, float, float]
+
+
+def body_class(body: str) -> str:
+    """Класс тела для выбора ширины корзины"""
+    return BODY_CLASSES.get(body, DEFAULT_BODY_CLASS)
+
+
+class SkyCache:
+    """Потокобезопасный LRU-кэш позиций тел по временным корзинам"""
+
+    def __init__(
+        self,
+        buckets: Dict[str, int] = None,
+        max_entries: int = None,
+    ):
+        self.buckets = {
+            **DEFAULT_BUCKETS,
+            **settings.SKY_CACHE_BUCKETS,
+            **(buckets or {}),
+        }
+        self.max_entries = max_entries or settings.SKY_CACHE_MAX_ENTRIES
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+        self.hits = {name: 0 for name in self.buckets}
+        self.misses = {name: 0 for name in self.buckets}
+        self.evaluations = 0
+
+    def bucket_of(self, julian_day: float, body_class: str) -> int:
+        """Номер корзины класса, в которую попадает момент"""
+        width = self.buckets.get(body_class, self.buckets[DEFAULT_BODY_CLASS])
+        return math.floor(julian_day * SECONDS_PER_DAY / width)
+
+    def bucket_start(self, bucket: int, body_class: str) -> float:
+        """Юлианский день начала корзины"""
+        width = self.buckets.get(body_class, self.buckets[DEFAULT_BODY_CLASS])
+        return bucket * width / SECONDS_PER_DAY
+
+    def positions(
+        self,
+        source: Hashable,
+        julian_day: float,
+        bodies: Sequence[str],
+        compute: Callable[[np.ndarray, List[str]], Any],
+    ) -> Dict[str, BodyState]:
+        """Позиции тел на момент julian_day.
+
+        compute(julian_days, bodies) вызывается только для классов без
+        записи в кэше, одним пакетом на все недостающие корзины, и должен
+        вернуть объект с полями planets/longitude/latitude/speed
+        (PlanetPositionsBatch). Тела, которых источник не дал, в
+        результат не попадают.
+        """
+        classes: Dict[str, List[str]] = {}
+        for body in bodies:
+            classes.setdefault(body_class(body), []).append(body)
+
+        states: Dict[str, Tuple[float, Dict[str, BodyState]]] = {}
+        missing: Dict[str, Tuple[Hashable, float]] = {}
+        with self._lock:
+            for name in classes:
+                bucket = self.bucket_of(julian_day, name)
+                key = (source, name, bucket)
+                entry = self._entries.get(key)
+                if entry is None:
+                    self._count(self.misses, name)
+                    missing[name] = (key, self.bucket_start(bucket, name))
+                else:
+                    self._count(self.hits, name)
+                    self._entries.move_to_end(key)
+                    states[name] = entry
+
+        if missing:
+            states.update(self._evaluate(missing, classes, compute))
+
+        result = {}
+        for body in bodies:
+            reference_jd, class_states = states[body_class(body)]
+            if body not in class_states:
+                continue
+            longitude, latitude, speed = class_states[body]
+            # Линейное продолжение от начала корзины до точного момента
+            longitude = (longitude + speed * (julian_day - reference_jd)) % 360
+            result[body] = (longitude, latitude, speed)
+        return result
+
+    def _evaluate(
+        self,
+        missing: Dict[str, Tuple[Hashable, float]],
+        classes: Dict[str, List[str]],
+        compute: Callable[[np.ndarray, List[str]], Any],
+    ) -> Dict[str, Tuple[float, Dict[str, BodyState]]]:
+        """Один пакетный расчет на все недостающие корзины"""
+        reference_jds = sorted({start for _, start in missing.values()})
+        bodies = [body for name in missing for body in classes[name]]
+        batch = compute(np.asarray(reference_jds), bodies)
+        self.evaluations += 1
+
+        evaluated = {}
+        with self._lock:
+            for name, (key, start) in missing.items():
+                row = reference_jds.index(start)
+                class_states = {}
+                for column, body in enumerate(batch.planets):
+                    if body_class(body) == name:
+                        class_states[body] = (
+                            float(batch.longitude[row, column]),
+                            float(batch.latitude[row, column]),
+                            float(batch.speed[row, column]),
+                        )
+                entry = (start, class_states)
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+                evaluated[name] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return evaluated
+
+    def shared(
+        self,
+        name: str,
+        julian_day: float,
+        body_class: str,
+        compute: Callable[[float], Any],
+    ) -> Any:
+        """Произвольные данные о небе, общие для корзины момента.
+
+        compute получает юлианский день начала корзины, поэтому результат
+        одинаков для всех запросов внутри нее. Счетчики ведутся под
+        именем name.
+        """
+        bucket = self.bucket_of(julian_day, body_class)
+        key = ("shared", name, body_class, bucket)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._count(self.hits, name)
+                self._entries.move_to_end(key)
+                return entry[1]
+            self._count(self.misses, name)
+
+        start = self.bucket_start(bucket, body_class)
+        value = compute(start)
+        self.evaluations += 1
+        with self._lock:
+            self._entries[key] = (start, value)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    @staticmethod
+    def _count(counters: Dict[str, int], name: str) -> None:
+        counters[name] = counters.get(name, 0) + 1
+
+    def clear(self) -> None:
+        """Очищает записи и счетчики"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = {name: 0 for name in self.buckets}
+            self.misses = {name: 0 for name in self.buckets}
+            self.evaluations = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Счетчики попаданий по классам тел"""
+        with self._lock:
+            classes = {}
+            for name in sorted(set(self.hits) | set(self.misses)):
+                hits = self.hits.get(name, 0)
+                misses = self.misses.get(name, 0)
+                total = hits + misses
+                classes[name] = {
+                    "bucket_seconds": self.buckets.get(name),
+                    "hits": hits,
+                    "misses": misses,
+                    "hit_rate": round(hits / total * 100, 2) if total else 0,
+                }
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "evaluations": self.evaluations,
+                "classes": classes,
+            }
+
+
+_sky_cache = None
+
+
+def get_sky_cache() -> SkyCache:
+    """Общий для процесса кэш неба"""
+    global _sky_cache
+    if _sky_cache is None:
+        _sky_cache = SkyCache()
+    return _sky_cache
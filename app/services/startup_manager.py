@@ -9,6 +9,7 @@ from typing import Any, Dict, Optional
 
 from loguru import logger
 
+from app.core.config import settings
 from app.services.astro_cache_service import astro_cache
 from app.services.async_kerykeion_service import async_kerykeion
 from app.services.performance_monitor import performance_monitor
@@ -20,6 +21,10 @@ class StartupManager:
 
     def __init__(self):
         self.startup_completed = False
+        # Ready to serve once the warm-start snapshot is mapped
+        self.ready = False
+        self._warmup_task: Optional[asyncio.Task] = None
+        self._snapshot_task: Optional[asyncio.Task] = None
         self.startup_errors = []
         self.startup_stats = {
             "start_time": None,
@@ -28,6 +33,8 @@ class StartupManager:
             "services_initialized": 0,
             "services_failed": 0,
             "cache_warmed": False,
+            "snapshot_entries": 0,
+            "ready_seconds": None,
             "monitoring_active": False,
             "precompute_active": False,
         }
@@ -48,6 +55,7 @@ class StartupManager:
         initialization_results = {
             "async_kerykeion": {"status": "pending"},
             "cache_service": {"status": "pending"},
+            "cache_snapshot": {"status": "pending"},
             "performance_monitor": {"status": "pending"},
             "precompute_service": {"status": "pending"},
             "cache_warmup": {"status": "pending"},
@@ -62,6 +70,9 @@ class StartupManager:
                 initialization_results, redis_url
             )
 
+            # 2a. Map the warm-start snapshot; the pod is ready after this
+            await self._load_cache_snapshot(initialization_results)
+
             # 3. Initialize performance monitoring
             await self._initialize_performance_monitor(
                 initialization_results, enable_background_monitoring
@@ -72,9 +83,23 @@ class StartupManager:
                 initialization_results, enable_precomputation
             )
 
-            # 5. Warm up cache with popular data
+            # 5. Warm up cache with popular data. With a snapshot the hot
+            # set is already there, so the warmup runs in the background
             if enable_cache_warmup:
-                await self._warm_up_cache(initialization_results)
+                if self.startup_stats["snapshot_entries"]:
+                    initialization_results["cache_warmup"] = {
+                        "status": "background"
+                    }
+                    self._warmup_task = asyncio.create_task(
+                        self._warm_up_cache(initialization_results)
+                    )
+                else:
+                    await self._warm_up_cache(initialization_results)
+
+            if settings.CACHE_SNAPSHOT_INTERVAL > 0:
+                self._snapshot_task = asyncio.create_task(
+                    self._save_snapshots_periodically()
+                )
 
             # 6. Run initial diagnostics
             diagnostics = await self._run_startup_diagnostics()
@@ -121,6 +146,10 @@ class StartupManager:
             kerykeion_available = async_kerykeion.is_available()
 
             if kerykeion_available:
+                # Spawn worker processes before the first real request
+                if async_kerykeion.process_pool is not None:
+                    await async_kerykeion.process_pool.warm_up()
+
                 # Test a simple operation to ensure it works
                 test_stats = await async_kerykeion.get_performance_stats()
 
@@ -188,6 +217,36 @@ class StartupManager:
             self.startup_stats["services_failed"] += 1
             self.startup_errors.append(f"Cache Service: {str(e)}")
 
+    async def _load_cache_snapshot(self, results: Dict[str, Any]):
+        """Map the L1 snapshot written by the previous process."""
+        try:
+            entries = astro_cache.load_snapshot()
+            self.startup_stats["snapshot_entries"] = entries
+            results["cache_snapshot"] = {
+                "status": "success" if entries else "empty",
+                "entries": entries,
+            }
+            logger.info(f"STARTUP_MANAGER_SNAPSHOT: {entries} entries mapped")
+        except Exception as e:
+            logger.error(f"STARTUP_MANAGER_SNAPSHOT_ERROR: {e}")
+            results["cache_snapshot"] = {"status": "error", "error": str(e)}
+            self.startup_errors.append(f"Cache Snapshot: {str(e)}")
+
+        # A missing or unusable snapshot only means a cold start
+        self.ready = True
+        self.startup_stats["ready_seconds"] = (
+            datetime.now() - self.startup_stats["start_time"]
+        ).total_seconds()
+
+    async def _save_snapshots_periodically(self):
+        """Refresh the L1 snapshot so a crash still leaves a warm one."""
+        while True:
+            await asyncio.sleep(settings.CACHE_SNAPSHOT_INTERVAL)
+            try:
+                await astro_cache.save_snapshot()
+            except Exception as e:
+                logger.error(f"STARTUP_MANAGER_SNAPSHOT_SAVE_ERROR: {e}")
+
     async def _initialize_performance_monitor(
         self, results: Dict[str, Any], enable_background: bool
     ):
@@ -371,10 +430,16 @@ class StartupManager:
             "performance_monitor": {"status": "pending"},
             "precompute_service": {"status": "pending"},
             "async_kerykeion": {"status": "pending"},
+            "cache_snapshot": {"status": "pending"},
             "cache_service": {"status": "pending"},
         }
 
         try:
+            for task in (self._warmup_task, self._snapshot_task):
+                if task is not None and not task.done():
+                    task.cancel()
+            self._warmup_task = self._snapshot_task = None
+
             # Stop performance monitoring
             try:
                 await performance_monitor.stop_monitoring()
@@ -405,6 +470,19 @@ class StartupManager:
                 shutdown_results["async_kerykeion"]["error"] = str(e)
                 logger.error(f"STARTUP_MANAGER_SHUTDOWN_KERYKEION_ERROR: {e}")
 
+            # Save the hot L1 entries for the next process
+            try:
+                entries = await astro_cache.save_snapshot()
+                shutdown_results["cache_snapshot"] = {
+                    "status": "success",
+                    "entries": entries,
+                }
+                logger.info("STARTUP_MANAGER_SHUTDOWN_SNAPSHOT_SUCCESS")
+            except Exception as e:
+                shutdown_results["cache_snapshot"]["status"] = "error"
+                shutdown_results["cache_snapshot"]["error"] = str(e)
+                logger.error(f"STARTUP_MANAGER_SHUTDOWN_SNAPSHOT_ERROR: {e}")
+
             # Shutdown cache service
             try:
                 await astro_cache.shutdown()
@@ -416,6 +494,7 @@ class StartupManager:
                 logger.error(f"STARTUP_MANAGER_SHUTDOWN_CACHE_ERROR: {e}")
 
             self.startup_completed = False
+            self.ready = False
             logger.info("STARTUP_MANAGER_SHUTDOWN_COMPLETE")
 
             return {
@@ -438,6 +517,7 @@ class StartupManager:
         try:
             status = {
                 "startup_completed": self.startup_completed,
+                "ready": self.ready,
                 "startup_stats": self.startup_stats,
                 "startup_errors": self.startup_errors,
                 "current_time": datetime.now().isoformat(),
@@ -8,8 +8,9 @@ from datetime import datetime
 from typing import Any, Dict, List, Optional
 
 from app.models.yandex_models import YandexZodiacSign
+from app.services.aspect_engine import aspect_between, find_cross_aspects
 from app.services.astrology_calculator import AstrologyCalculator, NatalChart
-from app.services.kerykeion_service import KerykeionService
+from app.services.kerykeion_service import MAJOR_ASPECT_TABLE, KerykeionService
 
 logger = logging.getLogger(__name__)
 
@@ -394,29 +395,28 @@ class SynastryService:
             # Анализируем аспекты между узлами и планетами
             karmic_planets = ["sun", "moon", "venus", "mars", "jupiter", "saturn"]
             
+            # Аспекты планет каждого партнера к узлу другого — одной матрицей
+            aspects_to_node2 = self._karmic_aspects(planets1, karmic_planets, node2)
+            aspects_to_node1 = self._karmic_aspects(planets2, karmic_planets, node1)
+
             for planet_name in karmic_planets:
-                planet1 = planets1.get(planet_name, {}).get("longitude")
-                planet2 = planets2.get(planet_name, {}).get("longitude")
-                
-                if planet1 is not None:
+                aspect = aspects_to_node2.get(planet_name)
+                if aspect:
                     # Планета партнера 1 к узлу партнера 2
-                    aspect = self._calculate_aspect_between_points(planet1, node2)
-                    if aspect:
-                        karmic["connections"].append({
-                            "connection": f"{planet_name}1 - Node2",
-                            "aspect": aspect,
-                            "interpretation": f"Кармическая связь через {planet_name}"
-                        })
-                        
-                if planet2 is not None:
-                    # Планета партнера 2 к узлу партнера 1  
-                    aspect = self._calculate_aspect_between_points(planet2, node1)
-                    if aspect:
-                        karmic["connections"].append({
-                            "connection": f"{planet_name}2 - Node1", 
-                            "aspect": aspect,
-                            "interpretation": f"Кармическая связь через {planet_name}"
-                        })
+                    karmic["connections"].append({
+                        "connection": f"{planet_name}1 - Node2",
+                        "aspect": aspect,
+                        "interpretation": f"Кармическая связь через {planet_name}"
+                    })
+
+                aspect = aspects_to_node1.get(planet_name)
+                if aspect:
+                    # Планета партнера 2 к узлу партнера 1
+                    karmic["connections"].append({
+                        "connection": f"{planet_name}2 - Node1",
+                        "aspect": aspect,
+                        "interpretation": f"Кармическая связь через {planet_name}"
+                    })
 
             # Оцениваем силу кармических связей
             if len(karmic["connections"]) >= 3:
@@ -430,25 +430,29 @@ class SynastryService:
             logger.error(f"SYNASTRY_KARMIC_ERROR: {e}")
             return {"connections": [], "strength": "weak"}
 
+    def _karmic_aspects(
+        self, planets: Dict[str, Any], planet_names: List[str], node: float
+    ) -> Dict[str, str]:
+        """Мажорные аспекты планет к лунному узлу: {планета: аспект}"""
+        names = [
+            name
+            for name in planet_names
+            if planets.get(name, {}).get("longitude") is not None
+        ]
+        hits = find_cross_aspects(
+            [planets[name]["longitude"] for name in names],
+            [node],
+            MAJOR_ASPECT_TABLE,
+        )
+        return {
+            names[hit.first]: MAJOR_ASPECT_TABLE[hit.aspect].name
+            for hit in hits
+        }
+
     def _calculate_aspect_between_points(self, long1: float, long2: float) -> Optional[str]:
         """Вычисляет аспект между двумя точками"""
-        angle = abs(long1 - long2)
-        if angle > 180:
-            angle = 360 - angle
-
-        aspects = {
-            0: ("Conjunction", 8),
-            60: ("Sextile", 6), 
-            90: ("Square", 8),
-            120: ("Trine", 8),
-            180: ("Opposition", 8)
-        }
-        
-        for aspect_angle, (aspect_name, orb) in aspects.items():
-            if abs(angle - aspect_angle) <= orb:
-                return aspect_name
-                
-        return None
+        aspect = aspect_between(long1, long2, MAJOR_ASPECT_TABLE)
+        return aspect.name if aspect else None
 
     def _get_sign_from_longitude(self, longitude: float) -> str:
         """Получить знак зодиака по долготе"""
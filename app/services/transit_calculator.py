@@ -4,14 +4,17 @@
 """
 
 import logging
-from datetime import date, datetime
+from datetime import date, datetime, time
 from typing import Any, Dict, List, Optional
 
 import pytz
 
+from app.services import cache_keys
 from app.services.astrology_calculator import AstrologyCalculator
 from app.services.enhanced_transit_service import TransitService
+from app.services.lunation_index import get_lunation_index
 from app.services.progression_service import ProgressionService
+from app.services.return_solver import get_return_solver
 
 
 class TransitCalculator:
@@ -71,7 +74,7 @@ class TransitCalculator:
             transit_date = datetime.now(pytz.UTC)
 
         # Получаем текущие позиции планет
-        current_positions = self.astro_calc.calculate_planet_positions(
+        current_positions = self.astro_calc.calculate_transit_positions(
             transit_date
         )
 
@@ -295,15 +298,24 @@ class TransitCalculator:
         if birth_place is None:
             birth_place = {"latitude": 55.7558, "longitude": 37.6176}  # Москва
 
-        # Находим точное время соляра (когда Солнце возвращается в натальную позицию)
-        natal_datetime = datetime.combine(birth_date, datetime.min.time())
-        self.astro_calc.calculate_planet_positions(natal_datetime)["Sun"][
-            "longitude"
-        ]
-
-        # Приблизительная дата соляра
-        solar_date = date(year, birth_date.month, birth_date.day)
-        solar_datetime = datetime.combine(solar_date, datetime.min.time())
+        # Время рождения неизвестно - натальное Солнце берется на полдень,
+        # что дает точность момента соляра около полусуток
+        natal_datetime = datetime.combine(birth_date, time(12, 0))
+        solver = get_return_solver()
+        natal_sun = solver.longitude_at("Sun", natal_datetime)
+
+        # Точное время соляра (когда Солнце возвращается в натальную позицию)
+        solar_datetime = solver.solar_return(
+            natal_sun,
+            year,
+            chart_id=cache_keys.chart_id(
+                natal_datetime,
+                birth_place["latitude"],
+                birth_place["longitude"],
+            ),
+            birth_datetime=natal_datetime,
+        ).replace(tzinfo=None)
+        solar_date = solar_datetime.date()
 
         # Рассчитываем позиции планет на соляр
         solar_positions = self.astro_calc.calculate_planet_positions(
@@ -323,6 +335,7 @@ class TransitCalculator:
         return {
             "year": year,
             "date": solar_date.isoformat(),
+            "exact_time": solar_datetime.isoformat(),
             "planets": solar_positions,
             "houses": solar_houses,
             "interpretation": interpretation,
@@ -534,20 +547,37 @@ class TransitCalculator:
             # Fallback к середине месяца
             new_moon_date = datetime(target_year, target_month, 15)
 
+        # Точное время лунара (когда Луна возвращается в натальную позицию).
+        # Без времени рождения натальная Луна берется на полдень
+        natal_datetime = datetime.combine(birth_date, time(12, 0))
+        solver = get_return_solver()
+        natal_moon = solver.longitude_at("Moon", natal_datetime)
+        lunar_datetime = solver.lunar_return(
+            natal_moon,
+            target_year,
+            target_month,
+            chart_id=cache_keys.chart_id(
+                natal_datetime,
+                birth_place["latitude"],
+                birth_place["longitude"],
+            ),
+        ).replace(tzinfo=None)
+
         # Рассчитываем позиции планет на лунар
         lunar_positions = self.astro_calc.calculate_planet_positions(
-            new_moon_date, birth_place["latitude"], birth_place["longitude"]
+            lunar_datetime, birth_place["latitude"], birth_place["longitude"]
         )
 
         # Рассчитываем дома для лунара
         lunar_houses = self.astro_calc.calculate_houses(
-            new_moon_date, birth_place["latitude"], birth_place["longitude"]
+            lunar_datetime, birth_place["latitude"], birth_place["longitude"]
         )
 
         return {
             "month": target_month,
             "year": target_year,
             "new_moon_date": new_moon_date.isoformat(),
+            "exact_time": lunar_datetime.isoformat(),
             "planets": lunar_positions,
             "houses": lunar_houses,
             "interpretation": self._interpret_lunar_return(lunar_positions),
@@ -555,24 +585,13 @@ class TransitCalculator:
         }
 
     def _find_new_moon(self, year: int, month: int) -> Optional[datetime]:
-        """Находит дату новолуния в указанном месяце."""
-
-        # Простое приближение - используем лунный цикл ~29.5 дней
-        # В реальной астрологии нужны точные эфемериды
+        """Находит точный момент новолуния в указанном месяце (UTC)."""
 
         try:
-            # Проверяем середину месяца
-            test_date = datetime(year, month, 15)
-            moon_phase = self.astro_calc.calculate_moon_phase(test_date)
-
-            # Если фаза близка к новолунию (0-30 градусов)
-            if moon_phase["angle"] <= 30 or moon_phase["angle"] >= 330:
-                return test_date
-
-            # Иначе возвращаем приблизительную дату
-            return datetime(year, month, 1)
-
-        except Exception:
+            event = get_lunation_index().new_moon_in_month(year, month)
+            return event["datetime"].replace(tzinfo=None)
+        except Exception as e:
+            self.logger.warning(f"Failed to find new moon: {e}")
             return None
 
     def _interpret_lunar_return(
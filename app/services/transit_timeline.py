@@ -0,0 +1,745 @@
+"""
+Линия транзитов натальной карты: отсортированные окна аспектов.
+
+Окна строятся проходом по эфемеридам на сетке моментов. Шаг сетки
+планеты не больше наименьшего орбиса, деленного на ее наибольшую
+скорость, поэтому в каждое окно попадает хотя бы один узел. Каждое окно хранит
+отклонения от точного аспекта в узлах сетки, поэтому вход в орбис,
+точные касания, выход и орбис в любой момент внутри покрытия получаются
+интерполяцией, без новых расчетов эфемерид.
+
+Покрытие растет кусками, выровненными по TIMELINE_CHUNK_DAYS: новый
+участок считается одним пакетным вызовом на группу планет, а окна,
+открытые на границе покрытия, сшиваются со своим продолжением. Линия
+сериализуется в словарь и хранится в кэше между запросами.
+"""
+
+import base64
+import bisect
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.services.astrology_calculator import AstrologyCalculator, to_julian_days
+from app.services.ephemeris_solver import RootNotBracketedError, brent_root, wrap_angle
+from app.services.transit_timing import (
+    MAX_WINDOW_EXTENSION_DAYS,
+    AspectWindow,
+    ExactHit,
+    TransitTimingSolver,
+    aspect_targets,
+    to_moment,
+)
+
+logger = logging.getLogger(__name__)
+
+TIMELINE_FORMAT = 2
+
+# Границы покрытия кратны этому числу суток (и каждому шагу сетки),
+# поэтому соседние участки делят общий узел
+TIMELINE_CHUNK_DAYS = 10.0
+
+# Шаг продления покрытия, пока окно открыто на его границе (сутки)
+EDGE_EXTENSION_DAYS = 60.0
+
+# Столбцы упакованного индекса окон при сериализации
+_INDEX_COLUMNS = 8
+
+# Шаги сетки: делители TIMELINE_CHUNK_DAYS, точные в двоичной записи
+GRID_STEPS_DAYS = (5.0, 2.5, 2.0, 1.25, 1.0, 0.625, 0.5, 0.25, 0.125, 0.0625)
+
+# Наибольшие скорость (°/сут) и ускорение (°/сут²) тел за 1950–2050
+PLANET_MAX_SPEED = {
+    "Moon": 15.4,
+    "Sun": 1.02,
+    "Mercury": 2.21,
+    "Venus": 1.26,
+    "Mars": 0.8,
+    "Jupiter": 0.25,
+    "Saturn": 0.14,
+    "Uranus": 0.07,
+    "Neptune": 0.045,
+    "Pluto": 0.045,
+    "TrueNode": 0.26,
+    "Chiron": 0.15,
+}
+PLANET_MAX_ACCELERATION = {
+    "Moon": 0.52,
+    "Sun": 0.001,
+    "Mercury": 0.2,
+    "Venus": 0.043,
+    "Mars": 0.016,
+    "Jupiter": 0.011,
+    "Saturn": 0.006,
+    "Uranus": 0.013,
+    "Neptune": 0.006,
+    "Pluto": 0.001,
+    "TrueNode": 0.061,
+    "Chiron": 0.011,
+}
+
+# Касание орбиса у станции мельче этого (градусы) может пройти между
+# узлами: ошибка линейной интерполяции на шаге не больше этой величины
+GRAZE_TOLERANCE = 0.02
+
+
+def sweep_step(planet: str, min_orb: float) -> float:
+    """Шаг сетки планеты для линии с наименьшим орбисом min_orb.
+
+    За шаг планета проходит не больше орбиса, поэтому в каждом окне
+    есть узел, а касание глубже GRAZE_TOLERANCE не теряется между
+    узлами.
+    """
+    limit = TransitTimingSolver.grid_step(planet)
+    if planet in PLANET_MAX_SPEED:
+        limit = min(limit, min_orb / PLANET_MAX_SPEED[planet])
+    if planet in PLANET_MAX_ACCELERATION:
+        limit = min(
+            limit,
+            float(np.sqrt(8 * GRAZE_TOLERANCE / PLANET_MAX_ACCELERATION[planet])),
+        )
+    for step in GRID_STEPS_DAYS:
+        if step <= limit:
+            return step
+    return GRID_STEPS_DAYS[-1]
+
+
+def _linear_root(left: float, right: float) -> float:
+    """Доля шага, на которой линейная функция проходит через ноль"""
+    return left / (left - right) if left != right else 0.0
+
+
+def _edge_fraction(outer: float, inner: float, orb: float) -> float:
+    """Доля шага от внешнего узла до границы орбиса.
+
+    Интерполируется отклонение со знаком: между узлами оно может пройти
+    через ноль, и тогда |отклонение| на шаге не линейно.
+    """
+    boundary = orb if outer > 0 else -orb
+    return _linear_root(outer - boundary, inner - boundary)
+
+
+def _merge(target: "TimelineWindow", other: "TimelineWindow") -> None:
+    """Объединяет узлы двух частей одного окна (общие узлы совпадают)"""
+    first = min(target.first_jd, other.first_jd)
+    last = max(target.last_jd, other.last_jd)
+    deviations = np.empty(int(round((last - first) / target.step)) + 1)
+    for part in (target, other):
+        offset = int(round((part.first_jd - first) / target.step))
+        deviations[offset : offset + len(part.deviations)] = part.deviations
+    target.first_jd = first
+    target.deviations = deviations
+
+
+@dataclass
+class TimelineWindow:
+    """Окно аспекта: отклонения от точного аспекта в узлах сетки.
+
+    Узлы идут с шагом step начиная с first_jd. Внутренние узлы лежат в
+    орбисе, крайние — снаружи, если граница окна попала в покрытие.
+    """
+
+    transit_planet: str
+    natal_point: str
+    aspect_angle: float
+    target: float
+    orb: float
+    first_jd: float
+    step: float
+    deviations: np.ndarray
+
+    @property
+    def key(self) -> Tuple[str, str, float, float]:
+        return (
+            self.transit_planet,
+            self.natal_point,
+            self.aspect_angle,
+            self.target,
+        )
+
+    @property
+    def last_jd(self) -> float:
+        return self.first_jd + self.step * (len(self.deviations) - 1)
+
+    def _excess(self, index: int) -> float:
+        return abs(float(self.deviations[index])) - self.orb
+
+    @property
+    def open_start(self) -> bool:
+        """Окно началось раньше покрытия"""
+        return self._excess(0) <= 0
+
+    @property
+    def open_end(self) -> bool:
+        """Окно продолжается после покрытия"""
+        return self._excess(-1) <= 0
+
+    @property
+    def start_jd(self) -> Optional[float]:
+        """Вход в орбис или None, если окно открыто слева"""
+        if self.open_start:
+            return None
+        return self.first_jd + self.step * _edge_fraction(
+            float(self.deviations[0]), float(self.deviations[1]), self.orb
+        )
+
+    @property
+    def end_jd(self) -> Optional[float]:
+        """Выход из орбиса или None, если окно открыто справа"""
+        if self.open_end:
+            return None
+        return self.last_jd - self.step * _edge_fraction(
+            float(self.deviations[-1]), float(self.deviations[-2]), self.orb
+        )
+
+    @property
+    def span(self) -> Tuple[float, float]:
+        """Интервал окна; открытые границы — бесконечность"""
+        start, end = self.start_jd, self.end_jd
+        return (
+            -np.inf if start is None else start,
+            np.inf if end is None else end,
+        )
+
+    def exact_brackets(self) -> List[Tuple[int, bool]]:
+        """Интервалы сетки с точным касанием и признак ретроградности"""
+        left = self.deviations[:-1]
+        right = self.deviations[1:]
+        crossing = (right != 0) & (((left > 0) != (right > 0)) | (left == 0))
+        # Переход через ±180° — разрыв, а не касание
+        crossing &= np.abs(left - right) < 180
+        return [
+            (int(index), bool(left[index] > right[index]))
+            for index in np.nonzero(crossing)[0]
+        ]
+
+    def exact_jds(self) -> List[Tuple[float, bool]]:
+        """Моменты точных касаний (линейная интерполяция)"""
+        return [
+            (
+                self.first_jd
+                + self.step
+                * (
+                    index
+                    + _linear_root(self.deviations[index], self.deviations[index + 1])
+                ),
+                retrograde,
+            )
+            for index, retrograde in self.exact_brackets()
+        ]
+
+    @property
+    def min_orb(self) -> float:
+        if self.exact_brackets():
+            return 0.0
+        return float(np.abs(self.deviations).min())
+
+    def deviation_at(self, julian_day: float) -> Optional[float]:
+        """Отклонение от точного аспекта в момент внутри узлов окна"""
+        if not self.first_jd <= julian_day <= self.last_jd:
+            return None
+        position = (julian_day - self.first_jd) / self.step
+        index = min(int(position), len(self.deviations) - 2)
+        if index < 0:
+            return float(self.deviations[0])
+        fraction = position - index
+        left, right = self.deviations[index], self.deviations[index + 1]
+        return float(left + (right - left) * fraction)
+
+    def narrowed(self, orb: float) -> List["TimelineWindow"]:
+        """Окна того же аспекта для меньшего орбиса"""
+        inside = np.abs(self.deviations) <= orb
+        if not inside.any():
+            return []
+        edges = np.diff(inside.astype(np.int8))
+        run_starts = list(np.nonzero(edges == 1)[0] + 1)
+        run_ends = list(np.nonzero(edges == -1)[0])
+        if inside[0]:
+            run_starts.insert(0, 0)
+        if inside[-1]:
+            run_ends.append(len(inside) - 1)
+
+        windows = []
+        for first, last in zip(run_starts, run_ends):
+            low = max(first - 1, 0)
+            high = min(last + 2, len(self.deviations))
+            windows.append(
+                TimelineWindow(
+                    self.transit_planet,
+                    self.natal_point,
+                    self.aspect_angle,
+                    self.target,
+                    orb,
+                    self.first_jd + self.step * low,
+                    self.step,
+                    self.deviations[low:high],
+                )
+            )
+        return windows
+
+
+class TransitTimeline:
+    """Окна транзитных аспектов к одной натальной карте.
+
+    Окна отсортированы по началу; вместе с накопленным максимумом концов
+    это дает поиск окон, пересекающих интервал, за O(log n + k).
+    """
+
+    def __init__(
+        self,
+        natal_longitudes: Mapping[str, float],
+        transit_planets: Iterable[str],
+        aspect_orbs: Mapping[float, float],
+        calculator: Optional[AstrologyCalculator] = None,
+    ):
+        self.natal_longitudes = {
+            name: float(longitude) for name, longitude in natal_longitudes.items()
+        }
+        self.transit_planets = list(transit_planets)
+        self.aspect_orbs = {angle: float(orb) for angle, orb in aspect_orbs.items()}
+        self.calculator = calculator
+        # Покрытие по группам планет с общим шагом сетки: шаг -> [от, до]
+        self.coverage: Dict[float, List[float]] = {}
+        self.windows: List[TimelineWindow] = []
+        self.revision = 0
+        self._index: Optional[Tuple[List[float], ...]] = None
+
+    # Параметры
+
+    def matches(
+        self,
+        natal_longitudes: Mapping[str, float],
+        transit_planets: Iterable[str],
+        aspect_orbs: Mapping[float, float],
+    ) -> bool:
+        """Построена ли линия для тех же карты, планет и орбисов"""
+        other = TransitTimeline(natal_longitudes, transit_planets, aspect_orbs)
+        return (
+            other.natal_longitudes == self.natal_longitudes
+            and other.transit_planets == self.transit_planets
+            and other.aspect_orbs == self.aspect_orbs
+        )
+
+    def _groups(
+        self, planets: Optional[Iterable[str]] = None
+    ) -> Dict[float, List[str]]:
+        wanted = set(self.transit_planets if planets is None else planets)
+        min_orb = min(self.aspect_orbs.values(), default=1.0)
+        groups: Dict[float, List[str]] = {}
+        for planet in self.transit_planets:
+            if planet in wanted:
+                step = sweep_step(planet, min_orb)
+                groups.setdefault(step, []).append(planet)
+        return groups
+
+    def _targets(self) -> List[Tuple[float, float, float]]:
+        return [
+            (angle, target, orb)
+            for angle, orb in self.aspect_orbs.items()
+            for target in aspect_targets(angle)
+        ]
+
+    # Расширение покрытия
+
+    def ensure(
+        self,
+        start: datetime,
+        end: datetime,
+        planets: Optional[Iterable[str]] = None,
+    ) -> int:
+        """Расширяет покрытие до [start, end]; возвращает число новых
+        участков (0, если интервал уже покрыт)"""
+        start_jd, end_jd = (float(jd) for jd in to_julian_days([start, end]))
+        chunk = TIMELINE_CHUNK_DAYS
+        low = float(np.floor(start_jd / chunk) * chunk)
+        high = max(float(np.ceil(end_jd / chunk) * chunk), low + chunk)
+        return self._extend(low, high, planets)
+
+    def _extend(
+        self,
+        low: float,
+        high: float,
+        planets: Optional[Iterable[str]] = None,
+    ) -> int:
+        added = 0
+        for step, group in self._groups(planets).items():
+            covered = self.coverage.get(step)
+            if covered is None:
+                self._sweep(step, group, low, high)
+                self.coverage[step] = [low, high]
+                added += 1
+                continue
+            if low < covered[0]:
+                self._sweep(step, group, low, covered[0])
+                covered[0] = low
+                added += 1
+            if high > covered[1]:
+                self._sweep(step, group, covered[1], high)
+                covered[1] = high
+                added += 1
+
+        if added:
+            self.revision += 1
+            self._index = None
+        return added
+
+    def _sweep(self, step: float, planets: List[str], low: float, high: float) -> None:
+        """Окна группы планет на участке [low, high] одним пакетным
+        вызовом и векторным поиском по всем аспектам"""
+        grid = low + step * np.arange(int(round((high - low) / step)) + 1)
+        batch = self.calculator.calculate_positions_for_julian_days(grid, planets)
+        natal_names = list(self.natal_longitudes)
+        targets = self._targets()
+        if not batch.planets or not natal_names or not targets:
+            return
+
+        natal = np.array([self.natal_longitudes[n] for n in natal_names])
+        offsets = np.array([target for _, target, _ in targets])
+        orbs = np.array([orb for _, _, orb in targets])
+
+        # Отклонения: моменты × планеты × натальные точки × аспекты
+        deviation = wrap_angle(
+            batch.longitude[:, :, None, None]
+            - natal[None, None, :, None]
+            - offsets[None, None, None, :]
+        )
+        inside = np.abs(deviation) <= orbs
+
+        existing: Dict[Tuple, List[TimelineWindow]] = {}
+        for window in self.windows:
+            if window.step == step:
+                existing.setdefault(window.key, []).append(window)
+
+        for column, natal_index, target_index in np.argwhere(inside.any(axis=0)):
+            angle, target, orb = targets[target_index]
+            template = TimelineWindow(
+                batch.planets[column],
+                natal_names[natal_index],
+                angle,
+                target,
+                orb,
+                low,
+                step,
+                deviation[:, column, natal_index, target_index],
+            )
+            for window in template.narrowed(orb):
+                self._add(window, existing.get(window.key, ()), low, high)
+
+    def _add(
+        self,
+        window: TimelineWindow,
+        existing: Sequence[TimelineWindow],
+        low: float,
+        high: float,
+    ) -> None:
+        """Добавляет окно участка [low, high] или сшивает его с окном,
+        которое продолжается через границу участка"""
+        seams = []
+        if window.open_start and abs(window.first_jd - low) < 1e-6:
+            seams.append(low)
+        if window.open_end and abs(window.last_jd - high) < 1e-6:
+            seams.append(high)
+
+        for seam in seams:
+            for other in existing:
+                deviation = other.deviation_at(seam)
+                if deviation is not None and abs(deviation) <= other.orb:
+                    _merge(other, window)
+                    return
+
+        self.windows.append(window)
+
+    def trim(self, retention_days: float) -> int:
+        """Удаляет окна, закончившиеся раньше чем за retention_days до
+        ближайшего горизонта покрытия, и сдвигает начало покрытия; окна
+        через новую границу остаются целиком"""
+        if not self.coverage:
+            return 0
+        cutoff = min(high for _, high in self.coverage.values())
+        cutoff -= retention_days
+        floor = float(np.floor(cutoff / TIMELINE_CHUNK_DAYS) * TIMELINE_CHUNK_DAYS)
+        for covered in self.coverage.values():
+            covered[0] = min(max(covered[0], floor), covered[1])
+
+        kept = [window for window in self.windows if window.span[1] >= cutoff]
+        removed = len(self.windows) - len(kept)
+        if removed:
+            self.windows = kept
+            self._index = None
+            self.revision += 1
+        return removed
+
+    # Запросы
+
+    def _sorted(self) -> Tuple[List[float], List[float], List[float]]:
+        if self._index is None:
+            spans = [window.span for window in self.windows]
+            order = sorted(range(len(spans)), key=lambda i: spans[i][0])
+            self.windows = [self.windows[i] for i in order]
+            starts, ends, max_ends, running = [], [], [], -np.inf
+            for i in order:
+                start, end = spans[i]
+                starts.append(start)
+                ends.append(end)
+                running = max(running, end)
+                max_ends.append(running)
+            self._index = (starts, ends, max_ends)
+        return self._index
+
+    def overlapping(
+        self,
+        start: datetime,
+        end: datetime,
+        planets: Optional[Iterable[str]] = None,
+    ) -> List[TimelineWindow]:
+        """Окна, пересекающие интервал, в порядке начала"""
+        start_jd, end_jd = (float(jd) for jd in to_julian_days([start, end]))
+        starts, ends, max_ends = self._sorted()
+        wanted = None if planets is None else set(planets)
+
+        found = []
+        index = bisect.bisect_right(starts, end_jd) - 1
+        while index >= 0 and max_ends[index] >= start_jd:
+            window = self.windows[index]
+            if ends[index] >= start_jd and (
+                wanted is None or window.transit_planet in wanted
+            ):
+                found.append(window)
+            index -= 1
+        found.reverse()
+        return found
+
+    def aspects_at(self, moment: datetime) -> List[Tuple[TimelineWindow, float, float]]:
+        """Аспекты в орбисе на момент: (окно, орбис, угловое расстояние).
+
+        Порядок как у движка аспектов: транзитная планета, натальная
+        точка, затем порядок таблицы орбисов.
+        """
+        julian_day = float(to_julian_days([moment])[0])
+        planet_order = {name: i for i, name in enumerate(self.transit_planets)}
+        natal_order = {name: i for i, name in enumerate(self.natal_longitudes)}
+        aspect_order = {angle: i for i, angle in enumerate(self.aspect_orbs)}
+
+        found = []
+        for window in self.overlapping(moment, moment):
+            deviation = window.deviation_at(julian_day)
+            if deviation is None or abs(deviation) > window.orb:
+                continue
+            separation = abs(wrap_angle(window.target + deviation))
+            found.append((window, abs(deviation), separation))
+
+        found.sort(
+            key=lambda item: (
+                planet_order[item[0].transit_planet],
+                natal_order[item[0].natal_point],
+                aspect_order[item[0].aspect_angle],
+            )
+        )
+        return found
+
+    def find_windows(
+        self,
+        start: datetime,
+        end: datetime,
+        planets: Iterable[str],
+        aspect_orbs: Mapping[float, float],
+    ) -> List[AspectWindow]:
+        """Окна аспектов планет за период для орбисов не шире линии.
+
+        Пока найденное окно открыто на границе покрытия, покрытие этих
+        планет продлевается (не дальше MAX_WINDOW_EXTENSION_DAYS), чтобы
+        у окна были известны вход и выход. Моменты уточняются методом
+        Брента, окна отсортированы по первому точному касанию.
+        """
+        planets = list(planets)
+        self.ensure(start, end, planets)
+        origin = {step: list(span) for step, span in self.coverage.items()}
+
+        start_jd, end_jd = self._jd(start), self._jd(end)
+        while True:
+            windows = [
+                narrow
+                for window in self.overlapping(start, end, planets)
+                if window.aspect_angle in aspect_orbs
+                for narrow in window.narrowed(
+                    min(window.orb, aspect_orbs[window.aspect_angle])
+                )
+                if narrow.span[0] <= end_jd and narrow.span[1] >= start_jd
+            ]
+            extend_start = [w for w in windows if w.open_start]
+            extend_end = [w for w in windows if w.open_end]
+            if not extend_start and not extend_end:
+                break
+
+            extended = False
+            for group, direction in ((extend_start, -1), (extend_end, 1)):
+                for step in {window.step for window in group}:
+                    covered = self.coverage[step]
+                    side = 0 if direction < 0 else 1
+                    if (
+                        abs(covered[side] - origin[step][side])
+                        >= MAX_WINDOW_EXTENSION_DAYS
+                    ):
+                        continue
+                    edge = covered[side] + direction * EDGE_EXTENSION_DAYS
+                    self._extend(
+                        min(edge, covered[0]),
+                        max(edge, covered[1]),
+                        self._groups(planets)[step],
+                    )
+                    extended = True
+            if not extended:
+                break
+
+        result = [self.aspect_window(window) for window in windows]
+        result.sort(
+            key=lambda window: (
+                window.peak.timestamp() if window.peak else float("-inf")
+            )
+        )
+        return result
+
+    @staticmethod
+    def _jd(moment: datetime) -> float:
+        return float(to_julian_days([moment])[0])
+
+    def aspect_window(self, window: TimelineWindow) -> AspectWindow:
+        """Окно в формате решателя с моментами, уточненными Брентом"""
+        natal_longitude = self.natal_longitudes[window.natal_point]
+
+        def deviation(julian_day: float) -> float:
+            batch = self.calculator.calculate_positions_for_julian_days(
+                np.array([julian_day]), [window.transit_planet]
+            )
+            return wrap_angle(
+                float(batch.longitude[0, 0]) - natal_longitude - window.target
+            )
+
+        def boundary(julian_day: float) -> float:
+            return abs(deviation(julian_day)) - window.orb
+
+        def node(index: int) -> float:
+            return window.first_jd + window.step * index
+
+        def refine(func, index: int, estimate: float) -> float:
+            try:
+                return brent_root(func, node(index), node(index + 1))
+            except RootNotBracketedError:
+                # Узлы хранятся округленными: остается интерполяция
+                return estimate
+
+        last = len(window.deviations) - 1
+        start = None if window.open_start else refine(boundary, 0, window.start_jd)
+        end = None if window.open_end else refine(boundary, last - 1, window.end_jd)
+        hits = [
+            ExactHit(to_moment(refine(deviation, index, estimate)), retrograde)
+            for (index, retrograde), (estimate, _) in zip(
+                window.exact_brackets(), window.exact_jds()
+            )
+        ]
+
+        return AspectWindow(
+            transit_planet=window.transit_planet,
+            natal_point=window.natal_point,
+            aspect_angle=window.aspect_angle,
+            orb=window.orb,
+            start=to_moment(start) if start is not None else None,
+            end=to_moment(end) if end is not None else None,
+            exact_hits=hits,
+            min_orb=window.min_orb,
+        )
+
+    # Сериализация
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Словарь для кэша: окна упакованы в два массива (индекс окон и
+        отклонения float32) в base64, чтобы запись оставалась компактной
+        для любого кодека и дешевой для оценки размера в L1"""
+        planet_index = {name: i for i, name in enumerate(self.transit_planets)}
+        natal_index = {name: i for i, name in enumerate(self.natal_longitudes)}
+        index = np.array(
+            [
+                (
+                    planet_index[window.transit_planet],
+                    natal_index[window.natal_point],
+                    window.aspect_angle,
+                    window.target,
+                    window.orb,
+                    window.first_jd,
+                    window.step,
+                    len(window.deviations),
+                )
+                for window in self.windows
+            ],
+            dtype=np.float64,
+        ).reshape(-1, _INDEX_COLUMNS)
+        deviations = (
+            np.concatenate([window.deviations for window in self.windows])
+            if self.windows
+            else np.empty(0)
+        )
+        return {
+            "format": TIMELINE_FORMAT,
+            "natal": self.natal_longitudes,
+            "planets": self.transit_planets,
+            "orbs": [[angle, orb] for angle, orb in self.aspect_orbs.items()],
+            "coverage": [
+                [step, low, high] for step, (low, high) in self.coverage.items()
+            ],
+            "index": _pack(index.astype("<f8")),
+            "deviations": _pack(deviations.astype("<f4")),
+        }
+
+    @classmethod
+    def from_dict(
+        cls,
+        data: Mapping[str, Any],
+        calculator: Optional[AstrologyCalculator] = None,
+    ) -> Optional["TransitTimeline"]:
+        """Линия из словаря или None для другого формата"""
+        if data.get("format") != TIMELINE_FORMAT:
+            return None
+        timeline = cls(
+            data["natal"],
+            data["planets"],
+            {angle: orb for angle, orb in data["orbs"]},
+            calculator,
+        )
+        timeline.coverage = {step: [low, high] for step, low, high in data["coverage"]}
+
+        index = _unpack(data["index"], "<f8").reshape(-1, _INDEX_COLUMNS)
+        deviations = _unpack(data["deviations"], "<f4").astype(np.float64)
+        aspect_angles = {float(angle): angle for angle in timeline.aspect_orbs}
+        natal_names = list(timeline.natal_longitudes)
+        offset = 0
+        for row in index.tolist():
+            planet, natal, angle, target, orb, first_jd, step, count = row
+            count = int(count)
+            timeline.windows.append(
+                TimelineWindow(
+                    timeline.transit_planets[int(planet)],
+                    natal_names[int(natal)],
+                    aspect_angles.get(angle, angle),
+                    target,
+                    orb,
+                    first_jd,
+                    step,
+                    deviations[offset : offset + count],
+                )
+            )
+            offset += count
+        return timeline
+
+    def __len__(self) -> int:
+        return len(self.windows)
+
+
+def _pack(array: np.ndarray) -> str:
+    return base64.b64encode(array.tobytes()).decode("ascii")
+
+
+def _unpack(text: str, dtype: str) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(text), dtype=dtype)
@@ -0,0 +1,475 @@
+"""
+Точное время транзитных аспектов: вход в орбис, точные касания, выход.
+
+Долготы транзитной планеты считаются пакетно на сетке моментов, шаг
+которой зависит от скорости планеты. Отклонение от точного аспекта
+(со знаком) дает окна в орбисе, а границы окон и точные касания
+уточняются методом Брента. При ретроградном движении окно может
+содержать несколько точных касаний (проходов).
+"""
+
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.services.astrology_calculator import (
+    AstrologyCalculator,
+    PlanetPositionsBatch,
+    from_julian_day,
+    to_julian_days,
+)
+from app.services.ephemeris_solver import brent_root, wrap_angle
+
+logger = logging.getLogger(__name__)
+
+# Шаг сетки (сутки): за шаг планета проходит заметно меньше орбиса
+PLANET_GRID_STEP_DAYS = {
+    "Moon": 0.25,
+    "Sun": 1.0,
+    "Mercury": 1.0,
+    "Venus": 1.0,
+    "Mars": 1.0,
+    "Jupiter": 2.0,
+    "Saturn": 2.0,
+    "Uranus": 5.0,
+    "Neptune": 5.0,
+    "Pluto": 5.0,
+    "TrueNode": 2.0,
+    "Chiron": 2.0,
+}
+DEFAULT_GRID_STEP_DAYS = 1.0
+
+# Полуширина поиска ближайшего точного касания вокруг момента
+PLANET_SEARCH_SPAN_DAYS = {
+    "Moon": 2,
+    "Sun": 15,
+    "Mercury": 60,
+    "Venus": 60,
+    "Mars": 90,
+    "Jupiter": 240,
+    "Saturn": 300,
+    "Uranus": 400,
+    "Neptune": 400,
+    "Pluto": 400,
+    "TrueNode": 120,
+    "Chiron": 300,
+}
+DEFAULT_SEARCH_SPAN_DAYS = 60
+
+# Предел продления окна за границы периода поиска (сутки)
+MAX_WINDOW_EXTENSION_DAYS = 800
+EXTENSION_CHUNK = 64
+
+
+@dataclass
+class ExactHit:
+    """Точное касание аспекта"""
+
+    moment: datetime
+    retrograde: bool
+
+
+@dataclass
+class AspectWindow:
+    """Период действия транзитного аспекта в пределах орбиса"""
+
+    transit_planet: str
+    natal_point: str
+    aspect_angle: float
+    orb: float
+    start: Optional[datetime]
+    end: Optional[datetime]
+    exact_hits: List[ExactHit] = field(default_factory=list)
+    min_orb: float = 0.0
+
+    @property
+    def duration_days(self) -> Optional[float]:
+        if self.start is None or self.end is None:
+            return None
+        return (self.end - self.start).total_seconds() / 86400.0
+
+    @property
+    def peak(self) -> Optional[datetime]:
+        """Первое точное касание или начало окна"""
+        if self.exact_hits:
+            return self.exact_hits[0].moment
+        return self.start
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "transit_planet": self.transit_planet,
+            "natal_point": self.natal_point,
+            "aspect_angle": self.aspect_angle,
+            "orb": self.orb,
+            "start": self.start.isoformat() if self.start else None,
+            "end": self.end.isoformat() if self.end else None,
+            "exact_dates": [hit.moment.isoformat() for hit in self.exact_hits],
+            "passes": len(self.exact_hits),
+            "retrograde_passes": sum(
+                1 for hit in self.exact_hits if hit.retrograde
+            ),
+            "min_orb": self.min_orb,
+            "duration_days": self.duration_days,
+        }
+
+
+def to_moment(julian_day: float) -> datetime:
+    """Момент с точностью до секунды"""
+    return from_julian_day(julian_day).replace(microsecond=0)
+
+
+def aspect_targets(aspect_angle: float) -> Tuple[float, ...]:
+    """Смещения долготы от натальной точки, дающие точный аспект"""
+    if aspect_angle % 180 == 0:
+        return (float(aspect_angle),)
+    return (float(aspect_angle), -float(aspect_angle))
+
+
+class TransitTimingSolver:
+    """Решатель моментов транзитных аспектов"""
+
+    def __init__(
+        self,
+        calculator: Optional[AstrologyCalculator] = None,
+        track_cache_size: int = 64,
+    ):
+        self.calculator = calculator or AstrologyCalculator()
+        self.track_cache_size = track_cache_size
+        self._tracks: "OrderedDict[Tuple, PlanetPositionsBatch]" = (
+            OrderedDict()
+        )
+        self.evaluations = 0
+        self.track_hits = 0
+        self.track_misses = 0
+
+    # Эфемериды
+
+    @staticmethod
+    def grid_step(planet: str) -> float:
+        return PLANET_GRID_STEP_DAYS.get(planet, DEFAULT_GRID_STEP_DAYS)
+
+    def _evaluate(
+        self, julian_days: np.ndarray, planets: Sequence[str]
+    ) -> PlanetPositionsBatch:
+        self.evaluations += len(julian_days) * len(planets)
+        return self.calculator.calculate_positions_for_julian_days(
+            julian_days, list(planets)
+        )
+
+    def _track(
+        self, planets: Tuple[str, ...], start_jd: float, end_jd: float
+    ) -> Tuple[np.ndarray, PlanetPositionsBatch]:
+        """Долготы на сетке, выровненной по шагу (кэшируется)"""
+        step = max(self.grid_step(planet) for planet in planets)
+        first = int(np.floor(start_jd / step))
+        count = int(np.ceil(end_jd / step)) - first + 1
+        key = (planets, first, count, step)
+
+        grid = (first + np.arange(count)) * step
+        batch = self._tracks.get(key)
+        if batch is not None:
+            self._tracks.move_to_end(key)
+            self.track_hits += 1
+            return grid, batch
+
+        self.track_misses += 1
+        batch = self._evaluate(grid, planets)
+        self._tracks[key] = batch
+        if len(self._tracks) > self.track_cache_size:
+            self._tracks.popitem(last=False)
+        return grid, batch
+
+    def _longitude(self, planet: str, julian_day: float) -> float:
+        batch = self._evaluate(np.array([julian_day]), [planet])
+        return float(batch.longitude[0, 0])
+
+    # Поиск окон
+
+    def find_aspect_windows(
+        self,
+        transit_planet: str,
+        natal_point: str,
+        natal_longitude: float,
+        aspect_angle: float,
+        orb: float,
+        start: datetime,
+        end: datetime,
+    ) -> List[AspectWindow]:
+        """Окна аспекта транзитной планеты к натальной точке за период"""
+        return self.find_chart_windows(
+            {natal_point: natal_longitude},
+            [transit_planet],
+            {aspect_angle: orb},
+            start,
+            end,
+        )
+
+    def find_chart_windows(
+        self,
+        natal_longitudes: Dict[str, float],
+        transit_planets: Iterable[str],
+        aspect_orbs: Dict[float, float],
+        start: datetime,
+        end: datetime,
+    ) -> List[AspectWindow]:
+        """Все окна аспектов транзитных планет к натальной карте.
+
+        Сетка долгот для каждой группы планет с одинаковым шагом
+        вычисляется одним пакетным вызовом. Окна отсортированы по
+        первому точному касанию (или началу окна).
+        """
+        start_jd, end_jd = (float(jd) for jd in to_julian_days([start, end]))
+
+        groups: Dict[float, List[str]] = {}
+        for planet in transit_planets:
+            groups.setdefault(self.grid_step(planet), []).append(planet)
+
+        windows: List[AspectWindow] = []
+        for planets in groups.values():
+            grid, batch = self._track(tuple(planets), start_jd, end_jd)
+
+            for column, planet in enumerate(batch.planets):
+                for natal_point, natal_longitude in natal_longitudes.items():
+                    for aspect_angle, orb in aspect_orbs.items():
+                        for target in aspect_targets(aspect_angle):
+                            windows.extend(
+                                self._windows_for_target(
+                                    planet,
+                                    natal_point,
+                                    float(natal_longitude),
+                                    aspect_angle,
+                                    orb,
+                                    target,
+                                    grid,
+                                    batch.longitude[:, column],
+                                )
+                            )
+
+        windows.sort(
+            key=lambda window: (
+                window.peak.timestamp() if window.peak else float("-inf")
+            )
+        )
+        return windows
+
+    def _windows_for_target(
+        self,
+        planet: str,
+        natal_point: str,
+        natal_longitude: float,
+        aspect_angle: float,
+        orb: float,
+        target: float,
+        grid: np.ndarray,
+        longitudes: np.ndarray,
+    ) -> List[AspectWindow]:
+        deviation = wrap_angle(longitudes - natal_longitude - target)
+        inside = np.abs(deviation) <= orb
+        if not inside.any():
+            return []
+
+        def boundary(julian_day: float) -> float:
+            deviation = wrap_angle(
+                self._longitude(planet, julian_day) - natal_longitude - target
+            )
+            return abs(deviation) - orb
+
+        # Непрерывные серии узлов внутри орбиса
+        edges = np.diff(inside.astype(np.int8))
+        run_starts = list(np.nonzero(edges == 1)[0] + 1)
+        run_ends = list(np.nonzero(edges == -1)[0])
+        if inside[0]:
+            run_starts.insert(0, 0)
+        if inside[-1]:
+            run_ends.append(len(inside) - 1)
+
+        windows = []
+        last = len(grid) - 1
+        for first_index, last_index in zip(run_starts, run_ends):
+            if first_index == 0:
+                start_jd = self._extend_boundary(
+                    planet, natal_longitude, target, orb, grid[0], -1
+                )
+            else:
+                start_jd = brent_root(
+                    boundary,
+                    float(grid[first_index - 1]),
+                    float(grid[first_index]),
+                )
+
+            if last_index == last:
+                end_jd = self._extend_boundary(
+                    planet, natal_longitude, target, orb, grid[last], 1
+                )
+            else:
+                end_jd = brent_root(
+                    boundary,
+                    float(grid[last_index]),
+                    float(grid[last_index + 1]),
+                )
+
+            hits = self._exact_hits(
+                planet,
+                start_jd if start_jd is not None else float(grid[0]),
+                end_jd if end_jd is not None else float(grid[last]),
+                natal_longitude,
+                target,
+            )
+            min_orb = (
+                0.0
+                if hits
+                else float(
+                    np.abs(deviation[first_index : last_index + 1]).min()
+                )
+            )
+            windows.append(
+                AspectWindow(
+                    transit_planet=planet,
+                    natal_point=natal_point,
+                    aspect_angle=aspect_angle,
+                    orb=orb,
+                    start=(
+                        to_moment(start_jd) if start_jd is not None else None
+                    ),
+                    end=to_moment(end_jd) if end_jd is not None else None,
+                    exact_hits=hits,
+                    min_orb=min_orb,
+                )
+            )
+        return windows
+
+    def _exact_hits(
+        self,
+        planet: str,
+        start_jd: float,
+        end_jd: float,
+        natal_longitude: float,
+        target: float,
+    ) -> List[ExactHit]:
+        """Точные касания внутри окна (несколько при ретроградности)"""
+        hits = []
+        for moment, retrograde in self._crossings(
+            planet, natal_longitude, target, start_jd, end_jd
+        ):
+            if start_jd - 1e-6 <= moment <= end_jd + 1e-6:
+                hits.append(ExactHit(to_moment(moment), retrograde))
+        return hits
+
+    def _crossings(
+        self,
+        planet: str,
+        natal_longitude: float,
+        target: float,
+        start_jd: float,
+        end_jd: float,
+    ) -> List[Tuple[float, bool]]:
+        """Моменты точного аспекта на интервале и признак ретроградности"""
+        grid, batch = self._track((planet,), start_jd, end_jd)
+        if not batch.planets:
+            return []
+        values = wrap_angle(batch.longitude[:, 0] - natal_longitude - target)
+
+        def residual(julian_day: float) -> float:
+            return wrap_angle(
+                self._longitude(planet, julian_day) - natal_longitude - target
+            )
+
+        crossings = []
+        for index in range(len(grid) - 1):
+            left, right = float(values[index]), float(values[index + 1])
+            if right == 0 or (left > 0) == (right > 0) and left != 0:
+                continue
+            # Переход через ±180° — разрыв, а не касание
+            if abs(left - right) >= 180:
+                continue
+            moment = brent_root(
+                residual,
+                float(grid[index]),
+                float(grid[index + 1]),
+                left,
+                right,
+            )
+            # Отклонение убывает при переходе через ноль — попятное движение
+            crossings.append((moment, left > right))
+        return crossings
+
+    def _extend_boundary(
+        self,
+        planet: str,
+        natal_longitude: float,
+        target: float,
+        orb: float,
+        from_jd: float,
+        direction: int,
+    ) -> Optional[float]:
+        """Ищет границу орбиса за пределами периода поиска"""
+        step = self.grid_step(planet)
+        origin = float(from_jd)
+        previous = origin
+        travelled = 0.0
+
+        def boundary(julian_day: float) -> float:
+            deviation = wrap_angle(
+                self._longitude(planet, julian_day) - natal_longitude - target
+            )
+            return abs(deviation) - orb
+
+        while travelled < MAX_WINDOW_EXTENSION_DAYS:
+            offsets = step * np.arange(1, EXTENSION_CHUNK + 1)
+            chunk = previous + direction * offsets
+            batch = self._evaluate(chunk, [planet])
+            deviation = np.abs(
+                wrap_angle(batch.longitude[:, 0] - natal_longitude - target)
+            )
+            outside = np.nonzero(deviation > orb)[0]
+            if len(outside):
+                index = int(outside[0])
+                inner = previous if index == 0 else float(chunk[index - 1])
+                outer = float(chunk[index])
+                low, high = sorted((inner, outer))
+                return brent_root(boundary, low, high)
+            previous = float(chunk[-1])
+            travelled = abs(previous - origin)
+
+        return None
+
+    # Точная дата ближайшего касания
+
+    def nearest_exact_hit(
+        self,
+        transit_planet: str,
+        natal_longitude: float,
+        aspect_angle: float,
+        moment: datetime,
+    ) -> Optional[datetime]:
+        """Ближайшее к моменту точное касание аспекта"""
+        span = PLANET_SEARCH_SPAN_DAYS.get(
+            transit_planet, DEFAULT_SEARCH_SPAN_DAYS
+        )
+        center = float(to_julian_days([moment])[0])
+
+        best: Optional[float] = None
+        for target in aspect_targets(aspect_angle):
+            for root, _ in self._crossings(
+                transit_planet,
+                natal_longitude,
+                target,
+                center - span,
+                center + span,
+            ):
+                if best is None or abs(root - center) < abs(best - center):
+                    best = root
+
+        return to_moment(best) if best is not None else None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "evaluations": self.evaluations,
+            "track_hits": self.track_hits,
+            "track_misses": self.track_misses,
+            "cached_tracks": len(self._tracks),
+        }
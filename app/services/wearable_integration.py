@@ -1,13 +1,20 @@
 """Wearable devices integration service."""
 
 from datetime import datetime, timedelta
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 from loguru import logger
 from sqlalchemy import and_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.iot_models import DeviceCommand, DeviceType, WearableAlert, WearableData
+from app.services.bulk_transits import (
+    STRONG_TRANSIT_SIGNIFICANCE,
+    BulkTransitEvaluator,
+    BulkTransitHit,
+    NatalMatrix,
+    get_bulk_transit_evaluator,
+)
 from app.services.iot_manager import IoTDeviceManager
 from app.services.lunar_calendar import LunarCalendar
 from app.services.transit_calculator import TransitCalculator
@@ -22,11 +29,13 @@ class WearableIntegrationService:
         iot_manager: IoTDeviceManager,
         lunar_service: LunarCalendar,
         transit_calculator: TransitCalculator,
+        bulk_transits: Optional[BulkTransitEvaluator] = None,
     ):
         self.db = db
         self.iot_manager = iot_manager
         self.lunar_service = lunar_service
         self.transit_calculator = transit_calculator
+        self.bulk_transits = bulk_transits
 
     async def sync_wearable_data(
         self, user_id: int, device_id: str, data: Dict[str, Any]
@@ -342,6 +351,66 @@ class WearableIntegrationService:
             logger.error(f"Failed to schedule transit reminders: {e}")
             return {"success": False, "error": str(e)}
 
+    async def schedule_transit_reminders_bulk(
+        self,
+        natal_matrix: NatalMatrix,
+        transit_date: Optional[datetime] = None,
+        min_significance: float = STRONG_TRANSIT_SIGNIFICANCE,
+        max_per_user: int = 3,
+    ) -> Dict[str, Any]:
+        """Schedule wearable reminders for strong transits of many users.
+
+        All users are evaluated against one sky snapshot in a single
+        vectorized pass instead of one transit calculation per user.
+        """
+        try:
+            evaluator = self.bulk_transits or get_bulk_transit_evaluator()
+            reminders: Dict[Any, List[Dict[str, Any]]] = {}
+
+            async for chunk in evaluator.stream(
+                natal_matrix, transit_date, min_significance
+            ):
+                for user_id, hits in chunk.by_user().items():
+                    reminders[user_id] = [
+                        self._bulk_transit_reminder(hit, chunk.moment)
+                        for hit in hits[:max_per_user]
+                    ]
+
+            logger.info(
+                f"Scheduled transit reminders for {len(reminders)}/"
+                f"{len(natal_matrix)} users"
+            )
+
+            return {
+                "success": True,
+                "message": f"Scheduled transit reminders for {len(reminders)} users",
+                "users": len(reminders),
+                "reminders": reminders,
+            }
+
+        except Exception as e:
+            logger.error(f"Failed to schedule bulk transit reminders: {e}")
+            return {"success": False, "error": str(e)}
+
+    def _bulk_transit_reminder(
+        self, hit: BulkTransitHit, transit_date: datetime
+    ) -> Dict[str, Any]:
+        """Reminder entry for one bulk-evaluated transit."""
+        name = f"{hit.transit_planet} {hit.aspect} {hit.natal_planet}"
+        alert = WearableAlert(
+            title="Астрологическое событие",
+            message=f"{name}: орбис {hit.orb:.1f}°",
+            alert_type="transit",
+            priority=min(10, max(1, round(hit.significance))),
+            expires_at=transit_date + timedelta(hours=6),
+        )
+        return {
+            "transit": name,
+            "significance": round(hit.significance, 1),
+            "reminder_time": (transit_date - timedelta(hours=2)).isoformat(),
+            "alert": alert.dict(),
+        }
+
     async def get_sleep_recommendations(
         self, user_id: int, recent_days: int = 7
     ) -> Dict[str, Any]: